@@ -5,8 +5,15 @@ import pandas_ta_classic as ta
 # import quantstats as qs # Lazy import
 from app.core.strategies_vectorized import VectorizedStrategy
 from app.services.math_service import OptionMath
+from app.services.pricing_grid import get_pricing_grid
+from app.data.technicals import resolve_indicators
 
-import pandas as pd
+# Colunas diárias de cada indicador no histórico do backtest (nomes do pandas_ta)
+INDICATOR_COLUMNS = {
+    'rsi': lambda df: df.ta.rsi(length=14, append=True),
+    'bollinger': lambda df: df.ta.bbands(length=20, std=2, append=True),
+    'sma': lambda df: [df.ta.sma(length=n, append=True) for n in (20, 50, 200)],
+}
 
 class VectorizedBacktester:
     def __init__(self):
@@ -14,10 +21,17 @@ class VectorizedBacktester:
         import quantstats as qs
         self.qs = qs
         
-    async def run_backtest(self, strategy: VectorizedStrategy, ticker: str, days: int = 252, initial_capital: float = 10000.0) -> dict:
+    async def run_backtest(self, strategy: VectorizedStrategy, ticker: str, days: int = 252, initial_capital: float = 10000.0, vol_surface=None, pricing: str = "exact") -> dict:
         """
         Executa Backtest simulando preços de opções via Black-Scholes.
+        
+        vol_surface: VolSurface opcional (app.services.vol_surface). Quando informada, cadeias e
+        marcação a mercado usam o smile por moneyness em vez da vol fixa de 30%.
+        pricing: "exact" (Black-Scholes) ou "grid" (lookup na PricingGrid pré-calculada,
+        erro limitado por grid.error_bound * F descontado; útil em sweeps/Monte Carlo).
         """
+        self.vol_surface = vol_surface
+        self.pricer = get_pricing_grid() if pricing == "grid" else OptionMath
         print(f"DEBUG: Starting backtest for {ticker}")
         # 1. Busca Dados Históricos
         hist_df = await self._fetch_historical_data(ticker, days)
@@ -25,15 +39,18 @@ class VectorizedBacktester:
             return {"error": "Dados históricos insuficientes"}
 
         # 2. Calcula Indicadores Técnicos (Usando Pandas TA)
-        # Calcula RSI, MACD, Bollinger Bands, etc., pois as estratégias podem precisar
+        # Apenas os que a estratégia declara em required_indicators
         try:
-            hist_df.ta.rsi(length=14, append=True)
-            hist_df.ta.bbands(length=20, std=2, append=True)
-            hist_df.ta.sma(length=20, append=True)
-            hist_df.ta.sma(length=200, append=True)
+            for name in resolve_indicators(strategy.required_indicators):
+                calc = INDICATOR_COLUMNS.get(name)
+                if calc:
+                    calc(hist_df)
         except Exception as e:
             print(f"Erro ao calcular indicadores: {e}")
 
+        # Estruturas entre vencimentos (calendário/diagonal) precisam de um segundo vencimento
+        expiries = (30, 60) if getattr(getattr(strategy, 'requirements', None), 'min_expiries', 0) >= 2 else (30,)
+
         trades = []
         active_trades = []
         equity_curve = [initial_capital]
@@ -47,31 +64,24 @@ class VectorizedBacktester:
             row = hist_df.iloc[i]
             
             # --- A. Gestão de Trades Abertos (Saída) ---
+            # Marcação a mercado de todas as pernas abertas numa única chamada vetorizada:
+            # valor por unidade = soma das pernas com sinal (+ comprada, - vendida)
+            values = self._mark_to_market(active_trades, current_date, row['close'])
             remaining_trades = []
-            for trade in active_trades:
-                # Atualiza preço da opção (Simulado via BS)
-                # T: Time to maturity diminui
+            for trade, value in zip(active_trades, values):
+                # Resultado por unidade contra o valor de entrada (débito > 0, crédito < 0)
+                pnl = (value - trade['entry_value']) * trade['quantity']
+                exit_price = value * np.sign(trade['entry_value'])
+                # T: Time to maturity diminui; a estrutura fecha no vencimento da primeira perna
                 new_dte = trade['dte_orig'] - (current_date - trade['entry_date']).days
                 if new_dte <= 0:
-                    # Expiração
-                    exit_price = max(0, row['close'] - trade['strike']) if trade['type'] == 'call' else max(0, trade['strike'] - row['close'])
-                    pnl = (exit_price - trade['entry_price']) * trade['quantity']
-                    if 'SELL' in trade['signal_type']: pnl = -pnl # Short logic simplificada
-                    
+                    # Expiração (pernas vencidas pelo intrínseco, as demais pelo BS)
                     trade.update({'exit_date': current_date, 'exit_price': exit_price, 'pnl': pnl, 'reason': 'Expiração'})
                     trades.append(trade)
                     current_capital += (trade['invested'] + pnl) # Devolve margem + lucro/preju
                 else:
-                    # Recalcula preço teórico (Mark to Market)
-                    t_years = new_dte / 365.0
-                    theo_price = OptionMath.calculate_price(
-                         'c' if 'CALL' in trade['option_type'] else 'p',
-                         row['close'], trade['strike'], t_years, self.risk_free_rate, 0.30 # Vol fixa 30% por enqto
-                    )
-                    
-                    # Stop Loss / Take Profit Simples
-                    pnl_unrealized = (theo_price - trade['entry_price']) / trade['entry_price']
-                    if 'SELL' in trade['signal_type']: pnl_unrealized = -pnl_unrealized
+                    # Stop Loss / Take Profit Simples, sobre o prêmio de entrada
+                    pnl_unrealized = (value - trade['entry_value']) / abs(trade['entry_value'])
                     
                     exit_trade = False
                     if pnl_unrealized < -0.30: # Stop Loss -30%
@@ -82,12 +92,9 @@ class VectorizedBacktester:
                         reason = "Take Profit"
                         
                     if exit_trade:
-                        realized_pnl = (theo_price - trade['entry_price']) * trade['quantity']
-                        if 'SELL' in trade['signal_type']: realized_pnl = (trade['entry_price'] - theo_price) * trade['quantity']
-                        
-                        trade.update({'exit_date': current_date, 'exit_price': theo_price, 'pnl': realized_pnl, 'reason': reason})
+                        trade.update({'exit_date': current_date, 'exit_price': exit_price, 'pnl': pnl, 'reason': reason})
                         trades.append(trade)
-                        current_capital += (trade['invested'] + realized_pnl)
+                        current_capital += (trade['invested'] + pnl)
                     else:
                         remaining_trades.append(trade)
             
@@ -101,7 +108,7 @@ class VectorizedBacktester:
                 "rsi": row.get('RSI_14', 50)
             }
             
-            chain_df = self._generate_daily_chain(ticker, row['close'], current_date)
+            chain_df = self._generate_daily_chain(ticker, row['close'], current_date, expiries)
             
             # Roda Estratégia
             signals_df = strategy.analyze(ticker_data, chain_df)
@@ -109,10 +116,13 @@ class VectorizedBacktester:
             if not signals_df.empty and current_capital > 0:
                 # Pega o melhor sinal (ou todos, filtro simples aqui)
                 best_signal = signals_df.iloc[0]
+                legs = self._legs(best_signal)
+                # Prêmio líquido por unidade (débito > 0, crédito < 0); o módulo é o capital alocado
+                entry_value = sum(leg['quantity'] * leg['price'] for leg in legs)
+                price = abs(entry_value)
                 
                 # Tamanho da Posição (Ex: 10% do capital)
                 position_size = current_capital * 0.10
-                price = best_signal.get('last', best_signal.get('ask', 1.0)) # Preço da opção
                 qty = int(position_size / price) if price > 0 else 0
                 
                 if qty > 0:
@@ -120,13 +130,15 @@ class VectorizedBacktester:
                         "entry_date": current_date,
                         "ticker": ticker,
                         "option_symbol": best_signal['symbol'],
-                        "strike": best_signal['strike'],
+                        "strike": None if pd.isna(best_signal['strike']) else best_signal['strike'],  # estrutura: sem strike único
                         "option_type": best_signal['type'].upper(),
                         "signal_type": best_signal.get('signal_type', 'BUY'),
                         "entry_price": price,
+                        "entry_value": entry_value,
+                        "legs": legs,
                         "quantity": qty,
                         "invested": price * qty,
-                        "dte_orig": int(best_signal['time_to_expiry'] * 365),
+                        "dte_orig": min(leg['dte_orig'] for leg in legs),
                         "strategy": strategy.name
                     }
                     active_trades.append(trade)
@@ -175,23 +187,78 @@ class VectorizedBacktester:
             print(f"Erro download: {e}")
             return pd.DataFrame()
 
-    def _generate_daily_chain(self, ticker, spot_price, date) -> pd.DataFrame:
-        """Gera chain simulado para um dia específico no passado"""
+    def _generate_daily_chain(self, ticker, spot_price, date, expiries=(30,)) -> pd.DataFrame:
+        """
+        Gera chain simulado para um dia específico no passado. Sem dado de
+        liquidez no histórico, todas as opções recebem o mesmo volume nominal
+        (os filtros de liquidez das estratégias passam).
+        """
         strikes = np.arange(round(spot_price*0.8), round(spot_price*1.2), 1.0)
-        # Assume vencimento fixo dali a 30 dias (Simplificação Roll)
-        dte_years = 30 / 365.0
+        # Vencimentos fixos dali a N dias (Simplificação Roll); padrão 30 dias
+        dte = np.repeat(np.asarray(expiries), 2 * len(strikes))
+        dte_years = dte / 365.0
         
-        data = []
-        for k in strikes:
-            # Call
-            c_price = OptionMath.calculate_price('c', spot_price, k, dte_years, 0.1175, 0.30)
-            data.append({'symbol': f"{ticker}C{int(k)}", 'type': 'call', 'strike': k, 'time_to_expiry': dte_years, 'last': c_price, 'ask': c_price})
-            
-            # Put
-            p_price = OptionMath.calculate_price('p', spot_price, k, dte_years, 0.1175, 0.30)
-            data.append({'symbol': f"{ticker}P{int(k)}", 'type': 'put', 'strike': k, 'time_to_expiry': dte_years, 'last': p_price, 'ask': p_price})
-            
-        return pd.DataFrame(data)
+        # Call e Put intercaladas por strike, precificadas numa única chamada vetorizada
+        k = np.tile(np.repeat(strikes, 2), len(expiries))
+        is_call = np.tile([True, False], len(strikes) * len(expiries))
+        prices = self._pricer().price_array(is_call, spot_price, k, dte_years, 0.1175, self._vol(spot_price, k, dte_years))
+        suffix = [f"-{d}" if len(expiries) > 1 else "" for d in dte]
+        
+        return pd.DataFrame({
+            'symbol': [f"{ticker}{'C' if c else 'P'}{int(x)}{s}" for c, x, s in zip(is_call, k, suffix)],
+            'type': np.where(is_call, 'call', 'put'),
+            'strike': k,
+            'time_to_expiry': dte_years,
+            'last': prices,
+            'ask': prices,
+            'volume': 1000.0
+        })
+
+    @staticmethod
+    def _legs(signal) -> list:
+        """
+        Pernas do sinal com quantidade por unidade (+ compra, - venda): as da
+        estrutura ('legs'), ou a própria opção (venda pelo signal_type).
+        """
+        legs = signal.get('legs')
+        if isinstance(legs, list) and legs:
+            return [{'strike': leg['strike'], 'type': leg['type'], 'quantity': leg['quantity'],
+                     'price': leg['price'], 'dte_orig': int(leg['time_to_expiry'] * 365)} for leg in legs]
+        quantity = -1.0 if 'SELL' in str(signal.get('signal_type', 'BUY')) else 1.0
+        return [{'strike': signal['strike'], 'type': signal['type'], 'quantity': quantity,
+                 'price': signal.get('last', signal.get('ask', 1.0)), 'dte_orig': int(signal['time_to_expiry'] * 365)}]
+
+    def _mark_to_market(self, active_trades, current_date, spot_price) -> np.ndarray:
+        """
+        Valor por unidade de cada trade aberto (soma das pernas com sinal): pernas
+        vivas pelo BS, vencidas pelo intrínseco, todas numa única chamada vetorizada.
+        """
+        if not active_trades:
+            return np.empty(0)
+        legs = [(t, leg) for t in active_trades for leg in t['legs']]
+        owner = np.repeat(np.arange(len(active_trades)), [len(t['legs']) for t in active_trades])
+        is_call = np.array([leg['type'] == 'call' for _, leg in legs])
+        strikes = np.array([leg['strike'] for _, leg in legs], dtype=float)
+        quantity = np.array([leg['quantity'] for _, leg in legs], dtype=float)
+        dte = np.array([leg['dte_orig'] - (current_date - t['entry_date']).days for t, leg in legs], dtype=float)
+        t_years = np.where(dte > 0, dte, np.nan) / 365.0
+        theo = self._pricer().price_array(
+            is_call, spot_price, strikes, t_years, self.risk_free_rate, self._vol(spot_price, strikes, t_years)
+        )
+        intrinsic = np.where(is_call, np.maximum(spot_price - strikes, 0.0), np.maximum(strikes - spot_price, 0.0))
+        value = np.where(dte > 0, theo, intrinsic) * quantity
+        return np.bincount(owner, weights=value, minlength=len(active_trades))
+
+    def _pricer(self):
+        """OptionMath ou PricingGrid (mesma assinatura de price_array)."""
+        return getattr(self, 'pricer', OptionMath)
+
+    def _vol(self, spot_price, strike, t_years):
+        """Vol para precificação: superfície (sticky-moneyness) se houver, senão 30% fixo."""
+        surface = getattr(self, 'vol_surface', None)
+        if surface is None:
+            return 0.30
+        return surface.vol(strike, t_years, spot=spot_price)
 
     def _calculate_performance(self, trades, equity_curve, initial_capital):
         if not trades:
@@ -0,0 +1,122 @@
+from dataclasses import dataclass
+from typing import Iterable, Optional, Tuple
+
+import numpy as np
+
+INF = float('inf')
+ANY_BAND = (-INF, INF)
+
+_TYPE_CODES = {None: 0, 'call': 1, 'put': 2}
+_CLOSED = {'both': (False, False), 'left': (False, True), 'right': (True, False), 'neither': (True, True)}
+
+
+@dataclass(frozen=True)
+class LegFilter:
+    """
+    Condições declarativas de uma perna, avaliadas sobre as features do ChainContext.
+
+    Faixas são (mín, máx); limites infinitos não restringem. `closed` vale para
+    a faixa de moneyness ('both', 'left', 'right', 'neither'), já que algumas
+    estratégias usam desigualdade estrita (ex.: strike > 110% do spot).
+    """
+    option_type: Optional[str] = None                  # 'call', 'put' ou None (ambos)
+    moneyness: Tuple[float, float] = ANY_BAND          # strike / spot
+    closed: str = 'both'
+    delta: Tuple[float, float] = ANY_BAND              # |delta|
+    dte: Tuple[float, float] = ANY_BAND                # dias corridos até o vencimento
+    min_volume: Optional[float] = None                 # piso de liquidez
+    max_spread_pct: Optional[float] = None             # (ask - bid) / ask
+    min_iv_quantile: Optional[float] = None            # IV >= quantil q da cadeia (se houver IV)
+
+
+class FilterProgram:
+    """
+    Compila um conjunto de LegFilters em arrays de limites (um por spec) e os
+    avalia juntos, por broadcast (specs x opções), gerando a matriz booleana de
+    todas as estratégias. Moneyness vira intervalo de posições na ordem por
+    strike (searchsorted) e as demais features só são comparadas nas specs que
+    as restringem. Incluir uma estratégia a mais custa uma linha na matriz, não
+    uma passada pela cadeia.
+    """
+
+    def __init__(self, specs: Iterable[LegFilter]):
+        self.specs = list(dict.fromkeys(specs))   # sem duplicatas, ordem preservada
+        self.index = {spec: i for i, spec in enumerate(self.specs)}
+
+        def column(values, dtype=float):
+            return np.array(values, dtype=dtype)[:, None]
+
+        unknown = [s.option_type for s in self.specs if s.option_type not in _TYPE_CODES]
+        if unknown:
+            raise ValueError(f"Unknown option_type in filter spec: {unknown}")
+        bad_closed = [s.closed for s in self.specs if s.closed not in _CLOSED]
+        if bad_closed:
+            raise ValueError(f"Unknown 'closed' in filter spec: {bad_closed}")
+
+        self.type_code = column([_TYPE_CODES[s.option_type] for s in self.specs], np.int8)
+        self.m_lo = column([s.moneyness[0] for s in self.specs])
+        self.m_hi = column([s.moneyness[1] for s in self.specs])
+        self.m_lo_strict = column([_CLOSED[s.closed][0] for s in self.specs], bool)
+        self.m_hi_strict = column([_CLOSED[s.closed][1] for s in self.specs], bool)
+        self.d_lo = column([s.delta[0] for s in self.specs])
+        self.d_hi = column([s.delta[1] for s in self.specs])
+        self.t_lo = column([s.dte[0] for s in self.specs])
+        self.t_hi = column([s.dte[1] for s in self.specs])
+        self.min_volume = column([-INF if s.min_volume is None else s.min_volume for s in self.specs])
+        self.max_spread = column([INF if s.max_spread_pct is None else s.max_spread_pct for s in self.specs])
+        self.iv_q = [s.min_iv_quantile for s in self.specs]
+
+    def __len__(self) -> int:
+        return len(self.specs)
+
+    @staticmethod
+    def _band(mask, values, lo, hi):
+        """Aplica lo <= values <= hi só às specs que restringem esta feature."""
+        rows = np.flatnonzero((~(np.isneginf(lo) & np.isposinf(hi))).any(axis=1))
+        if rows.size:
+            mask[rows] &= (values >= lo[rows]) & (values <= hi[rows])
+
+    def _moneyness_ranges(self, ctx):
+        """
+        Faixas de moneyness viram intervalos de posição na ordem por moneyness
+        (searchsorted por spec), então a comparação na matriz é só de inteiros.
+        """
+        order = ctx.moneyness_order
+        sorted_m = ctx.moneyness[order]
+        lo, hi = self.m_lo[:, 0], self.m_hi[:, 0]
+        lo_strict, hi_strict = self.m_lo_strict[:, 0], self.m_hi_strict[:, 0]
+        start = np.where(lo_strict, np.searchsorted(sorted_m, lo, side='right'), np.searchsorted(sorted_m, lo, side='left'))
+        end = np.where(hi_strict, np.searchsorted(sorted_m, hi, side='left'), np.searchsorted(sorted_m, hi, side='right'))
+        # Sem restrição de moneyness: todas as opções (inclusive strike ausente)
+        free = np.isneginf(lo) & np.isposinf(hi)
+        start = np.where(free, 0, start)
+        end = np.where(free, ctx.n, end)
+        rank = np.empty(ctx.n, dtype=np.int32)
+        rank[order] = np.arange(ctx.n, dtype=np.int32)
+        return rank, start[:, None], end[:, None]
+
+    def evaluate(self, ctx) -> np.ndarray:
+        """Matriz booleana (len(specs), ctx.n): linha i = opções que satisfazem specs[i]."""
+        if not self.specs:
+            return np.zeros((0, ctx.n), dtype=bool)
+        # Tipo: uma linha da tabela (ambos, call, put) por spec
+        type_table = np.vstack([np.ones(ctx.n, dtype=bool), ctx.is_call, ctx.is_put])
+        mask = type_table[self.type_code[:, 0]]
+
+        rank, start, end = self._moneyness_ranges(ctx)
+        mask &= (rank >= start) & (rank < end)
+
+        self._band(mask, np.abs(ctx.delta), self.d_lo, self.d_hi)
+        self._band(mask, ctx.time_to_expiry * 365.0, self.t_lo, self.t_hi)
+        self._band(mask, ctx.volume, self.min_volume, np.full_like(self.min_volume, INF))
+        self._band(mask, ctx.spread_pct, np.full_like(self.max_spread, -INF), self.max_spread)
+
+        # IV relativa à cadeia: só restringe quando o enriquecimento trouxe IV (no
+        # universo o piso é o quantil do ativo de cada linha; ativo sem IV não restringe)
+        if ctx.has_iv and any(q is not None for q in self.iv_q):
+            floors = [np.atleast_1d(-INF if q is None else ctx.iv_quantile(q)) for q in self.iv_q]
+            width = max(len(f) for f in floors)
+            floors = np.vstack([np.broadcast_to(f, (width,)) for f in floors])
+            floors = np.where(np.isnan(floors), -INF, floors)
+            self._band(mask, ctx.iv, floors, np.full_like(floors, INF))
+        return mask
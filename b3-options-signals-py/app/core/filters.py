@@ -1,121 +1,116 @@
 from app.core.risk_classifier import get_risk_info, STRATEGY_RISK_MAP
-import math
+from app.core.signal_batch import category_mask
+import numpy as np
+
+
+def _field(source: dict, key: str, default=np.nan):
+    """Campo de um sinal/perna para as versões em lote: ausente -> default, None -> NaN."""
+    if source is None or key not in source:
+        return default
+    value = source[key]
+    return np.nan if value is None else value
+
 
 class ScoreCalculator:
     """
     Calcula o Score de Confiança (0-100) para um sinal de opção.
     Baseado em múltiplos critérios: Técnico, Liquidez, Volatilidade e Gregas.
     """
+    # Indicadores lidos de signal['technicals'] (ver VectorizedStrategy.required_indicators)
+    required_indicators = ('rsi',)
     
     @staticmethod
     def calculate_score(signal: dict, chain_row: dict = None) -> int:
-        score = 50 # Base score (Neutro)
-        
-        # 1. Alinhamento Técnico (Max 30 pts)
-        # -----------------------------------
+        """Score de um sinal: calculate_scores num lote de tamanho 1 (mesmas regras)."""
         technicals = signal.get('technicals', {})
-        rsi = technicals.get('rsi', 50)
-        strategy_type = signal.get('signal_type', '')
-        
-        # Lógica para estratégias de Reversão
-        if 'RSI' in signal.get('strategy', ''):
-            if 'BUY CALL' in strategy_type and rsi < 30: score += 20
-            elif 'BUY PUT' in strategy_type and rsi > 70: score += 20
-            elif 'BUY CALL' in strategy_type and rsi < 40: score += 10
-            elif 'BUY PUT' in strategy_type and rsi > 60: score += 10
-        
-        # Lógica para estratégias Direcionais (Trend Following)
-        elif 'BUY CALL' in strategy_type: # Ex: Long Call
-             if rsi > 50 and rsi < 70: score += 10
-        elif 'BUY PUT' in strategy_type: # Ex: Long Put
-             if rsi < 50 and rsi > 30: score += 10
+        return int(ScoreCalculator.calculate_scores(
+            [signal.get('strategy', '')], [signal.get('signal_type', '')], [signal.get('risk_level', 'MEDIUM')],
+            [_field(technicals, 'rsi', 50)], [_field(technicals, 'iv', 0)],
+            [_field(chain_row, 'volume', 0)], [_field(chain_row, 'bid', 0)], [_field(chain_row, 'ask', 0)],
+            [_field(chain_row, 'pop')], [_field(chain_row, 'expected_value')], [_field(chain_row, 'delta', 0.5)],
+            [_field(technicals, 'intraday_rsi')])[0])
 
-        # 2. Liquidez e Spread (Max 20 pts)
-        # ---------------------------------
-        # Se temos dados da cadeia (chain_row)
-        if chain_row is not None:
-             volume = chain_row.get('volume', 0)
-             # Open Interest se disponível (assumindo que volume seja proxy se não tiver OI)
-             
-             if volume > 1000: score += 10
-             elif volume > 100: score += 5
-             
-             # Spread Bid-Ask
-             bid = chain_row.get('bid', 0)
-             ask = chain_row.get('ask', 0)
-             if ask > 0:
-                 spread_pct = (ask - bid) / ask
-                 if spread_pct < 0.05: score += 10 # Spread estreito (<5%)
-                 elif spread_pct < 0.10: score += 5 # Spread ok (<10%)
-                 elif spread_pct > 0.30: score -= 10 # Spread muito largo (Penalidade)
-        
-        # 3. Probabilidade (Delta) (Max 20 pts)
-        # ------------------------------------
-        # Se for venda de opção (Tetha Gang), queremos Delta baixo (OTM)
-        if 'SELL' in strategy_type or 'SHORT' in strategy_type:
-             delta = abs(chain_row.get('delta', 0.5)) if chain_row is not None else 0.5
-             if delta < 0.30: score += 10 # Alta prob de expirar OTM
-             if delta < 0.15: score += 10 # Muito alta prob (mas pouco prêmio)
-        
-        # 4. Volatilidade (Max 10 pts)
-        # ---------------------------
-        iv = technicals.get('iv', 0)
-        # Se estratégia se beneficia de Vega alto (Venda)
-        if 'SELL' in strategy_type and iv > 0.50: score += 10
-        # Se estratégia se beneficia de Vega baixo (Compra)
-        if 'BUY' in strategy_type and iv < 0.30: score += 10
+    @staticmethod
+    def calculate_scores(strategy, signal_type, risk_level, rsi, iv, volume, bid, ask,
+                         pop, expected_value, delta, intraday_rsi=np.nan) -> np.ndarray:
+        """
+        Score de um lote de sinais em colunas alinhadas; é a única implementação
+        das regras (calculate_score chama esta com um sinal). Rótulos podem vir
+        como pd.Categorical: os testes de texto rodam uma vez por categoria, não
+        por sinal. intraday_rsi (RSI de 5m, NaN sem barras suficientes) é
+        difundido por sinal como o rsi. Campos ausentes são NaN (não pontuam).
+        """
+        rsi, iv, volume, bid, ask, pop, ev, delta = (
+            np.asarray(a, dtype=float) for a in (rsi, iv, volume, bid, ask, pop, expected_value, delta))
+        intraday_rsi = np.broadcast_to(np.asarray(intraday_rsi, dtype=float), rsi.shape)
+        buy_call = category_mask(signal_type, lambda s: 'BUY CALL' in s)
+        buy_put = category_mask(signal_type, lambda s: 'BUY PUT' in s)
+        sell = category_mask(signal_type, lambda s: 'SELL' in s)
+        short = sell | category_mask(signal_type, lambda s: 'SHORT' in s)
+        buy = category_mask(signal_type, lambda s: 'BUY' in s)
 
-        # 5. Penalidades de Risco (Risk Level)
-        # -----------------------------------
-        risk_level = signal.get('risk_level', 'MEDIUM')
-        if risk_level == 'UNLIMITED': score -= 15
-        if risk_level == 'HIGH': score -= 5
-        if risk_level == 'LOW': score += 5
-        
-        # Cap Score 0-100
-        return max(0, min(100, score))
+        # 1. Alinhamento Técnico
+        reversal = np.select([buy_call & (rsi < 30), buy_put & (rsi > 70), buy_call & (rsi < 40), buy_put & (rsi > 60)],
+                             [20, 20, 10, 10], 0)
+        reversal += ((buy_call & (intraday_rsi < 30)) | (buy_put & (intraday_rsi > 70))) * 5
+        trend = np.select([buy_call, buy_put], [((rsi > 50) & (rsi < 70)) * 10, ((rsi < 50) & (rsi > 30)) * 10], 0)
+        score = 50 + np.where(category_mask(strategy, lambda s: 'RSI' in s), reversal, trend)
+
+        # 2. Liquidez e Spread
+        score += np.select([volume > 1000, volume > 100], [10, 5], 0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            spread_pct = (ask - bid) / ask
+        score += np.where(ask > 0, np.select([spread_pct < 0.05, spread_pct < 0.10, spread_pct > 0.30], [10, 5, -10], 0), 0)
+
+        # 3. Probabilidade (PoP/EV; sem PoP, Delta como proxy na venda)
+        by_pop = short * ((pop > 0.70) * 10 + (pop > 0.85) * 10) \
+            + np.where(np.isfinite(ev), np.select([ev > 0.01, ev < -0.01], [5, -5], 0), 0)
+        by_delta = short * ((np.abs(delta) < 0.30) * 10 + (np.abs(delta) < 0.15) * 10)
+        score += np.where(np.isfinite(pop), by_pop, by_delta)
+
+        # 4. Volatilidade
+        score += (sell & (iv > 0.50)) * 10 + (buy & (iv < 0.30)) * 10
+
+        # 5. Penalidades de Risco
+        for level, points in (('UNLIMITED', -15), ('HIGH', -5), ('LOW', 5)):
+            score += category_mask(risk_level, lambda s, level=level: s == level) * points
+        return np.clip(score, 0, 100).astype(int)
 
 class RiskManager:
     """
     Identifica bandeiras de risco (Risk Flags) para um sinal
     """
+    UNLIMITED = "🚨 Risco Ilimitado"
+    LOW_LIQUIDITY = "⚠️ Baixa Liquidez"
+    WIDE_SPREAD = "↔️ Spread Largo"
+    EXPIRING = "⏰ Expira em Breve (Gamma Risk)"
     
     @staticmethod
     def get_risk_flags(signal: dict, chain_row: dict = None) -> list:
-        flags = []
-        
-        # 1. Risco Ilimitado
-        risk_level = signal.get('risk_level', 'MEDIUM')
-        if risk_level == 'UNLIMITED':
-            flags.append("🚨 Risco Ilimitado")
-            
-        # 2. Risco de Liquidez
-        if chain_row is not None:
-            volume = chain_row.get('volume', 0)
-            trades = chain_row.get('trades', 0) # Se disponível
-            if volume < 50:
-                 flags.append("⚠️ Baixa Liquidez")
-            
-            # 3. Risco de Spread
-            bid = chain_row.get('bid', 0)
-            ask = chain_row.get('ask', 0)
-            if ask > 0:
-                 spread_pct = (ask - bid) / ask
-                 if spread_pct > 0.20:
-                     flags.append("↔️ Spread Largo")
+        """Flags de um sinal: get_risk_flag_lists num lote de tamanho 1 (mesmas regras)."""
+        # Sem chain_row não há dados de liquidez: volume NaN não gera flag
+        return RiskManager.get_risk_flag_lists(
+            [signal.get('risk_level', 'MEDIUM')], [_field(chain_row, 'volume', 0 if chain_row is not None else np.nan)],
+            [_field(chain_row, 'bid', 0)], [_field(chain_row, 'ask', 0)], [_field(chain_row, 'time_to_expiry', 100)])[0]
 
-        # 4. Risco de Expiração (Gamma Risk)
-        # Assumindo dados normalizados com 'time_to_expiry' em anos
-        dte_years = chain_row.get('time_to_expiry', 100) if chain_row is not None else 100
-        dte_days = dte_years * 365
-        
-        if dte_days < 3:
-             flags.append("⏰ Expira em Breve (Gamma Risk)")
-        
-        # 5. Risco de Earnings (Simulado, idealmente viria de um calendário)
-        # flags.append("📅 Balanço Próximo") # Placeholder
-        
-        return flags
+    @staticmethod
+    def get_risk_flag_lists(risk_level, volume, bid, ask, time_to_expiry) -> list:
+        """
+        Flags de um lote de sinais (única implementação das regras; get_risk_flags
+        chama esta com um sinal): as condições são avaliadas em colunas; só a
+        lista de cada sinal (saída da API) é montada por linha.
+        """
+        volume, bid, ask, dte_years = (np.asarray(a, dtype=float) for a in (volume, bid, ask, time_to_expiry))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            spread_pct = (ask - bid) / ask
+        codes = (category_mask(risk_level, lambda s: s == 'UNLIMITED') * 1
+                 + (volume < 50) * 2
+                 + ((ask > 0) & (spread_pct > 0.20)) * 4
+                 + (dte_years * 365 < 3) * 8)
+        # Uma lista por combinação de flags (16), copiada para cada sinal
+        names = (RiskManager.UNLIMITED, RiskManager.LOW_LIQUIDITY, RiskManager.WIDE_SPREAD, RiskManager.EXPIRING)
+        combos = [[name for bit, name in enumerate(names) if code >> bit & 1] for code in range(16)]
+        return [list(combos[code]) for code in codes.tolist()]
 
 def apply_filters(signals: list, min_score: int = 0) -> list:
     """
@@ -0,0 +1,77 @@
+from collections import Counter
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+import numpy as np
+
+
+@dataclass(frozen=True)
+class Preconditions:
+    """
+    Condições baratas, no nível do ativo, sem as quais a estratégia não pode
+    disparar. São necessárias (nunca suficientes): um ativo reprovado não
+    geraria sinal mesmo que a estratégia rodasse, então pular não muda a saída.
+    """
+    types: Tuple[str, ...] = ()                      # tipos de opção que precisam existir
+    min_expiries: int = 0                            # vencimentos distintos na cadeia
+    min_options: int = 1                             # tamanho mínimo da cadeia
+    indicator: Optional[str] = None                  # indicador que precisa cair numa das faixas
+    ranges: Tuple[Tuple[float, float], ...] = ()     # intervalos abertos (lo, hi)
+
+
+class RoutingTable:
+    """
+    Estratégias x ativos elegíveis de um ciclo, a partir do perfil de cada ativo
+    no ChainContext (contagens por tipo, vencimentos e indicadores), tudo por
+    bincount sobre os códigos de ativo: nada da cadeia é filtrado aqui.
+    """
+
+    def __init__(self, strategies: list, ctx, ticker_data: Optional[dict] = None):
+        ticker_data = ticker_data or {}
+        self.ctx = ctx
+        self.strategies = list(strategies)
+        n_groups = len(ctx.groups)
+        codes = ctx.group_codes
+        options = np.bincount(codes, minlength=n_groups)
+        by_type = {
+            'call': np.bincount(codes, weights=ctx.is_call, minlength=n_groups),
+            'put': np.bincount(codes, weights=ctx.is_put, minlength=n_groups),
+        }
+        expiries = np.zeros(n_groups, dtype=int)
+        code_of = {group: code for code, group in enumerate(ctx.groups)}
+        for key in ctx.expiry_groups:
+            expiries[code_of[key[0]] if ctx.is_universe else 0] += 1
+
+        self.eligible = np.ones((len(self.strategies), n_groups), dtype=bool)
+        indicators = {}
+        for i, strategy in enumerate(self.strategies):
+            rule = strategy.requirements
+            ok = (options >= rule.min_options) & (expiries >= rule.min_expiries)
+            for option_type in rule.types:
+                ok &= by_type[option_type] > 0
+            if rule.indicator is not None:
+                if rule.indicator not in indicators:
+                    default = ticker_data.get(rule.indicator, np.nan)
+                    values = ctx.group_value(rule.indicator, default) if ctx.is_universe else [default]
+                    indicators[rule.indicator] = np.array(values, dtype=float)
+                value = indicators[rule.indicator]
+                ok &= np.logical_or.reduce([(value > lo) & (value < hi) for lo, hi in rule.ranges]
+                                           + [np.zeros(n_groups, dtype=bool)])
+            self.eligible[i] = ok
+
+    def rows(self, i: int) -> np.ndarray:
+        """Máscara das opções dos ativos elegíveis para a estratégia i."""
+        return self.eligible[i][self.ctx.group_codes]
+
+    def record(self, stats: dict) -> None:
+        """Acumula (estratégia, ativo) avaliados e pulados em stats (ver new_stats)."""
+        for strategy, ok in zip(self.strategies, self.eligible):
+            skipped = int((~ok).sum())
+            stats['evaluated'] += int(ok.sum())
+            stats['skipped'] += skipped
+            if skipped:
+                stats['skipped_by_strategy'][strategy.name] += skipped
+
+    @staticmethod
+    def new_stats() -> dict:
+        return {'evaluated': 0, 'skipped': 0, 'skipped_by_strategy': Counter()}
@@ -0,0 +1,185 @@
+from dataclasses import dataclass
+from typing import Callable, Dict, List
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+from app.core.structure_search import StructureSet, leg_records, structure_quotes
+
+# Rótulos de sinal que as estratégias devolvem (VectorizedStrategy.labels)
+LABELS = ('strategy', 'signal_type', 'reason', 'recommended_action', 'risk_level')
+
+
+def _categorical(value, n: int) -> pd.Categorical:
+    """Rótulo escalar (uma categoria, códigos zerados) ou um valor por linha; None = ausente."""
+    if value is None or np.ndim(value) == 0:
+        codes = np.full(n, 0 if value is not None else -1, dtype=np.int8)
+        uniques = [value] if value is not None else []
+    else:
+        codes, uniques = pd.factorize(np.asarray(value, dtype=object))
+    # Categorias sempre object: lotes de estratégias diferentes se unem sem conversão
+    return pd.Categorical.from_codes(codes, categories=pd.Index(uniques, dtype=object))
+
+
+def category_mask(values, predicate: Callable) -> np.ndarray:
+    """predicate avaliado uma vez por categoria e difundido pelos códigos (ausente -> False)."""
+    if isinstance(values, pd.Categorical):
+        codes, categories = values.codes, values.categories
+    else:
+        # factorize: mesmos códigos sem o custo de montar um Categorical (lotes de 1 sinal)
+        codes, categories = pd.factorize(np.asarray(values, dtype=object))
+    hit = np.array([bool(predicate(c)) for c in categories] + [False], dtype=bool)
+    return hit[codes]
+
+
+def _is_short(signal_type) -> bool:
+    return str(signal_type).upper().startswith(('SELL', 'SHORT'))
+
+
+@dataclass
+class SignalBatch:
+    """
+    Sinais de um scan em colunas, sem copiar a cadeia: uma linha por sinal.
+
+    legs traz as posições das pernas em ctx.df (n x pernas, -1 completa até a
+    maior estrutura do lote) e quantity a quantidade com sinal de cada perna;
+    sinais simples têm uma perna (+1 compra, -1 venda pelo signal_type). Os
+    rótulos são pd.Categorical: o texto de cada estratégia fica uma vez nas
+    categorias e por linha só há códigos. kind é o tipo da estrutura (ausente
+    nos sinais simples) e premium o prêmio líquido pelo mid (NaN nos simples).
+
+    O scanner junta os lotes de todas as estratégias (concat), calcula métricas,
+    score e flags sobre as colunas e só monta os dicts do sinal na saída.
+    """
+    legs: np.ndarray
+    quantity: np.ndarray
+    premium: np.ndarray
+    kind: pd.Categorical
+    labels: Dict[str, pd.Categorical]
+
+    def __len__(self) -> int:
+        return len(self.legs)
+
+    @classmethod
+    def empty(cls) -> 'SignalBatch':
+        return cls.from_positions(np.empty(0, dtype=np.intp))
+
+    @classmethod
+    def from_positions(cls, positions: np.ndarray, **labels) -> 'SignalBatch':
+        """Sinais de uma perna (posições de VectorizedStrategy.select)."""
+        positions = np.asarray(positions, dtype=np.intp)
+        n = len(positions)
+        labels = {key: _categorical(value, n) for key, value in labels.items()}
+        short = category_mask(labels['signal_type'], _is_short) if 'signal_type' in labels else np.zeros(n, bool)
+        return cls(positions[:, None], np.where(short, -1.0, 1.0)[:, None], np.full(n, np.nan),
+                   _categorical(None, n), labels)
+
+    @classmethod
+    def from_structures(cls, structures: StructureSet, **labels) -> 'SignalBatch':
+        """Uma linha por estrutura encontrada (StructureSpec.search)."""
+        n = len(structures)
+        legs = structures.positions.astype(np.intp)
+        return cls(legs, np.broadcast_to(structures.quantity, legs.shape).astype(float),
+                   np.asarray(structures.premium, dtype=float), _categorical(structures.kind, n),
+                   {key: _categorical(value, n) for key, value in labels.items()})
+
+    @classmethod
+    def concat(cls, batches: List['SignalBatch']) -> 'SignalBatch':
+        """Lotes em sequência; pernas completadas com -1 e categorias unidas (códigos recodificados)."""
+        batches = [b for b in batches if len(b)]
+        if not batches:
+            return cls.empty()
+        width = max(b.legs.shape[1] for b in batches)
+
+        def pad(a, fill):
+            return np.pad(a, ((0, 0), (0, width - a.shape[1])), constant_values=fill)
+
+        def union(parts):
+            return union_categoricals(parts) if parts else _categorical(None, 0)
+
+        names = [key for key in LABELS if any(key in b.labels for b in batches)]
+        names += [key for b in batches for key in b.labels if key not in names]
+        return cls(
+            np.concatenate([pad(b.legs, -1) for b in batches]),
+            np.concatenate([pad(b.quantity, 0.0) for b in batches]),
+            np.concatenate([b.premium for b in batches]),
+            union([b.kind for b in batches]),
+            {key: union([b.labels.get(key, _categorical(None, len(b))) for b in batches]) for key in dict.fromkeys(names)},
+        )
+
+    @property
+    def is_structure(self) -> np.ndarray:
+        return self.kind.codes >= 0
+
+    def label(self, key: str, default=None) -> np.ndarray:
+        """Rótulo decodificado (array de objetos); ausente -> default."""
+        values = self.labels.get(key)
+        if values is None:
+            return np.full(len(self), default, dtype=object)
+        return np.asarray(list(values.categories) + [default], dtype=object)[values.codes]
+
+    def quotes(self, ctx) -> dict:
+        """
+        Colunas numéricas por sinal: a própria opção nos sinais simples, o resumo
+        das pernas (structure_quotes) nas estruturas, com strike NaN.
+        """
+        first = self.legs[:, 0]
+        columns = {
+            'strike': ctx.strike[first], 'time_to_expiry': ctx.time_to_expiry[first],
+            'bid': ctx.bid[first], 'ask': ctx.ask[first], 'mid': ctx.mid[first],
+            'volume': ctx.volume[first], 'delta': ctx.delta[first], 'iv': ctx.iv[first],
+        }
+        structure = self.is_structure
+        if structure.any():
+            summary = structure_quotes(ctx, self.legs[structure], self.quantity[structure], self.premium[structure])
+            for key, values in summary.items():
+                columns[key][structure] = values
+            columns['strike'][structure] = np.nan
+        return columns
+
+    def leg_columns(self, ctx) -> dict:
+        """Pernas (n x pernas) para os cálculos em lote; perna ausente zerada (quantidade 0)."""
+        real = self.legs >= 0
+        pos = np.where(real, self.legs, 0)
+        return {
+            'is_call': real & ctx.is_call[pos],
+            'strike': np.where(real, ctx.strike[pos], 0.0),
+            'quantity': np.where(real, self.quantity, 0.0),
+            'price': np.where(real, ctx.mid[pos], 0.0),
+            'iv': np.where(real, ctx.iv[pos], 0.0),
+            'time_to_expiry': np.where(real, ctx.time_to_expiry[pos], 0.0),
+        }
+
+    def symbols(self, ctx) -> list:
+        """Código de cada sinal: a opção, ou as pernas unidas por '/' nas estruturas."""
+        if 'symbol' not in ctx.df.columns:
+            return ['ESTRUTURA'] * len(self)
+        symbols = ctx.df['symbol'].to_numpy()
+        return ['/'.join(symbols[row[row >= 0]]) if structure else symbols[row[0]]
+                for row, structure in zip(self.legs, self.is_structure)]
+
+    def leg_records(self, ctx) -> list:
+        """Pernas de cada sinal como dicts (formato 'legs' da API); montadas só na saída."""
+        structure = self.is_structure
+        records = [None] * len(self)
+        for i, legs in zip(np.flatnonzero(structure), leg_records(ctx, self.legs[structure], self.quantity[structure])):
+            records[i] = legs
+        single = np.flatnonzero(~structure)
+        if not len(single):
+            return records
+        p = self.legs[single, 0]
+        df = ctx.df
+        symbols = df['symbol'].to_numpy()[p].tolist() if 'symbol' in df.columns else [None] * len(p)
+        types = df['type'].to_numpy()[p].tolist() if 'type' in df.columns else [None] * len(p)
+        actions = [str(s).split(' ')[0] for s in self.label('signal_type', '')[single]]
+        columns = zip(symbols, ctx.strike[p].tolist(), types, actions, ctx.bid[p].tolist(), ctx.ask[p].tolist(),
+                      ctx.volume[p].tolist(), ctx.delta[p].tolist(), ctx.iv[p].tolist(), ctx.mid[p].tolist(),
+                      ctx.time_to_expiry[p].tolist())
+        for i, (symbol, strike, option_type, action, bid, ask, volume, delta, iv, mid, tte) in zip(single, columns):
+            records[i] = [{
+                "symbol": symbol, "strike": strike, "type": option_type, "action": action,
+                "bid": bid, "ask": ask, "volume": volume, "delta": delta, "iv": iv,
+                "price": mid, "time_to_expiry": tte,
+            }]
+        return records
@@ -1,7 +1,13 @@
 from abc import ABC, abstractmethod
+import numpy as np
+from app.core.strike_index import StrikeIndex
 from app.services.math_service import OptionMath
 
 class BaseStrategy(ABC):
+    # Indicators read from ticker_data; LegacyStrategyAdapter supplies them so
+    # analyze() never has to fetch market data itself
+    required_indicators: tuple = ()
+
     @property
     @abstractmethod
     def name(self):
@@ -24,6 +30,35 @@ class BaseStrategy(ABC):
         """
         pass
 
+    def analyze_context(self, ticker_data: dict, ctx, option_chain: list) -> list:
+        """
+        Columnar entry point used by LegacyStrategyAdapter: ctx is the ChainContext
+        of the normalized, enriched chain and option_chain its records (same
+        positions). Strategies that do per-option math override this to read the
+        precomputed columns instead.
+        """
+        return self.analyze(ticker_data, option_chain)
+
+    @staticmethod
+    def strike_index(ticker_data: dict, option_chain: list) -> StrikeIndex:
+        """
+        Sorted strikes of the chain. Reuses ticker_data['strike_index'] when the
+        caller built it once while normalizing the chain; otherwise builds it here.
+        """
+        index = ticker_data.get('strike_index')
+        if index is None or index.n != len(option_chain):
+            index = StrikeIndex.from_records(option_chain, ticker_data.get('price'))
+        return index
+
+    @staticmethod
+    def _atm_window(strikes, spot: float) -> np.ndarray:
+        """Positions (in the sorted strikes) with 0.98 <= strike / spot <= 1.02."""
+        lo = max(np.searchsorted(strikes, spot * 0.98, side='left') - 1, 0)
+        hi = np.searchsorted(strikes, spot * 1.02, side='right') + 1
+        window = np.arange(lo, min(hi, len(strikes)))
+        moneyness = strikes[window] / spot
+        return window[(moneyness >= 0.98) & (moneyness <= 1.02)]
+
 class HighIVStrategy(BaseStrategy):
     """
     Look for Deep OTM options with High Implied Volatility (Potential Reversal/Premium Sale).
@@ -73,45 +108,65 @@ class DeltaHedgeStrategy(BaseStrategy):
     description = "Identifica opções ATM (No Dinheiro) com Delta próximo a 0.50, ideais para operações direcionais com boa alavancagem."
     risk_level = "Médio"
 
+    # Theoretical inputs of the list-of-dicts path (the adapter path uses the chain's own IV)
+    risk_free = 0.1175
+    sigma = 0.30
+
     def analyze(self, ticker_data: dict, option_chain: list) -> list:
+        spot_price = ticker_data.get('price', 0)
+        if not option_chain:
+            return []
+        # Theoretical calculation, one vectorized call for the whole chain
+        flag = np.array([option['type'][0] == 'c' for option in option_chain])
+        strike = np.array([option['strike'] for option in option_chain], dtype=float)
+        t = np.array([option['time_to_expiry_years'] for option in option_chain], dtype=float)
+        greeks = OptionMath.greeks_array(flag, spot_price, strike, t, self.risk_free, self.sigma)
+        price = OptionMath.price_array(flag, spot_price, strike, t, self.risk_free, self.sigma)
+        return self._signals(ticker_data, option_chain, greeks, price)
+
+    def analyze_context(self, ticker_data: dict, ctx, option_chain: list) -> list:
+        # Greeks already computed by the chain enricher (market IV); entry at the mid
+        names = ("delta", "gamma", "theta", "vega", "rho")
+        if not all(name in ctx.df.columns for name in names):
+            return self.analyze(ticker_data, option_chain)
+        greeks = {name: ctx.df[name].to_numpy(dtype=float) for name in names}
+        return self._signals(ticker_data, option_chain, greeks, ctx.mid)
+
+    def _signals(self, ticker_data: dict, option_chain: list, greeks: dict, price: np.ndarray) -> list:
         signals = []
         spot_price = ticker_data.get('price', 0)
-        
-        for option in option_chain:
-            # Theoretical calculation
-            greeks = OptionMath.calculate_greeks(
-                flag=option['type'][0], # 'c' or 'p'
-                S=spot_price,
-                K=option['strike'],
-                t=option['time_to_expiry_years'],
-                r=0.1175, # Fixed Risk Free for now
-                sigma=0.30 # Fixed IV for now (should be calculated)
-            )
-            
-            if greeks and 0.45 <= abs(greeks['delta']) <= 0.55:
-                 signals.append({
-                    "strategy": self.name,
-                    "ticker": ticker_data['ticker'],
-                    "option_symbol": option['symbol'],
-                    "strike": option['strike'],
-                    "spot_price": spot_price,
-                    "type": option['type'].upper(), # Fix: Make sure type is sent
-                    "greeks": greeks,
-                    "entry_price": OptionMath.calculate_price(option['type'][0], spot_price, option['strike'], option['time_to_expiry_years'], 0.1175, 0.30),
-                    "reason": f"Delta Neutro/ATM (Delta: {greeks['delta']:.2f})",
-                    # New Educational Fields
-                    "setup_quality": "Medium",
-                    "recommended_action": "Compra a Seco (Swing Trade) ou Trava de Alta",
-                    "explanation": (
-                        f"Opção ATM com Delta de {greeks['delta']:.2f}. "
-                        "Ideal para capturar movimentos diretivos do ativo com boa relação custo/benefício. "
-                        "O Gamma alto nessa região acelera os ganhos se o papel explodir."
-                    )
-                })
+        valid = np.logical_and.reduce([np.isfinite(v) for v in greeks.values()])
+        with np.errstate(invalid='ignore'):
+            hits = np.flatnonzero(valid & (np.abs(greeks['delta']) >= 0.45) & (np.abs(greeks['delta']) <= 0.55))
+
+        for i in hits:
+            option = option_chain[i]
+            option_greeks = {name: float(values[i]) for name, values in greeks.items()}
+            signals.append({
+                "strategy": self.name,
+                "ticker": ticker_data['ticker'],
+                "option_symbol": option['symbol'],
+                "strike": option['strike'],
+                "spot_price": spot_price,
+                "type": option['type'].upper(), # Fix: Make sure type is sent
+                "greeks": option_greeks,
+                "entry_price": float(price[i]),
+                "reason": f"Delta Neutro/ATM (Delta: {option_greeks['delta']:.2f})",
+                # New Educational Fields
+                "setup_quality": "Medium",
+                "recommended_action": "Compra a Seco (Swing Trade) ou Trava de Alta",
+                "explanation": (
+                    f"Opção ATM com Delta de {option_greeks['delta']:.2f}. "
+                    "Ideal para capturar movimentos diretivos do ativo com boa relação custo/benefício. "
+                    "O Gamma alto nessa região acelera os ganhos se o papel explodir."
+                )
+            })
         
         return signals
 
 class RSIStrategy(BaseStrategy):
+    required_indicators = ('rsi',)
+
     @property
     def name(self):
         return "Reversão por IFR (RSI)"
@@ -125,28 +180,25 @@ class RSIStrategy(BaseStrategy):
         return "Médio"
 
     def analyze(self, ticker_data: dict, option_chain: list) -> list:
-        from app.services.b3_service import B3Service
-        
         ticker = ticker_data['ticker']
-        rsi = B3Service.get_rsi(ticker)
+        rsi = ticker_data.get('rsi')
+        if rsi is None:
+            # Standalone use only: the adapter (and the scanner) pass the computed RSI
+            from app.services.b3_service import B3Service
+            rsi = B3Service.get_rsi(ticker)
         
         signals = []
         
         # Logic: RSI < 30 -> BUY CALL (Expect rebound)
         #        RSI > 70 -> BUY PUT (Expect drop)
         
+        index = self.strike_index(ticker_data, option_chain)
+
         if rsi < 30:
             # Find closest OTM Call
             target_strike = ticker_data['price'] * 1.05 # 5% OTM
-            best_option = None
-            min_diff = float('inf')
-            
-            for option in option_chain:
-                if option['type'] == 'call':
-                     diff = abs(option['strike'] - target_strike)
-                     if diff < min_diff:
-                         min_diff = diff
-                         best_option = option
+            best = index.nearest(target_strike, 'call')
+            best_option = option_chain[best] if best is not None else None
             
             if best_option:
                 signals.append({
@@ -165,15 +217,8 @@ class RSIStrategy(BaseStrategy):
         elif rsi > 70:
             # Find closest OTM Put
             target_strike = ticker_data['price'] * 0.95 # 5% OTM
-            best_option = None
-            min_diff = float('inf')
-            
-            for option in option_chain:
-                if option['type'] == 'put':
-                     diff = abs(option['strike'] - target_strike)
-                     if diff < min_diff:
-                         min_diff = diff
-                         best_option = option
+            best = index.nearest(target_strike, 'put')
+            best_option = option_chain[best] if best is not None else None
             
             if best_option:
                 signals.append({
@@ -256,22 +301,16 @@ class LongStraddleStrategy(BaseStrategy):
         spot_price = ticker_data.get('price', 0)
         
         # Find ATM Call and Put
-        atm_call = None
-        atm_put = None
-        min_diff = float('inf')
-        
-        # Simple logic: closest strike to spot
-        best_strike = 0
-        
-        for option in option_chain:
-            diff = abs(option['strike'] - spot_price)
-            if diff < min_diff:
-                min_diff = diff
-                best_strike = option['strike']
+        # Simple logic: closest strike to spot (binary search on the sorted strikes)
+        index = self.strike_index(ticker_data, option_chain)
+        closest = index.nearest(spot_price)
+        best_strike = option_chain[closest]['strike'] if closest is not None else 0
         
         if best_strike > 0:
             # Get symbol for visualization (picking the Call as representative)
-            representative_option = next((o for o in option_chain if o['strike'] == best_strike and o['type'] == 'call'), None)
+            call = index.at_or_above(best_strike, 'call')
+            representative_option = (option_chain[call] if call is not None and option_chain[call]['strike'] == best_strike
+                                     else None)
             
             if representative_option:
                 signals.append({
@@ -363,19 +402,17 @@ class BullCallSpreadStrategy(BaseStrategy):
         buy_leg = None
         sell_leg = None
         
-        # Sort by strike
-        calls = sorted([o for o in option_chain if o['type'] == 'call'], key=lambda x: x['strike'])
+        # Calls sorted by strike (built once per chain)
+        index = self.strike_index(ticker_data, option_chain)
+        calls, strikes = index.positions('call'), index.strikes('call')
         
-        for i in range(len(calls) - 1):
-            opt1 = calls[i]
-            opt2 = calls[i+1] # Next strike
-            
-            # Check if Opt1 is ATM/ITM and Opt2 is OTM
-            if 0.98 <= (opt1['strike']/spot_price) <= 1.02: # ATM
-                if (opt2['strike'] - opt1['strike']) < spot_price * 0.05: # Spread not too wide
-                     buy_leg = opt1
-                     sell_leg = opt2
-                     break
+        # First ATM call whose next strike is less than 5% of spot away
+        atm = self._atm_window(strikes, spot_price)
+        atm = atm[atm < len(strikes) - 1]
+        ok = atm[(strikes[atm + 1] - strikes[atm]) < spot_price * 0.05] # Spread not too wide
+        if len(ok):
+            buy_leg = option_chain[calls[ok[0]]]
+            sell_leg = option_chain[calls[ok[0] + 1]]
         
         if buy_leg and sell_leg:
             signals.append({
@@ -407,24 +444,15 @@ class BearPutSpreadStrategy(BaseStrategy):
         buy_leg = None
         sell_leg = None
         
-        # Sort by strike descending for Puts usually, but ascending works if logic is correct
-        puts = sorted([o for o in option_chain if o['type'] == 'put'], key=lambda x: x['strike'])
-        
-        # Iterate to find Buy Higher Strike (ITM/ATM for Put? No, Buy Put is Higher Strike implies ITM if Price < Strike)
-        # Standard Bear Put Spread: Buy ITM/ATM Put (Higher Strike), Sell OTM Put (Lower Strike)
-        # Wait: Buy Put Strike K2, Sell Put Strike K1 (K1 < K2). 
-        # Usually we buy ATM and sell OTM.
+        # Standard Bear Put Spread: Buy ATM Put (Higher Strike), Sell OTM Put (next Lower Strike)
+        index = self.strike_index(ticker_data, option_chain)
+        puts, strikes = index.positions('put'), index.strikes('put')
         
-        for i in range(len(puts) - 1):
-             # p1 (lower strike), p2 (higher strike)
-             p1 = puts[i]
-             p2 = puts[i+1]
-             
-             # We want to Buy p2 (ATM) and Sell p1 (OTM)
-             if 0.98 <= (p2['strike']/spot_price) <= 1.02: # p2 is ATM
-                 buy_leg = p2
-                 sell_leg = p1
-                 break
+        atm = self._atm_window(strikes, spot_price)
+        atm = atm[atm >= 1] # needs a lower strike to sell
+        if len(atm):
+            buy_leg = option_chain[puts[atm[0]]]
+            sell_leg = option_chain[puts[atm[0] - 1]]
                  
         if buy_leg and sell_leg:
             signals.append({
@@ -442,3 +470,45 @@ class BearPutSpreadStrategy(BaseStrategy):
             })
 
         return signals
+
+
+class LegacyStrategyAdapter:
+    """
+    Runs list-of-dicts BaseStrategy classes over a ChainContext.
+
+    The chain is converted to records once per run and shared by every
+    strategy, along with the context's StrikeIndex (its positions are the
+    records' positions) and the indicators already computed for the ticker;
+    missing indicators get a neutral value instead of a network fetch. The
+    signal dicts keep the legacy format.
+    """
+    NEUTRAL_INDICATORS = {'rsi': 50.0}
+
+    def __init__(self, strategies: list):
+        self.strategies = list(strategies)
+
+    @staticmethod
+    def records(ctx) -> list:
+        """Chain rows as dicts, with the legacy 'time_to_expiry_years' key."""
+        df = ctx.df
+        if 'time_to_expiry_years' not in df.columns and 'time_to_expiry' in df.columns:
+            df = df.assign(time_to_expiry_years=df['time_to_expiry'])
+        return df.to_dict('records')
+
+    def ticker_data(self, ticker_data: dict, ctx) -> dict:
+        data = {'price': ctx.spot, **ticker_data, 'strike_index': ctx.strike_index}
+        for strategy in self.strategies:
+            for name in strategy.required_indicators:
+                if data.get(name) is None:
+                    data[name] = self.NEUTRAL_INDICATORS.get(name)
+        return data
+
+    def run(self, ticker_data: dict, ctx) -> list:
+        if ctx.is_universe:
+            raise ValueError("LegacyStrategyAdapter expects a single-ticker ChainContext")
+        option_chain = self.records(ctx)
+        data = self.ticker_data(ticker_data, ctx)
+        signals = []
+        for strategy in self.strategies:
+            signals.extend(strategy.analyze_context(data, ctx, option_chain))
+        return signals
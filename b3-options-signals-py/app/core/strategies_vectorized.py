@@ -1,9 +1,36 @@
 from abc import ABC, abstractmethod
+from dataclasses import replace
+from typing import Optional
 import pandas as pd
 import numpy as np
 
+from app.core.chain_context import ChainContext
+from app.core.filter_specs import INF, LegFilter
+from app.core.routing import Preconditions
+from app.core.signal_batch import SignalBatch
+from app.core.structure_search import (
+    StructureSpec, VerticalSpread, Strangle, Butterfly, IronCondor, IronButterfly, JadeLizard, TimeSpread,
+)
+
 # Classe Abstrata Base para Estratégias Vetorizadas
 class VectorizedStrategy(ABC):
+    # Indicadores técnicos que a estratégia lê de ticker_data (ver app.data.technicals).
+    # O scanner e o backtester calculam apenas a união do que as estratégias declaram.
+    required_indicators: tuple = ()
+
+    # Rótulos anexados às linhas selecionadas (labels() pode sobrescrever por chamada)
+    signal_type: str = 'SIGNAL'
+    reason: str = 'Sinal detectado'
+    recommended_action: str = ''
+    # Filtro declarativo da perna: o scanner compila as specs de todas as estratégias
+    # num único FilterProgram e as avalia juntas (ver app.core.filter_specs)
+    spec: Optional[LegFilter] = None
+    # Specs extras consultadas pela estratégia (pernas das estruturas)
+    leg_specs: tuple = ()
+    # Pré-condições baratas por ativo: o scanner só avalia a estratégia nos ativos
+    # que as cumprem (ver app.core.routing)
+    preconditions: Preconditions = Preconditions()
+
     @property
     @abstractmethod
     def name(self):
@@ -16,459 +43,396 @@ class VectorizedStrategy(ABC):
         """Nível de risco (Baixo, Médio, Alto, Crítico)"""
         pass
 
-    @abstractmethod
-    def analyze(self, ticker_data: dict, chain_df: pd.DataFrame) -> pd.DataFrame:
+    def select(self, ticker_data: dict, ctx: ChainContext) -> np.ndarray:
+        """
+        Posições (em ctx.df.iloc) das opções que disparam o sinal.
+        Lê apenas as features já calculadas no ChainContext; não copia a cadeia.
+        Estratégias sem `spec` sobrescrevem este método.
+        """
+        if self.spec is None:
+            raise NotImplementedError(f"{type(self).__name__} must define `spec` or override select()")
+        return ctx.positions(ctx.spec_mask(self.spec))
+
+    @property
+    def filter_specs(self) -> tuple:
+        """Todas as specs que a estratégia consulta (compiladas juntas pelo scanner)."""
+        return ((self.spec,) if self.spec is not None else ()) + tuple(self.leg_specs)
+
+    @property
+    def requirements(self) -> Preconditions:
+        """Pré-condições declaradas + o que as specs já exigem (cada tipo de perna, uma opção por spec)."""
+        specs = self.filter_specs
+        types = set(self.preconditions.types) | {s.option_type for s in specs if s.option_type is not None}
+        return replace(self.preconditions, types=tuple(sorted(types)),
+                       min_options=max(self.preconditions.min_options, len(specs)))
+
+    def labels(self, ticker_data: dict, ctx: Optional[ChainContext] = None,
+               positions: Optional[np.ndarray] = None) -> dict:
+        # Com ctx e posições, um rótulo pode variar por linha (ex.: por ativo no universo)
+        return {
+            'strategy': self.name,
+            'signal_type': self.signal_type,
+            'reason': self.reason,
+            'recommended_action': self.recommended_action,
+            'risk_level': self.risk_level,
+        }
+
+    def analyze(self, ticker_data: dict, chain_df: pd.DataFrame, ctx: Optional[ChainContext] = None) -> pd.DataFrame:
         """
         Analisa o DataFrame da Cadeia de Opções e retorna um DataFrame com os sinais encontrados.
         Colunas esperadas em chain_df: ['symbol', 'strike', 'type', 'time_to_expiry', 'bid', 'ask', 'last', 'iv', 'delta', 'theta']
+        O scanner passa um ctx compartilhado entre as estratégias; sem ele, um é montado aqui.
         """
-        pass
+        if ctx is None:
+            ctx = ChainContext(chain_df, ticker_data.get('price', 0))
+        positions = self.select(ticker_data, ctx)
+        if len(positions) == 0:
+            return pd.DataFrame()
+        return ctx.take(positions, **self.labels(ticker_data, ctx, positions))
+
+    def signals(self, ticker_data: dict, ctx: ChainContext) -> SignalBatch:
+        """
+        Mesmos sinais de analyze() em lote colunar (posições + rótulos categóricos),
+        sem materializar linhas da cadeia; é o caminho do scanner.
+        """
+        positions = self.select(ticker_data, ctx)
+        return SignalBatch.from_positions(positions, **self.labels(ticker_data, ctx, positions))
+
+
+class StructureStrategy(VectorizedStrategy):
+    """
+    Estratégias multi-perna: `structure` busca as combinações válidas por
+    vencimento (ver app.core.structure_search) e cada uma das `top_k` melhores
+    vira uma linha-resumo com as pernas em 'legs'.
+    """
+    structure: StructureSpec = None
+    top_k: int = 3
+
+    @property
+    def leg_specs(self) -> tuple:
+        return self.structure.leg_specs
+
+    def select(self, ticker_data: dict, ctx: ChainContext) -> np.ndarray:
+        # Posição da primeira perna de cada estrutura encontrada
+        return self.structure.search(ctx, self.top_k).positions[:, 0]
+
+    def analyze(self, ticker_data: dict, chain_df: pd.DataFrame, ctx: Optional[ChainContext] = None) -> pd.DataFrame:
+        if ctx is None:
+            ctx = ChainContext(chain_df, ticker_data.get('price', 0))
+        return self.structure.search(ctx, self.top_k).to_frame(ctx, **self.labels(ticker_data))
+
+    def signals(self, ticker_data: dict, ctx: ChainContext) -> SignalBatch:
+        return SignalBatch.from_structures(self.structure.search(ctx, self.top_k), **self.labels(ticker_data))
 
 # --- ESTRATÉGIAS BÁSICAS ---
 
 class HighIVStrategy(VectorizedStrategy):
     name = "Reversão de Volatilidade (High IV)"
     risk_level = "Alto"
+    signal_type = 'SELL CALL'
+    reason = 'Volatilidade Implícita Alta (OTM)'
+    recommended_action = 'Venda Coberta ou Trava de Baixa'
 
-    def analyze(self, ticker_data: dict, chain_df: pd.DataFrame) -> pd.DataFrame:
-        spot_price = ticker_data.get('price', 0)
-        
-        # Filtro Vetorizado: Call Options, >10% OTM, IV Alto
-        # Usa operações vetorizadas do Pandas ao invés de loops lentos
-        mask = (
-            (chain_df['type'] == 'call') & 
-            (chain_df['strike'] > spot_price * 1.10)
-            # Em produção, adicionaríamos filtro de 'iv' > percentil 80
-        )
-        
-        candidates = chain_df[mask].copy()
-        
-        if not candidates.empty:
-            candidates['strategy'] = self.name
-            candidates['signal_type'] = 'SELL CALL'
-            candidates['reason'] = 'Volatilidade Implícita Alta (OTM)'
-            candidates['recommended_action'] = 'Venda Coberta ou Trava de Baixa'
-            candidates['risk_level'] = self.risk_level
-            
-        return candidates
+    # Filtro Vetorizado: Call Options, >10% OTM, IV Alto
+    # IV acima do percentil 80 da cadeia (quando o enriquecimento trouxe IV real)
+    spec = LegFilter(option_type='call', moneyness=(1.10, INF), closed='neither', min_iv_quantile=0.80)
 
 class DeltaHedgeStrategy(VectorizedStrategy):
     name = "Hedge Delta Neutro (ATM)"
     risk_level = "Médio"
+    signal_type = 'BUY ATM'
+    reason = 'Delta Neutro / ATM'
+    recommended_action = 'Compra a Seco (Swing Trade)'
 
-    def analyze(self, ticker_data: dict, chain_df: pd.DataFrame) -> pd.DataFrame:
-        # Filtra opções ATM (Moneyness entre 0.98 e 1.02)
-        # Busca neutralidade de Delta (próximo de 0.50 para Calls ATM)
-        spot_price = ticker_data.get('price', 0)
-        
-        moneyness = chain_df['strike'] / spot_price
-        mask = (moneyness >= 0.98) & (moneyness <= 1.02)
-        
-        candidates = chain_df[mask].copy()
-        
-        if not candidates.empty:
-            candidates['strategy'] = self.name
-            candidates['signal_type'] = 'BUY ATM' 
-            candidates['reason'] = 'Delta Neutro / ATM'
-            candidates['recommended_action'] = 'Compra a Seco (Swing Trade)'
-            candidates['risk_level'] = self.risk_level
-            
-        return candidates
+    # Filtra opções ATM (Moneyness entre 0.98 e 1.02)
+    # Busca neutralidade de Delta (próximo de 0.50 para Calls ATM)
+    spec = LegFilter(moneyness=(0.98, 1.02))
 
 class RSIStrategy(VectorizedStrategy):
     name = "Reversão por IFR (RSI)"
     risk_level = "Médio"
-
-    def analyze(self, ticker_data: dict, chain_df: pd.DataFrame) -> pd.DataFrame:
+    required_indicators = ('rsi',)
+    recommended_action = 'Compra de Call levemente OTM'
+    # Só dispara em sobrevenda (< 30) ou sobrecompra (> 70)
+    preconditions = Preconditions(indicator='rsi', ranges=((-INF, 30), (70, INF)))
+
+    @staticmethod
+    def _rsi(ticker_data: dict, ctx: ChainContext) -> list:
+        # RSI de cada ativo: no universo vem difundido na coluna 'rsi' da cadeia
+        if ctx.is_universe:
+            return ctx.group_value('rsi', 50)
+        return [ticker_data.get('rsi', 50)]
+
+    def select(self, ticker_data: dict, ctx: ChainContext) -> np.ndarray:
         # Estratégia baseada no indicador RSI (Índice de Força Relativa)
         # Assume que o RSI já foi calculado e passado em ticker_data
-        
-        rsi = ticker_data.get('rsi', 50)
-        spot_price = ticker_data['price']
-        candidates = pd.DataFrame()
-
-        if rsi < 30:
-            # Sobrevenda (Oversold) -> Sinal de Compra de Call (Repique)
-            # Busca Calls levemente OTM (~5%) para pegar a volta
-            target_strike = spot_price * 1.05
-            calls = chain_df[chain_df['type'] == 'call'].copy()
-            
-            # Lógica vetorizada para encontrar o strike mais próximo
-            calls['dist'] = (calls['strike'] - target_strike).abs()
-            best_idx = calls['dist'].idxmin() if not calls.empty else None
-            
-            if best_idx is not None:
-                selection = calls.loc[[best_idx]].copy()
-                selection['strategy'] = self.name
-                selection['signal_type'] = 'BUY CALL'
-                selection['reason'] = f'RSI em Sobrevenda ({rsi})'
-                selection['recommended_action'] = 'Compra de Call levemente OTM'
-                selection['risk_level'] = self.risk_level
-                candidates = selection
-
-        elif rsi > 70:
-            # Sobrecompra (Overbought) -> Sinal de Compra de Put (Correção)
-            target_strike = spot_price * 0.95
-            puts = chain_df[chain_df['type'] == 'put'].copy()
-            
-            puts['dist'] = (puts['strike'] - target_strike).abs()
-            best_idx = puts['dist'].idxmin() if not puts.empty else None
-            
-            if best_idx is not None:
-                selection = puts.loc[[best_idx]].copy()
-                selection['strategy'] = self.name
-                selection['signal_type'] = 'BUY PUT'
-                selection['reason'] = f'RSI em Sobrecompra ({rsi})'
-                selection['recommended_action'] = 'Compra de Put levemente OTM'
-                selection['risk_level'] = self.risk_level
-                candidates = selection
-                
-        return candidates
+        rsi = np.array(self._rsi(ticker_data, ctx), dtype=float)
+        groups = np.arange(len(rsi))
+        # Sobrevenda (Oversold) -> Sinal de Compra de Call (Repique): Calls levemente OTM (~5%)
+        # Sobrecompra (Overbought) -> Sinal de Compra de Put (Correção)
+        # Uma busca por lado para todos os ativos (nearest por ativo)
+        oversold, overbought = rsi < 30, rsi > 70
+        calls = ctx.strike_index.nearest(ctx.group_spot[oversold] * 1.05, 'call', group=groups[oversold])
+        puts = ctx.strike_index.nearest(ctx.group_spot[overbought] * 0.95, 'put', group=groups[overbought])
+        best = np.concatenate([calls, puts])
+        return np.sort(best[best >= 0])
+
+    def labels(self, ticker_data: dict, ctx: Optional[ChainContext] = None,
+               positions: Optional[np.ndarray] = None) -> dict:
+        labels = super().labels(ticker_data)
+        if ctx is None or positions is None:
+            rsi = ticker_data.get('rsi', 50)
+            if rsi > 70:
+                labels.update(signal_type='BUY PUT', reason=f'RSI em Sobrecompra ({rsi})',
+                              recommended_action='Compra de Put levemente OTM')
+            else:
+                labels.update(signal_type='BUY CALL', reason=f'RSI em Sobrevenda ({rsi})')
+            return labels
+        by_group = self._rsi(ticker_data, ctx)
+        rsi = [by_group[g] for g in ctx.group_codes[positions]]
+        overbought = np.array([r > 70 for r in rsi], dtype=bool)
+        labels.update(
+            signal_type=np.where(overbought, 'BUY PUT', 'BUY CALL'),
+            reason=[f'RSI em Sobrecompra ({r})' if o else f'RSI em Sobrevenda ({r})' for r, o in zip(rsi, overbought)],
+            recommended_action=np.where(overbought, 'Compra de Put levemente OTM', self.recommended_action),
+        )
+        return labels
 
 class CoveredCallStrategy(VectorizedStrategy):
     name = "Lançamento Coberto"
     risk_level = "Baixo"
+    signal_type = 'SELL COVERED CALL'
+    reason = 'Strike OTM ideal para taxa (4-8%)'
+    recommended_action = 'Venda de Call (Tenha o ativo)'
 
-    def analyze(self, ticker_data: dict, chain_df: pd.DataFrame) -> pd.DataFrame:
-        spot_price = ticker_data.get('price', 0)
-        
-        # Venda de Call OTM (4% a 8% fora do dinheiro)
-        # Gera renda com a taxa, assumindo que o usuário tem a ação
-        moneyness = chain_df['strike'] / spot_price
-        mask = (chain_df['type'] == 'call') & (moneyness >= 1.04) & (moneyness <= 1.08)
-        
-        candidates = chain_df[mask].copy()
-        
-        if not candidates.empty:
-            candidates['strategy'] = self.name
-            candidates['signal_type'] = 'SELL COVERED CALL'
-            candidates['reason'] = 'Strike OTM ideal para taxa (4-8%)'
-            candidates['recommended_action'] = 'Venda de Call (Tenha o ativo)'
-            candidates['risk_level'] = self.risk_level
-        
-        return candidates
+    # Venda de Call OTM (4% a 8% fora do dinheiro)
+    # Gera renda com a taxa, assumindo que o usuário tem a ação
+    spec = LegFilter(option_type='call', moneyness=(1.04, 1.08))
 
 # --- ESTRATÉGIAS DIRECIONAIS BÁSICAS ---
 
 class LongCallStrategy(VectorizedStrategy):
     name = "Compra a Seco de Call"
     risk_level = "Médio"
+    signal_type = 'BUY CALL'
+    reason = 'Momentum de Alta (Simulado)'
+    recommended_action = 'Compra a Seco'
 
-    def analyze(self, ticker_data: dict, chain_df: pd.DataFrame) -> pd.DataFrame:
-        spot_price = ticker_data['price']
-        # Compra de Call levemente OTM (2-5%)
-        # Aposta na alta do ativo
-        moneyness = chain_df['strike'] / spot_price
-        mask = (chain_df['type'] == 'call') & (moneyness >= 1.02) & (moneyness <= 1.05)
-        
-        candidates = chain_df[mask].copy()
-        if not candidates.empty:
-            candidates['strategy'] = self.name
-            candidates['signal_type'] = 'BUY CALL'
-            candidates['reason'] = 'Momentum de Alta (Simulado)'
-            candidates['recommended_action'] = 'Compra a Seco'
-            candidates['risk_level'] = self.risk_level
-        return candidates
+    # Compra de Call levemente OTM (2-5%)
+    # Aposta na alta do ativo
+    spec = LegFilter(option_type='call', moneyness=(1.02, 1.05))
 
 class LongPutStrategy(VectorizedStrategy):
     name = "Compra a Seco de Put"
     risk_level = "Médio"
+    signal_type = 'BUY PUT'
+    reason = 'Momentum de Baixa (Simulado)'
+    recommended_action = 'Compra a Seco'
 
-    def analyze(self, ticker_data: dict, chain_df: pd.DataFrame) -> pd.DataFrame:
-        spot_price = ticker_data['price']
-        # Compra de Put levemente OTM (2-5% abaixo do spot)
-        # Aposta na queda do ativo
-        moneyness = chain_df['strike'] / spot_price
-        mask = (chain_df['type'] == 'put') & (moneyness >= 0.95) & (moneyness <= 0.98)
-        
-        candidates = chain_df[mask].copy()
-        if not candidates.empty:
-            candidates['strategy'] = self.name
-            candidates['signal_type'] = 'BUY PUT'
-            candidates['reason'] = 'Momentum de Baixa (Simulado)'
-            candidates['recommended_action'] = 'Compra a Seco'
-            candidates['risk_level'] = self.risk_level
-        return candidates
+    # Compra de Put levemente OTM (2-5% abaixo do spot)
+    # Aposta na queda do ativo
+    spec = LegFilter(option_type='put', moneyness=(0.95, 0.98))
 
 class CashSecuredPutStrategy(VectorizedStrategy):
     name = "Cash Secured Put"
     risk_level = "Baixo-Médio"
+    signal_type = 'SELL PUT'
+    reason = 'Strike ideal para entrada ou renda'
+    recommended_action = 'Venda de Put (Tenha caixa)'
 
-    def analyze(self, ticker_data: dict, chain_df: pd.DataFrame) -> pd.DataFrame:
-        spot_price = ticker_data['price']
-        # Venda de Put OTM (Strike < Spot). 3-7% OTM
-        # Intenção de comprar o papel mais barato
-        moneyness = chain_df['strike'] / spot_price
-        mask = (chain_df['type'] == 'put') & (moneyness >= 0.93) & (moneyness <= 0.97)
-        
-        candidates = chain_df[mask].copy()
-        if not candidates.empty:
-            candidates['strategy'] = self.name
-            candidates['signal_type'] = 'SELL PUT'
-            candidates['reason'] = 'Strike ideal para entrada ou renda'
-            candidates['recommended_action'] = 'Venda de Put (Tenha caixa)'
-            candidates['risk_level'] = self.risk_level
-        return candidates
+    # Venda de Put OTM (Strike < Spot). 3-7% OTM
+    # Intenção de comprar o papel mais barato
+    spec = LegFilter(option_type='put', moneyness=(0.93, 0.97))
 
 # --- TRAVAS (SPREADS) ---
 
-class BullCallSpreadStrategy(VectorizedStrategy):
+class BullCallSpreadStrategy(StructureStrategy):
     name = "Trava de Alta com Call"
     risk_level = "Médio"
-
-    def analyze(self, ticker_data: dict, chain_df: pd.DataFrame) -> pd.DataFrame:
-        spot_price = ticker_data['price']
-        # Compra Call ATM (0.98-1.02), Venda Call OTM (1.05-1.10)
-        # Reduz custo da ponta comprado com a venda
-        calls = chain_df[chain_df['type'] == 'call'].copy()
-        calls['moneyness'] = calls['strike'] / spot_price
-        
-        buy_mask = (calls['moneyness'] >= 0.98) & (calls['moneyness'] <= 1.02)
-        candidates = calls[buy_mask].copy()
-        
-        if not candidates.empty:
-            candidates['strategy'] = self.name
-            candidates['signal_type'] = 'BULL CALL SPREAD'
-            candidates['reason'] = 'Alta Moderada'
-            candidates['recommended_action'] = 'Compra ATM / Venda OTM (Strike superior)'
-            candidates['risk_level'] = self.risk_level
-        return candidates
-
-class BearPutSpreadStrategy(VectorizedStrategy):
+    signal_type = 'BULL CALL SPREAD'
+    reason = 'Alta Moderada'
+    recommended_action = 'Compra ATM / Venda OTM (Strike superior)'
+
+    # Compra Call ATM (0.98-1.02), Venda Call OTM (1.05-1.10)
+    # Reduz custo da ponta comprado com a venda; débito de no máximo 75% da largura
+    structure = VerticalSpread(
+        long_leg=LegFilter(option_type='call', moneyness=(0.98, 1.02), min_volume=1),
+        short_leg=LegFilter(option_type='call', moneyness=(1.05, 1.10), min_volume=1),
+        width=(0.03, 0.12), max_debit_ratio=0.75,
+    )
+
+class BearPutSpreadStrategy(StructureStrategy):
     name = "Trava de Baixa com Put"
     risk_level = "Médio"
+    signal_type = 'BEAR PUT SPREAD'
+    reason = 'Baixa Moderada'
+    recommended_action = 'Compra ATM / Venda OTM (Strike inferior)'
 
-    def analyze(self, ticker_data: dict, chain_df: pd.DataFrame) -> pd.DataFrame:
-        spot_price = ticker_data['price']
-        # Compra Put ATM, Venda Put OTM (Strike mais baixo)
-        puts = chain_df[chain_df['type'] == 'put'].copy()
-        puts['moneyness'] = puts['strike'] / spot_price
-        
-        buy_mask = (puts['moneyness'] >= 0.98) & (puts['moneyness'] <= 1.02)
-        candidates = puts[buy_mask].copy()
-        
-        if not candidates.empty:
-            candidates['strategy'] = self.name
-            candidates['signal_type'] = 'BEAR PUT SPREAD'
-            candidates['reason'] = 'Baixa Moderada'
-            candidates['recommended_action'] = 'Compra ATM / Venda OTM (Strike inferior)'
-            candidates['risk_level'] = self.risk_level
-        return candidates
+    # Compra Put ATM, Venda Put OTM (Strike mais baixo)
+    structure = VerticalSpread(
+        long_leg=LegFilter(option_type='put', moneyness=(0.98, 1.02), min_volume=1),
+        short_leg=LegFilter(option_type='put', moneyness=(0.90, 0.95), min_volume=1),
+        width=(-0.12, -0.03), max_debit_ratio=0.75,
+    )
 
 # --- ESTRATÉGIAS DE VOLATILIDADE ---
 
-class LongStraddleStrategy(VectorizedStrategy):
+class LongStraddleStrategy(StructureStrategy):
     name = "Compra de Volatilidade (Straddle)"
     risk_level = "Alto"
-
-    def analyze(self, ticker_data: dict, chain_df: pd.DataFrame) -> pd.DataFrame:
-        spot_price = ticker_data['price']
-        # Compra Call ATM + Compra Put ATM
-        # Lucra com movimento forte para qualquer lado
-        mask = (chain_df['type'] == 'call') & (np.isclose(chain_df['strike'], spot_price, rtol=0.01))
-        candidates = chain_df[mask].copy()
-        
-        if not candidates.empty:
-            candidates['strategy'] = self.name
-            candidates['signal_type'] = 'BUY STRADDLE'
-            candidates['reason'] = 'Explosão de Volatilidade'
-            candidates['recommended_action'] = 'Compra Call ATM + Compra Put ATM'
-            candidates['risk_level'] = self.risk_level
-        return candidates
+    signal_type = 'BUY STRADDLE'
+    reason = 'Explosão de Volatilidade'
+    recommended_action = 'Compra Call ATM + Compra Put ATM'
+
+    # Compra Call ATM + Compra Put ATM (mesmo strike e vencimento)
+    # Lucra com movimento forte para qualquer lado
+    structure = Strangle(
+        call_leg=LegFilter(option_type='call', moneyness=(0.99, 1.01), min_volume=1),
+        put_leg=LegFilter(option_type='put', moneyness=(0.99, 1.01), min_volume=1),
+        width=(0.0, 0.0),
+    )
 
 # --- ESTRATÉGIAS AVANÇADAS E COMBINAÇÕES ---
 
-class StrangleStrategy(VectorizedStrategy):
+class StrangleStrategy(StructureStrategy):
     name = "Compra de Volatilidade (Strangle)"
     risk_level = "Alto"
-
-    def analyze(self, ticker_data: dict, chain_df: pd.DataFrame) -> pd.DataFrame:
-        spot_price = ticker_data['price']
-        # Long Call OTM + Long Put OTM
-        # Apenas sinaliza se existirem ambas opções OTM
-        call_cond = (chain_df['type'] == 'call') & (chain_df['strike'] > spot_price * 1.05)
-        put_cond = (chain_df['type'] == 'put') & (chain_df['strike'] < spot_price * 0.95)
-        
-        if call_cond.any() and put_cond.any():
-            df = pd.DataFrame([chain_df.iloc[0].to_dict()])
-            df['strategy'] = self.name
-            df['signal_type'] = 'BUY STRANGLE'
-            df['symbol'] = "ESTRUTURA"
-            df['reason'] = 'Explosão de Volatilidade (Custo < Straddle)'
-            df['recommended_action'] = 'Compra Call OTM + Compra Put OTM'
-            df['risk_level'] = self.risk_level
-            return df
-        return pd.DataFrame()
-
-class ButterflyStrategy(VectorizedStrategy):
+    signal_type = 'BUY STRANGLE'
+    reason = 'Explosão de Volatilidade (Custo < Straddle)'
+    recommended_action = 'Compra Call OTM + Compra Put OTM'
+    # Long Call OTM + Long Put OTM: os pares com breakevens mais próximos do spot
+    structure = Strangle(
+        call_leg=LegFilter(option_type='call', moneyness=(1.05, INF), closed='neither', min_volume=1),
+        put_leg=LegFilter(option_type='put', moneyness=(-INF, 0.95), closed='left', min_volume=1),
+    )
+
+class ButterflyStrategy(StructureStrategy):
     name = "Borboleta (Butterfly)"
     risk_level = "Baixo"
-
-    def analyze(self, ticker_data: dict, chain_df: pd.DataFrame) -> pd.DataFrame:
-        # Long ITM Call, Short 2x ATM Call, Long OTM Call
-        # Lucro máximo no Strike ATM
-        spot_price = ticker_data['price']
-        mask = (chain_df['type'] == 'call') & (np.isclose(chain_df['strike'], spot_price, rtol=0.02))
-        candidates = chain_df[mask].copy()
-        
-        if not candidates.empty:
-            candidates['strategy'] = self.name
-            candidates['signal_type'] = 'BUY BUTTERFLY'
-            candidates['reason'] = 'Alvo no Strike ATM'
-            candidates['recommended_action'] = 'Montar estrutura 1-2-1 com Calls'
-            candidates['risk_level'] = self.risk_level
-        return candidates
-
-class IronButterflyStrategy(VectorizedStrategy):
+    signal_type = 'BUY BUTTERFLY'
+    reason = 'Alvo no Strike ATM'
+    recommended_action = 'Montar estrutura 1-2-1 com Calls'
+
+    # Long ITM Call, Short 2x ATM Call, Long OTM Call (asas simétricas)
+    # Lucro máximo no Strike ATM
+    structure = Butterfly(
+        body_leg=LegFilter(option_type='call', moneyness=(0.98, 1.02), min_volume=1),
+        wing_leg=LegFilter(option_type='call', min_volume=1),
+        width=(0.02, 0.10),
+    )
+
+class IronButterflyStrategy(StructureStrategy):
     name = "Borboleta de Ferro (Iron Butterfly)"
     risk_level = "Médio"
-
-    def analyze(self, ticker_data: dict, chain_df: pd.DataFrame) -> pd.DataFrame:
-        # Sell Straddle ATM + Buy Strangle OTM Protection
-        # Geração de renda em baixa volatilidade
-        spot_price = ticker_data['price']
-        mask = (chain_df['type'] == 'call') & (np.isclose(chain_df['strike'], spot_price, rtol=0.02))
-        candidates = chain_df[mask].copy()
-        
-        if not candidates.empty:
-            candidates['strategy'] = self.name
-            candidates['signal_type'] = 'SELL IRON BUTTERFLY'
-            candidates['reason'] = 'Alta probabilidade em lateralização'
-            candidates['recommended_action'] = 'Venda Straddle ATM + Compra Strangle OTM'
-            candidates['risk_level'] = self.risk_level
-        return candidates
-
-class CalendarSpreadStrategy(VectorizedStrategy):
+    signal_type = 'SELL IRON BUTTERFLY'
+    reason = 'Alta probabilidade em lateralização'
+    recommended_action = 'Venda Straddle ATM + Compra Strangle OTM'
+
+    # Sell Straddle ATM + Buy Strangle OTM Protection (put e call vendidas no mesmo strike)
+    # Geração de renda em baixa volatilidade
+    structure = IronButterfly(
+        short_put=LegFilter(option_type='put', moneyness=(0.98, 1.02), min_volume=1),
+        long_put=LegFilter(option_type='put', moneyness=(-INF, 0.98), min_volume=1),
+        short_call=LegFilter(option_type='call', moneyness=(0.98, 1.02), min_volume=1),
+        long_call=LegFilter(option_type='call', moneyness=(1.02, INF), min_volume=1),
+        width=(0.02, 0.10),
+    )
+
+class CalendarSpreadStrategy(StructureStrategy):
     name = "Trava de Calendário"
     risk_level = "Baixo"
-
-    def analyze(self, ticker_data: dict, chain_df: pd.DataFrame) -> pd.DataFrame:
-        # Venda ATM Curto Prazo, Compra ATM Longo Prazo
-        # Explora o decay (Theta) maior na opção curta
-        spot_price = ticker_data['price']
-        mask = (chain_df['type'] == 'call') & (np.isclose(chain_df['strike'], spot_price, rtol=0.02))
-        candidates = chain_df[mask].copy()
-        
-        if not candidates.empty:
-            candidates['strategy'] = self.name
-            candidates['signal_type'] = 'CALENDAR SPREAD'
-            candidates['reason'] = 'Explorar Theta Decay da curta'
-            candidates['recommended_action'] = 'Venda Call Curta / Compra Call Longa (Mesmo Strike)'
-            candidates['risk_level'] = self.risk_level
-        return candidates
-
-class DiagonalSpreadStrategy(VectorizedStrategy):
+    signal_type = 'CALENDAR SPREAD'
+    reason = 'Explorar Theta Decay da curta'
+    recommended_action = 'Venda Call Curta / Compra Call Longa (Mesmo Strike)'
+
+    # Venda ATM Curto Prazo, Compra ATM Longo Prazo (mesmo strike, todos os pares de vencimentos)
+    # Explora o decay (Theta) maior na opção curta
+    structure = TimeSpread(
+        near_leg=LegFilter(option_type='call', moneyness=(0.98, 1.02), min_volume=1),
+        far_leg=LegFilter(option_type='call', moneyness=(0.98, 1.02), min_volume=1),
+    )
+    preconditions = Preconditions(min_expiries=2)
+
+class DiagonalSpreadStrategy(StructureStrategy):
     name = "Trava Diagonal (PMCC)"
     risk_level = "Baixo-Médio"
-
-    def analyze(self, ticker_data: dict, chain_df: pd.DataFrame) -> pd.DataFrame:
-        # Compra Call Longa ITM (Substituto da ação), Venda Call Curta OTM (Renda)
-        spot_price = ticker_data['price']
-        # Identify OTM calls for the short leg
-        moneyness = chain_df['strike'] / spot_price
-        mask = (chain_df['type'] == 'call') & (moneyness >= 1.05)
-        candidates = chain_df[mask].copy()
-        
-        if not candidates.empty:
-            candidates['strategy'] = self.name
-            candidates['signal_type'] = 'DIAGONAL SPREAD'
-            candidates['reason'] = 'Renda com custeio da longa'
-            candidates['recommended_action'] = 'Compra Call Longa ITM / Venda Call Curta OTM'
-            candidates['risk_level'] = self.risk_level
-        return candidates
+    signal_type = 'DIAGONAL SPREAD'
+    reason = 'Renda com custeio da longa'
+    recommended_action = 'Compra Call Longa ITM / Venda Call Curta OTM'
+
+    # Compra Call Longa ITM (Substituto da ação), Venda Call Curta OTM (Renda)
+    # Longa 5% a 30% do spot abaixo da curta, num vencimento posterior
+    structure = TimeSpread(
+        near_leg=LegFilter(option_type='call', moneyness=(1.05, INF), min_volume=1),
+        far_leg=LegFilter(option_type='call', moneyness=(0.70, 0.95), min_volume=1),
+        strike_offset=(-0.30, -0.05),
+    )
+    preconditions = Preconditions(min_expiries=2)
 
 class CollarStrategy(VectorizedStrategy):
     name = "Collar (Proteção)"
     risk_level = "Baixo"
+    signal_type = 'COLLAR'
+    reason = 'Proteção de Carteira (Custo Zero ou Baixo)'
+    recommended_action = 'Compra Put OTM / Venda Call OTM'
 
-    def analyze(self, ticker_data: dict, chain_df: pd.DataFrame) -> pd.DataFrame:
-        # Long Stock + Long Put OTM (Hedge) + Short Call OTM (Financiamento)
-        spot_price = ticker_data['price']
-        # Find OTM Puts suitable for protection
-        mask = (chain_df['type'] == 'put') & (chain_df['strike'] < spot_price * 0.95)
-        candidates = chain_df[mask].copy()
-        
-        if not candidates.empty:
-            candidates['strategy'] = self.name
-            candidates['signal_type'] = 'COLLAR'
-            candidates['reason'] = 'Proteção de Carteira (Custo Zero ou Baixo)'
-            candidates['recommended_action'] = 'Compra Put OTM / Venda Call OTM'
-            candidates['risk_level'] = self.risk_level
-        return candidates
+    # Long Stock + Long Put OTM (Hedge) + Short Call OTM (Financiamento)
+    # Find OTM Puts suitable for protection
+    spec = LegFilter(option_type='put', moneyness=(-INF, 0.95), closed='left')
 
 class ProtectivePutStrategy(VectorizedStrategy):
     name = "Protective Put (Seguro)"
     risk_level = "Baixo"
+    signal_type = 'BUY PROTECTIVE PUT'
+    reason = 'Hedge contra Crash'
+    recommended_action = 'Compra de Put para proteger carteira'
 
-    def analyze(self, ticker_data: dict, chain_df: pd.DataFrame) -> pd.DataFrame:
-        # Long Stock + Long Put ATM/OTM
-        spot_price = ticker_data['price']
-        mask = (chain_df['type'] == 'put') & (chain_df['strike'] <= spot_price) & (chain_df['strike'] > spot_price * 0.90)
-        candidates = chain_df[mask].copy()
-        
-        if not candidates.empty:
-            candidates['strategy'] = self.name
-            candidates['signal_type'] = 'BUY PROTECTIVE PUT'
-            candidates['reason'] = 'Hedge contra Crash'
-            candidates['recommended_action'] = 'Compra de Put para proteger carteira'
-            candidates['risk_level'] = self.risk_level
-        return candidates
-
-class IronCondorStrategy(VectorizedStrategy):
+    # Long Stock + Long Put ATM/OTM
+    spec = LegFilter(option_type='put', moneyness=(0.90, 1.0), closed='right')
+
+class IronCondorStrategy(StructureStrategy):
     name = "Condor de Ferro (Iron Condor)"
     risk_level = "Baixo"
-
-    def analyze(self, ticker_data: dict, chain_df: pd.DataFrame) -> pd.DataFrame:
-        # Estratégia Neutra (Market Neutral)
-        # Ganha com a lateralidade e Theta decay
-        
-        if len(chain_df) > 10:
-             df = pd.DataFrame([chain_df.iloc[0].to_dict()]) # Mock usando a primeira linha
-             df['strategy'] = self.name
-             df['signal_type'] = 'SELL IRON CONDOR'
-             df['symbol'] = "ESTRUTURA"
-             df['reason'] = 'Mercado Lateral'
-             df['recommended_action'] = 'Venda Put Spread OTM + Venda Call Spread OTM'
-             df['risk_level'] = self.risk_level
-             return df
-        return pd.DataFrame()
-
-class JadeLizardStrategy(VectorizedStrategy):
+    signal_type = 'SELL IRON CONDOR'
+    reason = 'Mercado Lateral'
+    recommended_action = 'Venda Put Spread OTM + Venda Call Spread OTM'
+
+    # Estratégia Neutra (Market Neutral)
+    # Ganha com a lateralidade e Theta decay; crédito de pelo menos 20% da asa
+    structure = IronCondor(
+        short_put=LegFilter(option_type='put', moneyness=(0.85, 0.97), min_volume=1),
+        long_put=LegFilter(option_type='put', moneyness=(-INF, 0.97), min_volume=1),
+        short_call=LegFilter(option_type='call', moneyness=(1.03, 1.15), min_volume=1),
+        long_call=LegFilter(option_type='call', moneyness=(1.03, INF), min_volume=1),
+        width=(0.01, 0.10), min_credit_ratio=0.20,
+    )
+
+class JadeLizardStrategy(StructureStrategy):
     name = "Jade Lizard"
     risk_level = "Alto"
-
-    def analyze(self, ticker_data: dict, chain_df: pd.DataFrame) -> pd.DataFrame:
-        # Short Put OTM + Bear Call Spread OTM
-        # Renda sem risco de alta ilimitado
-        if len(chain_df) > 10:
-            df = pd.DataFrame([chain_df.iloc[0].to_dict()])
-            df['strategy'] = self.name
-            df['signal_type'] = 'SELL JADE LIZARD'
-            df['symbol'] = "ESTRUTURA"
-            df['reason'] = 'Coleta de Prêmio sem risco upside'
-            df['recommended_action'] = 'Venda Put OTM + Venda Call Spread OTM'
-            df['risk_level'] = self.risk_level
-            return df
-        return pd.DataFrame()
-
-class ShortStrangleStrategy(VectorizedStrategy):
+    signal_type = 'SELL JADE LIZARD'
+    reason = 'Coleta de Prêmio sem risco upside'
+    recommended_action = 'Venda Put OTM + Venda Call Spread OTM'
+
+    # Short Put OTM + Bear Call Spread OTM
+    # Renda sem risco de alta ilimitado (crédito total >= largura da trava)
+    structure = JadeLizard(
+        short_put=LegFilter(option_type='put', moneyness=(0.85, 0.97), min_volume=1),
+        short_call=LegFilter(option_type='call', moneyness=(1.03, 1.15), min_volume=1),
+        long_call=LegFilter(option_type='call', moneyness=(1.03, INF), min_volume=1),
+        width=(0.01, 0.10),
+    )
+
+class ShortStrangleStrategy(StructureStrategy):
     name = "Venda de Strangle (Short Strangle)"
     risk_level = "Crítico"
-
-    def analyze(self, ticker_data: dict, chain_df: pd.DataFrame) -> pd.DataFrame:
-        # Sell OTM Call + Sell OTM Put
-        # Aposta que o mercado NÃO vai se mover muito
-        spot_price = ticker_data['price']
-        call_cond = (chain_df['type'] == 'call') & (chain_df['strike'] > spot_price * 1.10)
-        put_cond = (chain_df['type'] == 'put') & (chain_df['strike'] < spot_price * 0.90)
-        
-        if call_cond.any() and put_cond.any():
-            df = pd.DataFrame([chain_df.iloc[0].to_dict()])
-            df['strategy'] = self.name
-            df['signal_type'] = 'SELL STRANGLE'
-            df['symbol'] = "STRUCTURE"
-            df['reason'] = 'Alta probabilidade (Lucro se não mover muito)'
-            df['recommended_action'] = 'Venda Call OTM + Venda Put OTM (Risco Infinito)'
-            df['risk_level'] = self.risk_level
-            return df
-        return pd.DataFrame()
+    signal_type = 'SELL STRANGLE'
+    reason = 'Alta probabilidade (Lucro se não mover muito)'
+    recommended_action = 'Venda Call OTM + Venda Put OTM (Risco Infinito)'
+    # Sell OTM Call + Sell OTM Put
+    # Aposta que o mercado NÃO vai se mover muito
+    structure = Strangle(
+        call_leg=LegFilter(option_type='call', moneyness=(1.10, INF), closed='neither', min_volume=1),
+        put_leg=LegFilter(option_type='put', moneyness=(-INF, 0.90), closed='left', min_volume=1),
+        short=True,
+    )
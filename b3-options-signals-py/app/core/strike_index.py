@@ -0,0 +1,174 @@
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+_TYPE_CODES = {None: 0, 'call': 1, 'put': 2}
+
+
+class StrikeIndex:
+    """
+    Strikes da cadeia ordenados por (tipo, vencimento), montado uma vez por cadeia.
+
+    Cada segmento guarda as posições (em chain_df.iloc / na lista de opções)
+    ordenadas por strike, com empate resolvido pela posição original; as buscas
+    (mais próximo, primeiro >= alvo, último <= alvo) são searchsorted sobre o
+    segmento e aceitam um alvo escalar (-> posição ou None) ou um array de
+    alvos (-> array de posições, -1 onde não há strike).
+
+    option_type: 'call', 'put' ou None (ambos). expiry: chave do vencimento
+    ('expiry' da cadeia, ou time_to_expiry sem ela) ou None (todos).
+
+    Numa cadeia com vários ativos (universo), `group` traz o código do ativo de
+    cada linha: os segmentos ficam ordenados por (ativo, strike) e as buscas
+    recebem o ativo de cada alvo, resolvendo todos os ativos num único
+    searchsorted sobre a chave composta ativo x strike.
+    """
+
+    def __init__(self, strike, option_type, expiry=None, spot=None, group=None):
+        strike = np.asarray(strike, dtype=float)
+        option_type = np.asarray(option_type)
+        self.spot = spot          # escalar, ou um spot por ativo
+        self.n = len(strike)
+
+        codes = np.where(option_type == 'call', 1, np.where(option_type == 'put', 2, 0))
+        if expiry is not None:
+            expiry_codes, uniques = pd.factorize(np.asarray(expiry), sort=True)
+            self.expiries = list(uniques)
+        else:
+            expiry_codes, self.expiries = np.full(self.n, -1), []
+        group = np.zeros(self.n, dtype=np.intp) if group is None else np.asarray(group, dtype=np.intp)
+
+        # Chave composta: strike deslocado pelo ativo, com faixas disjuntas por ativo
+        valid = np.flatnonzero(np.isfinite(strike))
+        self._base = float(strike[valid].min()) if len(valid) else 0.0
+        self._span = float(strike[valid].max()) - self._base if len(valid) else 0.0
+        self._offset = self._span + 4.0
+
+        # Ordenações estáveis por (ativo, strike), com empate na ordem da cadeia; os
+        # segmentos por tipo e/ou vencimento saem fatiando a ordenação com essas chaves
+        # à frente (uma ordenação por nível, não um filtro por vencimento)
+        self._segments = {}
+        for by_type in (False, True):
+            for by_expiry in (False, True):
+                leading = ([expiry_codes[valid]] if by_expiry else []) + ([codes[valid]] if by_type else [])
+                order = valid[np.lexsort([strike[valid], group[valid]] + leading)]
+                type_keys = codes[order] if by_type else np.zeros(len(order), dtype=int)
+                expiry_keys = expiry_codes[order] if by_expiry else np.full(len(order), -1)
+                bounds = np.flatnonzero((np.diff(type_keys) != 0) | (np.diff(expiry_keys) != 0)) + 1
+                groups = group[order]
+                columns = (order, strike[order], groups, (strike[order] - self._base) + groups * self._offset)
+                for segment in zip(*(np.split(c, bounds) for c in columns)) if len(order) else ():
+                    first = segment[0][0]
+                    code = int(codes[first]) if by_type else 0
+                    e = int(expiry_codes[first]) if by_expiry else -1
+                    if (by_expiry and e < 0) or (by_type and code == 0):
+                        continue      # sem vencimento / sem tipo: só nos segmentos gerais
+                    self._segments[(code, self.expiries[e] if by_expiry else None)] = segment
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, spot: Optional[float] = None) -> 'StrikeIndex':
+        """Índice de uma cadeia normalizada (colunas strike, type e expiry ou time_to_expiry)."""
+        expiry_col = 'expiry' if 'expiry' in df.columns else 'time_to_expiry' if 'time_to_expiry' in df.columns else None
+        return cls(df['strike'].to_numpy(dtype=float), df['type'].to_numpy(),
+                   df[expiry_col].to_numpy() if expiry_col else None, spot)
+
+    @classmethod
+    def from_records(cls, options: list, spot: Optional[float] = None) -> 'StrikeIndex':
+        """Índice de uma lista de opções (dicts com 'strike', 'type' e opcionalmente 'expiry')."""
+        has_expiry = any('expiry' in o for o in options)
+        return cls([o.get('strike', np.nan) for o in options], [o.get('type') for o in options],
+                   [o.get('expiry') for o in options] if has_expiry else None, spot)
+
+    _EMPTY = (np.empty(0, np.intp), np.empty(0), np.empty(0, np.intp), np.empty(0))
+
+    def _segment(self, option_type, expiry):
+        if option_type not in _TYPE_CODES:
+            raise ValueError(f"Unknown option_type: {option_type}")
+        return self._segments.get((_TYPE_CODES[option_type], expiry), self._EMPTY)
+
+    def _keys(self, target, group):
+        """Alvos na chave composta (limitados à faixa dos strikes para não invadir outro ativo)."""
+        t = np.atleast_1d(np.asarray(target, dtype=float))
+        if group is None:
+            g = np.zeros(len(t), dtype=np.intp)
+        else:
+            g = np.broadcast_to(np.asarray(group, dtype=np.intp), t.shape)
+        with np.errstate(invalid='ignore'):
+            key = np.clip(t - self._base, -1.0, self._span + 1.0) + g * self._offset
+        return t, g, key
+
+    def _range(self, option_type, expiry, group):
+        """Segmento inteiro, ou só a fatia de um ativo."""
+        positions, strikes, groups, _ = self._segment(option_type, expiry)
+        if group is None:
+            return positions, strikes
+        lo, hi = np.searchsorted(groups, group, side='left'), np.searchsorted(groups, group, side='right')
+        return positions[lo:hi], strikes[lo:hi]
+
+    def positions(self, option_type: Optional[str] = None, expiry=None, group: Optional[int] = None) -> np.ndarray:
+        """Posições do segmento, em ordem crescente de strike (por ativo)."""
+        return self._range(option_type, expiry, group)[0]
+
+    def strikes(self, option_type: Optional[str] = None, expiry=None, group: Optional[int] = None) -> np.ndarray:
+        """Strikes do segmento, ordenados."""
+        return self._range(option_type, expiry, group)[1]
+
+    @staticmethod
+    def _result(target, found: np.ndarray):
+        if np.ndim(target) == 0:
+            return int(found[0]) if found[0] >= 0 else None
+        return found
+
+    def nearest(self, target, option_type: Optional[str] = None, expiry=None, group=None):
+        """Strike mais próximo do alvo no mesmo ativo (empate: menor posição na cadeia)."""
+        positions, strikes, groups, keys = self._segment(option_type, expiry)
+        t, g, key = self._keys(target, group)
+        if not len(keys):
+            return self._result(target, np.full(len(t), -1, dtype=np.intp))
+        # Vizinhos de cima e de baixo, cada um no início da sua sequência de strikes
+        # iguais (a menor posição entre iguais); vizinho de outro ativo não conta
+        above = np.minimum(np.searchsorted(keys, key, side='left'), len(keys) - 1)
+        right = np.searchsorted(keys, keys[above], side='left')
+        left = np.searchsorted(keys, keys[np.maximum(right - 1, 0)], side='left')
+        d_left = np.where(groups[left] == g, np.abs(strikes[left] - t), np.inf)
+        d_right = np.where(groups[right] == g, np.abs(strikes[right] - t), np.inf)
+        pick = np.where((d_right < d_left) | ((d_right == d_left) & (positions[right] < positions[left])), right, left)
+        found = np.where(np.isfinite(t) & np.isfinite(np.minimum(d_left, d_right)), positions[pick], -1)
+        return self._result(target, found)
+
+    def at_or_above(self, target, option_type: Optional[str] = None, expiry=None, group=None):
+        """Menor strike >= alvo."""
+        positions, strikes, groups, keys = self._segment(option_type, expiry)
+        t, g, key = self._keys(target, group)
+        if not len(keys):
+            return self._result(target, np.full(len(t), -1, dtype=np.intp))
+        i = np.minimum(np.searchsorted(keys, key, side='left'), len(keys) - 1)
+        return self._result(target, np.where((strikes[i] >= t) & (groups[i] == g), positions[i], -1))
+
+    def at_or_below(self, target, option_type: Optional[str] = None, expiry=None, group=None):
+        """Maior strike <= alvo (empate: menor posição)."""
+        positions, strikes, groups, keys = self._segment(option_type, expiry)
+        t, g, key = self._keys(target, group)
+        if not len(keys):
+            return self._result(target, np.full(len(t), -1, dtype=np.intp))
+        i = np.maximum(np.searchsorted(keys, key, side='right') - 1, 0)
+        start = np.searchsorted(keys, keys[i], side='left')
+        return self._result(target, np.where((strikes[start] <= t) & (groups[start] == g), positions[start], -1))
+
+    def between(self, low: float, high: float, option_type: Optional[str] = None, expiry=None,
+                group: Optional[int] = None) -> np.ndarray:
+        """Posições com low <= strike <= high, em ordem de strike."""
+        positions, strikes = self._range(option_type, expiry, group)
+        return positions[np.searchsorted(strikes, low, side='left'):np.searchsorted(strikes, high, side='right')]
+
+    def atm(self, option_type: Optional[str] = None, expiry=None, group=None):
+        """Posição da opção no dinheiro (strike mais próximo do spot do ativo)."""
+        if self.spot is None:
+            raise ValueError("StrikeIndex built without spot")
+        spot = np.asarray(self.spot, dtype=float)
+        if spot.ndim == 0:
+            return self.nearest(float(spot), option_type, expiry, group)
+        if group is None:
+            group = np.arange(len(spot))
+        return self.nearest(spot[group], option_type, expiry, group)
@@ -0,0 +1,542 @@
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from app.core.filter_specs import INF, ANY_BAND, LegFilter
+
+# Tolerância de comparação de strikes (float) nas faixas de largura
+_EPS = 1e-9
+
+
+def _band_pairs(ka: np.ndarray, kb: np.ndarray, lo: float, hi: float) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Todos os pares (ia, ib) com lo <= kb[ib] - ka[ia] <= hi, para ka e kb ordenados.
+
+    Para cada strike de `ka` a faixa válida de `kb` sai de dois searchsorted; os
+    pares são gerados direto dessas faixas (custo proporcional aos pares válidos,
+    não ao produto len(ka) x len(kb)).
+    """
+    start = np.searchsorted(kb, ka + lo - _EPS, side='left')
+    end = np.searchsorted(kb, ka + hi + _EPS, side='right')
+    counts = np.maximum(end - start, 0)
+    total = int(counts.sum())
+    ia = np.repeat(np.arange(len(ka)), counts)
+    offsets = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+    return ia, np.repeat(start, counts) + offsets
+
+
+def _top(score: np.ndarray, k: int) -> np.ndarray:
+    """Índices dos k maiores scores (NaN por último), em ordem decrescente."""
+    score = np.where(np.isnan(score), -np.inf, score)
+    if k < len(score):
+        candidates = np.argpartition(-score, k - 1)[:k]
+    else:
+        candidates = np.arange(len(score))
+    return candidates[np.argsort(-score[candidates], kind='stable')]
+
+
+def _symbols(ctx) -> np.ndarray:
+    df = ctx.df
+    return df['symbol'].to_numpy() if 'symbol' in df.columns else np.full(ctx.n, '', dtype=object)
+
+
+def structure_quotes(ctx, positions: np.ndarray, quantity: np.ndarray, premium: np.ndarray) -> dict:
+    """
+    Colunas-resumo de estruturas (m x pernas): bid/ask são os preços naturais
+    no sentido do sinal, mid o prêmio líquido, volume o da perna menos líquida,
+    delta o líquido e iv a média das pernas com IV. Posição -1 marca perna
+    ausente (lotes com estruturas de tamanhos diferentes, ver SignalBatch).
+    """
+    legs = positions >= 0
+    pos = np.where(legs, positions, 0)
+    q = np.where(legs, np.broadcast_to(quantity, positions.shape), 0.0)
+    bid, ask = ctx.bid[pos], ctx.ask[pos]
+    iv = ctx.iv[pos]
+    has_iv = legs & np.isfinite(iv)
+    n_iv = has_iv.sum(axis=1)
+
+    # Pacote comprado: paga ask nas compradas e recebe bid nas vendidas; crédito inverte o sinal
+    natural_ask = np.where(legs, np.where(q > 0, q * ask, q * bid), 0.0).sum(axis=1)
+    natural_bid = np.where(legs, np.where(q > 0, q * bid, q * ask), 0.0).sum(axis=1)
+    credit = premium > 0
+    return {
+        'time_to_expiry': ctx.time_to_expiry[pos[:, 0]],
+        'bid': np.where(credit, -natural_ask, natural_bid),
+        'ask': np.where(credit, -natural_bid, natural_ask),
+        'mid': np.abs(premium),
+        'volume': np.where(legs, ctx.volume[pos], np.inf).min(axis=1),
+        'delta': np.where(legs, ctx.delta[pos] * q, 0.0).sum(axis=1),
+        'iv': np.where(n_iv > 0, np.where(has_iv, iv, 0.0).sum(axis=1) / np.maximum(n_iv, 1), np.nan),
+    }
+
+
+def leg_records(ctx, positions: np.ndarray, quantity: np.ndarray) -> list:
+    """Pernas de cada estrutura como dicts (formato 'legs' do sinal); ignora posições -1."""
+    symbols = _symbols(ctx)
+    types = np.where(ctx.is_call, 'call', np.where(ctx.is_put, 'put', ''))
+    quantity = np.broadcast_to(quantity, positions.shape)
+    return [
+        [{
+            'symbol': symbols[p], 'strike': float(ctx.strike[p]), 'type': types[p],
+            'action': 'BUY' if qty > 0 else 'SELL', 'quantity': float(qty),
+            'bid': float(ctx.bid[p]), 'ask': float(ctx.ask[p]), 'volume': float(ctx.volume[p]),
+            'delta': float(ctx.delta[p]), 'iv': float(ctx.iv[p]), 'price': float(ctx.mid[p]),
+            'time_to_expiry': float(ctx.time_to_expiry[p]),
+        } for p, qty in zip(row, q) if p >= 0]
+        for row, q in zip(positions, quantity)
+    ]
+
+
+@dataclass
+class StructureSet:
+    """
+    Estruturas encontradas: uma linha por combinação de pernas.
+
+    positions indexa ctx.df.iloc (m x pernas); quantity é a quantidade com sinal
+    de cada perna (+ compra, - venda). premium é o crédito (> 0) ou débito (< 0)
+    pelo mid; max_loss = inf quando o risco é ilimitado.
+    """
+    kind: str
+    quantity: np.ndarray
+    positions: np.ndarray
+    premium: np.ndarray
+    width: np.ndarray
+    max_loss: np.ndarray
+    score: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.positions)
+
+    @classmethod
+    def empty(cls, kind: str, quantity) -> 'StructureSet':
+        quantity = np.asarray(quantity, dtype=float)
+        return cls(kind, quantity, np.empty((0, len(quantity)), dtype=np.intp), *(np.empty(0) for _ in range(4)))
+
+    def subset(self, index) -> 'StructureSet':
+        return StructureSet(self.kind, self.quantity, self.positions[index], self.premium[index],
+                            self.width[index], self.max_loss[index], self.score[index])
+
+    @classmethod
+    def concat(cls, kind: str, quantity, parts: List['StructureSet']) -> 'StructureSet':
+        parts = [p for p in parts if len(p)]
+        if not parts:
+            return cls.empty(kind, quantity)
+        return cls(kind, np.asarray(quantity, dtype=float), np.concatenate([p.positions for p in parts]),
+                   *(np.concatenate([getattr(p, f) for p in parts]) for f in ('premium', 'width', 'max_loss', 'score')))
+
+    def top(self, k: int) -> 'StructureSet':
+        return self.subset(_top(self.score, k)) if len(self) else self
+
+    def top_per_group(self, k: int, group: np.ndarray) -> 'StructureSet':
+        """As k melhores de cada ativo (group: código do ativo de cada estrutura)."""
+        if not len(self):
+            return self
+        score = np.where(np.isnan(self.score), -np.inf, self.score)
+        order = np.lexsort((-score, group))
+        sorted_group = group[order]
+        starts = np.searchsorted(sorted_group, sorted_group, side='left')
+        return self.subset(order[np.arange(len(order)) - starts < k])
+
+    def to_frame(self, ctx, **labels) -> pd.DataFrame:
+        """
+        Uma linha-resumo por estrutura, no formato de sinal do scanner: 'legs'
+        traz as pernas (com quantidade), bid/ask são os preços naturais da
+        estrutura no sentido do sinal, volume é o da perna menos líquida.
+        """
+        if not len(self):
+            return pd.DataFrame()
+        symbols = _symbols(ctx)
+        pos = self.positions
+        quotes = structure_quotes(ctx, pos, self.quantity, self.premium)
+        frame = pd.DataFrame({
+            'symbol': ['/'.join(symbols[row]) for row in pos],
+            'type': 'structure',
+            'structure': self.kind,
+            'strike': np.nan,
+            **{key: quotes[key] for key in ('time_to_expiry', 'bid', 'ask', 'mid')},
+            'net_premium': self.premium,
+            'width': self.width,
+            **{key: quotes[key] for key in ('volume', 'delta', 'iv')},
+            'structure_score': self.score,
+            'legs': leg_records(ctx, pos, self.quantity),
+            **({'underlying': np.asarray(ctx.groups, dtype=object)[ctx.group_codes[pos[:, 0]]]} if ctx.is_universe else {}),
+            **{key: value for key, value in labels.items() if value is not None},
+        })
+        return frame
+
+
+class StructureSpec:
+    """
+    Base das buscas de estrutura: pernas candidatas vêm das LegFilters (avaliadas
+    no FilterProgram compartilhado do ChainContext), agrupadas por vencimento e
+    ordenadas por strike; cada subclasse combina essas listas sem produto cartesiano
+    completo e devolve um StructureSet.
+    """
+    kind: str = 'structure'
+    quantity: tuple = ()
+
+    @property
+    def leg_specs(self) -> tuple:
+        raise NotImplementedError
+
+    def _search_expiry(self, ctx, legs: List[np.ndarray], top_k: Optional[int], spot: float) -> StructureSet:
+        raise NotImplementedError
+
+    def search(self, ctx, top_k: Optional[int] = None) -> StructureSet:
+        """
+        Estruturas válidas de todos os vencimentos; com top_k, só as melhores por
+        score (por ativo, no universo: cada grupo de vencimento é de um só ativo).
+        """
+        masks = [ctx.spec_mask(spec) for spec in self.leg_specs]
+        parts = []
+        for group in ctx.expiry_groups.values():
+            legs = [group[mask[group]] for mask in masks]
+            if all(len(leg) for leg in legs):
+                part = self._search_expiry(ctx, legs, top_k, ctx.spot_row[group[0]])
+                parts.append(part.top(top_k) if top_k is not None else part)
+        found = StructureSet.concat(self.kind, self.quantity, parts)
+        if top_k is None:
+            return found
+        if ctx.is_universe:
+            return found.top_per_group(top_k, ctx.group_codes[found.positions[:, 0]])
+        return found.top(top_k)
+
+    @staticmethod
+    def _reward_risk(max_profit, max_loss):
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(max_loss > 0, max_profit / max_loss, np.nan)
+
+    @staticmethod
+    def _best_cells(score: np.ndarray, top_k: Optional[int]):
+        """Células (linha, coluna) da matriz de combinações com score válido, só as top_k se dado."""
+        flat = score.ravel()
+        best = _top(flat, top_k if top_k is not None else flat.size)
+        return np.unravel_index(best[np.isfinite(flat[best])], score.shape)
+
+
+@dataclass(frozen=True)
+class VerticalSpread(StructureSpec):
+    """
+    Trava vertical (mesmo tipo, mesmo vencimento): compra `long_leg`, vende
+    `short_leg`. Serve para débito (trava de alta com call, de baixa com put) e
+    crédito. width é a distância entre strikes em fração do spot (positiva se a
+    vendida está acima). Score: lucro máximo / perda máxima.
+    """
+    long_leg: LegFilter
+    short_leg: LegFilter
+    width: Tuple[float, float] = ANY_BAND
+    max_debit_ratio: float = 1.0     # débito / largura
+    min_credit_ratio: float = 0.0    # crédito / largura
+    kind = 'vertical'
+    quantity = (1.0, -1.0)
+
+    @property
+    def leg_specs(self) -> tuple:
+        return (self.long_leg, self.short_leg)
+
+    def _search_expiry(self, ctx, legs, top_k, spot) -> StructureSet:
+        long_pos, short_pos = legs
+        lo, hi = (w * spot for w in self.width)
+        i, j = _band_pairs(ctx.strike[long_pos], ctx.strike[short_pos], lo, hi)
+        pl, ps = long_pos[i], short_pos[j]
+        width = np.abs(ctx.strike[ps] - ctx.strike[pl])
+        premium = ctx.mid[ps] - ctx.mid[pl]
+        debit = -premium
+        max_loss = np.where(premium < 0, debit, width - premium)
+        max_profit = np.where(premium < 0, width - debit, premium)
+        valid = (width > 0) & (max_loss > 0) & (max_profit > 0) & np.where(
+            premium < 0, debit <= self.max_debit_ratio * width, premium >= self.min_credit_ratio * width)
+        keep = np.flatnonzero(valid)
+        return StructureSet(self.kind, np.array(self.quantity), np.column_stack([pl, ps])[keep], premium[keep],
+                            width[keep], max_loss[keep], self._reward_risk(max_profit, max_loss)[keep])
+
+
+@dataclass(frozen=True)
+class Strangle(StructureSpec):
+    """
+    Call e put de strikes diferentes no mesmo vencimento (compra ou venda).
+    Comprado: score = -(meia-distância entre breakevens) / spot (movimento mais
+    barato de capturar). Vendido (risco ilimitado): score = crédito / spot.
+    width limita Kcall - Kput em fração do spot; (0, 0) é o straddle (call e
+    put do mesmo strike).
+
+    O score é soma de um termo da call e um da put, então cada lado é podado às
+    `beam` melhores pernas antes do cruzamento (exato para top_k <= beam quando
+    width não restringe). No straddle não há poda: o join por strike já é linear.
+    """
+    call_leg: LegFilter
+    put_leg: LegFilter
+    short: bool = False
+    width: Tuple[float, float] = (0.0, INF)
+    beam: int = 64
+
+    @property
+    def straddle(self) -> bool:
+        return self.width == (0.0, 0.0)
+
+    @property
+    def kind(self) -> str:
+        kind = 'straddle' if self.straddle else 'strangle'
+        return 'short_' + kind if self.short else kind
+
+    @property
+    def quantity(self) -> tuple:
+        return (-1.0, -1.0) if self.short else (1.0, 1.0)
+
+    @property
+    def leg_specs(self) -> tuple:
+        return (self.call_leg, self.put_leg)
+
+    def _side(self, ctx, positions, sign, spot) -> np.ndarray:
+        # Termo do lado no score: vendido = prêmio; comprado = -(distância do strike + 2 x prêmio)
+        mid = ctx.mid[positions]
+        term = mid if self.short else -(sign * (ctx.strike[positions] - spot) + 2 * mid)
+        term = np.where(mid > 0, term, np.nan)
+        return positions[np.sort(_top(term, len(positions) if self.straddle else self.beam))]
+
+    def _search_expiry(self, ctx, legs, top_k, spot) -> StructureSet:
+        call_pos, put_pos = self._side(ctx, legs[0], 1.0, spot), self._side(ctx, legs[1], -1.0, spot)
+        lo, hi = (w * spot for w in self.width)
+        i, j = _band_pairs(ctx.strike[put_pos], ctx.strike[call_pos], lo, hi)
+        pp, pc = put_pos[i], call_pos[j]
+        width = ctx.strike[pc] - ctx.strike[pp]
+        cost = ctx.mid[pc] + ctx.mid[pp]
+        if self.short:
+            premium, max_loss, score = cost, np.full(len(cost), INF), cost / spot
+        else:
+            premium, max_loss, score = -cost, cost, -(width + 2 * cost) / (2 * spot)
+        keep = np.flatnonzero(cost > 0)
+        return StructureSet(self.kind, np.array(self.quantity), np.column_stack([pc, pp])[keep], premium[keep],
+                            width[keep], max_loss[keep], score[keep])
+
+
+@dataclass(frozen=True)
+class Butterfly(StructureSpec):
+    """
+    Borboleta 1-2-1 de asas simétricas: corpo em `body_leg`, asas em `wing_leg`
+    a ±largura do corpo (strike exato na grade). Score: lucro máximo / débito.
+    """
+    body_leg: LegFilter
+    wing_leg: LegFilter
+    width: Tuple[float, float] = (0.0, INF)
+    max_debit_ratio: float = 1.0
+    kind = 'butterfly'
+    quantity = (1.0, -2.0, 1.0)
+
+    @property
+    def leg_specs(self) -> tuple:
+        return (self.body_leg, self.wing_leg)
+
+    def _search_expiry(self, ctx, legs, top_k, spot) -> StructureSet:
+        body_pos, wing_pos = legs
+        kb, kw = ctx.strike[body_pos], ctx.strike[wing_pos]
+        lo, hi = (w * spot for w in self.width)
+        # Asa inferior a [lo, hi] abaixo do corpo; a superior precisa estar no strike espelhado
+        i, j = _band_pairs(kb, kw, -hi, -lo)
+        mirror = 2 * kb[i] - kw[j]
+        k = np.clip(np.searchsorted(kw, mirror - _EPS), 0, max(len(kw) - 1, 0))
+        exact = np.abs(kw[k] - mirror) <= 1e-6 if len(kw) else np.zeros(len(i), dtype=bool)
+        i, j, k = i[exact], j[exact], k[exact]
+        p1, p2, p3 = wing_pos[j], body_pos[i], wing_pos[k]
+        width = ctx.strike[p2] - ctx.strike[p1]
+        premium = 2 * ctx.mid[p2] - ctx.mid[p1] - ctx.mid[p3]
+        debit = -premium
+        valid = (width > 0) & (debit > 0) & (debit <= self.max_debit_ratio * width)
+        keep = np.flatnonzero(valid)
+        return StructureSet(self.kind, np.array(self.quantity), np.column_stack([p1, p2, p3])[keep], premium[keep],
+                            width[keep], debit[keep], self._reward_risk(width - debit, debit)[keep])
+
+
+def _credit_spreads(ctx, short_pos, long_pos, lo, hi, beam):
+    """
+    Travas de crédito de um lado (vendida mais perto do dinheiro, comprada mais
+    longe), filtradas por crédito > 0 e reduzidas às `beam` melhores por
+    crédito / risco. lo, hi: distância com sinal kb - ka (comprada - vendida).
+    """
+    i, j = _band_pairs(ctx.strike[short_pos], ctx.strike[long_pos], lo, hi)
+    ps, pl = short_pos[i], long_pos[j]
+    width = np.abs(ctx.strike[pl] - ctx.strike[ps])
+    credit = ctx.mid[ps] - ctx.mid[pl]
+    keep = np.flatnonzero((width > 0) & (credit > 0) & (credit < width))
+    ps, pl, width, credit = ps[keep], pl[keep], width[keep], credit[keep]
+    best = _top(credit / (width - credit), beam)
+    return ps[best], pl[best], width[best], credit[best]
+
+
+@dataclass(frozen=True)
+class IronCondor(StructureSpec):
+    """
+    Trava de crédito com put + trava de crédito com call, vendidas OTM.
+
+    Cada lado é enumerado por faixa de largura (O(n · asas)) e podado por
+    crédito; os `beam` melhores de cada lado são combinados por broadcast com
+    a vendida de put abaixo da vendida de call. Score: crédito / perda máxima.
+    """
+    short_put: LegFilter
+    long_put: LegFilter
+    short_call: LegFilter
+    long_call: LegFilter
+    width: Tuple[float, float] = ANY_BAND     # largura de cada asa (fração do spot)
+    min_credit_ratio: float = 0.0             # crédito total / asa mais larga
+    beam: int = 128
+    kind = 'iron_condor'
+    quantity = (1.0, -1.0, -1.0, 1.0)
+
+    @property
+    def leg_specs(self) -> tuple:
+        return (self.long_put, self.short_put, self.short_call, self.long_call)
+
+    @staticmethod
+    def _bodies(put_strike, call_strike):
+        # Vendida de put abaixo da vendida de call
+        return put_strike < call_strike
+
+    def _search_expiry(self, ctx, legs, top_k, spot) -> StructureSet:
+        long_put, short_put, short_call, long_call = legs
+        lo, hi = (w * spot for w in self.width)
+        sp, lp, wp, cp = _credit_spreads(ctx, short_put, long_put, -hi, -lo, self.beam)
+        sc, lc, wc, cc = _credit_spreads(ctx, short_call, long_call, lo, hi, self.beam)
+
+        # (lado put) x (lado call)
+        credit = cp[:, None] + cc[None, :]
+        width = np.maximum(wp[:, None], wc[None, :])
+        max_loss = width - credit
+        valid = (self._bodies(ctx.strike[sp][:, None], ctx.strike[sc][None, :])
+                 & (max_loss > 0) & (credit >= self.min_credit_ratio * width))
+        score = np.where(valid, self._reward_risk(credit, max_loss), np.nan)
+        a, b = self._best_cells(score, top_k)
+        positions = np.column_stack([lp[a], sp[a], sc[b], lc[b]])
+        return StructureSet(self.kind, np.array(self.quantity), positions, credit[a, b], width[a, b],
+                            max_loss[a, b], score[a, b])
+
+
+@dataclass(frozen=True)
+class IronButterfly(IronCondor):
+    """
+    Iron condor com a put e a call vendidas no mesmo strike (straddle vendido
+    protegido por um strangle comprado). Mesma busca por lado e mesmo score;
+    só a combinação exige corpos iguais.
+    """
+    kind = 'iron_butterfly'
+
+    @staticmethod
+    def _bodies(put_strike, call_strike):
+        return np.abs(call_strike - put_strike) <= 1e-6
+
+
+@dataclass(frozen=True)
+class JadeLizard(StructureSpec):
+    """
+    Put vendida + trava de crédito com call, com crédito total >= largura da
+    trava (sem risco na alta). A perda máxima é a da put (ativo a zero) menos o
+    crédito. Score: crédito / perda máxima.
+    """
+    short_put: LegFilter
+    short_call: LegFilter
+    long_call: LegFilter
+    width: Tuple[float, float] = ANY_BAND     # largura da trava de call (fração do spot)
+    beam: int = 128
+    kind = 'jade_lizard'
+    quantity = (-1.0, -1.0, 1.0)
+
+    @property
+    def leg_specs(self) -> tuple:
+        return (self.short_put, self.short_call, self.long_call)
+
+    def _search_expiry(self, ctx, legs, top_k, spot) -> StructureSet:
+        short_put, short_call, long_call = legs
+        lo, hi = (w * spot for w in self.width)
+        sc, lc, wc, cc = _credit_spreads(ctx, short_call, long_call, lo, hi, self.beam)
+        puts = short_put[np.isfinite(ctx.mid[short_put]) & (ctx.mid[short_put] > 0)]
+
+        credit = ctx.mid[puts][:, None] + cc[None, :]
+        max_loss = ctx.strike[puts][:, None] - credit
+        valid = ((ctx.strike[puts][:, None] < ctx.strike[sc][None, :])
+                 & (credit >= wc[None, :]) & (max_loss > 0))
+        score = np.where(valid, self._reward_risk(credit, max_loss), np.nan)
+        a, b = self._best_cells(score, top_k)
+        positions = np.column_stack([puts[a], sc[b], lc[b]])
+        return StructureSet(self.kind, np.array(self.quantity), positions, credit[a, b], wc[b], max_loss[a, b], score[a, b])
+
+
+@dataclass(frozen=True)
+class TimeSpread(StructureSpec):
+    """
+    Trava de calendário / diagonal: vende `near_leg` num vencimento e compra
+    `far_leg` (mesmo tipo) num vencimento posterior do mesmo ativo.
+    strike_offset limita Klonga - Kcurta em fração do spot: (0, 0) é o
+    calendário (mesmo strike); uma faixa negativa em calls é a diagonal PMCC.
+
+    Todos os pares de vencimentos saem de um único join: as longas ordenadas
+    pela chave composta (ativo, tipo, strike) e, para cada curta, a faixa de
+    strikes por searchsorted (_band_pairs), mantidos os pares com a longa
+    vencendo depois. Score: theta líquido por dia sobre o débito,
+    (|θcurta| - |θlonga|) / débito, ponderado pela estrutura a termo da IV
+    (IVcurta / IVlonga); exige theta_ratio = |θcurta| / |θlonga| >=
+    min_theta_ratio. Sem theta na cadeia, |θ| ≈ mid / (2 T) por dia (ATM).
+    """
+    near_leg: LegFilter
+    far_leg: LegFilter
+    strike_offset: Tuple[float, float] = (0.0, 0.0)
+    min_theta_ratio: float = 1.0
+    quantity = (-1.0, 1.0)
+
+    @property
+    def kind(self) -> str:
+        return 'calendar' if self.strike_offset == (0.0, 0.0) else 'diagonal'
+
+    @property
+    def leg_specs(self) -> tuple:
+        return (self.near_leg, self.far_leg)
+
+    def search(self, ctx, top_k: Optional[int] = None) -> StructureSet:
+        near = ctx.positions(ctx.spec_mask(self.near_leg))
+        far = ctx.positions(ctx.spec_mask(self.far_leg))
+        near = near[np.isfinite(ctx.strike[near]) & np.isfinite(ctx.time_to_expiry[near])]
+        far = far[np.isfinite(ctx.strike[far]) & np.isfinite(ctx.time_to_expiry[far])]
+        if not len(near) or not len(far):
+            return StructureSet.empty(self.kind, self.quantity)
+
+        # Chave composta: segmento (ativo, tipo) x strike, com faixas disjuntas por segmento
+        segment = ctx.group_codes * 2 + ctx.is_put
+        base = min(ctx.strike[near].min(), ctx.strike[far].min())
+        band = np.abs(np.asarray(self.strike_offset)).max() * np.nanmax(ctx.spot_row)
+        offset = max(ctx.strike[near].max(), ctx.strike[far].max()) - base + band + 1.0
+
+        def key(p):
+            return segment[p] * offset + (ctx.strike[p] - base)
+
+        far = far[np.argsort(key(far), kind='stable')]
+        spot = ctx.spot_row[near]
+        i, j = _band_pairs(key(near), key(far), self.strike_offset[0] * spot, self.strike_offset[1] * spot)
+        pn, pf = near[i], far[j]
+        later = ctx.time_to_expiry[pf] > ctx.time_to_expiry[pn]
+        pn, pf = pn[later], pf[later]
+
+        t_near, t_far = ctx.time_to_expiry[pn], ctx.time_to_expiry[pf]
+        mid_near, mid_far = ctx.mid[pn], ctx.mid[pf]
+        theta_near, theta_far = np.abs(ctx.theta[pn]), np.abs(ctx.theta[pf])
+        with np.errstate(divide='ignore', invalid='ignore'):
+            proxy = ~(np.isfinite(theta_near) & np.isfinite(theta_far))
+            theta_near = np.where(proxy, mid_near / (2 * t_near * 365.0), theta_near)
+            theta_far = np.where(proxy, mid_far / (2 * t_far * 365.0), theta_far)
+            theta_ratio = theta_near / theta_far
+            term = np.where(np.isfinite(ctx.iv[pn] / ctx.iv[pf]), ctx.iv[pn] / ctx.iv[pf], 1.0)
+            premium = mid_near - mid_far
+            debit = -premium
+            score = (theta_near - theta_far) / debit * term
+
+        # Perda máxima: o débito, mais a diferença de strikes quando a longa fica fora da curta
+        gap = np.where(ctx.is_call[pn], ctx.strike[pf] - ctx.strike[pn], ctx.strike[pn] - ctx.strike[pf])
+        max_loss = debit + np.maximum(gap, 0.0)
+        valid = (mid_near > 0) & (debit > 0) & (theta_ratio >= self.min_theta_ratio) & np.isfinite(score)
+        keep = np.flatnonzero(valid)
+        found = StructureSet(self.kind, np.array(self.quantity), np.column_stack([pn, pf])[keep], premium[keep],
+                             np.abs(ctx.strike[pf] - ctx.strike[pn])[keep], max_loss[keep], score[keep])
+        if top_k is None:
+            return found
+        if ctx.is_universe:
+            return found.top_per_group(top_k, ctx.group_codes[found.positions[:, 0]])
+        return found.top(top_k)
@@ -5,10 +5,12 @@ Integra múltiplas fontes:
 - StatusInvest (cadeia de opções)
 - Yahoo Finance (cotações e histórico)
 - Redis (cache/fallback)
+- Barras intraday agregadas das cotações consultadas
 """
 
 from .real_time import B3RealData
 from .technicals import TechnicalIndicators
 from .cache import RedisCache, cache
+from .intraday import IntradayBarStore, intraday_store
 
-__all__ = ['B3RealData', 'TechnicalIndicators', 'RedisCache', 'cache']
+__all__ = ['B3RealData', 'TechnicalIndicators', 'RedisCache', 'cache', 'IntradayBarStore', 'intraday_store']
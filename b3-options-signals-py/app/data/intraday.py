@@ -0,0 +1,204 @@
+"""
+Barras intraday montadas a partir das cotações consultadas pelo worker.
+
+O worker consulta a cotação de cada ativo a cada 30s. Em vez de descartar esses
+dados, cada cotação alimenta barras OHLCV de 1 e 5 minutos guardadas em buffers
+circulares de tamanho fixo (memória constante por ativo).
+
+Cada barra é gravada duas vezes no array interno (posições i e i + capacidade),
+então as últimas N barras são sempre uma fatia contígua: os indicadores recebem
+views do NumPy, sem cópia.
+"""
+
+import time
+import logging
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Timeframes suportados: nome -> (segundos por barra, capacidade em barras)
+TIMEFRAMES = {
+    '1m': (60, 480),   # ~1 pregão completo
+    '5m': (300, 240),  # ~3 pregões
+}
+
+
+class BarRingBuffer:
+    """Buffer circular de barras OHLCV com memória fixa."""
+
+    FIELDS = ('timestamp', 'open', 'high', 'low', 'close', 'volume')
+
+    def __init__(self, interval: int, capacity: int):
+        self.interval = interval
+        self.capacity = capacity
+        # Uma linha por campo, 2x capacidade (espelho para views contíguas)
+        self._data = np.full((len(self.FIELDS), 2 * capacity), np.nan)
+        self._pos = -1    # posição da barra atual em [0, capacity)
+        self._count = 0   # barras já abertas (satura em capacity)
+        self._bucket = None
+
+    def __len__(self) -> int:
+        return self._count
+
+    def update(self, timestamp: float, price: float, volume: float = 0.0) -> bool:
+        """
+        Agrega uma cotação na barra corrente ou abre uma barra nova.
+
+        Cotações fora de ordem (anteriores à barra atual) são ignoradas.
+
+        Returns:
+            True se a cotação foi incorporada
+        """
+        bucket = timestamp - (timestamp % self.interval)
+
+        if self._bucket is None or bucket > self._bucket:
+            self._pos = (self._pos + 1) % self.capacity
+            self._count = min(self._count + 1, self.capacity)
+            self._bucket = bucket
+            self._write(bucket, price, price, price, price, volume)
+            return True
+
+        if bucket < self._bucket:
+            return False
+
+        i = self._pos
+        row = self._data[:, i]
+        self._write(bucket, row[1], max(row[2], price), min(row[3], price), price, row[5] + volume)
+        return True
+
+    def _write(self, bucket, open_, high, low, close, volume):
+        values = (bucket, open_, high, low, close, volume)
+        self._data[:, self._pos] = values
+        self._data[:, self._pos + self.capacity] = values
+
+    def view(self, field: str, n: Optional[int] = None) -> np.ndarray:
+        """
+        Últimas n barras (mais antiga primeiro) de um campo, sem cópia.
+
+        A view é somente leitura e continua válida até a próxima barra nova.
+        """
+        available = self._count if n is None else min(n, self._count)
+        end = self._pos + self.capacity + 1
+        out = self._data[self.FIELDS.index(field), end - available:end]
+        out.flags.writeable = False
+        return out
+
+    def to_frame(self, n: Optional[int] = None) -> pd.DataFrame:
+        """DataFrame OHLCV (cópia) no formato do histórico do Yahoo, para depuração."""
+        df = pd.DataFrame({
+            f.capitalize(): np.array(self.view(f, n)) for f in self.FIELDS[1:]
+        })
+        df.index = pd.to_datetime(self.view('timestamp', n), unit='s')
+        return df
+
+
+def rsi(close: np.ndarray, period: int = 14) -> Optional[float]:
+    """RSI de Wilder sobre um array de fechamentos (None se houver poucas barras)."""
+    if len(close) <= period:
+        return None
+
+    delta = np.diff(close)
+    gain = pd.Series(np.clip(delta, 0, None), copy=False)
+    loss = pd.Series(np.clip(-delta, 0, None), copy=False)
+    avg_gain = gain.ewm(alpha=1 / period, adjust=False).mean().iloc[-1]
+    avg_loss = loss.ewm(alpha=1 / period, adjust=False).mean().iloc[-1]
+
+    if avg_loss == 0:
+        return 100.0 if avg_gain > 0 else 50.0
+    return float(100 - 100 / (1 + avg_gain / avg_loss))
+
+
+def bollinger(close: np.ndarray, period: int = 20, std: float = 2.0) -> Optional[Dict]:
+    """Bandas de Bollinger da última barra, no mesmo formato de TechnicalIndicators."""
+    if len(close) < period:
+        return None
+
+    window = close[-period:]
+    middle = float(window.mean())
+    dev = float(window.std())
+    upper = middle + std * dev
+    lower = middle - std * dev
+    current = float(close[-1])
+
+    bandwidth = ((upper - lower) / middle) * 100 if middle else 0.0
+    position = ((current - lower) / (upper - lower)) * 100 if upper > lower else 50.0
+
+    return {
+        'upper': upper,
+        'middle': middle,
+        'lower': lower,
+        'bandwidth': bandwidth,
+        'position': position,
+        'squeeze': bandwidth < 10
+    }
+
+
+class IntradayBarStore:
+    """Mantém os buffers de barras intraday de todos os ativos consultados."""
+
+    def __init__(self, timeframes: Dict = None):
+        self.timeframes = timeframes or TIMEFRAMES
+        self._buffers: Dict[str, Dict[str, BarRingBuffer]] = {}
+        # Volume diário acumulado da última cotação (o Yahoo devolve o acumulado)
+        self._last_volume: Dict[str, float] = {}
+
+    def add_quote(self, ticker: str, price: float, cumulative_volume: float = 0.0,
+                  timestamp: Optional[float] = None):
+        """
+        Incorpora uma cotação consultada às barras do ativo.
+
+        Args:
+            ticker: Ticker do ativo
+            price: Último preço
+            cumulative_volume: Volume acumulado do dia (como vem em get_cotacao)
+            timestamp: Epoch em segundos (padrão: agora)
+        """
+        if price is None or not np.isfinite(price) or price <= 0:
+            return
+
+        timestamp = time.time() if timestamp is None else timestamp
+        buffers = self._buffers.get(ticker)
+        if buffers is None:
+            buffers = {
+                name: BarRingBuffer(interval, capacity)
+                for name, (interval, capacity) in self.timeframes.items()
+            }
+            self._buffers[ticker] = buffers
+
+        # Volume incremental; acumulado menor que o anterior indica novo pregão
+        last = self._last_volume.get(ticker)
+        volume = cumulative_volume - last if last is not None and cumulative_volume >= last else 0.0
+        self._last_volume[ticker] = cumulative_volume
+
+        for buffer in buffers.values():
+            buffer.update(timestamp, price, volume)
+
+    def bars(self, ticker: str, timeframe: str = '1m') -> Optional[BarRingBuffer]:
+        """Buffer de barras do ativo no timeframe pedido (None se nunca consultado)."""
+        return self._buffers.get(ticker, {}).get(timeframe)
+
+    def indicators(self, ticker: str) -> Dict:
+        """
+        RSI e Bollinger intraday por timeframe, calculados sobre views dos buffers.
+
+        Timeframes sem barras suficientes ficam de fora do resultado.
+        """
+        result = {}
+        for name, buffer in self._buffers.get(ticker, {}).items():
+            close = buffer.view('close')
+            values = {'bars': len(buffer)}
+            rsi_value = rsi(close)
+            if rsi_value is not None:
+                values['rsi'] = rsi_value
+            bb = bollinger(close)
+            if bb is not None:
+                values['bollinger'] = bb
+            result[name] = values
+        return result
+
+
+# Instância global (alimentada pelo scanner a cada cotação)
+intraday_store = IntradayBarStore()
@@ -10,21 +10,61 @@ Fallback: Cache Redis com TTL de 15 minutos
 """
 
 import httpx
+import numpy as np
 import pandas as pd
 from bs4 import BeautifulSoup
 from typing import Optional, Dict, List
 import asyncio
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Prazo usado quando o vencimento da opção é desconhecido (~1 mês útil)
+DEFAULT_TIME_TO_EXPIRY = 20 / 252
+
+
+def b3_expiry(symbol: str, today: Optional[date] = None) -> Optional[date]:
+    """
+    Vencimento de uma opção B3 pelo código (ex: PETRA300 -> janeiro): a 5ª letra
+    é o mês (A-L calls, M-X puts, de janeiro a dezembro) e o vencimento é a 3ª
+    sexta-feira do mês; o ano é o da próxima ocorrência a partir de hoje.
+    """
+    today = today or date.today()
+    letter = symbol[4:5].upper()
+    if not ('A' <= letter <= 'X'):
+        return None
+    month = (ord(letter) - ord('A')) % 12 + 1
+    for year in (today.year, today.year + 1):
+        first = date(year, month, 1)
+        third_friday = first + timedelta(days=(4 - first.weekday()) % 7 + 14)
+        if third_friday >= today:
+            return third_friday
+    return None
+
+
+def with_expiry(df: pd.DataFrame, expiries: List[Optional[date]], today: Optional[date] = None) -> pd.DataFrame:
+    """
+    Adiciona 'expiry' (ISO) e 'time_to_expiry' (dias úteis / 252, mínimo 1 dia)
+    à cadeia; sem vencimento conhecido a linha fica com o prazo padrão.
+    """
+    today = today or date.today()
+    known = np.array([e is not None for e in expiries], dtype=bool)
+    days = np.zeros(len(expiries))
+    if known.any():
+        days[known] = np.busday_count(today, np.array([e for e in expiries if e is not None], dtype='datetime64[D]'))
+    df['expiry'] = [e.isoformat() if e is not None else None for e in expiries]
+    df['time_to_expiry'] = np.where(known, np.maximum(days, 1) / 252, DEFAULT_TIME_TO_EXPIRY)
+    return df
+
 
 class B3RealData:
     """Cliente para buscar dados reais da B3."""
     
-    def __init__(self):
+    def __init__(self, max_expiries: int = 4):
         self.timeout = httpx.Timeout(10.0, connect=5.0)
+        # Vencimentos buscados no fallback (calendário/diagonal precisam de mais de um)
+        self.max_expiries = max_expiries
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
         }
@@ -37,7 +77,8 @@ class B3RealData:
             ticker: Ticker do ativo (ex: PETR4)
             
         Returns:
-            DataFrame com colunas: ticker_opcao, tipo, strike, preco, delta, iv, volume
+            DataFrame com colunas: ticker_opcao, tipo, strike, preco, delta, iv, volume,
+            expiry e time_to_expiry (vencimento pelo código da opção)
         """
         logger.info(f"Buscando cadeia de opções para {ticker} no StatusInvest")
         
@@ -75,6 +116,7 @@ class B3RealData:
                 return await self._get_opcoes_yfinance(ticker)
             
             df = pd.DataFrame(opcoes_data)
+            df = with_expiry(df, [b3_expiry(symbol) for symbol in df['ticker_opcao']])
             logger.info(f"Encontradas {len(df)} opções para {ticker}")
             return df
             
@@ -116,27 +158,26 @@ class B3RealData:
         try:
             import yfinance as yf
             
-            stock = yf.Ticker(f"{ticker}.SA")
-            
-            # Pega próximas datas de vencimento
-            expirations = stock.options
-            if not expirations:
+            def fetch():
+                stock = yf.Ticker(f"{ticker}.SA")
+                # Próximos vencimentos (um option_chain por data), empilhados numa só cadeia
+                frames = []
+                for expiration in stock.options[:self.max_expiries]:
+                    opt_chain = stock.option_chain(expiration)
+                    for tipo, table in (('CALL', opt_chain.calls), ('PUT', opt_chain.puts)):
+                        frame = table.copy()
+                        frame['tipo'] = tipo
+                        frame['underlying'] = ticker
+                        frames.append(with_expiry(frame, [date.fromisoformat(expiration)] * len(frame)))
+                return frames
+            
+            # yfinance é síncrono: roda numa thread para não travar o event loop
+            frames = await asyncio.to_thread(fetch)
+            if not frames:
                 logger.warning(f"Nenhuma opção disponível no yfinance para {ticker}")
                 return pd.DataFrame()
             
-            # Pega primeira data de vencimento
-            opt_chain = stock.option_chain(expirations[0])
-            
-            # Combina calls e puts
-            calls = opt_chain.calls.copy()
-            calls['tipo'] = 'CALL'
-            calls['underlying'] = ticker
-            
-            puts = opt_chain.puts.copy()
-            puts['tipo'] = 'PUT'
-            puts['underlying'] = ticker
-            
-            df = pd.concat([calls, puts], ignore_index=True)
+            df = pd.concat(frames, ignore_index=True)
             
             # Renomeia colunas para padrão
             df = df.rename(columns={
@@ -144,14 +185,18 @@ class B3RealData:
                 'strike': 'strike',
                 'lastPrice': 'preco',
                 'volume': 'volume',
-                'impliedVolatility': 'iv'
+                'impliedVolatility': 'iv',
+                'openInterest': 'open_interest'
             })
             
             # Adiciona timestamp
             df['timestamp'] = datetime.now().isoformat()
             
-            # Seleciona colunas relevantes
-            df = df[['ticker_opcao', 'underlying', 'tipo', 'strike', 'preco', 'volume', 'iv', 'timestamp']]
+            # Seleciona colunas relevantes (bid/ask/OI quando o Yahoo informa)
+            colunas = ['ticker_opcao', 'underlying', 'tipo', 'strike', 'preco', 'volume', 'iv', 'timestamp',
+                       'expiry', 'time_to_expiry']
+            colunas += [c for c in ('bid', 'ask', 'open_interest') if c in df.columns]
+            df = df[colunas]
             
             logger.info(f"Encontradas {len(df)} opções via yfinance para {ticker}")
             return df
@@ -175,8 +220,9 @@ class B3RealData:
         try:
             import yfinance as yf
             
+            # yfinance é síncrono: roda numa thread para não travar o event loop
             stock = yf.Ticker(f"{ticker}.SA")
-            hist = stock.history(period="1d")
+            hist = await asyncio.to_thread(stock.history, period="1d")
             
             if hist.empty:
                 raise ValueError(f"Nenhum dado disponível para {ticker}")
@@ -221,7 +267,7 @@ class B3RealData:
             start_date = end_date - timedelta(days=days)
             
             stock = yf.Ticker(f"{ticker}.SA")
-            hist = stock.history(start=start_date, end=end_date)
+            hist = await asyncio.to_thread(stock.history, start=start_date, end=end_date)
             
             if hist.empty:
                 raise ValueError(f"Nenhum histórico disponível para {ticker}")
@@ -11,18 +11,58 @@ Usa TA-lib e pandas_ta para calcular:
 
 import pandas as pd
 import pandas_ta_classic as ta
-from typing import Dict, Optional
+from typing import Dict, Iterable, Optional, Set
 import logging
+import time
 from datetime import datetime
 
 logger = logging.getLogger(__name__)
 
 
+# Indicadores disponíveis e suas dependências. Pedir 'trend' implica calcular
+# 'sma'; 'signals' agrega RSI, MACD e Bollinger.
+INDICATOR_DEPENDENCIES = {
+    'rsi': (),
+    'macd': (),
+    'bollinger': (),
+    'sma': (),
+    'volume': (),
+    'trend': ('sma',),
+    'signals': ('rsi', 'macd', 'bollinger'),
+}
+
+ALL_INDICATORS = tuple(INDICATOR_DEPENDENCIES)
+
+
+def resolve_indicators(indicators: Iterable[str]) -> Set[str]:
+    """
+    Expande a lista de indicadores pedidos com suas dependências.
+    
+    Nomes desconhecidos são ignorados (com log) para que uma estratégia mal
+    declarada não derrube o scan.
+    """
+    resolved: Set[str] = set()
+    pending = list(indicators)
+    while pending:
+        name = pending.pop()
+        if name in resolved:
+            continue
+        if name not in INDICATOR_DEPENDENCIES:
+            logger.warning(f"Indicador desconhecido ignorado: {name}")
+            continue
+        resolved.add(name)
+        pending.extend(INDICATOR_DEPENDENCIES[name])
+    return resolved
+
+
 class TechnicalIndicators:
     """Calcula indicadores técnicos com dados reais."""
     
     def __init__(self):
-        self.cache = {}  # Cache simples em memória
+        # Cache em memória: ticker -> {'key', 'created', 'values'}
+        # 'key' identifica a última barra (timestamp, fechamento, tamanho), então
+        # o cache é invalidado assim que chega uma barra nova ou a barra atual muda.
+        self.cache = {}
         self.cache_ttl = 300  # 5 minutos
     
     async def calculate_all(self, df: pd.DataFrame, ticker: str) -> Dict:
@@ -36,49 +76,95 @@ class TechnicalIndicators:
         Returns:
             Dict com todos os indicadores calculados
         """
-        logger.info(f"Calculando indicadores técnicos para {ticker}")
+        return await self.calculate(df, ticker, ALL_INDICATORS)
+    
+    async def calculate(self, df: pd.DataFrame, ticker: str, indicators: Iterable[str]) -> Dict:
+        """
+        Calcula apenas os indicadores pedidos (e suas dependências).
+        
+        Os valores ficam memoizados por ticker e última barra: chamadas seguintes
+        com o mesmo histórico só calculam o que ainda não estiver no cache.
+        
+        Args:
+            df: DataFrame com OHLCV (histórico)
+            ticker: Ticker do ativo
+            indicators: Nomes dos indicadores (ver INDICATOR_DEPENDENCIES)
+            
+        Returns:
+            Dict com 'ticker', 'timestamp' e os indicadores pedidos
+        """
+        wanted = resolve_indicators(indicators)
         
         if df.empty or len(df) < 50:
             logger.warning(f"Dados insuficientes para calcular indicadores: {len(df)} linhas")
-            return self._get_default_indicators()
+            return self._select(self._get_default_indicators(), wanted)
         
-        try:
-            # Copia DataFrame para não modificar original
-            data = df.copy()
-            
-            # RSI
-            rsi = self._calculate_rsi(data)
-            
-            # MACD
-            macd_data = self._calculate_macd(data)
-            
-            # Bollinger Bands
-            bb_data = self._calculate_bollinger(data)
-            
-            # SMAs
-            sma_data = self._calculate_smas(data)
-            
-            # Volume analysis
-            volume_data = self._analyze_volume(data)
-            
-            indicators = {
-                'ticker': ticker,
-                'timestamp': datetime.now().isoformat(),
-                'rsi': rsi,
-                'macd': macd_data,
-                'bollinger': bb_data,
-                'sma': sma_data,
-                'volume': volume_data,
-                'trend': self._determine_trend(data, sma_data),
-                'signals': self._generate_signals(rsi, macd_data, bb_data)
+        values = self._cached_values(df, ticker)
+        missing = wanted - values.keys()
+        
+        if missing:
+            logger.info(f"Calculando indicadores para {ticker}: {sorted(missing)}")
+            try:
+                values.update(self._compute(df.copy(), missing, values))
+            except Exception as e:
+                logger.error(f"Erro ao calcular indicadores para {ticker}: {e}")
+                return self._select(self._get_default_indicators(), wanted)
+        
+        indicators_dict = self._select(values, wanted)
+        indicators_dict['ticker'] = ticker
+        
+        if 'rsi' in indicators_dict:
+            logger.info(f"Indicadores calculados para {ticker}: RSI={indicators_dict['rsi']:.1f}")
+        return indicators_dict
+    
+    def _cached_values(self, df: pd.DataFrame, ticker: str) -> Dict:
+        """Retorna os valores memoizados para a última barra de df (ou um dict vazio novo)."""
+        last_close = df['Close'].iloc[-1] if 'Close' in df.columns else None
+        key = (df.index[-1], last_close, len(df))
+        now = time.monotonic()
+        
+        entry = self.cache.get(ticker)
+        if entry is None or entry['key'] != key or now - entry['created'] > self.cache_ttl:
+            entry = {
+                'key': key,
+                'created': now,
+                'values': {'timestamp': datetime.now().isoformat()}
             }
-            
-            logger.info(f"Indicadores calculados para {ticker}: RSI={rsi:.1f}, Trend={indicators['trend']}")
-            return indicators
-            
-        except Exception as e:
-            logger.error(f"Erro ao calcular indicadores para {ticker}: {e}")
-            return self._get_default_indicators()
+            self.cache[ticker] = entry
+        return entry['values']
+    
+    def _compute(self, data: pd.DataFrame, names: Set[str], known: Dict) -> Dict:
+        """Calcula os indicadores em `names`, reaproveitando dependências já conhecidas."""
+        out = {}
+        
+        def get(name):
+            return out[name] if name in out else known[name]
+        
+        # Indicadores base primeiro, depois os derivados
+        if 'rsi' in names:
+            out['rsi'] = self._calculate_rsi(data)
+        if 'macd' in names:
+            out['macd'] = self._calculate_macd(data)
+        if 'bollinger' in names:
+            out['bollinger'] = self._calculate_bollinger(data)
+        if 'sma' in names:
+            out['sma'] = self._calculate_smas(data)
+        if 'volume' in names:
+            out['volume'] = self._analyze_volume(data)
+        if 'trend' in names:
+            out['trend'] = self._determine_trend(data, get('sma'))
+        if 'signals' in names:
+            out['signals'] = self._generate_signals(get('rsi'), get('macd'), get('bollinger'))
+        
+        return out
+    
+    @staticmethod
+    def _select(values: Dict, wanted: Set[str]) -> Dict:
+        """Filtra o dict de valores para os indicadores pedidos."""
+        selected = {'ticker': values.get('ticker', 'UNKNOWN'), 'timestamp': values.get('timestamp')}
+        for name in wanted:
+            selected[name] = values[name]
+        return selected
     
     def _calculate_rsi(self, df: pd.DataFrame, period: int = 14) -> float:
         """Calcula RSI."""
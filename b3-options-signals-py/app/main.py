@@ -1,7 +1,7 @@
 from fastapi import FastAPI, Request
 import os
 from fastapi.middleware.cors import CORSMiddleware
-from app.routers import options, signals, backtest, admin, health
+from app.routers import options, signals, backtest, admin, health, portfolio
 from slowapi import Limiter, _rate_limit_exceeded_handler
 from slowapi.util import get_remote_address
 from slowapi.errors import RateLimitExceeded
@@ -15,9 +15,12 @@ limiter = Limiter(key_func=get_remote_address)
 
 from contextlib import asynccontextmanager
 from app.worker import start_worker
+from app.services import kernels
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    # Compila/carrega do cache os kernels JIT (no-op sem numba)
+    kernels.warmup()
     # Inicia o worker de agendamento em background
     start_worker()
     yield
@@ -55,6 +58,7 @@ app.include_router(options.router)
 app.include_router(signals.router)
 app.include_router(backtest.router)
 app.include_router(admin.router)
+app.include_router(portfolio.router)
 
 @app.get("/")
 def read_root():
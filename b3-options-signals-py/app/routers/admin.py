@@ -1,5 +1,7 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query
 from app.services.alerts import alert_service
+from app.services.profiler import strategy_profiler
+from typing import Optional
 import os
 
 router = APIRouter(prefix="/admin", tags=["Admin"])
@@ -40,3 +42,18 @@ async def test_telegram_alert():
         "message": "Test alert sent! Check your Telegram.",
         "signal": test_signal
     }
+
+
+@router.get("/profile/strategies")
+async def strategy_profile(cycles: Optional[int] = Query(default=None, ge=1)):
+    """
+    Per-strategy execution profile of the last scan cycles (rolling window).
+
+    Wall time, options in, signals out, exceptions and (with PROFILE_MEMORY=true)
+    peak traced allocation, per strategy and per ticker, most expensive first;
+    `last_cycle.slowest` names the most expensive strategy of the latest scan.
+    `acquisition` has the data fetch stages (quote, history, chain) with
+    timeouts/fallbacks counted; `routing` has the strategy x ticker evaluations
+    run and skipped by the routing table's preconditions.
+    """
+    return strategy_profiler.summary(cycles)
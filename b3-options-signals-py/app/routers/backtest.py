@@ -1,6 +1,6 @@
 from fastapi import APIRouter, HTTPException, BackgroundTasks, Depends, Request
 from pydantic import BaseModel
-from typing import Optional, List
+from typing import Literal, Optional, List
 from app.core.backtester import VectorizedBacktester
 from app.services.scanner import scanner # Using scanner to access initialized strategies
 from app.core.auth import verify_token
@@ -12,6 +12,7 @@ class BacktestRequest(BaseModel):
     strategy_name: str
     days: int = 252
     initial_capital: float = 10000.0
+    pricing: Literal["exact", "grid"] = "exact" # precomputed lookup with "grid"
 
 @router.post("/run")
 async def run_backtest(
@@ -41,7 +42,8 @@ async def run_backtest(
         strategy=strategy,
         ticker=req.ticker.upper(),
         days=req.days,
-        initial_capital=req.initial_capital
+        initial_capital=req.initial_capital,
+        pricing=req.pricing
     )
     
     if "error" in result:
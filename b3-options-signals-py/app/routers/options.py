@@ -1,9 +1,30 @@
+import math
+from typing import List, Literal, Optional, Union
+import numpy as np
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel
-from app.services.math_service import OptionMath
+from app.services.math_service import (
+    OptionMath, IV_OK, IV_BELOW_INTRINSIC, IV_ABOVE_MAX, IV_NO_CONVERGENCE, IV_INVALID_INPUT
+)
+from app.services.american import AmericanOptionMath
+from app.services.scenarios import (
+    ScenarioEngine, DEFAULT_SPOT_SHOCKS, DEFAULT_VOL_SHOCKS, DEFAULT_DAYS_FORWARD
+)
 
 router = APIRouter(prefix="/options", tags=["Options"])
 
+MAX_BATCH_ROWS = 100_000
+
+# Per-row error codes of /calculate/batch (same values as the IV solver statuses)
+BATCH_ERROR_CODES = {
+    IV_OK: "ok",
+    IV_BELOW_INTRINSIC: "price below intrinsic value",
+    IV_ABOVE_MAX: "price above upper bound",
+    IV_NO_CONVERGENCE: "implied volatility did not converge",
+    IV_INVALID_INPUT: "invalid input",
+}
+
 class PricingRequest(BaseModel):
     type: str # 'call' or 'put'
     S: float  # Spot price
@@ -11,6 +32,9 @@ class PricingRequest(BaseModel):
     t: float  # Time to expiration (years)
     r: float  # Risk-free rate (decimal, e.g. 0.1375 for 13.75%)
     sigma: float # Volatility (decimal, e.g. 0.30 for 30%)
+    q: float = 0.0 # Dividend yield (decimal)
+    style: Literal["european", "american"] = "european"
+    method: Literal["baw", "crr"] = "baw" # American engine: 'baw' (fast) or 'crr' (binomial tree)
 
 @router.post("/calculate")
 def calculate_option(request: PricingRequest):
@@ -18,14 +42,133 @@ def calculate_option(request: PricingRequest):
     Calculate theoretical price and Greeks for an option.
     """
     flag = request.type.lower()[0] # 'c' or 'p'
+    args = (flag, request.S, request.K, request.t, request.r, request.sigma, request.q)
+
+    if request.style == "american":
+        price = float(AmericanOptionMath.price(*args, method=request.method))
+        greeks = {k: float(v) for k, v in AmericanOptionMath.greeks(*args, method=request.method).items()}
+        if not all(math.isfinite(v) for v in greeks.values()):
+            greeks = None
+    else:
+        price = OptionMath.calculate_price(*args)
+        greeks = OptionMath.calculate_greeks(*args)
     
-    price = OptionMath.calculate_price(flag, request.S, request.K, request.t, request.r, request.sigma)
-    greeks = OptionMath.calculate_greeks(flag, request.S, request.K, request.t, request.r, request.sigma)
-    
-    if greeks is None:
-        raise HTTPException(status_code=500, detail="Error calculating Greeks")
+    if greeks is None or math.isnan(price):
+        raise HTTPException(status_code=422, detail="Invalid pricing inputs (check type, S, K, t and sigma)")
 
     return {
         "price": price,
         "greeks": greeks
     }
+
+
+Column = List[Optional[float]]
+
+class BatchPricingRequest(BaseModel):
+    """Column arrays of equal length; S, r and sigma may also be a single value for all rows."""
+    type: List[str]
+    S: Union[float, Column]
+    K: Column
+    t: Column
+    r: Union[float, Column]
+    sigma: Optional[Union[float, Column]] = None # Missing/null rows are solved from price
+    price: Optional[Column] = None # Market price, used for implied volatility
+
+
+def _to_array(values, n: int) -> np.ndarray:
+    if values is None:
+        return np.full(n, np.nan)
+    if isinstance(values, list):
+        return np.array(values, dtype=float)  # None -> NaN
+    return np.full(n, float(values))
+
+
+def _to_column(values: np.ndarray) -> list:
+    """NaN is not valid JSON: emit null instead."""
+    out = values.astype(object)
+    out[~np.isfinite(values)] = None
+    return out.tolist()
+
+
+@router.post("/calculate/batch")
+def calculate_batch(request: BatchPricingRequest):
+    """
+    Prices a whole column batch (e.g. a strike ladder) in one vectorized pass.
+
+    Rows with sigma use it directly; rows without sigma but with a market price
+    are priced at their implied volatility. Bad rows get an error code and null
+    outputs instead of failing the request.
+    """
+    n = len(request.type)
+    if n > MAX_BATCH_ROWS:
+        raise HTTPException(status_code=413, detail=f"Batch limited to {MAX_BATCH_ROWS} rows")
+
+    columns = {name: _to_array(getattr(request, name), n) for name in ("S", "K", "t", "r", "sigma", "price")}
+    mismatched = [name for name, values in columns.items() if len(values) != n]
+    if mismatched:
+        raise HTTPException(status_code=422, detail=f"Columns must have {n} rows: {mismatched}")
+
+    flag = np.asarray(request.type, dtype=str)
+    S, K, t, r, sigma, market = (columns[k] for k in ("S", "K", "t", "r", "sigma", "price"))
+
+    error = np.full(n, IV_OK, dtype=np.int8)
+    iv = np.full(n, np.nan)
+    has_price = ~np.isnan(market)
+    if has_price.any():
+        solved = OptionMath.implied_volatility_array(
+            market[has_price], flag[has_price], S[has_price], K[has_price], t[has_price], r[has_price]
+        )
+        iv[has_price] = solved["iv"]
+        # IV errors only fail the row when the price was needed to get sigma
+        error[has_price] = np.where(np.isnan(sigma[has_price]), solved["status"], IV_OK)
+
+    vol = np.where(np.isnan(sigma), iv, sigma)
+    price = OptionMath.price_array(flag, S, K, t, r, vol)
+    greeks = OptionMath.greeks_array(flag, S, K, t, r, vol)
+    error[(error == IV_OK) & np.isnan(price)] = IV_INVALID_INPUT
+
+    # Columns are already JSON-native; skip the per-element jsonable_encoder pass
+    return JSONResponse({
+        "count": n,
+        "price": _to_column(price),
+        "iv": _to_column(iv),
+        **{name: _to_column(values) for name, values in greeks.items()},
+        "error": error.tolist(),
+        "error_codes": BATCH_ERROR_CODES,
+    })
+
+
+class ScenarioLeg(BaseModel):
+    type: str # 'call' or 'put'
+    strike: float
+    time_to_expiry: float # years
+    iv: Optional[float] = None # decimal; defaults to 30%
+    quantity: float = 1.0 # signed: positive long, negative short
+    price: Optional[float] = None # entry premium; defaults to today's model value
+
+class ScenarioRequest(BaseModel):
+    spot: float
+    legs: List[ScenarioLeg]
+    r: float = 0.1375
+    spot_shocks: List[float] = list(DEFAULT_SPOT_SHOCKS) # relative, e.g. -0.10 = -10%
+    vol_shocks: List[float] = list(DEFAULT_VOL_SHOCKS) # absolute vol points
+    days_forward: List[int] = list(DEFAULT_DAYS_FORWARD)
+
+@router.post("/scenarios")
+def scenario_grid(request: ScenarioRequest):
+    """
+    P&L of a multi-leg position over a spot x vol x days-forward grid.
+    pnl[i][j][k] is the P&L for spot_shocks[i], vol_shocks[j], days_forward[k].
+    """
+    if not request.legs or request.spot <= 0:
+        raise HTTPException(status_code=422, detail="Need a positive spot and at least one leg")
+
+    result = ScenarioEngine(risk_free_rate=request.r).grid(
+        [leg.model_dump() for leg in request.legs], request.spot,
+        request.spot_shocks, request.vol_shocks, request.days_forward
+    )
+    pnl = result["pnl"]
+    if not np.isfinite(pnl).all():
+        raise HTTPException(status_code=422, detail="Invalid leg inputs (check type, strike, time_to_expiry)")
+    result["pnl"] = pnl.round(6).tolist()
+    return result
@@ -0,0 +1,42 @@
+from datetime import date
+from typing import Optional
+from fastapi import APIRouter, HTTPException
+from pydantic import BaseModel
+from app.services.portfolio import portfolio
+
+router = APIRouter(prefix="/portfolio", tags=["Portfolio"])
+
+class PositionRequest(BaseModel):
+    underlying: str # e.g. PETR4
+    type: str # 'call' or 'put'
+    strike: float
+    expiry: date
+    quantity: float # signed: positive long, negative short
+    iv: Optional[float] = None # refreshed from each scan when the symbol matches the chain
+    symbol: Optional[str] = None
+
+@router.get("")
+def get_exposure():
+    """
+    Net delta/gamma/vega/theta per underlying and in total.
+    Greeks are refreshed by each scan of the underlying.
+    """
+    return portfolio.exposure()
+
+@router.get("/positions")
+def list_positions():
+    return portfolio.positions().to_dict(orient="records")
+
+@router.post("/positions")
+def add_position(request: PositionRequest):
+    position_id = portfolio.add_position(
+        request.underlying.upper(), request.type, request.strike, request.expiry,
+        request.quantity, iv=request.iv, symbol=request.symbol
+    )
+    return {"id": position_id, "exposure": portfolio.exposure()}
+
+@router.delete("/positions/{position_id}")
+def remove_position(position_id: int):
+    if not portfolio.remove_position(position_id):
+        raise HTTPException(status_code=404, detail=f"Position {position_id} not found")
+    return {"id": position_id, "exposure": portfolio.exposure()}
@@ -5,7 +5,6 @@ from app.core.database import get_db
 from app.services import crud
 from app.core.auth import verify_token
 from typing import List, Optional
-import asyncio
 
 router = APIRouter(prefix="/signals", tags=["Signals"])
 
@@ -24,12 +23,12 @@ async def get_signals(
     - Aplica todas as estratégias
     - Filtra por confiança mínima
     """
-    # Executa scan para todos os ativos em paralelo
-    results = await asyncio.gather(*[scanner.scan_ticker(t.upper()) for t in ativos])
+    # Executa scan para todos os ativos num único universo (aquisição em paralelo)
+    results = await scanner.scan_universe([t.upper() for t in ativos])
     
     # Flatten results
     all_signals = []
-    for ticker_res in results:
+    for ticker_res in results.values():
         all_signals.extend(ticker_res)
     
     # Filtra por score de confiabilidade
@@ -86,10 +85,10 @@ async def batch_scan(
     """
     Scan multiple tickers simultaneously (batch operation).
     """
-    results = await asyncio.gather(*[scanner.scan_ticker(t.upper()) for t in tickers])
+    results = await scanner.scan_universe([t.upper() for t in tickers])
     
     all_signals = []
-    for ticker_results in results:
+    for ticker_results in results.values():
         for signal in ticker_results:
             crud.create_signal(db, signal)
             all_signals.append(signal)
@@ -72,6 +72,34 @@ class MultiChannelAlertService:
                     legs_formatted.append(f"• {action} {leg['type'].upper()} Strike {leg['strike']}")
                 legs_html = f"<b>🛠️ Estrutura:</b>\n" + "\n".join(legs_formatted) + "\n"
             
+            # Scenario stress (optional, attached by the scanner)
+            scenarios = signal_data.get('scenarios')
+            scenarios_html = ""
+            if scenarios:
+                scenarios_html = (
+                    f"🧪 <b>Cenários (1d):</b> Gap -10% {scenarios['gap_down_10']:+.2f} • "
+                    f"Vol +10 {scenarios['vol_spike_10']:+.2f} • Pior {scenarios['worst']['pnl']:+.2f}\n"
+                )
+
+            # Lognormal expiry metrics (optional, attached by the scanner)
+            probabilities = signal_data.get('probabilities') or {}
+            probabilities_html = ""
+            if probabilities.get('pop') is not None:
+                probabilities_html = f"🎲 <b>PoP:</b> {probabilities['pop']:.0%}"
+                if probabilities.get('expected_value') is not None:
+                    probabilities_html += f" • EV {probabilities['expected_value']:+.2f}"
+                if probabilities.get('breakeven_low') is not None:
+                    probabilities_html += f" • BE {probabilities['breakeven_low']:.2f}"
+                if probabilities.get('max_loss_unlimited'):
+                    probabilities_html += " • Perda máx. ilimitada"
+                probabilities_html += "\n"
+
+            # Stale inputs (stages served from the last good fetch, set by the scanner)
+            degraded = signal_data.get('degraded') or []
+            degraded_html = ""
+            if degraded:
+                degraded_html = f"⏳ <b>Dados defasados:</b> {', '.join(degraded)}\n"
+
             # Timestamp (Brasília)
             tz = pytz.timezone('America/Sao_Paulo')
             time_now = datetime.now(tz).strftime('%H:%M:%S')
@@ -92,7 +120,10 @@ class MultiChannelAlertService:
                 f"💡 <b>Motivo:</b> {signal_data.get('reason', 'N/A')}\n\n"
                 
                 f"📉 <b>Técnicos:</b> RSI {technicals.get('rsi', 0):.0f} • IV {technicals.get('iv', 0):.2f}\n"
-                f"{flags_html}\n"
+                f"{probabilities_html}"
+                f"{scenarios_html}"
+                f"{flags_html}"
+                f"{degraded_html}\n"
                 f"{legs_html}\n"
                 
                 f"<i>🕒 {time_now} • B3 Real-Time Scan</i>"
@@ -1,13 +1,9 @@
+import hashlib
+from collections import OrderedDict
 import pandas as pd
 import numpy as np
 from datetime import datetime
-
-# Try importing py_vollib_vectorized, fallback strictly if not present to avoid runtime crashes during dev
-try:
-    import py_vollib_vectorized
-    HAS_VOLLIB_VECTORIZED = True
-except ImportError:
-    HAS_VOLLIB_VECTORIZED = False
+from app.services.math_service import OptionMath
 
 class GreeksService:
     """
@@ -28,25 +24,10 @@ class GreeksService:
         
         # If simulation, we might not have 'iv'. We can calculate IV from price, then Greeks.
         # Or if we have 'iv', we calculate Greeks directly.
-        
-        if not HAS_VOLLIB_VECTORIZED:
-            # Fallback: Mock Greeks
-            chain_df['delta'] = np.where(chain_df['type'] == 'call', 0.5, -0.5)
-            chain_df['gamma'] = 0.05
-            chain_df['theta'] = -0.01
-            chain_df['vega'] = 0.10
-            return chain_df
 
-        # Prepare for PyVollib Vectorized
-        # It expects a flag 'q' for dividend, 'r' risk free
-        # And flag 'flag' ('c' or 'p')
-        
         # Copy to avoid side effects
         df = chain_df.copy()
         
-        # Map type to 'c'/'p'
-        df['flag'] = df['type'].apply(lambda x: 'c' if x == 'call' else 'p')
-        
         # If we have Spot Price (S) and Option Price (P), we can get IV.
         # Ideally, B3 Service provides Spot Price. Let's assume 'spot_price' column exists.
         
@@ -54,38 +35,114 @@ class GreeksService:
             # Cannot calculate without spot
             return df
             
-        # Calculate Implied Volatility if missing
-        if 'iv' not in df.columns or df['iv'].isnull().any():
-             # price_dataframe returns a helper object usually, but py_vollib_vectorized extends floats/arrays
-             # We use the vector functions
-             from py_vollib_vectorized import vectorized_implied_volatility
-             
-             df['iv'] = vectorized_implied_volatility(
-                 df['last'], 
-                 df['spot_price'], 
-                 df['strike'], 
-                 df['time_to_expiry'], 
-                 risk_free_rate, 
-                 df['flag'].values, 
-                 return_as='numpy'
-             )
-        
-        # Calculate Greeks
-        from py_vollib_vectorized import get_all_greeks
-        
-        result = get_all_greeks(
-             df['flag'], 
-             df['spot_price'], 
-             df['strike'], 
-             df['time_to_expiry'], 
-             risk_free_rate, 
-             df['iv'], 
-             model='black_scholes', # or black_scholes_merton
-             return_as='dataframe'
-        )
-        
-        # Merge back
-        df = pd.concat([df, result], axis=1)
-        
-        # Drop duplicates if any overlap
-        return df.loc[:,~df.columns.duplicated()]
+        is_call = (df['type'] == 'call').to_numpy()
+        spot = df['spot_price'].to_numpy(dtype=float)
+        strike = df['strike'].to_numpy(dtype=float)
+        tte = df['time_to_expiry'].to_numpy(dtype=float)
+
+        # Calculate Implied Volatility where missing (built-in batched solver)
+        iv = df['iv'].to_numpy(dtype=float) if 'iv' in df.columns else np.full(len(df), np.nan)
+        missing = np.isnan(iv)
+        if missing.any():
+            solved = OptionMath.implied_volatility_array(
+                df['last'].to_numpy(dtype=float)[missing],
+                is_call[missing], spot[missing], strike[missing], tte[missing],
+                risk_free_rate
+            )
+            iv[missing] = solved['iv']
+            status = np.zeros(len(df), dtype=np.int8)
+            status[missing] = solved['status']
+            df['iv_status'] = status
+        df['iv'] = iv
+
+        # Calculate Greeks (NaN where IV could not be solved)
+        greeks = OptionMath.greeks_array(is_call, spot, strike, tte, risk_free_rate, iv)
+        for name, values in greeks.items():
+            df[name] = values
+
+        return df
+
+
+class ChainEnricher:
+    """
+    Single enrichment stage run once per normalized chain, before strategies.
+
+    Solves IV from the mid price and computes delta/gamma/theta/vega/rho for
+    every row in one vectorized call. The computed columns are cached by
+    fingerprint of their inputs (spot + strikes/types/prices/expiries/quoted
+    IV and delta), so the 20 strategies and the scorer share one computation
+    and an unchanged chain between polls is not recomputed. Cached columns are
+    attached to a copy of the incoming frame, so other columns (volume, open
+    interest, symbols) are always the fresh ones.
+    """
+
+    COLUMNS = ('mid', 'iv', 'iv_status', 'delta', 'gamma', 'theta', 'vega', 'rho')
+
+    def __init__(self, risk_free_rate: float = 0.1375, max_entries: int = 64):
+        self.risk_free_rate = risk_free_rate
+        self.max_entries = max_entries
+        self._cache = OrderedDict()
+
+    @staticmethod
+    def fingerprint(chain_df: pd.DataFrame, spot_price: float) -> str:
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(np.float64(spot_price).tobytes())
+        for col in ('strike', 'last', 'bid', 'ask', 'time_to_expiry', 'iv', 'delta'):
+            if col in chain_df.columns:
+                digest.update(col.encode())
+                digest.update(chain_df[col].to_numpy(dtype=float).tobytes())
+        digest.update(chain_df['type'].to_numpy(dtype=str).tobytes())
+        return digest.hexdigest()
+
+    def enrich(self, chain_df: pd.DataFrame, spot_price: float) -> pd.DataFrame:
+        """
+        Returns a copy of chain_df with 'mid', 'iv', 'iv_status' and the Greeks
+        filled in. Quoted IV/delta from the source are kept only where the
+        solver fails.
+        """
+        if chain_df.empty:
+            return chain_df
+
+        key = self.fingerprint(chain_df, spot_price)
+        columns = self._cache.get(key)
+        if columns is not None:
+            self._cache.move_to_end(key)
+        else:
+            columns = self._compute(chain_df, spot_price)
+            self._cache[key] = columns
+            if len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+
+        df = chain_df.copy()
+        for name in self.COLUMNS:
+            df[name] = columns[name]
+        return df
+
+    def _compute(self, df: pd.DataFrame, spot_price: float) -> dict:
+        n = len(df)
+        nan = np.full(n, np.nan)
+
+        last = df['last'].to_numpy(dtype=float)
+        bid = df['bid'].to_numpy(dtype=float) if 'bid' in df.columns else nan
+        ask = df['ask'].to_numpy(dtype=float) if 'ask' in df.columns else nan
+        quoted = (bid > 0) & (ask >= bid)
+        mid = np.where(quoted, 0.5 * (bid + ask), last)
+
+        is_call = (df['type'] == 'call').to_numpy()
+        strike = df['strike'].to_numpy(dtype=float)
+        tte = df['time_to_expiry'].to_numpy(dtype=float)
+
+        solved = OptionMath.implied_volatility_array(mid, is_call, spot_price, strike, tte, self.risk_free_rate)
+        source_iv = df['iv'].to_numpy(dtype=float) if 'iv' in df.columns else nan
+        iv = np.where(solved['converged'], solved['iv'], source_iv)
+
+        greeks = OptionMath.greeks_array(is_call, spot_price, strike, tte, self.risk_free_rate, iv)
+        if 'delta' in df.columns:
+            source_delta = df['delta'].to_numpy(dtype=float)
+            greeks['delta'] = np.where(np.isnan(greeks['delta']), source_delta, greeks['delta'])
+
+        return {'mid': mid, 'iv': iv, 'iv_status': solved['status'], **greeks}
+
+
+# Global instance shared by the scanner
+chain_enricher = ChainEnricher()
@@ -0,0 +1,265 @@
+"""
+Offline reconstruction of historical implied volatility.
+
+Input: historical option prints (date, underlying, type, strike, expiry,
+price) and underlying closes (date, underlying, close), as CSV or Parquet
+files or directories of them. The prints are split into (underlying, month)
+partitions; each partition is solved in one vectorized
+OptionMath.implied_volatility_array call inside a process pool and reduced
+to one row per underlying and day:
+
+    atm_iv     at-the-money IV at the 30-day tenor (= iv_30d)
+    skew_30d   IV at 90% minus IV at 110% of the forward, 30-day tenor
+    iv_30d, iv_60d, iv_90d
+               constant-maturity ATM IV (linear in total variance between
+               listed expiries, flat vol outside them)
+    n_prints, n_solved
+
+Every partition is written atomically to <out_dir>/<UNDERLYING>/<YYYY-MM>
+(Parquet when pyarrow is installed, else a NumPy .npz of columns); a rerun
+skips partitions already on disk, so an interrupted job resumes where it
+stopped. See scripts/build_iv_history.py.
+"""
+import glob
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from app.services.math_service import IV_OK, OptionMath
+
+logger = logging.getLogger(__name__)
+
+try:
+    import pyarrow  # noqa: F401
+    PARQUET_AVAILABLE = True
+except ImportError:
+    PARQUET_AVAILABLE = False
+
+PRINT_COLUMNS = ('date', 'underlying', 'type', 'strike', 'expiry', 'price')
+CLOSE_COLUMNS = ('date', 'underlying', 'close')
+SUMMARY_COLUMNS = ('date', 'underlying', 'atm_iv', 'skew_30d', 'iv_30d', 'iv_60d', 'iv_90d', 'n_prints', 'n_solved')
+
+TENOR_DAYS = (30, 60, 90)
+SKEW_MONEYNESS = 0.10   # wings at ln(K/F) = -/+ 0.10
+MIN_DAYS_TO_EXPIRY = 1
+
+
+def load_table(path: str, columns=None) -> pd.DataFrame:
+    """Reads a CSV/Parquet file, or every such file in a directory (concatenated)."""
+    paths = sorted(glob.glob(os.path.join(path, '*'))) if os.path.isdir(path) else [path]
+    frames = []
+    for p in paths:
+        if p.endswith('.parquet'):
+            frames.append(pd.read_parquet(p, columns=list(columns) if columns else None))
+        elif p.endswith(('.csv', '.csv.gz')):
+            frames.append(pd.read_csv(p, usecols=list(columns) if columns else None))
+    if not frames:
+        raise FileNotFoundError(f"No .csv or .parquet files at {path}")
+    return pd.concat(frames, ignore_index=True)
+
+
+def _segment_interp(group: np.ndarray, x: np.ndarray, y: np.ndarray, n_groups: int, target: float):
+    """
+    Linear interpolation of y(x) at `target` inside every group at once.
+    Targets outside a group's x range are clipped to it (flat extrapolation).
+    Returns (values, clipped_target) per group; NaN for empty groups.
+    """
+    order = np.lexsort((x, group))
+    g, xs, ys = group[order], x[order], y[order]
+    ids = np.arange(n_groups)
+    start = np.searchsorted(g, ids, side='left')
+    end = np.searchsorted(g, ids, side='right')
+    empty = start == end
+    last = np.maximum(end - 1, start)
+    start_c = np.minimum(start, len(xs) - 1)
+    last_c = np.minimum(last, len(xs) - 1)
+    if len(xs) == 0:
+        return np.full(n_groups, np.nan), np.full(n_groups, np.nan)
+
+    clipped = np.clip(target, xs[start_c], xs[last_c])
+    # Position of the clipped target inside each segment: one global searchsorted on (group, x)
+    span = np.ptp(xs) + 1.0
+    key = g * span + (xs - xs.min())
+    pos = np.searchsorted(key, ids * span + (clipped - xs.min()), side='left')
+    hi = np.clip(pos, start_c, last_c)
+    lo = np.clip(pos - 1, start_c, last_c)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        w = np.where(xs[hi] > xs[lo], (clipped - xs[lo]) / (xs[hi] - xs[lo]), 0.0)
+    values = ys[lo] + w * (ys[hi] - ys[lo])
+    return np.where(empty, np.nan, values), np.where(empty, np.nan, clipped)
+
+
+def _as_days(column: pd.Series) -> np.ndarray:
+    if not pd.api.types.is_datetime64_any_dtype(column):
+        column = pd.to_datetime(column)
+    return column.to_numpy(dtype='datetime64[D]')
+
+
+def solve_partition(prints: pd.DataFrame, risk_free_rate: float = 0.1375) -> pd.DataFrame:
+    """
+    IVs for one partition of prints (with the underlying 'close' merged in),
+    reduced to daily summary rows. Runs in the worker processes.
+    """
+    date, expiry = (_as_days(prints[c]) for c in ('date', 'expiry'))
+    days = (expiry - date).astype(np.int64)
+    t = days / 365.0
+    S = prints['close'].to_numpy(dtype=float)
+    K = prints['strike'].to_numpy(dtype=float)
+    type_codes, types = pd.factorize(prints['type'])
+    is_call = np.asarray([str(v).lower().startswith('c') for v in types], dtype=bool)[type_codes]
+    price = prints['price'].to_numpy(dtype=float)
+
+    usable = (days >= MIN_DAYS_TO_EXPIRY) & (price > 0) & (S > 0) & (K > 0)
+    iv = np.full(len(prints), np.nan)
+    solved = OptionMath.implied_volatility_array(price[usable], is_call[usable], S[usable], K[usable], t[usable], risk_free_rate)
+    iv[usable] = np.where(solved['status'] == IV_OK, solved['iv'], np.nan)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        k = np.log(K / (S * np.exp(risk_free_rate * t)))
+    # Smile from out-of-the-money quotes only (puts below the forward, calls above)
+    otm = np.isfinite(iv) & (iv > 0) & np.where(is_call, k >= 0, k < 0)
+
+    day_codes, day_values = pd.factorize(date, sort=True)
+    n_days = len(day_values)
+    summary = pd.DataFrame({
+        'date': np.asarray(day_values, dtype='datetime64[D]'),
+        'underlying': prints['underlying'].iloc[0],
+        'n_prints': np.bincount(day_codes, minlength=n_days),
+        'n_solved': np.bincount(day_codes, weights=np.isfinite(iv), minlength=n_days).astype(np.int64),
+    })
+
+    # Per (day, expiry) smile: ATM and the two wings
+    slice_codes, slice_keys = pd.factorize(day_codes[otm] * 100_000 + days[otm], sort=True)
+    n_slices = len(slice_keys)
+    k_otm, iv_otm = k[otm], iv[otm]
+    atm, at = _segment_interp(slice_codes, k_otm, iv_otm, n_slices, 0.0)
+    atm = np.where(at == 0.0, atm, np.nan)   # ATM must be bracketed by quotes
+    put_wing, at_p = _segment_interp(slice_codes, k_otm, iv_otm, n_slices, -SKEW_MONEYNESS)
+    call_wing, at_c = _segment_interp(slice_codes, k_otm, iv_otm, n_slices, SKEW_MONEYNESS)
+    skew = np.where((at_p == -SKEW_MONEYNESS) & (at_c == SKEW_MONEYNESS), put_wing - call_wing, np.nan)
+
+    slice_day = slice_keys // 100_000
+    slice_t = (slice_keys % 100_000) / 365.0
+
+    # Term structure per day: total variance linear in t, flat vol outside the listed expiries
+    has_atm = np.isfinite(atm)
+    for tenor in TENOR_DAYS:
+        T = tenor / 365.0
+        w, at_t = _segment_interp(slice_day[has_atm], slice_t[has_atm], atm[has_atm] ** 2 * slice_t[has_atm], n_days, T)
+        summary[f'iv_{tenor}d'] = np.sqrt(w / at_t)
+    has_skew = np.isfinite(skew)
+    skew_30, _ = _segment_interp(slice_day[has_skew], slice_t[has_skew], skew[has_skew], n_days, TENOR_DAYS[0] / 365.0)
+    summary['skew_30d'] = skew_30
+    summary['atm_iv'] = summary[f'iv_{TENOR_DAYS[0]}d']
+    return summary[list(SUMMARY_COLUMNS)]
+
+
+def _store_ext() -> str:
+    return '.parquet' if PARQUET_AVAILABLE else '.npz'
+
+
+def write_table(df: pd.DataFrame, path: str) -> None:
+    """Atomic write (tmp file + rename), so a partition on disk is always complete."""
+    tmp = path + '.tmp'
+    if path.endswith('.parquet'):
+        df.to_parquet(tmp, index=False)
+    else:
+        columns = {c: (df[c].to_numpy(dtype=str) if pd.api.types.is_string_dtype(df[c]) else df[c].to_numpy())
+                   for c in df.columns}
+        with open(tmp, 'wb') as f:
+            np.savez(f, **columns)
+    os.replace(tmp, path)
+
+
+def read_table(path: str) -> pd.DataFrame:
+    if path.endswith('.parquet'):
+        return pd.read_parquet(path)
+    with np.load(path, allow_pickle=False) as data:
+        return pd.DataFrame({name: data[name] for name in data.files})
+
+
+def read_history(out_dir: str, underlying: Optional[str] = None) -> pd.DataFrame:
+    """Daily IV summaries from the store, optionally for one underlying, sorted by date."""
+    pattern = os.path.join(out_dir, underlying or '*', '*')
+    paths = [p for p in sorted(glob.glob(pattern)) if p.endswith(('.parquet', '.npz'))]
+    if not paths:
+        return pd.DataFrame(columns=list(SUMMARY_COLUMNS))
+    df = pd.concat([read_table(p) for p in paths], ignore_index=True)
+    df['date'] = pd.to_datetime(df['date'])
+    return df.sort_values(['underlying', 'date'], ignore_index=True)
+
+
+def _solve_and_write(prints: pd.DataFrame, path: str, risk_free_rate: float) -> int:
+    write_table(solve_partition(prints, risk_free_rate), path)
+    return len(prints)
+
+
+class IVHistoryJob:
+    """
+    Batch IV reconstruction over a process pool, partitioned by
+    (underlying, month) and resumable (see module docstring).
+    workers <= 1 solves in-process.
+    """
+
+    def __init__(self, out_dir: str, risk_free_rate: float = 0.1375, workers: Optional[int] = None):
+        self.out_dir = out_dir
+        self.risk_free_rate = risk_free_rate
+        self.workers = os.cpu_count() if workers is None else workers
+
+    def partition_path(self, underlying: str, month: str) -> str:
+        return os.path.join(self.out_dir, underlying, f"{month}{_store_ext()}")
+
+    def _done(self, underlying: str, month: str) -> bool:
+        base = os.path.join(self.out_dir, underlying, month)
+        return os.path.exists(base + '.parquet') or os.path.exists(base + '.npz')
+
+    def run(self, prints: pd.DataFrame, closes: pd.DataFrame) -> dict:
+        """Solves every partition not yet on disk. Returns counts and rows/s throughput."""
+        start = time.perf_counter()
+        prints = prints[list(PRINT_COLUMNS)].copy()
+        closes = closes[list(CLOSE_COLUMNS)].copy()
+        prints['date'] = pd.to_datetime(prints['date'])
+        prints['expiry'] = pd.to_datetime(prints['expiry'])
+        closes['date'] = pd.to_datetime(closes['date'])
+        prints = prints.merge(closes, on=['date', 'underlying'], how='inner')
+        month = prints['date'].to_numpy(dtype='datetime64[M]')
+
+        tasks, skipped = [], 0
+        for (underlying, m), part in prints.groupby([prints['underlying'], month], sort=True):
+            m = str(np.datetime64(m, 'M'))
+            if self._done(underlying, m):
+                skipped += 1
+                continue
+            os.makedirs(os.path.join(self.out_dir, underlying), exist_ok=True)
+            tasks.append((part, self.partition_path(underlying, m)))
+
+        rows = 0
+        if self.workers and self.workers > 1 and len(tasks) > 1:
+            with ProcessPoolExecutor(max_workers=self.workers) as pool:
+                futures = {pool.submit(_solve_and_write, part, path, self.risk_free_rate): path for part, path in tasks}
+                for future in as_completed(futures):
+                    rows += future.result()
+                    self._progress(futures[future], rows, start)
+        else:
+            for part, path in tasks:
+                rows += _solve_and_write(part, path, self.risk_free_rate)
+                self._progress(path, rows, start)
+
+        elapsed = time.perf_counter() - start
+        return {
+            "partitions": len(tasks),
+            "skipped": skipped,
+            "rows": rows,
+            "seconds": round(elapsed, 3),
+            "rows_per_second": round(rows / elapsed, 1) if elapsed > 0 else 0.0,
+        }
+
+    @staticmethod
+    def _progress(path: str, rows: int, start: float):
+        elapsed = time.perf_counter() - start
+        logger.info(f"IV history: {path} done ({rows} rows, {rows / max(elapsed, 1e-9):,.0f} rows/s)")
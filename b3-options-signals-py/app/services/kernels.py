@@ -0,0 +1,279 @@
+"""
+Optional JIT backend for the pricing hot loops.
+
+The kernels below are plain per-row loops over flat float64 arrays. With
+Numba installed they are compiled (and cached on disk, so only the first
+start after a code change pays the compile cost); OptionMath then routes
+price_array, greeks_array and implied_volatility_array through them, and
+PricingGrid its lookup. Without Numba, or with JIT_BACKEND=numpy, OptionMath
+keeps its NumPy code path. Both
+backends implement the same formulas and iteration, and agree to rounding
+(scipy's ndtr vs erfc).
+
+JIT_BACKEND: "auto" (default: Numba if importable), "numba" or "numpy".
+"""
+import logging
+import math
+import os
+import time
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+try:
+    import numba
+    NUMBA_AVAILABLE = True
+except ImportError:
+    numba = None
+    NUMBA_AVAILABLE = False
+
+SQRT2 = math.sqrt(2.0)
+SQRT_2PI = math.sqrt(2.0 * math.pi)
+
+# Per-row status codes of the implied volatility solvers (re-exported by math_service)
+IV_OK = 0
+IV_BELOW_INTRINSIC = 1   # price below the no-arbitrage lower bound
+IV_ABOVE_MAX = 2         # price above the upper bound (or implies sigma > IV_SIGMA_MAX)
+IV_NO_CONVERGENCE = 3
+IV_INVALID_INPUT = 4
+
+IV_SIGMA_MAX = 5.0
+
+
+def _select_backend() -> bool:
+    requested = os.getenv("JIT_BACKEND", "auto").lower()
+    if requested == "numpy":
+        return False
+    if requested == "numba" and not NUMBA_AVAILABLE:
+        logger.warning("JIT_BACKEND=numba but numba is not installed; using NumPy kernels")
+    return NUMBA_AVAILABLE
+
+
+JIT_ENABLED = _select_backend()
+
+
+def set_backend(name: str) -> None:
+    """Switch at runtime ("numba" or "numpy"), e.g. for benchmarks and tests."""
+    global JIT_ENABLED
+    if name == "numba" and not NUMBA_AVAILABLE:
+        raise RuntimeError("numba is not installed")
+    JIT_ENABLED = name == "numba"
+
+
+def _jit(fn):
+    # Compilation is lazy: importing this module never compiles anything
+    if NUMBA_AVAILABLE:
+        return numba.njit(cache=True, nogil=True)(fn)
+    return fn
+
+
+@_jit
+def _ndtr(x):
+    return 0.5 * math.erfc(-x / SQRT2)
+
+
+@_jit
+def _pdf(x):
+    return math.exp(-0.5 * x * x) / SQRT_2PI
+
+
+@_jit
+def _d1_d2(S, K, t, r, sigma, q):
+    v = sigma * math.sqrt(t)
+    log_fk = math.log(S / K) + (r - q) * t
+    if v > 0:
+        d1 = (log_fk + 0.5 * v * v) / v
+        return d1, d1 - v, v
+    # v == 0 is the intrinsic-value limit
+    d = math.inf if log_fk > 0 else -math.inf
+    return d, d, v
+
+
+@_jit
+def _bs_one(is_call, S, K, t, r, sigma, q):
+    d1, d2, _ = _d1_d2(S, K, t, r, sigma, q)
+    df_r = math.exp(-r * t)
+    df_q = math.exp(-q * t)
+    if is_call:
+        return S * df_q * _ndtr(d1) - K * df_r * _ndtr(d2)
+    return K * df_r * _ndtr(-d2) - S * df_q * _ndtr(-d1)
+
+
+@_jit
+def bs_price(is_call, S, K, t, r, sigma, q, valid, out):
+    for i in range(out.size):
+        if not valid[i]:
+            out[i] = np.nan
+            continue
+        out[i] = _bs_one(is_call[i], S[i], K[i], t[i], r[i], sigma[i], q[i])
+
+
+@_jit
+def grid_price(is_call, S, K, t, r, sigma, q, valid, table, k_lo, k_hi, dk, nk, v_lo, v_hi, dv, nv, out):
+    """
+    Bilinear lookup in PricingGrid's flattened c(k, v) table (row-major, nk x nv).
+    k = ln(K/S) - (r - q) t needs no exp; calls scale by S e^{-qT}, puts add
+    K e^{-rT} by parity. The log and the exps run in single precision (their
+    rounding is part of PricingGrid.error_bound). Rows outside the table get
+    the exact price.
+    """
+    for i in range(out.size):
+        if not valid[i]:
+            out[i] = np.nan
+            continue
+        k = math.log(np.float32(K[i] / S[i])) - (r[i] - q[i]) * t[i]
+        v = sigma[i] * math.sqrt(t[i])
+        if not (k_lo <= k <= k_hi and v_lo <= v <= v_hi):
+            out[i] = _bs_one(is_call[i], S[i], K[i], t[i], r[i], sigma[i], q[i])
+            continue
+        x = (k - k_lo) / dk
+        y = (v - v_lo) / dv
+        a = min(int(x), nk - 2)
+        b = min(int(y), nv - 2)
+        fx = x - a
+        fy = y - b
+        cell = a * nv + b
+        c = (table[cell] * (1 - fx) + table[cell + nv] * fx) * (1 - fy) \
+            + (table[cell + 1] * (1 - fx) + table[cell + nv + 1] * fx) * fy
+        scale = S[i] if q[i] == 0.0 else S[i] * math.exp(np.float32(-q[i] * t[i]))   # e^{-rT} F
+        if is_call[i]:
+            out[i] = scale * c
+        else:
+            out[i] = scale * (c - 1.0) + K[i] * math.exp(np.float32(-r[i] * t[i]))
+
+
+@_jit
+def bs_greeks(is_call, S, K, t, r, sigma, q, valid, out):
+    """out: (5, n) -> delta, gamma, theta (per day), vega, rho (per 1 pp)."""
+    for i in range(S.size):
+        if not valid[i]:
+            for g in range(5):
+                out[g, i] = np.nan
+            continue
+        d1, d2, v = _d1_d2(S[i], K[i], t[i], r[i], sigma[i], q[i])
+        sqrt_t = math.sqrt(t[i])
+        df_r = math.exp(-r[i] * t[i])
+        df_q = math.exp(-q[i] * t[i])
+        pdf_d1 = _pdf(d1)
+        alive = v > 0
+
+        gamma = df_q * pdf_d1 / (S[i] * v) if alive else 0.0
+        decay = -S[i] * df_q * pdf_d1 * sigma[i] / (2 * sqrt_t) if alive else 0.0
+        if is_call[i]:
+            n_d1, n_d2 = _ndtr(d1), _ndtr(d2)
+            delta = df_q * n_d1
+            theta = decay - r[i] * K[i] * df_r * n_d2 + q[i] * S[i] * df_q * n_d1
+            rho = K[i] * t[i] * df_r * n_d2
+        else:
+            n_md1, n_md2 = _ndtr(-d1), _ndtr(-d2)
+            delta = -df_q * n_md1
+            theta = decay + r[i] * K[i] * df_r * n_md2 - q[i] * S[i] * df_q * n_md1
+            rho = -K[i] * t[i] * df_r * n_md2
+
+        out[0, i] = delta
+        out[1, i] = gamma
+        out[2, i] = theta / 365.0
+        out[3, i] = S[i] * df_q * pdf_d1 * sqrt_t * 0.01
+        out[4, i] = rho * 0.01
+
+
+@_jit
+def _black_call(F, K, v):
+    d1 = math.log(F / K) / v + 0.5 * v
+    return F * _ndtr(d1) - K * _ndtr(d1 - v)
+
+
+@_jit
+def implied_vol(is_call, price, S, K, t, r, q, valid, tol, max_iter, iv, status):
+    """Row-by-row version of OptionMath.implied_volatility_array (same guess, steps and exits)."""
+    for i in range(price.size):
+        iv[i] = np.nan
+        status[i] = IV_INVALID_INPUT
+        if not valid[i]:
+            continue
+
+        F = S[i] * math.exp((r[i] - q[i]) * t[i])
+        c = price[i] * math.exp(r[i] * t[i]) + (0.0 if is_call[i] else F - K[i])
+        intrinsic = max(F - K[i], 0.0)
+        slack = max(tol * (c - intrinsic), 1e-15 * F)
+
+        if c < intrinsic - 1e-12 * F:
+            status[i] = IV_BELOW_INTRINSIC
+            continue
+        if c >= F:
+            status[i] = IV_ABOVE_MAX
+            continue
+        if c <= intrinsic + 1e-12 * F:
+            iv[i] = 0.0
+            status[i] = IV_OK
+            continue
+
+        sqrt_t = math.sqrt(t[i])
+        lo = 0.0
+        hi = IV_SIGMA_MAX * sqrt_t
+        if _black_call(F, K[i], hi) < c:
+            status[i] = IV_ABOVE_MAX
+            continue
+
+        half_gap = c - 0.5 * (F - K[i])
+        disc = max(half_gap * half_gap - (F - K[i]) ** 2 / math.pi, 0.0)
+        v = SQRT_2PI / (F + K[i]) * (half_gap + math.sqrt(disc))
+        if not math.isfinite(v) or v <= lo or v >= hi:
+            v = min(SQRT_2PI * c / F, 0.5 * hi)
+
+        done = False
+        for _ in range(max_iter):
+            d1 = math.log(F / K[i]) / v + 0.5 * v
+            d2 = d1 - v
+            f = F * _ndtr(d1) - K[i] * _ndtr(d2) - c
+            vega = F * _pdf(d1)
+            volga = vega * d1 * d2 / v
+
+            if f < 0:
+                lo = v
+            if f > 0:
+                hi = v
+
+            newton = f / vega
+            denom = 1.0 - 0.5 * newton * volga / vega
+            step = newton / denom if (math.isfinite(denom) and denom > 0.5) else newton
+            candidate = v - step
+            if not math.isfinite(candidate) or candidate <= lo or candidate >= hi:
+                candidate = 0.5 * (lo + hi)
+
+            if abs(f) <= slack:
+                done = True
+                break
+            converged = abs(candidate - v) <= tol * v
+            v = candidate
+            if converged:
+                done = True
+                break
+
+        if done:
+            iv[i] = v / sqrt_t
+            status[i] = IV_OK
+        else:
+            status[i] = IV_NO_CONVERGENCE
+
+
+def warmup() -> float:
+    """
+    Compiles (or loads from the on-disk cache) every kernel for the float64
+    signatures OptionMath uses. Returns the elapsed seconds; 0 without Numba.
+    """
+    if not (NUMBA_AVAILABLE and JIT_ENABLED):
+        return 0.0
+    start = time.perf_counter()
+    one = np.ones(1)
+    flag = np.ones(1, dtype=np.bool_)
+    bs_price(flag, one, one, one, one * 0.1, one * 0.3, one * 0.0, flag, np.empty(1))
+    grid_price(flag, one, one, one, one * 0.1, one * 0.3, one * 0.0, flag, np.ones(4), -1.0, 1.0, 2.0, 2,
+               0.0, 1.0, 1.0, 2, np.empty(1))
+    bs_greeks(flag, one, one, one, one * 0.1, one * 0.3, one * 0.0, flag, np.empty((5, 1)))
+    implied_vol(flag, one * 0.1, one, one, one, one * 0.1, one * 0.0, flag, 1e-10, 40,
+                np.empty(1), np.empty(1, dtype=np.int8))
+    elapsed = time.perf_counter() - start
+    logger.info(f"JIT kernels ready in {elapsed:.2f}s")
+    return elapsed
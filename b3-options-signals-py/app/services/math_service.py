@@ -1,10 +1,158 @@
-from py_vollib.black_scholes import black_scholes as bs
-from py_vollib.black_scholes.greeks.analytical import delta, gamma, theta, vega, rho
 import numpy as np
+from scipy.special import ndtr
+
+from app.services import kernels
+# Per-row IV status codes, shared with the JIT kernels
+from app.services.kernels import (
+    IV_OK, IV_BELOW_INTRINSIC, IV_ABOVE_MAX, IV_NO_CONVERGENCE, IV_INVALID_INPUT, IV_SIGMA_MAX
+)
+
+SQRT_2PI = np.sqrt(2.0 * np.pi)
+
+
+def _norm_pdf(x):
+    return np.exp(-0.5 * x * x) / SQRT_2PI
+
 
 class OptionMath:
+    """
+    Black-Scholes(-Merton) pricing and Greeks.
+
+    The *_array methods take scalars or NumPy arrays (broadcast together) and
+    evaluate every option in one vectorized pass. Invalid rows (non-positive
+    S/K, negative t/sigma, unknown flag, non-finite input) come back as NaN
+    instead of raising, so one bad quote never poisons a whole chain.
+
+    Greek units follow py_vollib: theta per calendar day, vega and rho per
+    1 percentage point.
+    """
+
     @staticmethod
-    def calculate_price(flag: str, S: float, K: float, t: float, r: float, sigma: float) -> float:
+    def call_mask(flag) -> np.ndarray:
+        """
+        Normalize option flags to a boolean "is call" array.
+        Accepts booleans or strings starting with 'c'/'p' (any case);
+        see `valid_flag_mask` for rows whose flag is neither.
+        """
+        flag = np.asarray(flag)
+        if flag.dtype == bool:
+            return flag
+        first = flag.astype('U1')
+        return (first == 'c') | (first == 'C')
+
+    @staticmethod
+    def valid_flag_mask(flag) -> np.ndarray:
+        """True where the flag is a boolean or a 'c'/'p' string."""
+        flag = np.asarray(flag)
+        if flag.dtype == bool:
+            return np.ones(flag.shape, dtype=bool)
+        first = flag.astype('U1')
+        return (first == 'c') | (first == 'C') | (first == 'p') | (first == 'P')
+
+    @staticmethod
+    def _broadcast(flag, S, K, t, r, sigma, q):
+        is_call = OptionMath.call_mask(flag)
+        is_call, S, K, t, r, sigma, q = np.broadcast_arrays(
+            is_call,
+            np.asarray(S, dtype=float), np.asarray(K, dtype=float),
+            np.asarray(t, dtype=float), np.asarray(r, dtype=float),
+            np.asarray(sigma, dtype=float), np.asarray(q, dtype=float),
+        )
+        valid = (
+            np.broadcast_to(OptionMath.valid_flag_mask(flag), S.shape)
+            & (S > 0) & (K > 0) & (t >= 0) & (sigma >= 0)
+            & np.isfinite(r) & np.isfinite(q) & np.isfinite(t) & np.isfinite(sigma)
+        )
+        return is_call, S, K, t, r, sigma, q, valid
+
+    @staticmethod
+    def _flat(*arrays):
+        """Contiguous 1-D views/copies in the dtypes the JIT kernels are compiled for."""
+        return [np.ascontiguousarray(a).ravel() for a in arrays]
+
+    @staticmethod
+    def _prepare(flag, S, K, t, r, sigma, q):
+        is_call, S, K, t, r, sigma, q, valid = OptionMath._broadcast(flag, S, K, t, r, sigma, q)
+
+        with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+            sqrt_t = np.sqrt(t)
+            v = sigma * sqrt_t
+            df_r = np.exp(-r * t)
+            df_q = np.exp(-q * t)
+            log_fk = np.log(S / K) + (r - q) * t
+            # v == 0 is the intrinsic-value limit: d1 -> +/-inf by moneyness
+            d1 = np.where(v > 0, (log_fk + 0.5 * v * v) / v, np.where(log_fk > 0, np.inf, -np.inf))
+            d2 = np.where(v > 0, d1 - v, d1)
+
+        return is_call, S, K, t, r, sigma, q, valid, sqrt_t, v, df_r, df_q, d1, d2
+
+    @staticmethod
+    def price_array(flag, S, K, t, r, sigma, q=0.0) -> np.ndarray:
+        """
+        Vectorized Black-Scholes price.
+        flag: 'c'/'p' (or 'call'/'put', or bool is_call), scalar or array
+        S, K, t (years), r, sigma, q (dividend yield): scalars or arrays
+        """
+        if kernels.JIT_ENABLED:
+            args = OptionMath._broadcast(flag, S, K, t, r, sigma, q)
+            out = np.empty(args[1].shape)
+            kernels.bs_price(*OptionMath._flat(*args), out.reshape(-1))
+            return out
+
+        is_call, S, K, t, r, sigma, q, valid, sqrt_t, v, df_r, df_q, d1, d2 = \
+            OptionMath._prepare(flag, S, K, t, r, sigma, q)
+
+        with np.errstate(invalid='ignore', over='ignore'):
+            call = S * df_q * ndtr(d1) - K * df_r * ndtr(d2)
+            put = K * df_r * ndtr(-d2) - S * df_q * ndtr(-d1)
+            price = np.where(is_call, call, put)
+
+        return np.where(valid, price, np.nan)
+
+    @staticmethod
+    def greeks_array(flag, S, K, t, r, sigma, q=0.0) -> dict:
+        """
+        Vectorized first-order Greeks (plus gamma).
+        Returns a dict of arrays: delta, gamma, theta, vega, rho.
+        """
+        if kernels.JIT_ENABLED:
+            args = OptionMath._broadcast(flag, S, K, t, r, sigma, q)
+            shape = args[1].shape
+            out = np.empty((5, args[1].size))
+            kernels.bs_greeks(*OptionMath._flat(*args), out)
+            return {name: out[g].reshape(shape) for g, name in enumerate(("delta", "gamma", "theta", "vega", "rho"))}
+
+        is_call, S, K, t, r, sigma, q, valid, sqrt_t, v, df_r, df_q, d1, d2 = \
+            OptionMath._prepare(flag, S, K, t, r, sigma, q)
+
+        with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+            pdf_d1 = _norm_pdf(d1)
+            n_d1, n_d2 = ndtr(d1), ndtr(d2)
+            n_md1, n_md2 = ndtr(-d1), ndtr(-d2)
+            alive = v > 0
+
+            delta = np.where(is_call, df_q * n_d1, -df_q * n_md1)
+            gamma = np.where(alive, df_q * pdf_d1 / (S * v), 0.0)
+            vega = S * df_q * pdf_d1 * sqrt_t
+            decay = np.where(alive, -S * df_q * pdf_d1 * sigma / (2 * sqrt_t), 0.0)
+            theta = np.where(
+                is_call,
+                decay - r * K * df_r * n_d2 + q * S * df_q * n_d1,
+                decay + r * K * df_r * n_md2 - q * S * df_q * n_md1,
+            )
+            rho = np.where(is_call, K * t * df_r * n_d2, -K * t * df_r * n_md2)
+
+        nan = np.nan
+        return {
+            "delta": np.where(valid, delta, nan),
+            "gamma": np.where(valid, gamma, nan),
+            "theta": np.where(valid, theta / 365.0, nan),
+            "vega": np.where(valid, vega * 0.01, nan),
+            "rho": np.where(valid, rho * 0.01, nan),
+        }
+
+    @staticmethod
+    def calculate_price(flag: str, S: float, K: float, t: float, r: float, sigma: float, q: float = 0.0) -> float:
         """
         Calculate Black-Scholes price.
         flag: 'c' for call, 'p' for put
@@ -13,32 +161,145 @@ class OptionMath:
         t: Time to expiration (in years)
         r: Risk-free interest rate (decimal)
         sigma: Volatility (decimal)
+        q: Dividend yield (decimal)
+        Returns NaN for invalid inputs.
         """
-        try:
-            return bs(flag.lower(), S, K, t, r, sigma)
-        except Exception as e:
-            print(f"Error calculating price: {e}")
-            return 0.0
+        return float(OptionMath.price_array(flag, S, K, t, r, sigma, q))
 
     @staticmethod
-    def calculate_greeks(flag: str, S: float, K: float, t: float, r: float, sigma: float):
+    def calculate_greeks(flag: str, S: float, K: float, t: float, r: float, sigma: float, q: float = 0.0):
         """
         Calculate all main Greeks.
+        Returns None for invalid inputs.
+        """
+        greeks = {k: float(v) for k, v in OptionMath.greeks_array(flag, S, K, t, r, sigma, q).items()}
+        if not all(np.isfinite(v) for v in greeks.values()):
+            return None
+        return greeks
+
+    @staticmethod
+    def implied_volatility_array(price, flag, S, K, t, r, q=0.0, tol=1e-10, max_iter=40) -> dict:
         """
-        try:
-            d = delta(flag.lower(), S, K, t, r, sigma)
-            g = gamma(flag.lower(), S, K, t, r, sigma)
-            th = theta(flag.lower(), S, K, t, r, sigma)
-            v = vega(flag.lower(), S, K, t, r, sigma)
-            rh = rho(flag.lower(), S, K, t, r, sigma)
-            
+        Vectorized implied volatility.
+
+        Works on the undiscounted forward (Black) call price: puts are mapped
+        through put-call parity. Starts from the Corrado-Miller rational
+        approximation, then takes Halley steps safeguarded by a [lo, hi]
+        bracket (falling back to bisection whenever a step leaves it).
+        Only unconverged rows are iterated.
+
+        Returns a dict of arrays:
+            iv: implied volatility (NaN where not solved)
+            converged: bool
+            status: IV_OK, IV_BELOW_INTRINSIC, IV_ABOVE_MAX, IV_NO_CONVERGENCE or IV_INVALID_INPUT
+        """
+        is_call = OptionMath.call_mask(flag)
+        is_call, price, S, K, t, r, q = np.broadcast_arrays(
+            is_call,
+            np.asarray(price, dtype=float), np.asarray(S, dtype=float),
+            np.asarray(K, dtype=float), np.asarray(t, dtype=float),
+            np.asarray(r, dtype=float), np.asarray(q, dtype=float),
+        )
+        shape = price.shape
+        is_call, price, S, K, t, r, q = (a.ravel() for a in (is_call, price, S, K, t, r, q))
+
+        iv = np.full(price.size, np.nan)
+        status = np.full(price.size, IV_INVALID_INPUT, dtype=np.int8)
+
+        valid = (
+            np.broadcast_to(OptionMath.valid_flag_mask(flag), shape).ravel()
+            & (S > 0) & (K > 0) & (t > 0) & (price >= 0)
+            & np.isfinite(price) & np.isfinite(r) & np.isfinite(q) & np.isfinite(t)
+        )
+
+        if kernels.JIT_ENABLED:
+            kernels.implied_vol(
+                *OptionMath._flat(is_call, price, S, K, t, r, q, valid), float(tol), int(max_iter), iv, status
+            )
             return {
-                "delta": d,
-                "gamma": g,
-                "theta": th,
-                "vega": v,
-                "rho": rh
+                "iv": iv.reshape(shape),
+                "converged": (status == IV_OK).reshape(shape),
+                "status": status.reshape(shape),
             }
-        except Exception as e:
-            print(f"Error calculating greeks: {e}")
-            return None
+
+        with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+            F = S * np.exp((r - q) * t)
+            c = price * np.exp(r * t) + np.where(is_call, 0.0, F - K)
+            intrinsic = np.maximum(F - K, 0.0)
+            # Tolerance scales with the time value (the out-of-the-money part of the
+            # price), floored at double precision relative to the forward
+            slack = np.maximum(tol * (c - intrinsic), 1e-15 * F)
+
+            below = valid & (c < intrinsic - 1e-12 * F)
+            above = valid & (c >= F)
+            status[below] = IV_BELOW_INTRINSIC
+            status[above] = IV_ABOVE_MAX
+
+            # Zero time value: sigma = 0 is the only solution
+            flat = valid & ~below & ~above & (c <= intrinsic + 1e-12 * F)
+            iv[flat] = 0.0
+            status[flat] = IV_OK
+
+            idx = np.flatnonzero(valid & ~below & ~above & ~flat)
+            F, K_, c, sqrt_t, slack = F[idx], K[idx], c[idx], np.sqrt(t[idx]), slack[idx]
+
+            # Total volatility v = sigma * sqrt(t) is bracketed by (0, v_max]
+            lo = np.zeros(idx.size)
+            hi = IV_SIGMA_MAX * sqrt_t
+            too_high = OptionMath._black_call(F, K_, hi) < c
+            status[idx[too_high]] = IV_ABOVE_MAX
+
+            keep = ~too_high
+            idx, F, K_, c, sqrt_t, slack, lo, hi = (a[keep] for a in (idx, F, K_, c, sqrt_t, slack, lo, hi))
+
+            # Corrado-Miller initial guess (Brenner-Subrahmanyam when it breaks down)
+            half_gap = c - 0.5 * (F - K_)
+            disc = np.maximum(half_gap ** 2 - (F - K_) ** 2 / np.pi, 0.0)
+            v = SQRT_2PI / (F + K_) * (half_gap + np.sqrt(disc))
+            bad = ~np.isfinite(v) | (v <= lo) | (v >= hi)
+            v = np.where(bad, np.minimum(SQRT_2PI * c / F, 0.5 * hi), v)
+
+            done = np.zeros(idx.size, dtype=bool)
+            for _ in range(max_iter):
+                act = np.flatnonzero(~done)
+                if act.size == 0:
+                    break
+                Fa, Ka, ca, va = F[act], K_[act], c[act], v[act]
+
+                d1 = np.log(Fa / Ka) / va + 0.5 * va
+                d2 = d1 - va
+                f = Fa * ndtr(d1) - Ka * ndtr(d2) - ca
+                vega = Fa * _norm_pdf(d1)
+                volga = vega * d1 * d2 / va
+
+                lo[act] = np.where(f < 0, va, lo[act])
+                hi[act] = np.where(f > 0, va, hi[act])
+
+                # Halley step, Newton when the correction term is unusable
+                newton = f / vega
+                denom = 1.0 - 0.5 * newton * volga / vega
+                step = np.where(np.isfinite(denom) & (denom > 0.5), newton / denom, newton)
+                candidate = va - step
+
+                outside = ~np.isfinite(candidate) | (candidate <= lo[act]) | (candidate >= hi[act])
+                candidate = np.where(outside, 0.5 * (lo[act] + hi[act]), candidate)
+
+                converged = (np.abs(f) <= slack[act]) | (np.abs(candidate - va) <= tol * va)
+                v[act] = np.where(np.abs(f) <= slack[act], va, candidate)
+                done[act] = converged
+
+            iv[idx] = v / sqrt_t
+            status[idx] = np.where(done, IV_OK, IV_NO_CONVERGENCE)
+            iv[idx[~done]] = np.nan
+
+        return {
+            "iv": iv.reshape(shape),
+            "converged": (status == IV_OK).reshape(shape),
+            "status": status.reshape(shape),
+        }
+
+    @staticmethod
+    def _black_call(F, K, v):
+        """Undiscounted Black call price for total volatility v = sigma * sqrt(t) > 0."""
+        d1 = np.log(F / K) / v + 0.5 * v
+        return F * ndtr(d1) - K * ndtr(d1 - v)
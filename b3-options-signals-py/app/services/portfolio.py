@@ -0,0 +1,216 @@
+from datetime import date
+from typing import Dict, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from app.services.math_service import OptionMath
+
+GREEKS = ("delta", "gamma", "vega", "theta")
+
+
+class PortfolioGreeks:
+    """
+    In-memory positions book with incrementally maintained net Greeks.
+
+    Legs live in preallocated columnar arrays (grown by doubling); each row
+    caches its quantity-weighted Greeks and the inputs they were computed
+    from (spot, iv, valuation day). add/remove/refresh only mark rows whose
+    inputs changed, recompute those in one vectorized greeks_array call and
+    apply the difference to the per-underlying totals, so a scan refresh over
+    thousands of legs costs a few array operations.
+
+    Greek units follow OptionMath (theta per day, vega per 1 vol point),
+    multiplied by the signed quantity.
+    """
+
+    def __init__(self, risk_free_rate: float = 0.1375, capacity: int = 1024):
+        self.risk_free_rate = risk_free_rate
+        self._size = 0
+        self._ids: Dict[int, int] = {}      # position id -> row
+        self._next_id = 1
+        self._underlyings: Dict[str, int] = {}
+        self._symbols = np.empty(capacity, dtype=object)
+        self._alloc(capacity)
+        self._totals = np.zeros((0, len(GREEKS)))   # per underlying code
+        self._spots = np.zeros(0)                    # last spot per underlying code
+        self.as_of = date.today()
+
+    def _alloc(self, capacity: int):
+        old = getattr(self, '_cols', None)
+        cols = {
+            'active': np.zeros(capacity, dtype=bool),
+            'underlying': np.zeros(capacity, dtype=np.int32),
+            'is_call': np.zeros(capacity, dtype=bool),
+            'strike': np.zeros(capacity),
+            'expiry': np.zeros(capacity, dtype=np.int64),   # date ordinal
+            'quantity': np.zeros(capacity),
+            'iv': np.full(capacity, np.nan),
+            'iv_from_surface': np.zeros(capacity, dtype=bool),   # re-read on every refresh
+            # Inputs the cached Greeks were computed with
+            'spot_used': np.full(capacity, np.nan),
+            'iv_used': np.full(capacity, np.nan),
+            'day_used': np.zeros(capacity, dtype=np.int64),
+            'greeks': np.zeros((capacity, len(GREEKS))),
+        }
+        if old is not None:
+            for name, values in old.items():
+                cols[name][:self._size] = values[:self._size]
+            symbols = np.empty(capacity, dtype=object)
+            symbols[:self._size] = self._symbols[:self._size]
+            self._symbols = symbols
+        self._cols = cols
+
+    def _code(self, underlying: str) -> int:
+        code = self._underlyings.get(underlying)
+        if code is None:
+            code = self._underlyings[underlying] = len(self._underlyings)
+            self._totals = np.vstack([self._totals, np.zeros(len(GREEKS))])
+            self._spots = np.append(self._spots, np.nan)
+        return code
+
+    def add_position(self, underlying: str, option_type: str, strike: float, expiry: Union[date, str],
+                     quantity: float, iv: Optional[float] = None, symbol: Optional[str] = None) -> int:
+        """Adds one leg (quantity signed: + long, - short). Returns the position id."""
+        if self._size == len(self._cols['active']):
+            self._alloc(max(2 * self._size, 16))
+        expiry = date.fromisoformat(expiry) if isinstance(expiry, str) else expiry
+
+        row = self._size
+        self._size += 1
+        c = self._cols
+        c['active'][row] = True
+        c['underlying'][row] = self._code(underlying)
+        c['is_call'][row] = option_type.lower().startswith('c')
+        c['strike'][row] = strike
+        c['expiry'][row] = expiry.toordinal()
+        c['quantity'][row] = quantity
+        c['iv'][row] = np.nan if iv is None else iv
+        c['iv_from_surface'][row] = False
+        c['spot_used'][row] = np.nan
+        c['greeks'][row] = 0.0
+        self._symbols[row] = symbol
+
+        position_id = self._next_id
+        self._next_id += 1
+        self._ids[position_id] = row
+        self._update(np.array([row]))
+        return position_id
+
+    def remove_position(self, position_id: int) -> bool:
+        row = self._ids.pop(position_id, None)
+        if row is None:
+            return False
+        c = self._cols
+        self._totals[c['underlying'][row]] -= c['greeks'][row]
+        c['active'][row] = False
+        c['greeks'][row] = 0.0
+        # Rows are tombstoned; compact once half the table is dead
+        if len(self._ids) < self._size // 2:
+            self._compact()
+        return True
+
+    def _compact(self):
+        live = np.flatnonzero(self._cols['active'][:self._size])
+        for name, values in self._cols.items():
+            values[:live.size] = values[live]
+            values[live.size:self._size] = 0
+        self._symbols[:live.size] = self._symbols[live]
+        remap = {old: new for new, old in enumerate(live)}
+        self._ids = {pid: remap[row] for pid, row in self._ids.items()}
+        self._size = live.size
+
+    def refresh(self, underlying: str, spot: float, chain_df: Optional[pd.DataFrame] = None,
+                as_of: Optional[date] = None, surface=None) -> int:
+        """
+        New spot (and optionally IVs from an enriched chain, matched by symbol)
+        for one underlying. Legs still without an IV read it from the vol
+        surface when one is given. as_of defaults to today, so a long-running
+        worker decays time to expiry across day boundaries. Returns how many
+        legs had their Greeks recomputed.
+        """
+        self.as_of = as_of or date.today()
+        code = self._underlyings.get(underlying)
+        if code is None:
+            return 0
+        self._spots[code] = spot
+
+        c = self._cols
+        n = self._size
+        rows = np.flatnonzero(c['active'][:n] & (c['underlying'][:n] == code))
+        if chain_df is not None and not chain_df.empty and 'iv' in chain_df.columns and rows.size:
+            quoted = pd.Series(chain_df['iv'].to_numpy(dtype=float), index=chain_df['symbol']).groupby(level=0).last()
+            fresh = quoted.reindex(self._symbols[rows]).to_numpy(dtype=float)
+            has = np.isfinite(fresh)
+            c['iv'][rows[has]] = fresh[has]
+            c['iv_from_surface'][rows[has]] = False
+        if surface is not None and rows.size:
+            missing = rows[np.isnan(c['iv'][rows]) | c['iv_from_surface'][rows]]
+            t = np.maximum(c['expiry'][missing] - self.as_of.toordinal(), 0) / 365.0
+            c['iv'][missing] = surface.vol(c['strike'][missing], t)
+            c['iv_from_surface'][missing] = True
+        return self._update(rows)
+
+    def _update(self, rows: np.ndarray) -> int:
+        """Recomputes Greeks for the rows whose spot, IV or valuation day changed."""
+        c = self._cols
+        today = self.as_of.toordinal()
+        spot = self._spots[c['underlying'][rows]]
+        iv = c['iv'][rows]
+        dirty = (
+            (spot != c['spot_used'][rows])
+            | ~((iv == c['iv_used'][rows]) | (np.isnan(iv) & np.isnan(c['iv_used'][rows])))
+            | (c['day_used'][rows] != today)
+        ) & np.isfinite(spot)
+        rows, spot, iv = rows[dirty], spot[dirty], iv[dirty]
+        if rows.size == 0:
+            return 0
+
+        t = np.maximum(c['expiry'][rows] - today, 0) / 365.0
+        greeks = OptionMath.greeks_array(
+            c['is_call'][rows], spot, c['strike'][rows], t, self.risk_free_rate, iv
+        )
+        new = np.column_stack([greeks[g] for g in GREEKS]) * c['quantity'][rows, None]
+        new = np.nan_to_num(new, nan=0.0)  # legs without IV contribute nothing until one arrives
+
+        np.add.at(self._totals, c['underlying'][rows], new - c['greeks'][rows])
+        c['greeks'][rows] = new
+        c['spot_used'][rows] = spot
+        c['iv_used'][rows] = iv
+        c['day_used'][rows] = today
+        return int(rows.size)
+
+    def exposure(self) -> dict:
+        """Net Greeks per underlying and in total."""
+        by_underlying = {
+            name: dict(zip(GREEKS, np.round(self._totals[code], 6).tolist()))
+            for name, code in self._underlyings.items()
+        }
+        return {
+            "total": dict(zip(GREEKS, np.round(self._totals.sum(axis=0), 6).tolist()))
+            if len(self._totals) else dict.fromkeys(GREEKS, 0.0),
+            "by_underlying": by_underlying,
+            "positions": len(self._ids),
+        }
+
+    def positions(self) -> pd.DataFrame:
+        rows = np.array(sorted(self._ids.values()), dtype=np.intp)
+        names = {code: name for name, code in self._underlyings.items()}
+        c = self._cols
+        df = pd.DataFrame({
+            'id': sorted(self._ids, key=self._ids.get),
+            'underlying': [names[u] for u in c['underlying'][rows]],
+            'symbol': self._symbols[rows],
+            'type': np.where(c['is_call'][rows], 'call', 'put'),
+            'strike': c['strike'][rows],
+            'expiry': [date.fromordinal(int(d)).isoformat() for d in c['expiry'][rows]],
+            'quantity': c['quantity'][rows],
+            'iv': c['iv'][rows],
+        })
+        for j, g in enumerate(GREEKS):
+            df[g] = c['greeks'][rows, j]
+        return df
+
+
+# Global instance shared by the scanner and the API
+portfolio = PortfolioGreeks()
@@ -0,0 +1,306 @@
+from collections.abc import Mapping
+
+import numpy as np
+import pandas as pd
+from scipy.special import ndtr
+
+from app.services.math_service import OptionMath
+
+# Standard-normal nodes for structures valued before their last expiry (see _horizon_metrics)
+HORIZON_NODES = np.linspace(-8.0, 8.0, 401)
+
+
+def _lognormal_cdf(x, S, mu, sigma, t):
+    """P(S_T <= x) for S_T = S exp((mu - sigma^2/2) t + sigma W_t); 0 for x <= 0."""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        z = (np.log(np.maximum(x, 1e-300) / S) - (mu - 0.5 * sigma ** 2) * t) / (sigma * np.sqrt(t))
+    return np.where(x > 0, ndtr(z), 0.0)
+
+
+def _touch_probability(H, S, mu, sigma, t):
+    """Probability that a GBM started at S hits level H before t (reflection principle)."""
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        nu = mu - 0.5 * sigma ** 2
+        vt = sigma * np.sqrt(t)
+        x = np.log(H / S)
+        up = np.where(x >= 0, 1.0, -1.0)
+        power = np.exp(2 * nu * x / sigma ** 2)
+        p = ndtr((-up * x + up * nu * t) / vt) + power * ndtr((-up * x - up * nu * t) / vt)
+    return np.clip(np.where(x == 0, 1.0, p), 0.0, 1.0)
+
+
+def _horizon_metrics(S, is_call, strike, quantity, cost, sigma, leg_sigma, tau, t, r, mu, chunk=512) -> dict:
+    """
+    Metrics at the horizon t for structures with legs that outlive it
+    (calendars, diagonals): legs with tau > 0 remaining are valued with
+    Black-Scholes at leg_sigma, the others at intrinsic. The P&L is no longer
+    piecewise linear, so it is evaluated on lognormal quantile nodes: PoP and
+    breakevens from its sign changes (linear in z between nodes), the expected
+    value by trapezoidal quadrature, max profit/loss over the nodes and the
+    x -> 0 limit (unbounded when the net call quantity is not zero).
+    """
+    z = HORIZON_NODES
+    out = {key: np.empty(len(S)) for key in ('pop', 'breakeven_low', 'breakeven_high', 'expected_value',
+                                             'max_profit', 'max_loss')}
+    density = np.exp(-0.5 * z ** 2) / np.sqrt(2 * np.pi)
+    for lo in range(0, len(S), chunk):
+        rows = slice(lo, lo + chunk)
+        vt = (sigma[rows] * np.sqrt(t[rows]))[:, None]
+        x = S[rows, None] * np.exp((mu[rows] - 0.5 * sigma[rows] ** 2)[:, None] * t[rows, None] + vt * z)
+        x = np.column_stack([np.zeros(len(x)), x])
+        call, K, q, vol, remaining = (a[rows][:, None, :] for a in (is_call, strike, quantity, leg_sigma, tau))
+        intrinsic = np.where(call, np.maximum(x[..., None] - K, 0.0), np.maximum(K - x[..., None], 0.0))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            alive = OptionMath.price_array(call, x[..., None], K, remaining, r, vol)
+        # x = 0 (first node): a live call is worthless, a live put worth the discounted strike
+        alive = np.where(x[..., None] > 0, alive, np.where(call, 0.0, K * np.exp(-r * remaining)))
+        value = np.where(remaining > 0, alive, intrinsic)
+        pnl = (np.where(q != 0, value, 0.0) * q).sum(axis=2) - cost[rows, None]
+        at_zero, pnl = pnl[:, 0], pnl[:, 1:]
+        x = x[:, 1:]
+
+        # Sign changes between nodes -> breakevens and the positive probability mass
+        a, b = pnl[:, :-1], pnl[:, 1:]
+        crosses = (a > 0) != (b > 0)
+        with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+            w = np.where(crosses, a / (a - b), 0.5)
+        zc = z[:-1] + (z[1:] - z[:-1]) * w
+        cdf_lo, cdf_hi, cdf_c = ndtr(z[:-1]), ndtr(z[1:]), ndtr(zc)
+        mass = np.where(crosses, np.where(a > 0, cdf_c - cdf_lo, cdf_hi - cdf_c),
+                        np.where(a > 0, cdf_hi - cdf_lo, 0.0))
+        tails = np.where(pnl[:, 0] > 0, ndtr(z[0]), 0.0) + np.where(pnl[:, -1] > 0, 1 - ndtr(z[-1]), 0.0)
+        out['pop'][rows] = mass.sum(axis=1) + tails
+        with np.errstate(over='ignore'):
+            xc = np.where(crosses, x[:, :-1] * np.exp(vt * (zc - z[:-1])), np.nan)
+        with np.errstate(invalid='ignore'):
+            out['breakeven_low'][rows] = np.nanmin(np.where(crosses, xc, np.inf), axis=1)
+            out['breakeven_high'][rows] = np.nanmax(np.where(crosses, xc, -np.inf), axis=1)
+
+        f = (pnl + cost[rows, None]) * density
+        expected = (0.5 * (f[:, 1:] + f[:, :-1]) * np.diff(z)).sum(axis=1)
+        out['expected_value'][rows] = np.exp(-r * t[rows]) * expected - cost[rows]
+        slope_up = np.where(call[:, 0, :], q[:, 0, :], 0.0).sum(axis=1)
+        extremes = np.column_stack([at_zero, pnl])
+        out['max_profit'][rows] = np.where(slope_up > 0, np.inf, extremes.max(axis=1))
+        out['max_loss'][rows] = np.where(slope_up < 0, np.inf, -extremes.min(axis=1))
+    for key in ('breakeven_low', 'breakeven_high'):
+        out[key] = np.where(np.isinf(out[key]), np.nan, out[key])
+    return out
+
+
+def structure_metrics(spot, is_call, strike, quantity, premium, sigma, t, r=0.1375, drift=None,
+                      leg_t=None, leg_sigma=None) -> dict:
+    """
+    Expiry metrics for a batch of option structures under a lognormal model.
+
+    Legs are padded (n, L) arrays: is_call, strike, signed quantity (0 for
+    padding) and premium per unit (paid when long, received when short).
+    sigma and t are per structure (n,); drift defaults to r (risk-neutral).
+    The expiry P&L is piecewise linear with kinks at the strikes, so its
+    zero crossings (breakevens) and the probability mass where it is
+    positive are computed in closed form for every row at once.
+
+    Structures whose legs expire at different dates (leg_t, (n, L) years) are
+    measured at the first expiry t instead: legs still alive are valued with
+    Black-Scholes at their remaining time and leg_sigma (default: sigma), see
+    _horizon_metrics.
+
+    Returns a dict of (n,) arrays: pop, prob_touch, breakeven_low,
+    breakeven_high, expected_value, max_profit, max_loss (inf = unlimited).
+    """
+    is_call, strike, quantity, premium = (np.atleast_2d(np.asarray(a)) for a in (is_call, strike, quantity, premium))
+    strike = strike.astype(float)
+    quantity = quantity.astype(float)
+    premium = premium.astype(float)
+    n, L = strike.shape
+    S = np.broadcast_to(np.asarray(spot, dtype=float), (n,))
+    sigma = np.broadcast_to(np.asarray(sigma, dtype=float), (n,))
+    t = np.broadcast_to(np.asarray(t, dtype=float), (n,))
+    mu = np.broadcast_to(np.asarray(r if drift is None else drift, dtype=float), (n,))
+    legs = quantity != 0
+    cost = (quantity * premium).sum(axis=1)
+
+    def pnl_at(x):
+        # x: (n, m) underlying prices at expiry -> (n, m) P&L
+        payoff = np.where(is_call[:, None, :], np.maximum(x[..., None] - strike[:, None, :], 0.0),
+                          np.maximum(strike[:, None, :] - x[..., None], 0.0))
+        return (payoff * quantity[:, None, :]).sum(axis=2) - cost[:, None]
+
+    # Kinks (strikes; padding pushed to the end) and the P&L slope beyond them
+    kinks = np.sort(np.where(legs, strike, np.nan), axis=1)
+    kinks = np.where(np.isnan(kinks), np.nanmax(kinks, axis=1, keepdims=True), kinks)
+    slope_up = np.where(is_call, quantity, 0.0).sum(axis=1)  # d P&L / d S above the highest strike
+    at_kinks = pnl_at(kinks)
+    at_zero = pnl_at(np.zeros((n, 1)))[:, 0]
+
+    # Breakevens: crossings on [0, k_0], between kinks, and beyond the last kink
+    with np.errstate(divide='ignore', invalid='ignore'):
+        nodes = np.column_stack([np.zeros(n), kinks])
+        values = np.column_stack([at_zero, at_kinks])
+        a, b = values[:, :-1], values[:, 1:]
+        crosses = (a * b < 0) | ((b == 0) & (a != 0))
+        x = nodes[:, :-1] + (nodes[:, 1:] - nodes[:, :-1]) * a / (a - b)
+        inner = np.where(crosses, x, np.nan)
+        tail = kinks[:, -1] - at_kinks[:, -1] / slope_up
+        tail = np.where((at_kinks[:, -1] * slope_up < 0) & (slope_up != 0), tail, np.nan)
+    breakevens = np.column_stack([inner, tail])
+
+    # Probability of profit: split [0, inf) at nodes and breakevens, test each interval's midpoint
+    cuts = np.sort(np.column_stack([nodes, np.where(np.isnan(breakevens), kinks[:, -1:], breakevens)]), axis=1)
+    edges = np.column_stack([cuts, np.full(n, np.inf)])
+    lo, hi = edges[:, :-1], edges[:, 1:]
+    mid = np.where(np.isinf(hi), lo * 2 + 1.0, 0.5 * (lo + hi))
+    positive = (pnl_at(mid) > 0) & (hi > lo)
+    cdf = _lognormal_cdf(edges, S[:, None], mu[:, None], sigma[:, None], t[:, None])
+    cdf[:, -1] = 1.0
+    pop = np.where(positive, np.diff(cdf, axis=1), 0.0).sum(axis=1)
+
+    # Expected value: discounted expected payoff under (drift, sigma) minus net premium
+    with np.errstate(divide='ignore', invalid='ignore'):
+        F = (S * np.exp(mu * t))[:, None]
+        vt = (sigma * np.sqrt(t))[:, None]
+        d1 = (np.log(F / strike) + 0.5 * vt ** 2) / vt
+        d2 = d1 - vt
+        expected = np.where(is_call, F * ndtr(d1) - strike * ndtr(d2), strike * ndtr(-d2) - F * ndtr(-d1))
+    ev = np.exp(-r * t) * (np.where(legs, expected, 0.0) * quantity).sum(axis=1) - cost
+
+    # Touch: nearest short strike (the level that hurts), else nearest strike
+    with np.errstate(divide='ignore'):
+        distance = np.abs(np.log(strike / S[:, None]))
+    distance = np.where(legs & (quantity < 0), distance, np.where(legs, distance + 1e6, np.inf))
+    touch_level = np.take_along_axis(strike, np.argmin(distance, axis=1)[:, None], axis=1)[:, 0]
+    prob_touch = _touch_probability(touch_level, S, mu, sigma, t)
+
+    extremes = np.column_stack([at_zero, at_kinks])
+    max_profit = np.where(slope_up > 0, np.inf, extremes.max(axis=1))
+    max_loss = np.where(slope_up < 0, np.inf, -extremes.min(axis=1))
+
+    valid = (sigma > 0) & (t > 0) & (S > 0) & legs.any(axis=1)
+    nan = np.nan
+    metrics = {
+        "pop": pop,
+        "breakeven_low": np.nanmin(np.where(np.isnan(breakevens), np.inf, breakevens), axis=1),
+        "breakeven_high": np.nanmax(np.where(np.isnan(breakevens), -np.inf, breakevens), axis=1),
+        "expected_value": ev,
+        "max_profit": max_profit,
+        "max_loss": max_loss,
+    }
+
+    # Legs that outlive the first expiry keep their time value there
+    if leg_t is not None:
+        tau = np.where(legs, np.atleast_2d(np.asarray(leg_t, dtype=float)) - t[:, None], 0.0)
+        staggered = valid & (tau > 1e-9).any(axis=1)
+        if staggered.any():
+            leg_sigma = np.broadcast_to(sigma[:, None], strike.shape) if leg_sigma is None else \
+                np.where(np.isfinite(leg_sigma), leg_sigma, sigma[:, None])
+            rows = np.flatnonzero(staggered)
+            horizon = _horizon_metrics(S[rows], is_call[rows], strike[rows], quantity[rows], cost[rows], sigma[rows],
+                                       np.asarray(leg_sigma, dtype=float)[rows], np.maximum(tau[rows], 0.0),
+                                       t[rows], r, mu[rows])
+            for key, values in horizon.items():
+                metrics[key] = metrics[key].astype(float)
+                metrics[key][rows] = values
+
+    return {
+        "pop": np.where(valid, metrics["pop"], nan),
+        "prob_touch": np.where(valid, prob_touch, nan),
+        "breakeven_low": np.where(valid, metrics["breakeven_low"], nan),
+        "breakeven_high": np.where(valid, metrics["breakeven_high"], nan),
+        "expected_value": np.where(valid, metrics["expected_value"], nan),
+        "max_profit": metrics["max_profit"],
+        "max_loss": np.maximum(metrics["max_loss"], 0.0),
+    }
+
+
+def candidate_metrics(candidates: pd.DataFrame, spot: float, r: float = 0.1375, surface=None) -> pd.DataFrame:
+    """
+    Metrics for strategy candidate rows in one call.
+
+    Single-leg rows: side comes from 'signal_type' (SELL/SHORT -> short), the
+    premium from 'mid' (else 'last'). Structure rows carry a 'legs' list (signed
+    'quantity', 'price' per leg) and are padded into the same batch. The
+    distribution uses the vol surface at each strike when given (so
+    expected_value measures richness against the fitted smile), otherwise the
+    leg's own IV; a structure uses the mean over its legs. Returns a frame
+    aligned to candidates' index; breakevens with no crossing are NaN.
+
+    For a multi-ticker batch, `spot` is per row and `surface` may be a mapping
+    of underlying -> surface, matched against the 'underlying' column.
+    """
+    if candidates.empty:
+        return pd.DataFrame(index=candidates.index)
+
+    n = len(candidates)
+    is_call = (candidates['type'] == 'call').to_numpy()
+    strike = candidates['strike'].to_numpy(dtype=float)
+    t = candidates['time_to_expiry'].to_numpy(dtype=float)
+    side = candidates.get('signal_type', pd.Series('', index=candidates.index)).astype(str).str.upper()
+    quantity = np.where(side.str.startswith(('SELL', 'SHORT')).to_numpy(), -1.0, 1.0)
+    price_col = 'mid' if 'mid' in candidates.columns else 'last'
+    premium = candidates[price_col].to_numpy(dtype=float)
+    sigma = candidates['iv'].to_numpy(dtype=float) if 'iv' in candidates.columns else np.full(n, np.nan)
+
+    structures = [legs if isinstance(legs, list) else None for legs in candidates['legs']] \
+        if 'legs' in candidates.columns else [None] * n
+    width = max([1] + [len(legs) for legs in structures if legs])
+    is_call, strike, quantity, premium, sigma = (
+        np.pad(a[:, None], ((0, 0), (0, width - 1))) for a in (is_call, strike, quantity, premium, sigma)
+    )
+    leg_t = np.repeat(t[:, None], width, axis=1)
+    for i, legs in enumerate(structures):
+        if legs:
+            for j, leg in enumerate(legs):
+                is_call[i, j] = leg['type'] == 'call'
+                strike[i, j] = leg['strike']
+                quantity[i, j] = leg['quantity']
+                premium[i, j] = leg['price']
+                sigma[i, j] = leg['iv'] if leg.get('iv') is not None else np.nan
+                leg_t[i, j] = leg.get('time_to_expiry', t[i])
+
+    owner = candidates['underlying'].to_numpy() if isinstance(surface, Mapping) else None
+    metrics = leg_metrics(spot, is_call, strike, quantity, premium, sigma, t, r, surface, owner, leg_t)
+    return pd.DataFrame(metrics, index=candidates.index)
+
+
+def leg_metrics(spot, is_call, strike, quantity, premium, sigma, t, r: float = 0.1375,
+                surface=None, owner=None, leg_t=None) -> dict:
+    """
+    structure_metrics for candidates already padded into (n, L) leg arrays
+    (quantity 0 marks padding), as candidate_metrics and the scanner's
+    columnar signal batch build them. Each candidate's distribution vol is
+    the surface at its strikes when given (a mapping of underlying ->
+    surface is matched against `owner`), else the legs' own IV, averaged
+    over its legs. With per-leg expiries (leg_t), legs expiring after t are
+    priced at the surface vol of their own expiry. Unbounded breakevens and
+    max profit/loss come back NaN; max_profit_unlimited / max_loss_unlimited
+    flag the unbounded ones apart from the merely unknown.
+    """
+    def surface_vol(at):
+        if isinstance(surface, Mapping):
+            fair = np.full(strike.shape, np.nan)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                for key in pd.unique(owner):
+                    if surface.get(key) is not None:
+                        rows = owner == key
+                        fair[rows] = surface[key].vol(strike[rows], at[rows])
+            return np.where(np.isfinite(fair), fair, sigma)
+        if surface is not None:
+            with np.errstate(divide='ignore', invalid='ignore'):
+                fair = surface.vol(strike, at)
+            return np.where(np.isfinite(fair), fair, sigma)
+        return sigma
+
+    leg_sigma = None if leg_t is None else surface_vol(np.asarray(leg_t, dtype=float))
+    sigma = surface_vol(np.asarray(t, dtype=float)[:, None])
+    # One distribution per candidate: mean vol over its legs (padding excluded)
+    known = (quantity != 0) & np.isfinite(sigma)
+    with np.errstate(invalid='ignore'):
+        sigma = np.where(known, sigma, 0.0).sum(axis=1) / known.sum(axis=1)
+
+    metrics = structure_metrics(spot, is_call, strike, quantity, premium, sigma, t, r,
+                                leg_t=leg_t, leg_sigma=leg_sigma)
+    for key in ('max_profit', 'max_loss'):
+        metrics[f'{key}_unlimited'] = np.isposinf(metrics[key])
+    for key in ('breakeven_low', 'breakeven_high', 'max_profit', 'max_loss'):
+        metrics[key] = np.where(np.isinf(metrics[key]), np.nan, metrics[key])
+    return metrics
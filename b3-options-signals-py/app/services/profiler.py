@@ -0,0 +1,209 @@
+"""
+Per-strategy execution profile of scanner cycles.
+
+Every strategy pass of a scan is measured (wall time, rows in, signals out,
+exceptions and, when enabled, peak traced allocation) and attributed to the tickers of the
+cycle, along with the routing counts (strategy x ticker evaluations run and
+skipped by preconditions). A universe pass covers several tickers at once, so its rows and
+signals are split exactly by underlying, while its wall time is apportioned
+by each ticker's share of the rows in. The last `window`
+cycles are kept (constant memory) and aggregated on request, for the admin
+endpoint, together with the per-ticker data acquisition stage timings.
+
+Allocation tracking uses tracemalloc, which slows every allocation of the
+process while it runs, so it is off unless PROFILE_MEMORY=true (or
+track_memory=True) is set.
+"""
+
+import os
+import time
+import tracemalloc
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+import numpy as np
+
+
+class CycleProfile:
+    """Measurements of one scan cycle: one entry per strategy that ran."""
+
+    def __init__(self, tickers: List[str], track_memory: bool = False):
+        self.tickers = list(tickers)
+        self.track_memory = track_memory
+        self.started = time.time()
+        self.entries: Dict[str, dict] = {}
+        # Data acquisition per ticker: stage -> {'ms', 'source'} (see SignalScanner._fetch)
+        self.stages: Dict[str, dict] = {}
+        # Routing of the cycle: {'evaluated', 'skipped', 'skipped_by_strategy'} (see RoutingTable.record)
+        self.routing: Optional[dict] = None
+
+    @contextmanager
+    def measure(self, strategy: str, rows_in: np.ndarray):
+        """
+        Times the block and adds it to the entry of `strategy` (a strategy may run
+        more than once per cycle). rows_in is the number of options per ticker the
+        strategy sees; the block sets run['rows_out'] on the yielded dict (signals
+        per ticker). Exceptions are counted and re-raised.
+        """
+        entry = self.entries.setdefault(strategy, {
+            'wall_ms': 0.0, 'peak_kib': 0.0, 'errors': 0, 'error': None,
+            'rows_in': np.zeros(len(self.tickers)), 'rows_out': np.zeros(len(self.tickers)),
+        })
+        entry['rows_in'] = entry['rows_in'] + np.asarray(rows_in, dtype=float)
+        run = {'rows_out': 0}
+
+        # Peak of this block from a tracer started here. A tracer someone else
+        # started is left alone (no reset_peak): only the net growth is recorded
+        outer = self.track_memory and tracemalloc.is_tracing()
+        if outer:
+            base = tracemalloc.get_traced_memory()[0]
+        elif self.track_memory:
+            tracemalloc.start()
+            base = 0
+        start = time.perf_counter()
+        try:
+            yield run
+        except Exception as e:
+            entry['errors'] += 1
+            entry['error'] = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            entry['wall_ms'] += (time.perf_counter() - start) * 1e3
+            if outer:
+                peak = max(tracemalloc.get_traced_memory()[0] - base, 0)
+                entry['peak_kib'] = max(entry['peak_kib'], peak / 1024)
+            elif self.track_memory:
+                peak = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+                entry['peak_kib'] = max(entry['peak_kib'], peak / 1024)
+            entry['rows_out'] = entry['rows_out'] + np.asarray(run['rows_out'], dtype=float)
+
+    def record_stages(self, ticker: str, timings: dict) -> None:
+        self.stages[ticker] = dict(timings)
+
+    def record_routing(self, stats: dict) -> None:
+        self.routing = {'evaluated': stats['evaluated'], 'skipped': stats['skipped'],
+                        'skipped_by_strategy': dict(stats['skipped_by_strategy'])}
+
+    @property
+    def wall_ms(self) -> float:
+        return sum(entry['wall_ms'] for entry in self.entries.values())
+
+
+class StrategyProfiler:
+    """
+    Rolling window of cycle profiles.
+
+    The scanner opens a CycleProfile per scan (cycle), measures each strategy
+    pass with it and hands it back through record(); summary() aggregates the
+    most recent cycles per strategy and per ticker, most expensive first.
+    """
+
+    def __init__(self, window: int = 50, track_memory: Optional[bool] = None):
+        self.window = window
+        if track_memory is None:
+            track_memory = os.getenv('PROFILE_MEMORY', 'false').lower() == 'true'
+        self.track_memory = track_memory
+        self._cycles = deque(maxlen=window)
+
+    def cycle(self, tickers: List[str]) -> CycleProfile:
+        return CycleProfile(tickers, self.track_memory)
+
+    def record(self, cycle: CycleProfile) -> None:
+        if cycle.entries or cycle.stages:
+            self._cycles.append(cycle)
+
+    def clear(self) -> None:
+        self._cycles.clear()
+
+    def summary(self, cycles: Optional[int] = None) -> dict:
+        """
+        Aggregates over the last `cycles` cycles (default: the whole window).
+
+        Returns:
+            {'cycles', 'window', 'last_cycle': {..., 'slowest'}, 'strategies': [...],
+            'acquisition': {stage: {...}}, 'routing': {...}} with strategies sorted
+            by total wall time (descending), acquisition stages aggregated over all
+            tickers and routing evaluations/skips summed over the cycles.
+        """
+        recent = list(self._cycles)[-cycles:] if cycles else list(self._cycles)
+        totals: Dict[str, dict] = {}
+        stages: Dict[str, dict] = {}
+        routing = {'evaluated': 0, 'skipped': 0, 'skipped_by_strategy': {}}
+        for cycle in recent:
+            if cycle.routing:
+                routing['evaluated'] += cycle.routing['evaluated']
+                routing['skipped'] += cycle.routing['skipped']
+                for name, skipped in cycle.routing['skipped_by_strategy'].items():
+                    routing['skipped_by_strategy'][name] = routing['skipped_by_strategy'].get(name, 0) + skipped
+            for timings in cycle.stages.values():
+                for stage, timing in timings.items():
+                    total = stages.setdefault(stage, {'runs': 0, 'ms': [], 'cached': 0, 'failed': 0})
+                    total['runs'] += 1
+                    total['ms'].append(timing['ms'])
+                    source = timing.get('source')
+                    if source in ('cached', 'failed'):
+                        total[source] += 1
+            for name, entry in cycle.entries.items():
+                total = totals.setdefault(name, {
+                    'strategy': name, 'runs': 0, 'errors': 0, 'last_error': None,
+                    'wall_ms': [], 'rows_in': 0, 'rows_out': 0, 'peak_kib': 0.0, 'tickers': {},
+                })
+                total['runs'] += 1
+                total['errors'] += entry['errors']
+                total['last_error'] = entry['error'] or total['last_error']
+                total['wall_ms'].append(entry['wall_ms'])
+                total['rows_in'] += int(entry['rows_in'].sum())
+                total['rows_out'] += int(entry['rows_out'].sum())
+                total['peak_kib'] = max(total['peak_kib'], entry['peak_kib'])
+                # Wall time a ticker is charged: its share of the rows in
+                rows = entry['rows_in'].sum()
+                share = entry['rows_in'] / rows if rows else np.full(len(cycle.tickers), 1 / max(len(cycle.tickers), 1))
+                for ticker, n_in, n_out, part in zip(cycle.tickers, entry['rows_in'].tolist(),
+                                                     entry['rows_out'].tolist(), share.tolist()):
+                    if not n_in and not n_out:
+                        continue
+                    per_ticker = total['tickers'].setdefault(
+                        ticker, {'wall_ms': 0.0, 'rows_in': 0, 'rows_out': 0, 'errors': 0})
+                    per_ticker['wall_ms'] += entry['wall_ms'] * part
+                    per_ticker['rows_in'] += int(n_in)
+                    per_ticker['rows_out'] += int(n_out)
+                    per_ticker['errors'] += entry['errors']
+
+        strategies = []
+        for total in totals.values():
+            wall = np.array(total.pop('wall_ms'))
+            total['wall_ms'] = {'total': round(float(wall.sum()), 3), 'mean': round(float(wall.mean()), 3),
+                                'max': round(float(wall.max()), 3)}
+            total['peak_kib'] = round(total['peak_kib'], 1)
+            for per_ticker in total['tickers'].values():
+                per_ticker['wall_ms'] = round(per_ticker['wall_ms'], 3)
+            strategies.append(total)
+        strategies.sort(key=lambda s: s['wall_ms']['total'], reverse=True)
+
+        for total in stages.values():
+            ms = np.array(total.pop('ms'))
+            total['mean_ms'], total['max_ms'] = round(float(ms.mean()), 3), round(float(ms.max()), 3)
+
+        last_cycle = None
+        if recent:
+            cycle = recent[-1]
+            ranked = sorted(cycle.entries.items(), key=lambda item: item[1]['wall_ms'], reverse=True)
+            last_cycle = {
+                'started': cycle.started,
+                'tickers': cycle.tickers,
+                'wall_ms': round(cycle.wall_ms, 3),
+                'slowest': ranked[0][0] if ranked else None,
+                'stages': cycle.stages,
+                'routing': cycle.routing,
+                'strategies': [{'strategy': name, 'wall_ms': round(entry['wall_ms'], 3),
+                                'rows_in': int(entry['rows_in'].sum()), 'rows_out': int(entry['rows_out'].sum()),
+                                'peak_kib': round(entry['peak_kib'], 1), 'errors': entry['errors']}
+                               for name, entry in ranked],
+            }
+        return {'cycles': len(recent), 'window': self.window, 'last_cycle': last_cycle, 'strategies': strategies,
+                'acquisition': stages, 'routing': routing}
+
+
+strategy_profiler = StrategyProfiler()
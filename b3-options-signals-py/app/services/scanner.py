@@ -1,5 +1,11 @@
-from app.data import B3RealData, TechnicalIndicators, cache
+from app.data import B3RealData, TechnicalIndicators, cache, intraday_store
 from app.services.alerts import alert_service
+from app.services.greeks import chain_enricher
+from app.services.vol_surface import vol_surface_service
+from app.services.scenarios import scenario_engine
+from app.services.portfolio import portfolio
+from app.services.profiler import strategy_profiler
+from app.services.probability import leg_metrics
 from app.core.strategies_vectorized import (
     HighIVStrategy, DeltaHedgeStrategy, RSIStrategy, CoveredCallStrategy,
     LongCallStrategy, LongPutStrategy, CashSecuredPutStrategy,
@@ -9,17 +15,37 @@ from app.core.strategies_vectorized import (
     CalendarSpreadStrategy, DiagonalSpreadStrategy, CollarStrategy,
     ProtectivePutStrategy, JadeLizardStrategy, ShortStrangleStrategy
 )
+from app.core.chain_context import ChainContext
+from app.core.filter_specs import FilterProgram
+from app.core.routing import RoutingTable
+from app.core.signal_batch import SignalBatch
 from app.core.risk_classifier import get_risk_info
 from app.core.filters import ScoreCalculator, RiskManager
+from typing import Dict, List, Optional
 import pandas as pd
 import numpy as np
+import asyncio
 import logging
+import math
+import time
 
 logger = logging.getLogger(__name__)
 
+# Prazo (segundos) de cada etapa de aquisição de um ativo; as três correm em paralelo
+STAGE_DEADLINES = {'cotacao': 5.0, 'historico': 8.0, 'cadeia': 15.0}
+
 class SignalScanner:
-    def __init__(self):
+    def __init__(self, attach_scenarios: bool = True, deadlines: Optional[Dict[str, float]] = None):
         self.data_client = B3RealData()
+        # Prazos por etapa; estourado o prazo, usa o último valor bom (se ainda válido)
+        self.deadlines = {**STAGE_DEADLINES, **(deadlines or {})}
+        # Último valor bom por (etapa, ativo) e a idade máxima aceita (TTLs do cache)
+        self._last_good = {}
+        # Spot em que a última cadeia boa de cada ativo foi cotada
+        self._chain_spot = {}
+        self.max_age = {'cotacao': cache.ttl_cotacao, 'historico': cache.ttl_historico, 'cadeia': cache.ttl_cadeia}
+        # Anexa a cada sinal o resumo da grade de cenários (spot x vol x dias)
+        self.attach_scenarios = attach_scenarios
         self.tech_client = TechnicalIndicators()
         
         self.strategies = [
@@ -45,23 +71,85 @@ class SignalScanner:
             ShortStrangleStrategy()
         ]
         
-    async def scan_ticker(self, ticker: str):
+        # Filtros declarativos de todas as estratégias, avaliados numa única passada por cadeia
+        self.filter_program = FilterProgram(
+            spec for strategy in self.strategies for spec in strategy.filter_specs
+        )
+
+        # Avaliações (estratégia, ativo) feitas e puladas pelo roteamento, acumuladas
+        self.routing_stats = RoutingTable.new_stats()
+
+        # União dos indicadores que estratégias e score realmente consomem
+        self.required_indicators = set(ScoreCalculator.required_indicators)
+        for strategy in self.strategies:
+            self.required_indicators.update(strategy.required_indicators)
+        
+    async def _fetch(self, stage: str, ticker: str, fetch, timings: dict):
         """
-        Executa scan de estratégias para um ticker usando DADOS REAIS.
+        Uma etapa de aquisição com prazo. Falha, estouro do prazo ou resultado
+        vazio caem no último valor bom da etapa (se dentro de max_age); sem ele,
+        None. timings[stage] recebe o tempo (ms) e a origem (live/cached/failed).
         """
-        logger.info(f"Iniciando scan para {ticker} com dados reais")
-        
+        start = time.perf_counter()
+        value, error = None, None
+        try:
+            value = await asyncio.wait_for(fetch(), timeout=self.deadlines[stage])
+            if isinstance(value, pd.DataFrame) and value.empty:
+                value, error = None, "vazio"
+        except asyncio.TimeoutError:
+            error = f"prazo de {self.deadlines[stage]:.1f}s excedido"
+        except Exception as e:
+            error = str(e)
+
+        if value is not None:
+            self._last_good[(stage, ticker)] = (time.time(), value)
+            source = 'live'
+        else:
+            cached = self._last_good.get((stage, ticker))
+            if cached is not None and time.time() - cached[0] <= self.max_age[stage]:
+                value, source = cached[1], 'cached'
+            else:
+                source = 'failed'
+            logger.warning(f"Etapa {stage} de {ticker} falhou ({error}); usando: {source}")
+        timings[stage] = {'ms': round((time.perf_counter() - start) * 1e3, 3), 'source': source}
+        return value
+
+    async def _prepare(self, ticker: str, timings: Optional[dict] = None) -> Optional[dict]:
+        """
+        Etapa de dados de um ativo (I/O): cotação, histórico e cadeia buscados em
+        paralelo (cada um com prazo e fallback, ver _fetch), indicadores, cadeia
+        normalizada e enriquecida, superfície de vol e refresh da carteira. None
+        se falhar. timings recebe o tempo e a origem de cada etapa.
+        """
+        timings = {} if timings is None else timings
         try:
-            # 1. Busca Dados de Mercado (Real-time)
-            cotacao = await self.data_client.get_cotacao(ticker)
+            # 1-3. Cotação, histórico e cadeia são independentes: latência ~ a da etapa mais lenta
+            start = time.perf_counter()
+            cotacao, hist, chain_df = await asyncio.gather(
+                self._fetch('cotacao', ticker, lambda: self.data_client.get_cotacao(ticker), timings),
+                self._fetch('historico', ticker, lambda: self.data_client.get_historico(ticker, days=100), timings),
+                self._fetch('cadeia', ticker, lambda: self.data_client.get_cadeia_opcoes(ticker), timings),
+            )
+            timings['aquisicao'] = {'ms': round((time.perf_counter() - start) * 1e3, 3)}
+            if cotacao is None:
+                raise ValueError("cotação indisponível")
             spot_price = cotacao['preco']
+            # Cadeia reaproveitada: IV/gregas resolvidas contra o spot em que ela foi cotada
+            if timings['cadeia']['source'] == 'live':
+                self._chain_spot[ticker] = spot_price
+            elif timings['cadeia']['source'] == 'cached':
+                spot_price = self._chain_spot.get(ticker, spot_price)
+            
+            # Cada cotação nova alimenta as barras intraday (1m/5m); a reaproveitada não
+            if timings['cotacao']['source'] == 'live':
+                intraday_store.add_quote(ticker, cotacao['preco'], cotacao['volume'])
             
-            # 2. Calcula Indicadores Técnicos (Real-time)
-            # Busca histórico para cálculo
+            # Indicadores Técnicos a partir do histórico (neutro sem histórico)
             try:
-                hist = await self.data_client.get_historico(ticker, days=100)
-                indicators = await self.tech_client.calculate_all(hist, ticker)
-                rsi = indicators['rsi']
+                if hist is None:
+                    raise ValueError("histórico indisponível")
+                indicators = await self.tech_client.calculate(hist, ticker, self.required_indicators)
+                rsi = indicators.get('rsi', 50.0)
             except Exception as e:
                 logger.warning(f"Não foi possível calcular indicadores para {ticker}: {e}")
                 rsi = 50.0  # Fallback neutro
@@ -71,15 +159,15 @@ class SignalScanner:
                 "price": spot_price, 
                 "rsi": rsi,
                 "volume": cotacao['volume'],
-                "variation": cotacao['variacao']
+                "variation": cotacao['variacao'],
+                "intraday": intraday_store.indicators(ticker),
+                # Etapas servidas pelo último valor bom (dado defasado)
+                "degraded": [stage for stage, t in timings.items() if t.get('source') == 'cached'],
             }
             
-            # 3. Busca Cadeia de Opções (Real-time)
-            chain_df = await self.data_client.get_cadeia_opcoes(ticker)
-            
-            if chain_df.empty:
+            if chain_df is None:
                 logger.warning(f"Nenhuma opção encontrada para {ticker}")
-                return []
+                return None
             
             # Normalização de colunas para compatibilidade com estratégias
             # De: ['ticker_opcao', 'underlying', 'tipo', 'strike', 'preco', 'volume', 'iv', 'delta']
@@ -94,86 +182,216 @@ class SignalScanner:
             # Normaliza type (CALL/PUT -> call/put)
             chain_df['type'] = chain_df['type_raw'].str.lower()
             
-            # Colunas faltantes (mocked ou estimadas por enquanto)
+            # Colunas faltantes: sem cotação de bid/ask a fonte não informa spread (NaN)
             if 'bid' not in chain_df.columns:
-                chain_df['bid'] = chain_df['last'] * 0.98  # Estimativa spread
+                chain_df['bid'] = np.nan
             if 'ask' not in chain_df.columns:
-                chain_df['ask'] = chain_df['last'] * 1.02  # Estimativa spread
-            if 'theta' not in chain_df.columns:
-                chain_df['theta'] = -0.05  # Valor padrão pequeno
+                chain_df['ask'] = np.nan
             if 'time_to_expiry' not in chain_df.columns:
                 chain_df['time_to_expiry'] = 20/252  # ~1 mês útil padrão
             
+            # Enriquecimento único por cadeia: IV pelo mid + gregas reais (vetorizado, com cache)
+            chain_df = chain_enricher.enrich(chain_df, spot_price)
+            
+            # Superfície de volatilidade (SVI por vencimento, cacheada por snapshot)
+            ticker_data['vol_surface'] = vol_surface_service.build(chain_df, spot_price)
+
+            # Atualiza as gregas das posições abertas neste ativo (só as pernas que mudaram)
+            portfolio.refresh(ticker, spot_price, chain_df, surface=ticker_data['vol_surface'])
+            
         except Exception as e:
             logger.error(f"Erro ao buscar dados para {ticker}: {e}")
-            return []
+            return None
 
-        all_signals = []
-        
+        return {"ticker_data": ticker_data, "chain": chain_df, "cotacao": cotacao, "timings": timings}
 
-        # 4. Aplica Estratégias
-        for strategy in self.strategies:
+    async def scan_ticker(self, ticker: str):
+        """
+        Executa scan de estratégias para um ticker usando DADOS REAIS.
+        """
+        return (await self.scan_universe([ticker])).get(ticker, [])
+
+    async def scan_universe(self, tickers: List[str], chunk_size: Optional[int] = None,
+                            pause: float = 0.0) -> Dict[str, list]:
+        """
+        Scan de vários ativos com um único passe de cada estratégia.
+
+        A aquisição é por ativo (concorrente, em lotes de `chunk_size` com `pause`
+        segundos entre eles para respeitar a fonte; dentro do ativo as etapas
+        também correm em paralelo, com prazo e fallback); as cadeias normalizadas são
+        concatenadas com a coluna 'underlying' e spot/RSI difundidos por linha, e
+        cada estratégia roda uma vez sobre o universo (buscas por ativo no
+        ChainContext). O custo das estratégias cresce com o número de opções, não
+        com o de ativos. Retorna ticker -> sinais.
+        """
+        tickers = list(dict.fromkeys(tickers))
+        logger.info(f"Iniciando scan com dados reais para {len(tickers)} ativos")
+        signals = {ticker: [] for ticker in tickers}
+
+        prepared = {}
+        timings = {ticker: {} for ticker in tickers}
+        chunk_size = chunk_size or max(len(tickers), 1)
+        for i in range(0, len(tickers), chunk_size):
+            chunk = tickers[i:i + chunk_size]
+            results = await asyncio.gather(*(self._prepare(ticker, timings[ticker]) for ticker in chunk))
+            prepared.update({ticker: p for ticker, p in zip(chunk, results) if p is not None})
+            if pause and i + chunk_size < len(tickers):
+                await asyncio.sleep(pause)
+        if not prepared:
+            profile = strategy_profiler.cycle([])
+            for ticker, stages in timings.items():
+                profile.record_stages(ticker, stages)
+            strategy_profiler.record(profile)
+            return signals
+
+        # 4. Universo: cadeias concatenadas, com o ativo e seu spot/RSI em cada linha
+        universe_df = pd.concat([
+            p['chain'].assign(underlying=ticker, spot=p['ticker_data']['price'], rsi=p['ticker_data']['rsi'])
+            for ticker, p in prepared.items()
+        ], ignore_index=True)
+        # Features da cadeia (moneyness, máscaras call/put, mid, spread...) calculadas uma vez
+        chain_ctx = ChainContext(universe_df, universe_df['spot'].to_numpy(dtype=float),
+                                 program=self.filter_program, group=universe_df['underlying'].to_numpy())
+        universe_data = {"tickers": list(prepared)}
+
+        # 5. Roteamento: cada estratégia só roda nos ativos que cumprem suas pré-condições
+        routing = RoutingTable(self.strategies, chain_ctx)
+        routing_stats = RoutingTable.new_stats()
+        routing.record(routing_stats)
+        routing.record(self.routing_stats)
+        if routing_stats['skipped']:
+            logger.info(f"Roteamento: {routing_stats['skipped']} de {routing.eligible.size} avaliações puladas")
+
+        # 6. Aplica Estratégias (uma vez cada, para todos os ativos elegíveis); cada uma
+        # devolve um lote colunar (posições + rótulos categóricos), sem copiar linhas.
+        # Cada passe é medido (tempo, opções/sinais por ativo, pico de memória, erros)
+        options = np.bincount(chain_ctx.group_codes, minlength=len(chain_ctx.groups))
+        profile = strategy_profiler.cycle(chain_ctx.groups)
+        for ticker, stages in timings.items():
+            profile.record_stages(ticker, stages)
+        profile.record_routing(routing_stats)
+        batches = []
+        for i, strategy in enumerate(self.strategies):
+            eligible = routing.eligible[i]
+            if not eligible.any():
+                continue
             try:
-                # Retorna DataFrame com sinais
-                signal_df = strategy.analyze(ticker_data, chain_df)
-                
-                if not signal_df.empty:
-                    for _, row in signal_df.iterrows():
-                        risk_info = get_risk_info(strategy.name)
-                        
-                        # Prepara dados para o ScoreCalculator
-                        # O row (series) contem dados da opção, technicals vem do signal_dict ou context
-                        
-                        # Constrói o dicionário preliminar do sinal
-                        signal_dict = {
-                            "strategy": row.get('strategy', strategy.name),
-                            "ticker": row.get('symbol', 'ESTRUTURA'),
-                            "underlying": ticker,
-                            "spot_price": spot_price,
-                            "signal_type": row.get('signal_type', 'SIGNAL'),
-                            "reason": row.get('reason', 'Sinal detectado'),
-                            "timestamp": cotacao['timestamp'],
-                            "recommendation": row.get('recommended_action', ''),
-                            "risk_level": row.get('risk_level', strategy.risk_level),
-                            "risk_info": risk_info,
-                            "technicals": {
-                                "rsi": rsi,
-                                "iv": row.get('iv', 0)
-                            },
-                             "legs": [
-                                {
-                                    "symbol": row.get('symbol'),
-                                    "strike": row.get('strike'),
-                                    "type": row.get('type'),
-                                    "action": row.get('signal_type', '').split(' ')[0],
-                                    "bid": row.get('bid', 0),
-                                    "ask": row.get('ask', 0),
-                                    "volume": row.get('volume', 0),
-                                    "delta": row.get('delta', 0),
-                                    "time_to_expiry": row.get('time_to_expiry', 0)
-                                }
-                            ]
-                        }
-                        
-                        # Calcula Score e Risk Flags usando o módulo filters
-                        # Passamos o row (que atua como chain_row) para dados de liquidez/gregas
-                        # Converter row p/ dict para segurança
-                        chain_row_dict = row.to_dict()
-                        score = ScoreCalculator.calculate_score(signal_dict, chain_row_dict)
-                        flags = RiskManager.get_risk_flags(signal_dict, chain_row_dict)
-                        
-                        signal_dict['confidence_score'] = score
-                        signal_dict['risk_flags'] = flags
-                        
-                        all_signals.append(signal_dict)
-                        # Fire and forget alert
-                        await alert_service.send_signal(signal_dict)
-                        
+                with profile.measure(strategy.name, np.where(eligible, options, 0)) as run:
+                    if eligible.all():
+                        batch = strategy.signals(universe_data, chain_ctx)
+                    else:
+                        with chain_ctx.restricted(routing.rows(i)):
+                            batch = strategy.signals(universe_data, chain_ctx)
+                    run['rows_out'] = np.bincount(chain_ctx.group_codes[batch.legs[:, 0]],
+                                                  minlength=len(chain_ctx.groups))
+                batches.append(batch)
             except Exception as e:
-                logger.error(f"Erro na estratégia {strategy.name} para {ticker}: {e}")
+                logger.error(f"Erro na estratégia {strategy.name}: {e}")
                 continue
-                    
-        logger.info(f"Scan finalizado para {ticker}: {len(all_signals)} sinais encontrados")
-        return all_signals
+        strategy_profiler.record(profile)
+
+        # 7. Métricas, score e flags do lote inteiro; dicts só na saída (API/alertas)
+        for signal_dict in self._build_signals(SignalBatch.concat(batches), chain_ctx, prepared):
+            signals[signal_dict['underlying']].append(signal_dict)
+            # Fire and forget alert
+            await alert_service.send_signal(signal_dict)
+
+        for ticker in prepared:
+            logger.info(f"Scan finalizado para {ticker}: {len(signals[ticker])} sinais encontrados")
+        return signals
+
+    def _build_signals(self, batch: SignalBatch, ctx: ChainContext, prepared: dict) -> List[dict]:
+        """
+        Sinais completos (risco, probabilidades, cenários e score) de um lote.
+
+        PoP/toque/breakevens, vol da superfície, score, flags e cenários saem de
+        cálculos em colunas sobre o lote inteiro; o único passo por sinal é a
+        montagem final dos dicts, que é o formato consumido pela API e alertas.
+        """
+        if not len(batch):
+            return []
+        first = batch.legs[:, 0]
+        owner = ctx.group_codes[first]
+        groups = [prepared[group] for group in ctx.groups]
+        spot = np.array([p['ticker_data']['price'] for p in groups], dtype=float)[owner]
+        rsi = np.array([p['ticker_data']['rsi'] for p in groups], dtype=float)[owner]
+        # RSI intraday (barras de 5m) confirma as reversões; NaN enquanto não há barras
+        intraday_rsi = np.array([p['ticker_data']['intraday'].get('5m', {}).get('rsi', np.nan) for p in groups],
+                                dtype=float)
+        surfaces = [p['ticker_data'].get('vol_surface') for p in groups]
+        quotes = batch.quotes(ctx)
+        legs = batch.leg_columns(ctx)
+        strategy, signal_type, risk_level = (batch.labels.get(key) for key in ('strategy', 'signal_type', 'risk_level'))
+
+        # PoP, toque, breakevens e valor esperado de todos os candidatos de uma vez; pernas
+        # que vencem depois da primeira (calendário/diagonal) mantêm o valor no tempo
+        metrics = leg_metrics(spot, legs['is_call'], legs['strike'], legs['quantity'], legs['price'], legs['iv'],
+                              quotes['time_to_expiry'], surface=dict(zip(ctx.groups, surfaces)),
+                              owner=np.asarray(ctx.groups, dtype=object)[owner], leg_t=legs['time_to_expiry'])
+        scores = ScoreCalculator.calculate_scores(
+            strategy, signal_type, risk_level, rsi, quotes['iv'], quotes['volume'], quotes['bid'], quotes['ask'],
+            metrics['pop'], metrics['expected_value'], quotes['delta'], intraday_rsi[owner])
+        flags = RiskManager.get_risk_flag_lists(risk_level, quotes['volume'], quotes['bid'], quotes['ask'],
+                                                quotes['time_to_expiry'])
+        scenarios = scenario_engine.signal_summaries(legs['is_call'], legs['strike'], legs['time_to_expiry'],
+                                                     legs['iv'], legs['quantity'], legs['price'], spot) \
+            if self.attach_scenarios else [None] * len(batch)
+        surface_vol = self._surface_vols(surfaces, owner, quotes['strike'], quotes['time_to_expiry'])
+
+        # Risco por estratégia: uma consulta por categoria, não por sinal
+        names = batch.label('strategy')
+        risk_info = {name: get_risk_info(name) for name in dict.fromkeys(names.tolist())}
+        probabilities = {
+            key: [round(v, 4) if math.isfinite(v) else None for v in metrics[key].tolist()]
+            for key in ('pop', 'prob_touch', 'breakeven_low', 'breakeven_high', 'expected_value', 'max_profit', 'max_loss')
+        }
+        # Risco/ganho ilimitado (None acima só diz "sem valor")
+        probabilities.update({key: metrics[key].tolist() for key in ('max_profit_unlimited', 'max_loss_unlimited')})
+
+        columns = zip(
+            names.tolist(), batch.symbols(ctx), owner.tolist(), batch.label('signal_type', 'SIGNAL').tolist(),
+            batch.label('reason', 'Sinal detectado').tolist(), batch.label('recommended_action', '').tolist(),
+            batch.label('risk_level').tolist(), quotes['iv'].tolist(), surface_vol, batch.leg_records(ctx),
+            zip(*probabilities.values()), scenarios, scores.tolist(), flags,
+        )
+        signals = []
+        for (name, symbol, group, signal, reason, action, level, iv, iv_surface, leg_list,
+             probs, scenario, score, risk_flags) in columns:
+            ticker_data, cotacao = groups[group]['ticker_data'], groups[group]['cotacao']
+            signal_dict = {
+                "strategy": name,
+                "ticker": symbol,
+                "underlying": ticker_data['ticker'],
+                "spot_price": ticker_data['price'],
+                "signal_type": signal,
+                "reason": reason,
+                "timestamp": cotacao['timestamp'],
+                "recommendation": action,
+                "risk_level": level,
+                "risk_info": risk_info[name],
+                "technicals": {"rsi": ticker_data['rsi'], "iv": iv, "iv_surface": iv_surface,
+                               "intraday_rsi": ticker_data['intraday'].get('5m', {}).get('rsi')},
+                "legs": leg_list,
+                "probabilities": dict(zip(probabilities, probs)),
+            }
+            if self.attach_scenarios:
+                signal_dict['scenarios'] = scenario
+            signal_dict['confidence_score'] = score
+            signal_dict['risk_flags'] = risk_flags
+            # Etapas de aquisição servidas pelo último valor bom (vazio = tudo ao vivo)
+            signal_dict['degraded'] = ticker_data.get('degraded', [])
+            signals.append(signal_dict)
+        return signals
+
+    @staticmethod
+    def _surface_vols(surfaces: list, owner: np.ndarray, strike: np.ndarray, tte: np.ndarray) -> list:
+        """Vol da superfície ajustada no strike/prazo de cada sinal, por ativo (None sem superfície/strike)."""
+        vol = np.full(len(owner), np.nan)
+        for group, surface in enumerate(surfaces):
+            rows = np.flatnonzero((owner == group) & ~np.isnan(strike))
+            if surface is not None and len(rows):
+                with np.errstate(divide='ignore', invalid='ignore'):
+                    vol[rows] = surface.vol(strike[rows], tte[rows])
+        return [v if np.isfinite(v) else None for v in vol.tolist()]
 
 scanner = SignalScanner()
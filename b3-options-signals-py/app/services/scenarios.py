@@ -0,0 +1,187 @@
+from typing import Iterable, List, Optional
+
+import numpy as np
+
+from app.services.math_service import OptionMath
+
+# Default stress grid: spot moves (relative), vol shifts (absolute vol points), days forward
+DEFAULT_SPOT_SHOCKS = (-0.20, -0.10, -0.05, 0.0, 0.05, 0.10, 0.20)
+DEFAULT_VOL_SHOCKS = (-0.10, 0.0, 0.10, 0.25)
+DEFAULT_DAYS_FORWARD = (0, 1, 5, 10)
+
+# Compact grid attached to scanner signals (signal_summary / signal_summaries)
+SUMMARY_SPOT_SHOCKS = (-0.10, -0.05, 0.0, 0.05, 0.10)
+SUMMARY_VOL_SHOCKS = (0.0, 0.10)
+SUMMARY_DAYS_FORWARD = (1, 5)
+
+MIN_SCENARIO_VOL = 0.01
+DEFAULT_LEG_VOL = 0.30
+
+
+def _leg_quantity(leg: dict) -> float:
+    """Signed quantity: explicit 'quantity', else +1/-1 from the leg action (BUY/SELL, COMPRA/VENDA)."""
+    if leg.get('quantity') is not None:
+        return float(leg['quantity'])
+    action = str(leg.get('action', 'BUY')).upper()
+    return -1.0 if action.startswith(('SELL', 'VENDA', 'SHORT')) else 1.0
+
+
+def _leg_vol(leg: dict) -> float:
+    iv = leg.get('iv')
+    return float(iv) if iv is not None and np.isfinite(iv) and iv > 0 else DEFAULT_LEG_VOL
+
+
+class ScenarioEngine:
+    """
+    P&L of a set of option legs over a spot x vol x days-forward grid.
+
+    All scenarios and legs are priced in one broadcast OptionMath.price_array
+    call on a (spot, vol, days, legs) array, then summed over legs, so a
+    signal's full grid costs one vectorized evaluation (tens of microseconds
+    for the default 7 x 4 x 4 grid).
+
+    Legs are dicts with 'type' ('call'/'put'), 'strike', 'time_to_expiry'
+    (years), 'iv' (missing -> 30%), a signed 'quantity' or an 'action'
+    (BUY/SELL), and optionally 'price' (entry premium; defaults to today's
+    model value). P&L is per unit of quantity, before contract multipliers.
+    """
+
+    def __init__(self, risk_free_rate: float = 0.1375):
+        self.risk_free_rate = risk_free_rate
+
+    def grid(
+        self,
+        legs: List[dict],
+        spot: float,
+        spot_shocks: Iterable[float] = DEFAULT_SPOT_SHOCKS,
+        vol_shocks: Iterable[float] = DEFAULT_VOL_SHOCKS,
+        days_forward: Iterable[int] = DEFAULT_DAYS_FORWARD,
+    ) -> dict:
+        """
+        Returns the axes and a (spot, vol, days) P&L array plus a summary.
+        Raises ValueError if there are no legs.
+        """
+        if not legs:
+            raise ValueError("Scenario grid needs at least one leg")
+
+        spot_shocks = np.asarray(tuple(spot_shocks), dtype=float)
+        vol_shocks = np.asarray(tuple(vol_shocks), dtype=float)
+        days_forward = np.asarray(tuple(days_forward), dtype=float)
+
+        is_call = np.array([str(leg.get('type', '')).lower().startswith('c') for leg in legs])
+        strike = np.array([float(leg['strike']) for leg in legs])
+        tte = np.array([float(leg.get('time_to_expiry') or 0.0) for leg in legs])
+        iv = np.array([_leg_vol(leg) for leg in legs])
+        qty = np.array([_leg_quantity(leg) for leg in legs])
+
+        today = OptionMath.price_array(is_call, spot, strike, tte, self.risk_free_rate, iv)
+        entry = np.array([
+            float(leg['price']) if leg.get('price') is not None and np.isfinite(leg['price']) else today[i]
+            for i, leg in enumerate(legs)
+        ])
+
+        # Axes: (spot, vol, days, legs)
+        S = (spot * (1.0 + spot_shocks))[:, None, None, None]
+        sigma = np.maximum(iv + vol_shocks[:, None], MIN_SCENARIO_VOL)[None, :, None, :]
+        t = np.maximum(tte - days_forward[:, None] / 365.0, 0.0)[None, None, :, :]
+        values = OptionMath.price_array(is_call, S, strike, t, self.risk_free_rate, sigma)
+
+        pnl = ((values - entry) * qty).sum(axis=-1)
+        return {
+            "spot": spot,
+            "spot_shocks": spot_shocks.tolist(),
+            "vol_shocks": vol_shocks.tolist(),
+            "days_forward": days_forward.astype(int).tolist(),
+            "pnl": pnl,
+            "summary": self._summary(pnl, spot_shocks, vol_shocks, days_forward),
+        }
+
+    @staticmethod
+    def _summary(pnl: np.ndarray, spot_shocks, vol_shocks, days_forward) -> dict:
+        worst = np.unravel_index(np.nanargmin(pnl), pnl.shape)
+        best = np.unravel_index(np.nanargmax(pnl), pnl.shape)
+
+        def scenario(index):
+            i, j, k = index
+            return {"spot_shock": float(spot_shocks[i]), "vol_shock": float(vol_shocks[j]),
+                    "days_forward": int(days_forward[k]), "pnl": round(float(pnl[index]), 4)}
+
+        return {"worst": scenario(worst), "best": scenario(best)}
+
+    def signal_summary(self, legs: List[dict], spot: float) -> Optional[dict]:
+        """
+        Compact view attached to scanner signals: worst/best case plus the
+        -10% gap and vol-spike (+10 pts) P&L on the next day. None if unpriceable.
+        """
+        try:
+            result = self.grid(legs, spot, spot_shocks=SUMMARY_SPOT_SHOCKS,
+                               vol_shocks=SUMMARY_VOL_SHOCKS, days_forward=SUMMARY_DAYS_FORWARD)
+        except (ValueError, KeyError, TypeError):
+            return None
+        pnl = result["pnl"]
+        if not np.isfinite(pnl).all():
+            return None
+        return {
+            **result["summary"],
+            "gap_down_10": round(float(pnl[0, 0, 0]), 4),
+            "vol_spike_10": round(float(pnl[2, 1, 0]), 4),
+        }
+
+    def signal_summaries(self, is_call, strike, tte, iv, quantity, price, spot,
+                         chunk: int = 1024) -> List[Optional[dict]]:
+        """
+        signal_summary for a batch of signals: legs are padded (n, L) arrays
+        (quantity 0 marks padding; iv/price NaN fall back as in grid) and spot
+        is per signal. Each block of `chunk` signals is one price_array call
+        over a (signal, spot, vol, days, leg) array, which bounds the
+        temporaries; only the summary dicts are built per signal.
+        """
+        spot_shocks = np.asarray(SUMMARY_SPOT_SHOCKS, dtype=float)
+        vol_shocks = np.asarray(SUMMARY_VOL_SHOCKS, dtype=float)
+        days_forward = np.asarray(SUMMARY_DAYS_FORWARD, dtype=float)
+        quantity = np.asarray(quantity, dtype=float)
+        legs = quantity != 0
+        spot = np.broadcast_to(np.asarray(spot, dtype=float), legs.shape[:1])
+        strike = np.where(legs, strike, 1.0)
+        tte = np.where(legs, tte, 0.0)
+        iv = np.where(np.isfinite(iv) & (iv > 0), iv, DEFAULT_LEG_VOL)
+        is_call = np.asarray(is_call, dtype=bool)
+
+        today = OptionMath.price_array(is_call, spot[:, None], strike, tte, self.risk_free_rate, iv)
+        entry = np.where(np.isfinite(price), price, today)
+
+        pnl = np.empty((len(legs), len(spot_shocks), len(vol_shocks), len(days_forward)))
+        expand = (slice(None), None, None, None, slice(None))
+        for lo in range(0, len(legs), chunk):
+            block = slice(lo, lo + chunk)
+            # Axes: (signal, spot, vol, days, legs)
+            S = (spot[block, None] * (1.0 + spot_shocks))[:, :, None, None, None]
+            sigma = np.maximum(iv[block, None, :] + vol_shocks[:, None], MIN_SCENARIO_VOL)[:, None, :, None, :]
+            t = np.maximum(tte[block, None, :] - days_forward[:, None] / 365.0, 0.0)[:, None, None, :, :]
+            values = OptionMath.price_array(is_call[block][expand], S, strike[block][expand], t,
+                                            self.risk_free_rate, sigma)
+            pnl[block] = np.where(legs[block][expand], (values - entry[block][expand]) * quantity[block][expand],
+                                  0.0).sum(axis=-1)
+
+        # Worst/best cell for the whole batch at once; per signal only the output dict
+        flat = pnl.reshape(len(pnl), -1)
+        finite = np.isfinite(flat).all(axis=1)
+        safe = np.where(finite[:, None], flat, 0.0)
+        axes = [a.tolist() for a in (spot_shocks, vol_shocks, days_forward.astype(int))]
+
+        def scenarios(index):
+            i, j, k = np.unravel_index(index, pnl.shape[1:])
+            return [{"spot_shock": axes[0][a], "vol_shock": axes[1][b], "days_forward": axes[2][c], "pnl": round(v, 4)}
+                    for a, b, c, v in zip(i.tolist(), j.tolist(), k.tolist(), flat[np.arange(len(flat)), index].tolist())]
+
+        worst, best = scenarios(safe.argmin(axis=1)), scenarios(safe.argmax(axis=1))
+        gap_down, vol_spike = pnl[:, 0, 0, 0].tolist(), pnl[:, 2, 1, 0].tolist()
+        return [
+            {"worst": worst[i], "best": best[i],
+             "gap_down_10": round(gap_down[i], 4), "vol_spike_10": round(vol_spike[i], 4)} if ok else None
+            for i, ok in enumerate(finite.tolist())
+        ]
+
+
+# Global instance shared by the scanner and the API
+scenario_engine = ScenarioEngine()
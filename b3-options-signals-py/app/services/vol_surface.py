@@ -0,0 +1,165 @@
+import logging
+from collections import OrderedDict
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+from scipy.optimize import least_squares
+
+from app.services.greeks import ChainEnricher
+
+logger = logging.getLogger(__name__)
+
+# Minimum OTM quotes per expiry to fit a full SVI smile (fewer -> flat slice)
+MIN_SVI_POINTS = 5
+
+
+def svi_total_variance(k, params):
+    """
+    Raw SVI total variance w(k) = a + b * (rho * (k - m) + sqrt((k - m)^2 + s^2)).
+    params: array (..., 5) with columns a, b, rho, m, s (broadcast against k).
+    """
+    params = np.asarray(params, dtype=float)
+    a, b, rho, m, s = (params[..., i] for i in range(5))
+    x = k - m
+    return np.maximum(a + b * (rho * x + np.sqrt(x * x + s * s)), 1e-10)
+
+
+def fit_svi_slice(k: np.ndarray, w: np.ndarray) -> np.ndarray:
+    """
+    Least-squares SVI fit of one expiry's total variance smile.
+    Falls back to a flat slice (b = 0, a = median w) with too few points or on failure.
+    """
+    flat = np.array([np.median(w), 0.0, 0.0, 0.0, 0.1])
+    if len(k) < MIN_SVI_POINTS:
+        return flat
+
+    x0 = np.array([max(w.min() * 0.5, 1e-6), 0.1, 0.0, 0.0, 0.1])
+    lower = [-w.max(), 0.0, -0.999, k.min() - 1.0, 1e-4]
+    upper = [w.max() * 2.0, 5.0, 0.999, k.max() + 1.0, 5.0]
+    try:
+        fit = least_squares(lambda p: svi_total_variance(k, p) - w, x0, bounds=(lower, upper), max_nfev=200)
+    except Exception as e:
+        logger.warning(f"SVI fit failed, using flat slice: {e}")
+        return flat
+    return fit.x if fit.success else flat
+
+
+class VolSurface:
+    """
+    Implied volatility surface for one underlying snapshot.
+
+    One SVI slice per expiry; between expiries total variance is interpolated
+    linearly in time at fixed log-forward-moneyness, and it is extrapolated at
+    constant vol before the first / after the last slice. Queries locate the
+    bracketing slices with searchsorted, so sigma(K, T) for N points costs
+    O(N log n_expiries) with no re-fitting.
+    """
+
+    def __init__(self, spot: float, expiries: np.ndarray, params: np.ndarray, r: float = 0.1375, q: float = 0.0):
+        order = np.argsort(expiries)
+        self.spot = spot
+        self.r = r
+        self.q = q
+        self.expiries = np.asarray(expiries, dtype=float)[order]
+        self.params = np.asarray(params, dtype=float)[order]
+
+    def log_moneyness(self, K, T, spot=None):
+        spot = self.spot if spot is None else spot
+        forward = spot * np.exp((self.r - self.q) * np.asarray(T, dtype=float))
+        return np.log(np.asarray(K, dtype=float) / forward)
+
+    def total_variance(self, K, T, spot=None) -> np.ndarray:
+        K, T = np.broadcast_arrays(np.asarray(K, dtype=float), np.asarray(T, dtype=float))
+        k = self.log_moneyness(K, T, spot)
+        n = len(self.expiries)
+
+        i = np.searchsorted(self.expiries, T)
+        lo = np.clip(i - 1, 0, n - 1)
+        hi = np.clip(i, 0, n - 1)
+        t_lo, t_hi = self.expiries[lo], self.expiries[hi]
+        w_lo = svi_total_variance(k, self.params[lo])
+        w_hi = svi_total_variance(k, self.params[hi])
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            inside = lo != hi
+            frac = np.where(inside, (T - t_lo) / (t_hi - t_lo), 0.0)
+            interpolated = w_lo + frac * (w_hi - w_lo)
+            # Outside the quoted expiries keep the nearest slice's vol (w scales with T)
+            extrapolated = w_hi * T / t_hi
+        return np.where(inside, interpolated, extrapolated)
+
+    def vol(self, K, T, spot=None) -> np.ndarray:
+        """
+        Implied volatility for arrays of strikes and tenors (years); NaN for T <= 0.
+        Passing a different spot reads the smile at the same moneyness (sticky-moneyness),
+        which is how the backtester reprices as the underlying moves.
+        """
+        T = np.asarray(T, dtype=float)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(T > 0, np.sqrt(self.total_variance(K, T, spot) / T), np.nan)
+
+    def to_dict(self) -> dict:
+        return {
+            "spot": self.spot,
+            "expiries": self.expiries.tolist(),
+            "svi_params": self.params.tolist(),
+        }
+
+
+class VolSurfaceService:
+    """
+    Builds and caches one VolSurface per chain snapshot.
+
+    The key is the same fingerprint ChainEnricher uses, so a chain that has not
+    changed between polls reuses its fitted parameters.
+    """
+
+    def __init__(self, risk_free_rate: float = 0.1375, max_entries: int = 64):
+        self.risk_free_rate = risk_free_rate
+        self.max_entries = max_entries
+        self._cache = OrderedDict()
+
+    def build(self, chain_df: pd.DataFrame, spot_price: float) -> Optional[VolSurface]:
+        """
+        Fits the surface from an enriched chain ('iv', 'strike', 'type', 'time_to_expiry').
+        Uses out-of-the-money quotes with a finite IV. Returns None if nothing usable.
+        """
+        if chain_df.empty or 'iv' not in chain_df.columns:
+            return None
+
+        key = ChainEnricher.fingerprint(chain_df, spot_price)
+        if key in self._cache:
+            self._cache.move_to_end(key)
+            return self._cache[key]
+
+        iv = chain_df['iv'].to_numpy(dtype=float)
+        strike = chain_df['strike'].to_numpy(dtype=float)
+        tte = chain_df['time_to_expiry'].to_numpy(dtype=float)
+        is_call = (chain_df['type'] == 'call').to_numpy()
+
+        usable = np.isfinite(iv) & (iv > 0) & (tte > 0)
+
+        forward = spot_price * np.exp(self.risk_free_rate * tte)
+        k = np.log(strike / forward)
+        otm = np.where(is_call, k >= 0, k < 0)
+        usable &= otm
+
+        if not usable.any():
+            return None
+
+        expiries = np.unique(np.round(tte[usable], 6))
+        params = np.empty((len(expiries), 5))
+        for j, T in enumerate(expiries):
+            rows = usable & np.isclose(tte, T, atol=1e-6)
+            params[j] = fit_svi_slice(k[rows], iv[rows] ** 2 * T)
+
+        surface = VolSurface(spot_price, expiries, params, r=self.risk_free_rate)
+        self._cache[key] = surface
+        if len(self._cache) > self.max_entries:
+            self._cache.popitem(last=False)
+        return surface
+
+
+# Global instance shared by the scanner
+vol_surface_service = VolSurfaceService()
@@ -35,20 +35,13 @@ async def scheduled_scan():
 
     logger.info(f"⏰ Iniciando Scan Automático: {len(watchlist)} ativos...")
     
-    # Executa em paralelo com controle de concorrência (chunks)
-    # B3RealData e Yahoo tem rate limits, então vamos de 5 em 5
-    chunk_size = 5
-    for i in range(0, len(watchlist), chunk_size):
-        chunk = watchlist[i:i + chunk_size]
-        logger.info(f"Scanning chunk {i//chunk_size + 1}: {chunk}")
-        
-        try:
-            await asyncio.gather(*[scanner.scan_ticker(ticker) for ticker in chunk])
-        except Exception as e:
-            logger.error(f"Erro no chunk {chunk}: {e}")
-            
-        # Pequena pausa para não estourar rate limits
-        await asyncio.sleep(2)
+    # Aquisição em paralelo com controle de concorrência (chunks): B3RealData e
+    # Yahoo tem rate limits, então vamos de 5 em 5 com uma pequena pausa entre eles.
+    # As estratégias rodam uma única vez sobre o universo de todos os ativos.
+    try:
+        await scanner.scan_universe(watchlist, chunk_size=5, pause=2)
+    except Exception as e:
+        logger.error(f"Erro no scan do universo: {e}")
         
     logger.info("✅ Scan Automático Finalizado.")
 
@@ -0,0 +1,77 @@
+import sys
+import os
+import math
+import time
+
+import numpy as np
+
+# Fix path
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from app.services.american import AmericanOptionMath, CRR_STEPS
+
+N_OPTIONS = 5_000
+N_SCALAR_SAMPLE = 50  # Scalar tree is extrapolated from this sample
+REFERENCE_STEPS = 2000
+
+
+def random_chain(n, seed=7):
+    rng = np.random.default_rng(seed)
+    S = rng.uniform(5, 100, n)
+    return {
+        "flag": np.where(rng.random(n) < 0.5, 'c', 'p'),
+        "S": S,
+        "K": S * rng.uniform(0.7, 1.3, n),
+        "t": rng.uniform(5 / 365, 1.0, n),
+        "r": 0.1375,
+        "sigma": rng.uniform(0.15, 0.80, n),
+        "q": rng.uniform(0.0, 0.08, n),  # dividend yield makes early exercise matter for calls
+    }
+
+
+def scalar_crr(flag, S, K, t, r, sigma, q, steps):
+    """Textbook per-option tree: the loop the array engine replaces."""
+    dt = t / steps
+    u = math.exp(sigma * math.sqrt(dt))
+    d = 1 / u
+    disc = math.exp(-r * dt)
+    p = (math.exp((r - q) * dt) - d) / (u - d)
+    sign = 1.0 if flag == 'c' else -1.0
+    values = [max(sign * (S * u ** (2 * j - steps) - K), 0.0) for j in range(steps + 1)]
+    for i in range(steps - 1, -1, -1):
+        for j in range(i + 1):
+            cont = disc * (p * values[j + 1] + (1 - p) * values[j])
+            values[j] = max(cont, sign * (S * u ** (2 * j - i) - K))
+    return values[0]
+
+
+def main():
+    print("--- American Pricing Throughput ---")
+    chain = random_chain(N_OPTIONS)
+    reference = AmericanOptionMath.crr_price(**chain, steps=REFERENCE_STEPS)
+
+    start = time.perf_counter()
+    baw = AmericanOptionMath.baw_price(**chain)
+    elapsed = time.perf_counter() - start
+    print(f"BAW: {N_OPTIONS:,} options in {elapsed:.3f}s -> {N_OPTIONS / elapsed:,.0f} options/s, "
+          f"max |err| vs CRR({REFERENCE_STEPS}) {np.max(np.abs(baw - reference)):.4f}")
+
+    for preset, steps in CRR_STEPS.items():
+        start = time.perf_counter()
+        prices = AmericanOptionMath.crr_price(**chain, steps=preset)
+        elapsed = time.perf_counter() - start
+        print(f"CRR {preset} ({steps} steps): {N_OPTIONS / elapsed:,.0f} options/s, "
+              f"max |err| {np.max(np.abs(prices - reference)):.4f}")
+
+    steps = CRR_STEPS["standard"]
+    start = time.perf_counter()
+    for i in range(N_SCALAR_SAMPLE):
+        scalar_crr(chain["flag"][i], chain["S"][i], chain["K"][i], chain["t"][i],
+                   chain["r"], chain["sigma"][i], chain["q"][i], steps)
+    scalar_rate = N_SCALAR_SAMPLE / (time.perf_counter() - start)
+    print(f"Scalar CRR ({steps} steps): {scalar_rate:,.0f} options/s "
+          f"(~{N_OPTIONS / scalar_rate:.1f}s for {N_OPTIONS:,})")
+
+
+if __name__ == "__main__":
+    main()
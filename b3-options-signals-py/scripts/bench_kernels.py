@@ -0,0 +1,79 @@
+import sys
+import os
+import subprocess
+import tempfile
+import time
+
+import numpy as np
+
+# Fix path
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+sys.path.append(ROOT)
+
+from app.services import kernels
+from app.services.math_service import OptionMath
+
+N_OPTIONS = 1_000_000
+
+
+def random_chain(n, seed=21):
+    rng = np.random.default_rng(seed)
+    S = rng.uniform(5, 100, n)
+    return {
+        "flag": rng.random(n) < 0.5,
+        "S": S,
+        "K": S * rng.uniform(0.7, 1.3, n),
+        "t": rng.uniform(1 / 365, 2.0, n),
+        "r": 0.1175,
+        "sigma": rng.uniform(0.10, 0.90, n),
+    }
+
+
+def best_of(fn, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def warmup_in_subprocess(cache_dir):
+    env = {**os.environ, "NUMBA_CACHE_DIR": cache_dir, "JIT_BACKEND": "numba"}
+    code = "from app.services import kernels; print(kernels.warmup())"
+    out = subprocess.run([sys.executable, "-c", code], cwd=ROOT, env=env, capture_output=True, text=True)
+    return float(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    print("--- JIT Kernels vs NumPy ---")
+    if not kernels.NUMBA_AVAILABLE:
+        print("numba not installed: only the NumPy backend is available")
+        return
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        print(f"Warm-up, cold compile: {warmup_in_subprocess(cache_dir):.2f}s")
+        print(f"Warm-up, on-disk cache: {warmup_in_subprocess(cache_dir):.2f}s")
+
+    chain = random_chain(N_OPTIONS)
+    prices = OptionMath.price_array(**chain)
+    chain_without_sigma = {k: v for k, v in chain.items() if k != "sigma"}
+    benchmarks = {
+        "price": lambda: OptionMath.price_array(**chain),
+        "greeks": lambda: OptionMath.greeks_array(**chain),
+        "implied vol": lambda: OptionMath.implied_volatility_array(prices, **chain_without_sigma),
+    }
+
+    kernels.set_backend("numba")
+    kernels.warmup()
+    for name, fn in benchmarks.items():
+        kernels.set_backend("numpy")
+        numpy_time = best_of(fn)
+        kernels.set_backend("numba")
+        jit_time = best_of(fn)
+        print(f"{name:>12}: numpy {numpy_time:.3f}s | numba {jit_time:.3f}s | {numpy_time / jit_time:.1f}x "
+              f"({N_OPTIONS:,} options)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+import sys
+import os
+import time
+import warnings
+
+import numpy as np
+
+# Fix path
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from app.services.math_service import OptionMath
+
+N_OPTIONS = 1_000_000
+N_SCALAR_SAMPLE = 20_000  # Scalar path is extrapolated from this sample
+
+
+def random_chain(n, seed=42):
+    rng = np.random.default_rng(seed)
+    S = rng.uniform(5, 100, n)
+    return {
+        "flag": np.where(rng.random(n) < 0.5, 'c', 'p'),
+        "S": S,
+        "K": S * rng.uniform(0.7, 1.3, n),
+        "t": rng.uniform(1 / 365, 2.0, n),
+        "r": 0.1175,
+        "sigma": rng.uniform(0.10, 0.90, n),
+    }
+
+
+def scalar_path(chain, n):
+    """Current path: one py_vollib call per option for price and each Greek."""
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        from py_vollib.black_scholes import black_scholes as bs
+        from py_vollib.black_scholes.greeks.analytical import delta, gamma, theta, vega, rho
+
+    prices = np.empty(n)
+    for i in range(n):
+        args = (chain["flag"][i], chain["S"][i], chain["K"][i], chain["t"][i], chain["r"], chain["sigma"][i])
+        prices[i] = bs(*args)
+        delta(*args), gamma(*args), theta(*args), vega(*args), rho(*args)
+    return prices
+
+
+def main():
+    print("--- Black-Scholes Throughput ---")
+    chain = random_chain(N_OPTIONS)
+
+    start = time.perf_counter()
+    prices = OptionMath.price_array(**chain)
+    greeks = OptionMath.greeks_array(**chain)
+    array_time = time.perf_counter() - start
+    print(f"Array engine: {N_OPTIONS:,} options (price + 5 greeks) in {array_time:.3f}s "
+          f"-> {N_OPTIONS / array_time:,.0f} options/s")
+
+    sample = {k: (v[:N_SCALAR_SAMPLE] if isinstance(v, np.ndarray) else v) for k, v in chain.items()}
+    start = time.perf_counter()
+    reference = scalar_path(sample, N_SCALAR_SAMPLE)
+    scalar_time = time.perf_counter() - start
+    scalar_rate = N_SCALAR_SAMPLE / scalar_time
+    print(f"Scalar py_vollib: {N_SCALAR_SAMPLE:,} options in {scalar_time:.3f}s "
+          f"-> {scalar_rate:,.0f} options/s (~{N_OPTIONS / scalar_rate:.0f}s for {N_OPTIONS:,})")
+
+    print(f"Speedup: {(N_OPTIONS / array_time) / scalar_rate:,.0f}x")
+    print(f"Max |price diff| vs py_vollib: {np.max(np.abs(prices[:N_SCALAR_SAMPLE] - reference)):.2e}")
+    print(f"NaN rows: {int(np.isnan(greeks['delta']).sum())}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,251 @@
+import sys
+import os
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+# Fix path
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from app.services.scanner import SignalScanner
+from app.services.math_service import OptionMath
+
+try:
+    from app.core.chain_context import ChainContext
+except ImportError:  # árvore anterior ao contexto compartilhado
+    ChainContext = None
+try:
+    from app.core.filter_specs import FilterProgram, LegFilter
+except ImportError:  # árvore anterior às specs declarativas
+    FilterProgram = None
+try:
+    from app.core.strategies_vectorized import StructureStrategy
+except ImportError:  # árvore anterior à busca de estruturas
+    StructureStrategy = None
+try:
+    from app.core.signal_batch import SignalBatch
+except ImportError:  # árvore anterior ao lote colunar de sinais
+    SignalBatch = None
+
+SPOT = 30.0
+REPEAT = 50
+
+
+def synthetic_chain(n_strikes: int, n_expiries: int = 4, seed: int = 5) -> pd.DataFrame:
+    """Cadeia enriquecida no formato do scanner (symbol, type, strike, bid/ask, mid, iv, gregas)."""
+    rng = np.random.default_rng(seed)
+    strikes = np.round(np.linspace(SPOT * 0.6, SPOT * 1.4, n_strikes), 2)
+    tenors = np.arange(1, n_expiries + 1) * 21 / 252
+    K, T, is_call = (a.ravel() for a in np.meshgrid(strikes, tenors, [True, False], indexing='ij'))
+    iv = 0.30 + 0.4 * np.log(K / SPOT) ** 2
+    mid = OptionMath.price_array(is_call, SPOT, K, T, 0.1375, iv)
+    greeks = OptionMath.greeks_array(is_call, SPOT, K, T, 0.1375, iv)
+    return pd.DataFrame({
+        'symbol': [f"PETR{'A' if c else 'M'}{i}" for i, c in enumerate(is_call)],
+        'type': np.where(is_call, 'call', 'put'),
+        'strike': K, 'time_to_expiry': T, 'last': mid,
+        'bid': mid * 0.98, 'ask': mid * 1.02, 'mid': mid,
+        'volume': rng.integers(0, 5000, K.size), 'iv': iv, **greeks,
+    })
+
+
+def run(strategies, ticker_data, chain_df, shared: bool) -> float:
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        if shared:
+            ctx = ChainContext(chain_df, ticker_data['price'])
+            for strategy in strategies:
+                strategy.analyze(ticker_data, chain_df, ctx=ctx)
+        else:
+            for strategy in strategies:
+                strategy.analyze(ticker_data, chain_df)
+    return (time.perf_counter() - start) / REPEAT * 1e3
+
+
+def random_specs(n: int, seed: int = 9) -> list:
+    rng = np.random.default_rng(seed)
+    lo = rng.uniform(0.8, 1.15, n)
+    return [
+        LegFilter(option_type=('call', 'put')[i % 2], moneyness=(lo[i], lo[i] + 0.05),
+                  delta=(0.1, 0.6) if i % 3 == 0 else (-np.inf, np.inf),
+                  min_volume=100 if i % 4 == 0 else None)
+        for i in range(n)
+    ]
+
+
+def bench_specs(chain_df: pd.DataFrame):
+    """Custo de avaliar N specs: programa fundido (uma passada) vs. uma spec por vez."""
+    for n_specs in (20, 200, 1000):
+        specs = random_specs(n_specs)
+        program = FilterProgram(specs)
+        singles = [FilterProgram([spec]) for spec in specs]
+        ctx = ChainContext(chain_df, SPOT)
+
+        start = time.perf_counter()
+        for _ in range(REPEAT):
+            program.evaluate(ctx)
+        fused = (time.perf_counter() - start) / REPEAT * 1e3
+        start = time.perf_counter()
+        for _ in range(max(REPEAT // 10, 1)):
+            for single in singles:
+                single.evaluate(ctx)
+        separate = (time.perf_counter() - start) / max(REPEAT // 10, 1) * 1e3
+        print(f"{n_specs:>5} specs x {len(chain_df)} options | fused: {fused:7.2f} ms | one at a time: {separate:7.2f} ms")
+
+
+def bench_structures(strategies):
+    """Busca multi-perna (top 3 por estratégia) em cadeias largas; conta pares/quádruplas brutos evitados."""
+    structures = [s for s in strategies if isinstance(s, StructureStrategy)]
+    for n_strikes in (200, 500, 1000):
+        chain_df = synthetic_chain(n_strikes)
+        ctx = ChainContext(chain_df, SPOT)
+        cells = []
+        for strategy in structures:
+            start = time.perf_counter()
+            for _ in range(REPEAT // 5):
+                found = strategy.structure.search(ctx, strategy.top_k)
+            elapsed = (time.perf_counter() - start) / (REPEAT // 5) * 1e3
+            cells.append(f"{strategy.structure.kind} {elapsed:.2f}")
+        # Produto cartesiano completo de um condor por vencimento: (strikes por tipo)^4
+        naive = n_strikes ** 4 * 4
+        print(f"{n_strikes:>5} strikes x 4 expiries | ms: " + ", ".join(cells) + f" | full condor cross product: {naive:.1e}")
+
+
+def bench_universe(scanner):
+    """
+    Um ciclo do scanner para N ativos: um contexto e um passe de estratégias por
+    ativo vs. uma cadeia universo (concatenada) com um passe único.
+    """
+    repeat = REPEAT // 10
+    for n_tickers in (1, 5, 20, 50):
+        chains = [synthetic_chain(40, seed=i).assign(symbol=lambda d, i=i: f"T{i}" + d['symbol']) for i in range(n_tickers)]
+        rsi = [(20, 50, 80)[i % 3] for i in range(n_tickers)]
+
+        start = time.perf_counter()
+        for _ in range(repeat):
+            for chain_df, r in zip(chains, rsi):
+                ctx = ChainContext(chain_df, SPOT, program=scanner.filter_program)
+                for strategy in scanner.strategies:
+                    strategy.analyze({'price': SPOT, 'rsi': r}, chain_df, ctx=ctx)
+        per_ticker = (time.perf_counter() - start) / repeat * 1e3
+
+        start = time.perf_counter()
+        for _ in range(repeat):
+            universe = pd.concat([c.assign(underlying=f"T{i}", spot=SPOT, rsi=r)
+                                  for i, (c, r) in enumerate(zip(chains, rsi))], ignore_index=True)
+            ctx = ChainContext(universe, universe['spot'].to_numpy(), program=scanner.filter_program,
+                               group=universe['underlying'].to_numpy())
+            for strategy in scanner.strategies:
+                strategy.analyze({}, universe, ctx=ctx)
+        batched = (time.perf_counter() - start) / repeat * 1e3
+        print(f"{n_tickers:>3} tickers x {len(chains[0])} options | per ticker: {per_ticker:8.1f} ms"
+              f" | universe: {batched:7.1f} ms")
+
+
+def _row_signals(strategies, ctx, universe, rsi):
+    """
+    Caminho por linha anterior ao SignalBatch (reproduzido para comparação): um
+    DataFrame por estratégia, iterrows e get_risk_info/score/cenário por sinal.
+    """
+    from app.core.filters import RiskManager, ScoreCalculator
+    from app.core.risk_classifier import get_risk_info
+    from app.services.probability import candidate_metrics
+    from app.services.scenarios import scenario_engine
+
+    signals = []
+    for strategy in strategies:
+        frame = strategy.analyze({}, universe, ctx=ctx)
+        if frame.empty:
+            continue
+        metrics = candidate_metrics(frame, np.full(len(frame), SPOT))
+        frame = frame.join(metrics[metrics.columns.difference(frame.columns)])
+        for _, row in frame.iterrows():
+            legs = row['legs'] if isinstance(row.get('legs'), list) else [{
+                'symbol': row.get('symbol'), 'strike': row.get('strike'), 'type': row.get('type'),
+                'action': row.get('signal_type', '').split(' ')[0], 'bid': row.get('bid', 0), 'ask': row.get('ask', 0),
+                'volume': row.get('volume', 0), 'delta': row.get('delta', 0), 'iv': row.get('iv'),
+                'price': row.get('mid'), 'time_to_expiry': row.get('time_to_expiry', 0),
+            }]
+            signal = {
+                'strategy': row.get('strategy'), 'ticker': row.get('symbol'), 'signal_type': row.get('signal_type'),
+                'risk_level': row.get('risk_level'), 'risk_info': get_risk_info(strategy.name),
+                'technicals': {'rsi': rsi[row['underlying']], 'iv': row.get('iv', 0)}, 'legs': legs,
+                'probabilities': {k: row.get(k) for k in ('pop', 'prob_touch', 'expected_value')},
+                'scenarios': scenario_engine.signal_summary(legs, SPOT),
+            }
+            chain_row = row.to_dict()
+            signal['confidence_score'] = ScoreCalculator.calculate_score(signal, chain_row)
+            signal['risk_flags'] = RiskManager.get_risk_flags(signal, chain_row)
+            signals.append(signal)
+    return signals
+
+
+def bench_signal_output(scanner):
+    """
+    Saída dos sinais de um ciclo em cadeias grandes (5 ativos): DataFrame por
+    estratégia + iterrows (caminho anterior) vs. lote colunar com dicts montados
+    só na saída. Tempo médio e alocação intermediária (tracemalloc) a partir do contexto.
+    """
+    tickers = [f"T{i}" for i in range(5)]
+    rsi = {ticker: (20, 50, 80, 50, 20)[i] for i, ticker in enumerate(tickers)}
+    prepared = {ticker: {'ticker_data': {'ticker': ticker, 'price': SPOT, 'rsi': rsi[ticker], 'vol_surface': None,
+                                         'intraday': {}},
+                         'cotacao': {'timestamp': 0}} for ticker in tickers}
+
+    def columnar(ctx, universe):
+        batch = SignalBatch.concat([strategy.signals({}, ctx) for strategy in scanner.strategies])
+        return scanner._build_signals(batch, ctx, prepared)
+
+    for n_strikes in (50, 200, 500):
+        universe = pd.concat([synthetic_chain(n_strikes, seed=i).assign(
+            symbol=lambda d, t=t: t + d['symbol'], underlying=t, spot=SPOT, rsi=rsi[t])
+            for i, t in enumerate(tickers)], ignore_index=True)
+        ctx = ChainContext(universe, universe['spot'].to_numpy(), program=scanner.filter_program,
+                           group=universe['underlying'].to_numpy())
+        cells = []
+        for label, path in (('iterrows', lambda: _row_signals(scanner.strategies, ctx, universe, rsi)),
+                            ('columnar', lambda: columnar(ctx, universe))):
+            count = len(path())
+            repeat = 3
+            start = time.perf_counter()
+            for _ in range(repeat):
+                path()
+            elapsed = (time.perf_counter() - start) / repeat * 1e3
+            # Alocação intermediária: pico menos o que a lista de sinais retém
+            tracemalloc.start()
+            signals = path()
+            retained, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            del signals
+            cells.append(f"{label}: {elapsed:8.1f} ms, intermediate {(peak - retained) / 2 ** 20:6.1f} MiB")
+        print(f"{len(universe):>6} options, {count:>5} signals | " + " | ".join(cells))
+
+def main():
+    strategies = SignalScanner().strategies
+    print(f"{len(strategies)} strategies, mean of {REPEAT} runs per ticker")
+    for rsi in (50, 20):
+        ticker_data = {'ticker': 'PETR4', 'price': SPOT, 'rsi': rsi}
+        for n_strikes in (50, 200, 1000):
+            chain_df = synthetic_chain(n_strikes)
+            line = f"RSI {rsi:>2} | {len(chain_df):>5} options | per-strategy: {run(strategies, ticker_data, chain_df, False):7.2f} ms"
+            if ChainContext is not None:
+                line += f" | shared context: {run(strategies, ticker_data, chain_df, True):7.2f} ms"
+            print(line)
+    if FilterProgram is not None:
+        print()
+        bench_specs(synthetic_chain(1000))
+    if StructureStrategy is not None:
+        print()
+        bench_structures(strategies)
+    if ChainContext is not None and 'group' in ChainContext.__init__.__code__.co_varnames:
+        print()
+        bench_universe(SignalScanner())
+    if SignalBatch is not None:
+        print()
+        bench_signal_output(SignalScanner())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.core.chain_context import ChainContext
+from app.services.math_service import OptionMath
+
+R = 0.1375
+
+
+def synthetic_chain(ticker='', spot=30.0, strikes=None, expiries=(0.05, 0.12), types=('call', 'put'),
+                    iv_level=0.3, skew=0.4, spread=0.02, greeks=False):
+    """
+    Cadeia sintética strike x vencimento x tipo, precificada por Black-Scholes sobre
+    o smile iv_level + skew * ln(K/S)^2. Sem strikes: 21 strikes de 80% a 120% do
+    spot. greeks=True anexa as gregas de cada opção.
+    """
+    strikes = np.round(np.linspace(spot * 0.8, spot * 1.2, 21), 2) if strikes is None else np.asarray(strikes)
+    K, T, kind = (a.ravel() for a in np.meshgrid(strikes, expiries, list(types), indexing='ij'))
+    is_call = kind == 'call'
+    iv = iv_level + skew * np.log(K / spot) ** 2
+    mid = OptionMath.price_array(is_call, spot, K, T, R, iv)
+    # Sufixo de vencimento só quando há mais de um (símbolos únicos na cadeia)
+    suffix = [f"-{t:g}" for t in T] if len(expiries) > 1 else [''] * len(T)
+    df = pd.DataFrame({
+        'symbol': [f"{ticker}{k[0].upper()}{s:g}{x}" for k, s, x in zip(kind, K, suffix)], 'type': kind,
+        'strike': K, 'time_to_expiry': T, 'bid': mid * (1 - spread), 'ask': mid * (1 + spread), 'mid': mid,
+        'last': mid, 'volume': 100.0, 'iv': iv,
+    })
+    if greeks:
+        df = df.assign(**OptionMath.greeks_array(is_call, spot, K, T, R, iv))
+    return df
+
+
+@pytest.fixture
+def make_chain():
+    """Fábrica de cadeias de um ativo (ver synthetic_chain)."""
+    return synthetic_chain
+
+
+@pytest.fixture
+def make_universe():
+    """
+    Fábrica de universos: {ticker: {'spot', 'rsi', **synthetic_chain}} -> (df, ctx),
+    com as cadeias concatenadas, as colunas underlying/spot/rsi e o ChainContext
+    agrupado por ativo.
+    """
+    def build(spec):
+        frames = []
+        for ticker, params in spec.items():
+            params = dict(params)
+            rsi = params.pop('rsi', 50.0)
+            frames.append(synthetic_chain(ticker, **params).assign(underlying=ticker, spot=params['spot'], rsi=rsi))
+        df = pd.concat(frames, ignore_index=True)
+        return df, ChainContext(df, df['spot'].to_numpy(), group=df['underlying'].to_numpy())
+    return build
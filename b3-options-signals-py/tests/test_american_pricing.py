@@ -0,0 +1,51 @@
+import numpy as np
+from fastapi.testclient import TestClient
+from app.main import app
+from app.services.american import AmericanOptionMath
+from app.services.math_service import OptionMath
+
+
+def test_baw_matches_published_values_and_fine_tree():
+    # Haug, "The Complete Guide to Option Pricing Formulas", tabela BAW (put, r=0.10, sigma=0.25, T=0.5)
+    S = np.array([90.0, 100.0, 110.0])
+    baw = AmericanOptionMath.baw_price('p', S, 100.0, 0.5, 0.10, 0.25)
+    tree = AmericanOptionMath.crr_price('p', S, 100.0, 0.5, 0.10, 0.25, steps=2000)
+
+    assert np.allclose(baw, [10.79, 5.23, 2.30], atol=0.01)
+    assert np.allclose(baw, tree, atol=0.1)
+
+
+def test_early_exercise_premium_only_where_it_exists():
+    euro_call = OptionMath.price_array('c', 100.0, 100.0, 1.0, 0.10, 0.30)
+    # Call sem dividendos nunca é exercida antecipadamente
+    for method in ('baw', 'crr'):
+        assert np.isclose(AmericanOptionMath.price('c', 100.0, 100.0, 1.0, 0.10, 0.30, method=method), euro_call, atol=0.02)
+
+    # Put muito ITM vale o intrínseco; call com dividendos vale mais que a europeia
+    assert np.isclose(AmericanOptionMath.price('p', 60.0, 100.0, 1.0, 0.12, 0.30), 40.0)
+    assert AmericanOptionMath.price('c', 110.0, 100.0, 0.25, 0.08, 0.20, q=0.12) > \
+        OptionMath.price_array('c', 110.0, 100.0, 0.25, 0.08, 0.20, q=0.12)
+
+
+def test_vectorized_chain_keeps_shape_and_flags_invalid_rows():
+    flag = np.array(['c', 'p', 'x', 'p'])
+    t = np.array([0.5, 0.5, 0.5, -1.0])
+
+    for method in ('baw', 'crr'):
+        prices = AmericanOptionMath.price(flag, 30.0, 32.0, t, 0.1375, 0.35, q=0.04, method=method, steps='fast')
+        assert prices.shape == (4,)
+        assert np.isfinite(prices[:2]).all() and np.isnan(prices[2:]).all()
+
+
+def test_calculate_endpoint_accepts_american_style():
+    client = TestClient(app)
+    body = {"type": "put", "S": 90, "K": 100, "t": 0.5, "r": 0.10, "sigma": 0.25}
+
+    european = client.post("/options/calculate", json=body).json()
+    american = client.post("/options/calculate", json={**body, "style": "american"}).json()
+
+    assert american["price"] > european["price"]
+    assert -1.0 <= american["greeks"]["delta"] < european["greeks"]["delta"]
+    # Estilo/método fora do Literal: rejeitado na validação
+    assert client.post("/options/calculate", json={**body, "style": "bermudan"}).status_code == 422
+    assert client.post("/options/calculate", json={**body, "style": "american", "method": "lsm"}).status_code == 422
@@ -0,0 +1,58 @@
+import asyncio
+
+import numpy as np
+import pandas as pd
+
+from app.core.backtester import VectorizedBacktester
+from app.core.strategies_vectorized import BullCallSpreadStrategy, LongCallStrategy, RSIStrategy
+
+
+def history(days):
+    close = 30 * np.exp(np.cumsum(np.random.default_rng(4).normal(0, 0.02, days)))
+    return pd.DataFrame({'open': close, 'high': close * 1.01, 'low': close * 0.99, 'close': close, 'volume': 1e6},
+                        index=pd.date_range('2025-01-01', periods=days, freq='B'))
+
+
+def run(strategy, days=120, frames=None):
+    backtester = VectorizedBacktester()
+
+    async def fetch(ticker, days):
+        df = history(days)
+        if frames is not None:
+            frames.append(df)
+        return df
+
+    backtester._fetch_historical_data = fetch
+    return backtester, asyncio.run(backtester.run_backtest(strategy, 'PETR4', days=days))
+
+
+def test_structure_strategy_opens_multi_leg_trades():
+    backtester, result = run(BullCallSpreadStrategy())
+    assert result['total_trades'] > 0
+    trade = result['trades_log'][-1]
+    # Trava de alta: compra uma call e vende outra de strike maior, pelo débito líquido
+    legs = sorted(trade['legs'], key=lambda leg: leg['strike'])
+    assert [leg['quantity'] for leg in legs] == [1.0, -1.0] and trade['strike'] is None
+    assert np.isclose(trade['entry_value'], legs[0]['price'] - legs[1]['price']) and trade['entry_value'] > 0
+
+    # P&L = variação do valor das pernas (marcadas pelo BS/intrínseco) vezes as unidades
+    value = backtester._mark_to_market([trade], trade['exit_date'], history(220).loc[trade['exit_date'], 'close'])[0]
+    assert np.isclose(trade['pnl'], (value - trade['entry_value']) * trade['quantity'])
+
+
+def test_single_leg_trade_is_one_leg_structure():
+    _, result = run(LongCallStrategy())
+    trade = result['trades_log'][-1]
+    assert len(trade['legs']) == 1 and trade['legs'][0]['quantity'] == 1.0
+    assert np.isclose(trade['pnl'], (trade['exit_price'] - trade['entry_price']) * trade['quantity'])
+
+
+def test_only_required_indicator_columns_are_computed():
+    frames = []
+    run(RSIStrategy(), frames=frames)
+    assert 'RSI_14' in frames[0].columns
+    assert not any(col.startswith(('BB', 'SMA_')) for col in frames[0].columns)
+
+    frames.clear()
+    run(LongCallStrategy(), frames=frames)
+    assert list(frames[0].columns) == ['open', 'high', 'low', 'close', 'volume']
@@ -0,0 +1,72 @@
+import numpy as np
+import pandas as pd
+
+from app.core.chain_context import ChainContext
+from app.core.strategies_vectorized import (
+    CoveredCallStrategy, HighIVStrategy, RSIStrategy, ShortStrangleStrategy,
+)
+
+
+def chain():
+    strikes = np.array([24.0, 27.0, 30.0, 31.5, 33.0, 34.0, 36.0])
+    return pd.DataFrame({
+        'symbol': [f"OPT{i}" for i in range(14)],
+        'type': ['call'] * 7 + ['put'] * 7,
+        'strike': np.tile(strikes, 2),
+        'time_to_expiry': np.repeat([0.05, 0.15], 7),
+        'bid': np.linspace(0.1, 1.4, 14), 'ask': np.linspace(0.2, 1.5, 14),
+        'last': np.linspace(0.15, 1.45, 14),
+        'iv': np.linspace(0.2, 0.6, 14),
+    }, index=np.arange(100, 114))
+
+
+def test_context_features():
+    df = chain()
+    ctx = ChainContext(df, 30.0)
+
+    assert np.allclose(ctx.moneyness, df['strike'] / 30.0)
+    assert ctx.is_call.sum() == 7 and ctx.is_put.sum() == 7
+    assert np.allclose(ctx.mid, (df['bid'] + df['ask']) / 2)
+    assert np.allclose(ctx.spread_pct, (df['ask'] - df['bid']) / df['ask'])
+    assert np.all(np.diff(ctx.strike[ctx.strike_order]) >= 0)
+    # Vencimentos agrupados por time_to_expiry, posições ordenadas por strike
+    groups = ctx.expiry_groups
+    assert list(groups) == [0.05, 0.15]
+    assert list(groups[0.15]) == list(range(7, 14))
+    assert ctx.iv_quantile(0.8) == df['iv'].quantile(0.8)
+
+
+def test_strategies_select_positions_and_keep_index_labels():
+    df = chain()
+    ctx = ChainContext(df, 30.0)
+
+    positions = CoveredCallStrategy().select({'price': 30.0}, ctx)
+    assert list(positions) == [3]   # call 31.5 (moneyness 1.05)
+
+    signals = CoveredCallStrategy().analyze({'price': 30.0}, df, ctx=ctx)
+    assert list(signals.index) == [103]
+    assert signals.iloc[0]['signal_type'] == 'SELL COVERED CALL'
+    assert 'signal_type' not in df.columns   # a cadeia compartilhada não é alterada
+
+    # Sem ctx o resultado é o mesmo
+    pd.testing.assert_frame_equal(signals, CoveredCallStrategy().analyze({'price': 30.0}, df))
+
+    rich = df.assign(iv=np.where(df['symbol'] == 'OPT6', 0.9, df['iv']))
+    assert HighIVStrategy().analyze({'price': 30.0}, rich)['symbol'].tolist() == ['OPT6']
+
+
+def test_rsi_and_structure_labels():
+    df = chain()
+    ctx = ChainContext(df, 30.0)
+
+    oversold = RSIStrategy().analyze({'price': 30.0, 'rsi': 20}, df, ctx=ctx)
+    assert oversold['strike'].tolist() == [31.5] and oversold.iloc[0]['signal_type'] == 'BUY CALL'
+    overbought = RSIStrategy().analyze({'price': 30.0, 'rsi': 80}, df, ctx=ctx)
+    assert overbought['type'].tolist() == ['put'] and 'Sobrecompra' in overbought.iloc[0]['reason']
+    assert RSIStrategy().analyze({'price': 30.0, 'rsi': 50}, df, ctx=ctx).empty
+
+    # Estrutura: uma linha por par (call > 110%, put < 90%) do mesmo vencimento, maior crédito primeiro
+    single = df.assign(volume=10, time_to_expiry=0.05)
+    structure = ShortStrangleStrategy().analyze({'price': 30.0}, single)
+    assert structure['symbol'].tolist() == ['OPT6/OPT7', 'OPT5/OPT7']
+    assert all(leg['action'] == 'SELL' for leg in structure.iloc[0]['legs'])
@@ -0,0 +1,61 @@
+import numpy as np
+import pandas as pd
+
+from app.services.greeks import ChainEnricher
+from app.services.math_service import IV_OK, OptionMath
+
+SPOT, R = 30.0, 0.1375
+
+
+def chain():
+    strike = np.array([27.0, 30.0, 33.0, 30.0])
+    is_call = np.array([True, True, True, False])
+    fair = OptionMath.price_array(is_call, SPOT, strike, 0.1, R, 0.35)
+    return pd.DataFrame({
+        'symbol': ['A', 'B', 'C', 'D'], 'type': np.where(is_call, 'call', 'put'), 'strike': strike,
+        'time_to_expiry': 0.1, 'bid': fair * 0.99, 'ask': fair * 1.01, 'last': fair * 1.2,
+        'iv': 0.5, 'delta': 0.42, 'volume': [100.0, 200.0, 300.0, 400.0],
+    })
+
+
+def test_iv_solved_from_mid_not_last():
+    df = ChainEnricher(R).enrich(chain(), SPOT)
+    # mid = (bid + ask) / 2 = preço justo a 35%; o 'last' (20% acima) é ignorado
+    np.testing.assert_allclose(df['iv'], 0.35, atol=1e-6)
+    assert (df['iv_status'] == IV_OK).all()
+    np.testing.assert_allclose(df['delta'], OptionMath.greeks_array(
+        df['type'] == 'call', SPOT, df['strike'], 0.1, R, 0.35)['delta'])
+
+
+def test_falls_back_to_source_iv_and_delta():
+    df = chain()
+    # Calls ITM 20 cotadas a ~0 (abaixo do intrínseco): o solver não converge
+    df.loc[[1, 2], ['strike', 'bid', 'ask', 'last']] = [20.0, np.nan, np.nan, 0.0001]
+    df.loc[2, 'iv'] = np.nan
+    out = ChainEnricher(R).enrich(df, SPOT)
+    assert (out.loc[[1, 2], 'iv_status'] != IV_OK).all() and (out.loc[[0, 3], 'iv_status'] == IV_OK).all()
+    # Com IV da fonte: gregas a partir dela; sem nenhuma IV: delta da fonte
+    assert out.loc[1, 'iv'] == 0.5
+    assert np.isclose(out.loc[1, 'delta'], OptionMath.greeks_array(True, SPOT, 20.0, 0.1, R, 0.5)['delta'])
+    assert np.isnan(out.loc[2, 'iv']) and out.loc[2, 'delta'] == 0.42
+
+
+def test_cache_reuses_columns_but_keeps_fresh_volume(monkeypatch):
+    enricher = ChainEnricher(R)
+    calls = []
+    solve = OptionMath.implied_volatility_array
+    monkeypatch.setattr(OptionMath, 'implied_volatility_array', lambda *a, **k: calls.append(1) or solve(*a, **k))
+
+    first = enricher.enrich(chain(), SPOT)
+    polled = chain()
+    polled['volume'] = 0.0                          # só o volume mudou: acerto de cache
+    second = enricher.enrich(polled, SPOT)
+    assert len(calls) == 1
+    assert (second['volume'] == 0.0).all() and (first['volume'] > 0).all()
+    np.testing.assert_array_equal(second['iv'], first['iv'])
+
+    enricher.enrich(chain(), SPOT * 1.01)           # spot mudou: recalcula
+    repriced = chain()
+    repriced['bid'] *= 1.05
+    enricher.enrich(repriced, SPOT)                 # preço mudou: recalcula
+    assert len(calls) == 3
@@ -0,0 +1,78 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.core.chain_context import ChainContext
+from app.core.filter_specs import FilterProgram, LegFilter
+
+
+def chain():
+    strikes = np.array([24.0, 27.0, 30.0, 31.5, 33.0, 33.0, 36.0])
+    return pd.DataFrame({
+        'symbol': [f"OPT{i}" for i in range(14)],
+        'type': ['call'] * 7 + ['put'] * 7,
+        'strike': np.tile(strikes, 2),
+        'time_to_expiry': np.repeat([10 / 365, 40 / 365], 7),
+        'bid': np.linspace(0.1, 1.4, 14), 'ask': np.linspace(0.2, 1.5, 14),
+        'volume': np.tile([0, 50, 500, 5000, 10, 200, 1000], 2),
+        'delta': np.concatenate([np.linspace(0.9, 0.1, 7), -np.linspace(0.1, 0.9, 7)]),
+        'iv': np.linspace(0.2, 0.6, 14),
+    })
+
+
+def test_program_matches_manual_masks():
+    df = chain()
+    ctx = ChainContext(df, 30.0)
+    m = df['strike'] / 30.0
+    specs = [
+        LegFilter('call', moneyness=(1.0, 1.1)),
+        LegFilter('put', moneyness=(0.9, 1.0), closed='right'),
+        LegFilter('call', moneyness=(1.05, np.inf), closed='neither'),
+        LegFilter(None, delta=(0.3, 0.6)),
+        LegFilter('put', dte=(30, 60), min_volume=100),
+        LegFilter(None, max_spread_pct=0.2),
+        LegFilter('call', min_iv_quantile=0.5),
+    ]
+    matrix = FilterProgram(specs).evaluate(ctx)
+    spread = (df['ask'] - df['bid']) / df['ask']
+    expected = [
+        (df['type'] == 'call') & (m >= 1.0) & (m <= 1.1),
+        (df['type'] == 'put') & (m > 0.9) & (m <= 1.0),
+        (df['type'] == 'call') & (m > 1.05),
+        df['delta'].abs().between(0.3, 0.6),
+        (df['type'] == 'put') & (df['time_to_expiry'] * 365).between(30, 60) & (df['volume'] >= 100),
+        spread <= 0.2,
+        (df['type'] == 'call') & (df['iv'] >= df['iv'].quantile(0.5)),
+    ]
+    assert matrix.shape == (len(specs), len(df))
+    for row, mask in zip(matrix, expected):
+        assert np.array_equal(row, mask.to_numpy())
+
+
+def test_free_bands_keep_missing_features():
+    # Sem delta/volume na cadeia, specs que não restringem essas features não excluem nada
+    df = chain().drop(columns=['delta', 'volume']).assign(strike=lambda d: d['strike'].where(d.index != 0))
+    ctx = ChainContext(df, 30.0)
+    matrix = FilterProgram([LegFilter('call'), LegFilter('call', delta=(0.2, 0.8))]).evaluate(ctx)
+    assert matrix[0].sum() == 7          # inclusive o strike ausente
+    assert not matrix[1].any()
+
+
+def test_dedupe_validation_and_context_lookup():
+    spec = LegFilter('call', moneyness=(1.0, 1.1))
+    program = FilterProgram([spec, LegFilter('put'), spec])
+    assert len(program) == 2 and program.index[spec] == 0
+
+    with pytest.raises(ValueError):
+        FilterProgram([LegFilter('future')])
+    with pytest.raises(ValueError):
+        FilterProgram([LegFilter('call', closed='open')])
+
+    df = chain()
+    shared = ChainContext(df, 30.0, program=program)
+    alone = ChainContext(df, 30.0)
+    assert np.array_equal(shared.spec_mask(spec), alone.spec_mask(spec))
+    assert shared.spec_matrix.shape == (2, len(df))
+    # Spec fora do programa também funciona (avaliada avulsa)
+    extra = LegFilter('put', moneyness=(0.0, 0.95))
+    assert shared.spec_mask(extra).sum() == 2
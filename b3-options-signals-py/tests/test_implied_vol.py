@@ -0,0 +1,49 @@
+import numpy as np
+import pandas as pd
+from app.services.math_service import (
+    OptionMath, IV_OK, IV_BELOW_INTRINSIC, IV_ABOVE_MAX, IV_INVALID_INPUT
+)
+from app.services.greeks import GreeksService
+
+
+def test_recovers_volatility_across_smile_and_expiries():
+    rng = np.random.default_rng(3)
+    n = 5000
+    flag = np.where(rng.random(n) < 0.5, 'c', 'p')
+    S = rng.uniform(10, 60, n)
+    K = S * rng.uniform(0.85, 1.15, n)
+    t = rng.uniform(21 / 365, 1.5, n)
+    sigma = rng.uniform(0.15, 1.20, n)
+    price = OptionMath.price_array(flag, S, K, t, 0.1175, sigma)
+
+    result = OptionMath.implied_volatility_array(price, flag, S, K, t, 0.1175)
+
+    assert result['converged'].all()
+    assert np.allclose(result['iv'], sigma, atol=1e-6)
+
+
+def test_flags_arbitrage_bounds_and_invalid_rows():
+    # call ATM: preço 0 (abaixo do intrínseco a termo), acima do spot, NaN, t = 0
+    result = OptionMath.implied_volatility_array(
+        [0.0, 150.0, np.nan, 5.0, 10.4506], 'c', 100.0, 100.0, [1, 1, 1, 0, 1], 0.05
+    )
+
+    assert result['status'].tolist() == [IV_BELOW_INTRINSIC, IV_ABOVE_MAX, IV_INVALID_INPUT, IV_INVALID_INPUT, IV_OK]
+    assert np.isnan(result['iv'][:4]).all()
+    assert np.isclose(result['iv'][4], 0.20, atol=1e-4)
+
+
+def test_greeks_service_solves_missing_iv_without_optional_library():
+    chain = pd.DataFrame({
+        'type': ['call', 'put'],
+        'strike': [30.0, 30.0],
+        'time_to_expiry': [0.1, 0.1],
+        'spot_price': [31.0, 31.0],
+    })
+    chain['last'] = OptionMath.price_array(['c', 'p'], 31.0, 30.0, 0.1, 0.1375, 0.40)
+
+    enriched = GreeksService.calculate_greeks(chain)
+
+    assert np.allclose(enriched['iv'], 0.40)
+    assert (enriched['iv_status'] == IV_OK).all()
+    assert enriched['delta'].iloc[0] > 0.5 and enriched['delta'].iloc[1] < 0
@@ -0,0 +1,79 @@
+import numpy as np
+from app.core.filters import ScoreCalculator
+from app.data.intraday import BarRingBuffer, IntradayBarStore, rsi
+
+
+def test_quotes_aggregate_into_ohlc_bars():
+    buffer = BarRingBuffer(interval=60, capacity=10)
+
+    for ts, price in [(0, 10.0), (30, 12.0), (45, 9.0), (60, 11.0)]:
+        buffer.update(ts, price, volume=100)
+
+    assert len(buffer) == 2
+    assert list(buffer.view('open')) == [10.0, 11.0]
+    assert list(buffer.view('high')) == [12.0, 11.0]
+    assert list(buffer.view('low')) == [9.0, 11.0]
+    assert list(buffer.view('close')) == [9.0, 11.0]
+    assert list(buffer.view('volume')) == [300, 100]
+
+
+def test_wraparound_keeps_latest_bars_as_contiguous_view():
+    buffer = BarRingBuffer(interval=60, capacity=5)
+
+    for i in range(13):
+        buffer.update(i * 60, float(i))
+
+    close = buffer.view('close')
+    assert list(close) == [8.0, 9.0, 10.0, 11.0, 12.0]
+    assert list(buffer.view('close', 2)) == [11.0, 12.0]
+    # View sobre o array interno, sem cópia
+    assert close.base is not None
+    assert not close.flags.writeable
+
+
+def test_out_of_order_quote_is_ignored():
+    buffer = BarRingBuffer(interval=60, capacity=5)
+    buffer.update(120, 10.0)
+
+    assert not buffer.update(30, 99.0)
+    assert list(buffer.view('high')) == [10.0]
+
+
+def test_store_uses_incremental_volume_and_reports_indicators():
+    store = IntradayBarStore()
+    for i in range(40):
+        store.add_quote('PETR4', 30.0 + i * 0.1, cumulative_volume=1000 * (i + 1), timestamp=i * 60)
+
+    one_min = store.bars('PETR4', '1m')
+    assert len(one_min) == 40
+    # Primeira cotação não tem volume anterior de referência
+    assert one_min.view('volume')[0] == 0
+    assert np.all(one_min.view('volume')[1:] == 1000)
+
+    indicators = store.indicators('PETR4')
+    assert indicators['1m']['rsi'] == 100.0
+    assert 'bollinger' in indicators['1m']
+    assert 'rsi' not in indicators['5m']  # apenas 8 barras de 5 minutos
+
+
+def test_rsi_needs_more_bars_than_period():
+    assert rsi(np.arange(10, dtype=float)) is None
+
+
+def test_intraday_rsi_confirms_reversal_score():
+    store = IntradayBarStore()
+    for i in range(20 * 5):  # 20 barras de 5m em queda
+        store.add_quote('PETR4', 30.0 - 0.05 * i, 1000 * i, timestamp=60.0 * i)
+    intraday_rsi = store.indicators('PETR4')['5m']['rsi']
+    assert intraday_rsi < 30
+
+    signal = {'strategy': 'Reversão por IFR (RSI)', 'signal_type': 'BUY CALL', 'technicals': {'rsi': 25}}
+    base = ScoreCalculator.calculate_score(signal)
+    signal['technicals']['intraday_rsi'] = intraday_rsi
+    assert ScoreCalculator.calculate_score(signal) == base + 5
+    # Em lote: sem barras suficientes (NaN) não pontua; estratégia de tendência não usa a confirmação
+    def scores(intraday):
+        return ScoreCalculator.calculate_scores(
+            ['Reversão por IFR (RSI)', 'Compra a Seco de Call'], ['BUY CALL'] * 2, ['Médio'] * 2, [25, 60],
+            0.4, 0, 0, 0, np.nan, np.nan, 0.5, intraday)
+    assert (scores([intraday_rsi] * 2) - scores(np.nan)).tolist() == [5, 0]
@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+
+from app.services.iv_history import IVHistoryJob, read_history, solve_partition
+from app.services.math_service import OptionMath
+
+R = 0.1
+
+
+def synthetic_prints(days=3):
+    """Smile conhecido: vol = 0.30 - 0.2 k + 0.3 k^2 (ATM 30%, skew 90/110 = 4 pts)."""
+    prints, closes = [], []
+    for d in pd.bdate_range('2024-01-02', periods=days):
+        S = 30.0
+        closes.append((d, 'PETR4', S))
+        for tenor in (20, 50, 120):
+            t = tenor / 365
+            K = np.round(S * np.exp(np.linspace(-0.3, 0.3, 31) + R * t), 4)
+            k = np.log(K / (S * np.exp(R * t)))
+            vol = 0.30 - 0.2 * k + 0.3 * k ** 2
+            for flag in ('call', 'put'):
+                for strike, price in zip(K, OptionMath.price_array(flag, S, K, t, R, vol)):
+                    prints.append((d, 'PETR4', flag, strike, d + pd.Timedelta(days=tenor), price))
+    return (pd.DataFrame(prints, columns=['date', 'underlying', 'type', 'strike', 'expiry', 'price']),
+            pd.DataFrame(closes, columns=['date', 'underlying', 'close']))
+
+
+def test_partition_summary_recovers_smile():
+    prints, closes = synthetic_prints()
+    summary = solve_partition(prints.merge(closes, on=['date', 'underlying']), R)
+
+    assert len(summary) == 3
+    assert (summary['n_solved'] == summary['n_prints']).all()
+    assert np.allclose(summary[['atm_iv', 'iv_60d', 'iv_90d']], 0.30, atol=2e-3)
+    assert np.allclose(summary['skew_30d'], 0.04, atol=2e-3)
+
+
+def test_job_writes_store_and_resumes(tmp_path):
+    prints, closes = synthetic_prints()
+    # Print abaixo do intrínseco: contado, mas não resolvido
+    bad = prints.iloc[[0]].assign(price=0.0001)
+    prints = pd.concat([prints, bad], ignore_index=True)
+
+    report = IVHistoryJob(str(tmp_path), risk_free_rate=R, workers=1).run(prints, closes)
+    assert report['partitions'] == 1 and report['rows'] == len(prints) and report['rows_per_second'] > 0
+
+    history = read_history(str(tmp_path), 'PETR4')
+    assert list(history['date']) == list(pd.bdate_range('2024-01-02', periods=3))
+    assert history['n_prints'].sum() - history['n_solved'].sum() == 1
+
+    # Segunda execução: partição já gravada é pulada
+    again = IVHistoryJob(str(tmp_path), risk_free_rate=R, workers=1).run(prints, closes)
+    assert again['partitions'] == 0 and again['skipped'] == 1
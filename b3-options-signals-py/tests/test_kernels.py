@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+from app.services import kernels
+from app.services.math_service import OptionMath
+
+pytest.importorskip("numba")
+
+
+@pytest.fixture
+def backend():
+    original = kernels.JIT_ENABLED
+    yield kernels.set_backend
+    kernels.JIT_ENABLED = original
+
+
+def random_chain(n=20000, seed=8):
+    rng = np.random.default_rng(seed)
+    S = rng.uniform(5, 100, n)
+    flag = np.where(rng.random(n) < 0.5, 'c', 'p')
+    # Linhas inválidas e limites (t = 0, sigma = 0) também precisam bater
+    S[:3] = [-1.0, np.nan, 30.0]
+    flag[3] = 'x'
+    return {
+        "flag": flag,
+        "S": S,
+        "K": S * rng.uniform(0.7, 1.3, n),
+        "t": np.r_[1.0, 1.0, 0.0, rng.uniform(0, 2.0, n - 3)],
+        "r": 0.1175,
+        "sigma": np.r_[0.3, 0.3, 0.3, 0.0, rng.uniform(0.05, 1.0, n - 4)],
+        "q": 0.02,
+    }
+
+
+def test_jit_and_numpy_backends_agree(backend):
+    chain = random_chain()
+    results = {}
+    for name in ("numpy", "numba"):
+        backend(name)
+        price = OptionMath.price_array(**chain)
+        greeks = OptionMath.greeks_array(**chain)
+        results[name] = (price, greeks)
+
+    (p_np, g_np), (p_jit, g_jit) = results["numpy"], results["numba"]
+    assert np.allclose(p_np, p_jit, rtol=1e-12, atol=1e-12, equal_nan=True)
+    for greek in g_np:
+        assert np.allclose(g_np[greek], g_jit[greek], rtol=1e-12, atol=1e-12, equal_nan=True)
+
+
+def test_jit_implied_vol_matches_numpy_solver(backend):
+    chain = random_chain()
+    backend("numpy")
+    price = OptionMath.price_array(**chain)
+    args = {k: v for k, v in chain.items() if k != "sigma"}
+
+    expected = OptionMath.implied_volatility_array(price, **args)
+    backend("numba")
+    result = OptionMath.implied_volatility_array(price, **args)
+
+    assert np.array_equal(result["status"], expected["status"])
+    # Mesma iteração; só o arredondamento de erfc vs ndtr difere
+    assert np.allclose(result["iv"], expected["iv"], atol=1e-6, equal_nan=True)
@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+
+from app.core import strategies
+from app.core.chain_context import ChainContext
+from app.services.b3_service import B3Service
+from app.services.math_service import OptionMath
+
+SPOT = 30.0
+
+
+@pytest.fixture
+def df(make_chain):
+    return make_chain(spot=SPOT, strikes=np.linspace(24.0, 36.0, 25), expiries=(0.08,), iv_level=0.25, skew=0.3,
+                      greeks=True)
+
+
+@pytest.fixture
+def no_per_option_math(monkeypatch):
+    def fail(*args, **kwargs):
+        raise AssertionError("chamada por opção / I/O escondido")
+    monkeypatch.setattr(OptionMath, 'calculate_greeks', fail)
+    monkeypatch.setattr(OptionMath, 'calculate_price', fail)
+    monkeypatch.setattr(B3Service, 'get_rsi', fail)
+
+
+def test_adapter_reads_precomputed_columns(df, no_per_option_math):
+    ctx = ChainContext(df, SPOT)
+    adapter = strategies.LegacyStrategyAdapter([strategies.DeltaHedgeStrategy(), strategies.RSIStrategy()])
+
+    signals = adapter.run({'ticker': 'PETR4', 'price': SPOT, 'rsi': 20.0}, ctx)
+    hedge = [s for s in signals if s['strategy'] == strategies.DeltaHedgeStrategy.name]
+    expected = df[df['delta'].abs().between(0.45, 0.55)]
+    assert [s['option_symbol'] for s in hedge] == expected['symbol'].tolist()
+    assert [s['entry_price'] for s in hedge] == expected['mid'].tolist()
+    assert hedge[0]['greeks']['gamma'] == expected['gamma'].iloc[0]
+    rsi = [s for s in signals if s['strategy'] == 'Reversão por IFR (RSI)']
+    assert rsi[0]['signal_type'] == 'BUY CALL' and rsi[0]['option_symbol'] == 'C31.5'
+
+    # Sem RSI no ticker_data: valor neutro, sem buscar na rede
+    assert not strategies.LegacyStrategyAdapter([strategies.RSIStrategy()]).run({'ticker': 'PETR4'}, ctx)
+
+
+def test_adapter_keeps_list_strategy_output(df):
+    ctx = ChainContext(df, SPOT)
+    records = df.assign(time_to_expiry_years=df['time_to_expiry']).to_dict('records')
+    ticker_data = {'ticker': 'PETR4', 'price': SPOT}
+    for strategy in (strategies.CoveredCallStrategy(), strategies.LongStraddleStrategy(),
+                     strategies.BullCallSpreadStrategy(), strategies.BearPutSpreadStrategy()):
+        assert strategies.LegacyStrategyAdapter([strategy]).run(ticker_data, ctx) == strategy.analyze(ticker_data, records)
+
+    # Caminho de lista da DeltaHedge: r e sigma fixos, numa chamada vetorizada
+    hedge = strategies.DeltaHedgeStrategy().analyze(ticker_data, records)
+    assert hedge
+    for signal in hedge:
+        flag = signal['type'][0].lower()
+        greeks = OptionMath.calculate_greeks(flag, SPOT, signal['strike'], 0.08, 0.1175, 0.30)
+        assert signal['greeks'] == pytest.approx(greeks) and 0.45 <= abs(greeks['delta']) <= 0.55
+
+    universe = ChainContext(df, SPOT, group=np.zeros(len(df)))
+    with pytest.raises(ValueError):
+        strategies.LegacyStrategyAdapter([strategies.RSIStrategy()]).run(ticker_data, universe)
@@ -0,0 +1,44 @@
+import numpy as np
+from app.services.math_service import OptionMath
+
+
+def test_textbook_prices_and_put_call_parity():
+    prices = OptionMath.price_array(['c', 'p'], 100.0, 100.0, 1.0, 0.05, 0.20)
+
+    assert np.allclose(prices, [10.4506, 5.5735], atol=1e-4)
+    assert np.isclose(prices[0] - prices[1], 100.0 - 100.0 * np.exp(-0.05))
+
+
+def test_broadcasts_strike_ladder_against_scalar_inputs():
+    strikes = np.array([[90.0], [100.0], [110.0]])
+    sigmas = np.array([0.2, 0.3])
+
+    prices = OptionMath.price_array('c', 100.0, strikes, 0.5, 0.10, sigmas)
+
+    assert prices.shape == (3, 2)
+    assert np.all(np.diff(prices, axis=0) < 0)  # calls valem menos com strike maior
+    assert np.all(np.diff(prices, axis=1) > 0)  # e mais com vol maior
+
+
+def test_greeks_match_scalar_wrapper():
+    greeks = OptionMath.greeks_array(['c', 'p'], 30.0, 32.0, 0.25, 0.1175, 0.35)
+    scalar = OptionMath.calculate_greeks('p', 30.0, 32.0, 0.25, 0.1175, 0.35)
+
+    for name, value in scalar.items():
+        assert np.isclose(greeks[name][1], value)
+    assert 0 < greeks['delta'][0] < 1 and -1 < greeks['delta'][1] < 0
+    assert np.isclose(greeks['gamma'][0], greeks['gamma'][1])
+
+
+def test_invalid_rows_are_nan_without_affecting_others():
+    prices = OptionMath.price_array(['c', 'x', 'p', 'c'], [10, 10, -1, 10], 10, 0.5, 0.1, [0.3, 0.3, 0.3, np.nan])
+
+    assert np.isfinite(prices[0])
+    assert np.isnan(prices[1:]).all()
+    assert OptionMath.calculate_greeks('c', 10, 10, 0.5, 0.1, -0.3) is None
+
+
+def test_expiry_limit_is_intrinsic_value():
+    prices = OptionMath.price_array(['c', 'p', 'c'], 12.0, [10.0, 10.0, 12.0], 0.0, 0.1, 0.3)
+
+    assert np.allclose(prices, [2.0, 0.0, 0.0])
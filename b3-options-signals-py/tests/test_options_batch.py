@@ -0,0 +1,39 @@
+import numpy as np
+from fastapi.testclient import TestClient
+from app.main import app
+from app.routers.options import MAX_BATCH_ROWS
+from app.services.math_service import OptionMath, IV_OK, IV_BELOW_INTRINSIC, IV_INVALID_INPUT
+
+client = TestClient(app)
+
+
+def test_batch_prices_ladder_and_reports_row_errors():
+    strikes = [28.0, 30.0, 32.0, 30.0, 30.0, 30.0]
+    market = OptionMath.price_array('p', 30.0, 30.0, 0.1, 0.1375, 0.45)
+    body = {
+        "type": ["call", "call", "call", "put", "call", "x"],
+        "S": 30.0,
+        "K": strikes,
+        "t": [0.1] * 6,
+        "r": 0.1375,
+        "sigma": [0.30, 0.30, 0.30, None, None, 0.30],
+        "price": [None, None, None, float(market), 0.0, None],
+    }
+
+    data = client.post("/options/calculate/batch", json=body).json()
+
+    assert data["count"] == 6
+    assert np.allclose(data["price"][:3], OptionMath.price_array('c', 30.0, strikes[:3], 0.1, 0.1375, 0.30))
+    # Put sem sigma é precificada pela vol implícita do preço de mercado
+    assert np.isclose(data["iv"][3], 0.45) and np.isclose(data["price"][3], market)
+    assert data["error"] == [IV_OK, IV_OK, IV_OK, IV_OK, IV_BELOW_INTRINSIC, IV_INVALID_INPUT]
+    assert data["price"][4] is None and data["delta"][5] is None
+
+
+def test_batch_rejects_ragged_or_oversized_bodies():
+    ragged = {"type": ["c", "p"], "S": 30.0, "K": [30.0], "t": [0.1, 0.1], "r": 0.1, "sigma": 0.3}
+    assert client.post("/options/calculate/batch", json=ragged).status_code == 422
+
+    n = MAX_BATCH_ROWS + 1
+    oversized = {"type": ["c"] * n, "S": 30.0, "K": [30.0] * n, "t": [0.1] * n, "r": 0.1, "sigma": 0.3}
+    assert client.post("/options/calculate/batch", json=oversized).status_code == 413
@@ -0,0 +1,78 @@
+from datetime import date, timedelta
+import numpy as np
+import pandas as pd
+from app.services.math_service import OptionMath
+from app.services.portfolio import PortfolioGreeks
+
+TODAY = date(2026, 1, 5)
+
+
+def brute_force_delta(book, spot, underlying='PETR4'):
+    df = book.positions()
+    df = df[df['underlying'] == underlying]
+    t = np.array([(date.fromisoformat(d) - TODAY).days for d in df['expiry']]) / 365.0
+    g = OptionMath.greeks_array(df['type'].to_numpy(), spot, df['strike'].to_numpy(), t, book.risk_free_rate, df['iv'].to_numpy())
+    return float((g['delta'] * df['quantity']).sum())
+
+
+def test_totals_track_adds_removes_and_refreshes():
+    book = PortfolioGreeks(capacity=4)
+    ids = [
+        book.add_position('PETR4', 'call', 30 + i, TODAY + timedelta(days=30 + i), (-1) ** i * (i + 1), iv=0.35, symbol=f'PETRX{i}')
+        for i in range(10)
+    ]
+    book.add_position('VALE3', 'put', 60.0, TODAY + timedelta(days=45), 2, iv=0.30)
+
+    assert book.refresh('PETR4', 31.0, as_of=TODAY) == 10
+    assert book.refresh('VALE3', 58.0, as_of=TODAY) == 1
+
+    for pid in ids[:6]:
+        assert book.remove_position(pid)
+    exposure = book.exposure()
+    petr = exposure['by_underlying']['PETR4']['delta']
+    vale = exposure['by_underlying']['VALE3']['delta']
+    assert exposure['positions'] == 5
+    assert np.isclose(petr, brute_force_delta(book, 31.0))
+    assert np.isclose(exposure['total']['delta'], petr + vale)
+    assert vale < 0  # put comprada
+
+
+def test_refresh_recomputes_only_changed_legs():
+    book = PortfolioGreeks()
+    for i in range(5):
+        book.add_position('PETR4', 'put', 28.0 + i, TODAY + timedelta(days=20), -1, iv=0.40, symbol=f'PETRP{i}')
+    book.refresh('PETR4', 30.0, as_of=TODAY)
+
+    # Mesmo spot e IVs: nada a recalcular
+    assert book.refresh('PETR4', 30.0, as_of=TODAY) == 0
+    # Scan trouxe IV nova só para duas pernas
+    chain = pd.DataFrame({'symbol': ['PETRP1', 'PETRP3', 'OUTRA'], 'iv': [0.55, 0.50, 0.9]})
+    assert book.refresh('PETR4', 30.0, chain, as_of=TODAY) == 2
+    assert np.isclose(book.exposure()['total']['delta'], brute_force_delta(book, 30.0))
+    # Virada de dia muda o prazo de todas
+    assert book.refresh('PETR4', 30.0, as_of=TODAY + timedelta(days=1)) == 5
+
+
+def test_refresh_without_as_of_follows_the_calendar(monkeypatch):
+    import app.services.portfolio as module
+
+    class Clock(date):
+        current = TODAY
+
+        @classmethod
+        def today(cls):
+            return cls.current
+
+    monkeypatch.setattr(module, 'date', Clock)
+    book = PortfolioGreeks()
+    book.add_position('PETR4', 'call', 30.0, TODAY + timedelta(days=20), 1.0, iv=0.3, symbol='PETRA30')
+    book.refresh('PETR4', 30.0)
+    theta = book.exposure()['total']['theta']
+    assert book.refresh('PETR4', 30.0) == 0
+
+    # Virada do dia num worker de longa duração: o prazo encurta e as gregas mudam
+    Clock.current = TODAY + timedelta(days=1)
+    assert book.refresh('PETR4', 30.0) == 1
+    t = 19 / 365.0
+    expected = OptionMath.greeks_array('c', 30.0, 30.0, t, book.risk_free_rate, 0.3)['theta']
+    assert np.isclose(book.exposure()['total']['theta'], expected, atol=1e-6) and book.exposure()['total']['theta'] != theta
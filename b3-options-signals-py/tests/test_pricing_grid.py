@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+from pydantic import ValidationError
+from app.routers.backtest import BacktestRequest
+from app.services import kernels
+from app.services.math_service import OptionMath
+from app.services.pricing_grid import get_pricing_grid
+
+
+@pytest.fixture(params=["numpy", "numba"])
+def backend(request):
+    if request.param == "numba" and not kernels.NUMBA_AVAILABLE:
+        pytest.skip("numba não instalado")
+    original = kernels.JIT_ENABLED
+    kernels.set_backend(request.param)
+    yield request.param
+    kernels.JIT_ENABLED = original
+
+
+def test_grid_prices_within_stated_error_bound(backend):
+    grid = get_pricing_grid()
+    rng = np.random.default_rng(5)
+    n = 20000
+    flag = np.where(rng.random(n) < 0.5, 'c', 'p')
+    S = rng.uniform(5, 100, n)
+    K = S * rng.uniform(0.7, 1.3, n)
+    t = rng.uniform(2 / 365, 1.0, n)
+    sigma = rng.uniform(0.10, 0.90, n)
+
+    approx = grid.price_array(flag, S, K, t, 0.1175, sigma, q=0.02)
+    exact = OptionMath.price_array(flag, S, K, t, 0.1175, sigma, q=0.02)
+
+    discounted_forward = S * np.exp(-0.02 * t)
+    assert np.all(np.abs(approx - exact) <= grid.error_bound * discounted_forward + 1e-12)
+
+
+def test_rows_outside_grid_fall_back_to_exact_pricing(backend):
+    grid = get_pricing_grid()
+    # Asa muito distante, vencimento no dia (v < v_min), flag inválida
+    flag = np.array(['c', 'p', 'x'])
+    K = np.array([300.0, 30.0, 30.0])
+    t = np.array([0.5, 1 / 3650, 0.5])
+
+    approx = grid.price_array(flag, 30.0, K, t, 0.1175, 0.30)
+
+    assert np.allclose(approx[:2], OptionMath.price_array(flag[:2], 30.0, K[:2], t[:2], 0.1175, 0.30))
+    assert np.isnan(approx[2])
+
+
+def test_backtest_request_accepts_only_known_pricing():
+    assert BacktestRequest(ticker='PETR4', strategy_name='x', pricing='grid').pricing == 'grid'
+    with pytest.raises(ValidationError):
+        BacktestRequest(ticker='PETR4', strategy_name='x', pricing='fast')
@@ -0,0 +1,93 @@
+import numpy as np
+import pandas as pd
+from scipy.special import ndtr
+
+from app.core.filters import ScoreCalculator
+from app.services.math_service import OptionMath
+from app.services.probability import candidate_metrics, structure_metrics
+
+
+def test_long_call_pop_and_ev_closed_form():
+    S, K, prem, sigma, t, r = 30.0, 31.0, 0.9, 0.35, 0.1, 0.1
+    m = structure_metrics(S, [[True]], [[K]], [[1.0]], [[prem]], sigma, t, r)
+
+    # PoP = P(S_T > K + prêmio) sob a lognormal neutra ao risco
+    be = K + prem
+    d2 = (np.log(S / be) + (r - 0.5 * sigma ** 2) * t) / (sigma * np.sqrt(t))
+    assert np.isclose(m['breakeven_low'][0], be)
+    assert np.isclose(m['pop'][0], ndtr(d2))
+    # EV neutro ao risco = preço BS - prêmio pago
+    assert np.isclose(m['expected_value'][0], OptionMath.price_array('c', S, K, t, r, sigma) - prem)
+    assert np.isinf(m['max_profit'][0]) and np.isclose(m['max_loss'][0], prem)
+
+
+def test_multi_leg_structures_in_one_batch():
+    # Linha 0: trava de alta 30/33 (débito 0.9); linha 1: iron condor 26/28/32/34 (crédito 0.65, perna de padding)
+    is_call = [[True, True, False, False], [False, False, True, True]]
+    strike = [[30, 33, 0, 0], [26, 28, 32, 34]]
+    qty = [[1, -1, 0, 0], [1, -1, -1, 1]]
+    prem = [[1.2, 0.3, 0, 0], [0.1, 0.4, 0.5, 0.15]]
+
+    m = structure_metrics(30.0, is_call, strike, qty, prem, 0.35, 0.1, 0.1375)
+
+    assert np.allclose(m['breakeven_low'], [30.9, 27.35])
+    assert np.allclose(m['breakeven_high'], [30.9, 32.65])
+    assert np.allclose(m['max_profit'], [2.1, 0.65])
+    assert np.allclose(m['max_loss'], [0.9, 1.35])
+
+    # Conferência por Monte Carlo do PoP
+    z = np.random.default_rng(0).standard_normal(200_000)
+    ST = 30.0 * np.exp((0.1375 - 0.5 * 0.35 ** 2) * 0.1 + 0.35 * np.sqrt(0.1) * z)
+    spread = np.maximum(ST - 30, 0) - np.maximum(ST - 33, 0) - 0.9
+    condor = (np.maximum(26 - ST, 0) - np.maximum(28 - ST, 0) - np.maximum(ST - 32, 0)
+              + np.maximum(ST - 34, 0) + 0.65)
+    assert np.allclose(m['pop'], [(spread > 0).mean(), (condor > 0).mean()], atol=0.005)
+
+
+def test_short_put_touch_is_about_twice_itm_probability():
+    m = structure_metrics(30.0, [[False]], [[27.0]], [[-1.0]], [[0.4]], 0.35, 0.1, 0.0, drift=0.0)
+    itm = ndtr((np.log(27.0 / 30.0) + 0.5 * 0.35 ** 2 * 0.1) / (0.35 * np.sqrt(0.1)))
+    assert 1.8 * itm < m['prob_touch'][0] < 2.0 * itm
+    assert np.isinf(m['max_profit'][0]) is np.False_ and np.isclose(m['max_profit'][0], 0.4)
+
+
+def test_candidate_metrics_and_score():
+    candidates = pd.DataFrame({
+        'type': ['put', 'call', 'call'],
+        'strike': [27.0, 31.0, 31.0],
+        'time_to_expiry': [0.1, 0.1, 0.0],
+        'mid': [0.4, 0.9, 0.9],
+        'iv': [0.35, 0.30, 0.30],
+        'signal_type': ['SELL PUT', 'BUY CALL', 'BUY CALL'],
+    }, index=[10, 11, 12])
+
+    metrics = candidate_metrics(candidates, 30.0)
+
+    assert list(metrics.index) == [10, 11, 12]
+    assert metrics.loc[10, 'pop'] > 0.8
+    assert np.isnan(metrics.loc[11, 'max_profit'])   # ilimitado -> NaN (serializável)
+    assert np.isnan(metrics.loc[12, 'pop'])          # vencida: sem distribuição
+
+    signal = {'signal_type': 'SELL PUT', 'strategy': 'Venda de Put', 'technicals': {}}
+    row = {'pop': 0.9, 'expected_value': 0.2, 'delta': -0.5}
+    assert ScoreCalculator.calculate_score(signal, row) == ScoreCalculator.calculate_score(signal, {'delta': -0.1}) + 5
+
+
+def test_calendar_values_far_leg_at_remaining_time():
+    # Calendário 30: vende call de 0.1 ano, compra a de 0.3 (vol 0.35 perto, 0.30 longe)
+    S, K, r, t_near, t_far = 30.0, 30.0, 0.1375, 0.1, 0.3
+    near = OptionMath.price_array('c', S, K, t_near, r, 0.35)
+    far = OptionMath.price_array('c', S, K, t_far, r, 0.30)
+    debit = far - near
+    m = structure_metrics(S, [[True, True]], [[K, K]], [[-1.0, 1.0]], [[near, far]], 0.35, t_near, r,
+                          leg_t=[[t_near, t_far]], leg_sigma=[[0.35, 0.30]])
+
+    # No primeiro vencimento a perna longa vale BS com o prazo restante
+    z = np.random.default_rng(0).standard_normal(200_000)
+    ST = S * np.exp((r - 0.5 * 0.35 ** 2) * t_near + 0.35 * np.sqrt(t_near) * z)
+    pnl = OptionMath.price_array('c', ST, K, t_far - t_near, r, 0.30) - np.maximum(ST - K, 0) - debit
+    assert 0 < m['pop'][0] and np.isclose(m['pop'][0], (pnl > 0).mean(), atol=0.005)
+    assert np.isclose(m['expected_value'][0], np.exp(-r * t_near) * (pnl.mean() + debit) - debit, atol=0.01)
+    assert m['breakeven_low'][0] < K < m['breakeven_high'][0]
+    # Perda máxima limitada ao débito (spot longe do strike); ganho máximo finito
+    assert np.isclose(m['max_loss'][0], debit, atol=0.01) and 0 < m['max_profit'][0] < np.inf
@@ -0,0 +1,73 @@
+from collections import Counter
+
+import tracemalloc
+
+import numpy as np
+import pytest
+
+from app.services.profiler import StrategyProfiler
+
+
+def test_cycles_aggregate_per_strategy_and_ticker():
+    profiler = StrategyProfiler(window=2, track_memory=True)
+    for _ in range(3):
+        cycle = profiler.cycle(['PETR4', 'VALE3'])
+        with cycle.measure('rapida', [30, 10]) as run:
+            run['rows_out'] = np.array([2, 1])
+        with cycle.measure('lenta', [0, 40]) as run:
+            buffer = np.ones(200_000)   # ~1.5 MiB alocados dentro do bloco
+            run['rows_out'] = np.array([0, len(buffer) // 100_000])
+        # Exceções contam para a estratégia e seguem para o scanner
+        with pytest.raises(ValueError):
+            with cycle.measure('quebrada', [30, 40]):
+                raise ValueError('strike inválido')
+        cycle.record_routing({'evaluated': 4, 'skipped': 2, 'skipped_by_strategy': Counter({'lenta': 1, 'quebrada': 1})})
+        profiler.record(cycle)
+
+    summary = profiler.summary()
+    # Janela: só os 2 últimos ciclos
+    assert summary['cycles'] == 2
+    by_name = {s['strategy']: s for s in summary['strategies']}
+    assert by_name['rapida']['rows_in'] == 80 and by_name['rapida']['rows_out'] == 6
+    assert by_name['rapida']['tickers']['PETR4']['rows_out'] == 4
+    # Ativo sem opções elegíveis não aparece na estratégia
+    assert list(by_name['lenta']['tickers']) == ['VALE3']
+    assert by_name['lenta']['peak_kib'] > 1500
+    assert by_name['quebrada']['errors'] == 2 and 'strike inválido' in by_name['quebrada']['last_error']
+    # Tempo rateado pelas opções de cada ativo
+    fast = by_name['rapida']
+    assert fast['tickers']['PETR4']['wall_ms'] + fast['tickers']['VALE3']['wall_ms'] == pytest.approx(
+        fast['wall_ms']['total'], abs=1e-2)
+    assert [s['wall_ms']['total'] for s in summary['strategies']] == sorted(
+        (s['wall_ms']['total'] for s in summary['strategies']), reverse=True)
+    assert summary['last_cycle']['slowest'] == summary['last_cycle']['strategies'][0]['strategy']
+    assert profiler.summary(cycles=1)['cycles'] == 1
+    # Roteamento somado na janela e o do último ciclo
+    assert summary['routing'] == {'evaluated': 8, 'skipped': 4, 'skipped_by_strategy': {'lenta': 2, 'quebrada': 2}}
+    assert summary['last_cycle']['routing']['skipped'] == 2
+
+
+def test_memory_tracking_is_opt_in_and_spares_outer_tracer(monkeypatch):
+    monkeypatch.delenv('PROFILE_MEMORY', raising=False)
+    assert not StrategyProfiler().track_memory
+    monkeypatch.setenv('PROFILE_MEMORY', 'true')
+    assert StrategyProfiler().track_memory
+
+    cycle = StrategyProfiler(track_memory=False).cycle(['PETR4'])
+    with cycle.measure('sem_memoria', [1]):
+        assert not tracemalloc.is_tracing()
+    assert cycle.entries['sem_memoria']['peak_kib'] == 0
+
+    # Tracer de fora: o pico dele sobrevive ao bloco e ele continua rodando
+    tracemalloc.start()
+    try:
+        spike = np.ones(500_000)
+        del spike
+        outer_peak = tracemalloc.get_traced_memory()[1]
+        cycle = StrategyProfiler(track_memory=True).cycle(['PETR4'])
+        with cycle.measure('dentro', [1]):
+            kept = np.ones(100_000)
+        assert tracemalloc.is_tracing() and tracemalloc.get_traced_memory()[1] >= outer_peak
+        assert 700 < cycle.entries['dentro']['peak_kib'] < 1000 and len(kept)
+    finally:
+        tracemalloc.stop()
@@ -0,0 +1,52 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.core.routing import RoutingTable
+from app.core.strategies_vectorized import (
+    CalendarSpreadStrategy, CashSecuredPutStrategy, IronCondorStrategy, LongCallStrategy, RSIStrategy,
+)
+from app.services.scanner import SignalScanner
+
+
+@pytest.fixture
+def universe(make_universe):
+    return make_universe({
+        'PETR4': {'spot': 30.0, 'rsi': 20.0},
+        'VALE3': {'spot': 60.0, 'rsi': 50.0, 'expiries': (0.05,), 'types': ('call',)},   # só calls, 1 vencimento
+        'BBAS3': {'spot': 25.0, 'rsi': 80.0},
+    })
+
+
+def test_table_follows_declared_and_derived_preconditions(universe):
+    df, ctx = universe
+    strategies = [RSIStrategy(), CashSecuredPutStrategy(), CalendarSpreadStrategy(), LongCallStrategy(), IronCondorStrategy()]
+    routing = RoutingTable(strategies, ctx)
+    assert routing.eligible.tolist() == [
+        [True, False, True],       # RSI fora de 30-70
+        [True, False, True],       # precisa de puts
+        [True, False, True],       # precisa de 2 vencimentos
+        [True, True, True],
+        [True, False, True],       # pernas de put e de call
+    ]
+    stats = RoutingTable.new_stats()
+    routing.record(stats)
+    assert stats['evaluated'] == 11 and stats['skipped'] == 4
+    assert stats['skipped_by_strategy']['Reversão por IFR (RSI)'] == 1
+
+
+def test_routed_evaluation_matches_full_evaluation(universe):
+    df, ctx = universe
+    strategies = SignalScanner().strategies
+    routing = RoutingTable(strategies, ctx)
+    for i, strategy in enumerate(strategies):
+        full = strategy.analyze({}, df, ctx=ctx)
+        with ctx.restricted(routing.rows(i)):
+            routed = strategy.analyze({}, df, ctx=ctx)
+        eligible = set(np.asarray(ctx.groups)[routing.eligible[i]])
+        if strategy.name not in (CalendarSpreadStrategy.name, 'Trava Diagonal (PMCC)'):
+            # Pré-condições necessárias: nada se perde nos ativos pulados
+            expected = full[full['underlying'].isin(eligible)] if not full.empty else full
+            assert routed.get('symbol', pd.Series()).tolist() == expected.get('symbol', pd.Series()).tolist()
+        assert routed.empty or routed['underlying'].isin(eligible).all()
+    assert ctx._active is None
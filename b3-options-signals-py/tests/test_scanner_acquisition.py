@@ -0,0 +1,110 @@
+import asyncio
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import app.services.scanner as scanner_module
+from app.data.intraday import IntradayBarStore
+from app.services.greeks import ChainEnricher
+from app.services.portfolio import PortfolioGreeks
+from app.services.profiler import StrategyProfiler
+from app.services.scanner import SignalScanner
+from app.services.vol_surface import VolSurfaceService
+
+SPOT = 30.0
+
+
+class SlowSource:
+    """Fonte falsa: cada etapa dorme `delays[etapa]` segundos antes de responder."""
+
+    def __init__(self, make_chain, delays, spot=SPOT):
+        self.make_chain = make_chain
+        self.delays = dict(delays)
+        self.spot = spot
+
+    async def get_cotacao(self, ticker):
+        await asyncio.sleep(self.delays['cotacao'])
+        return {'ticker': ticker, 'preco': self.spot, 'volume': 1000, 'variacao': 0.5, 'timestamp': 'agora'}
+
+    async def get_historico(self, ticker, days=100):
+        await asyncio.sleep(self.delays['historico'])
+        close = SPOT + np.cumsum(np.random.default_rng(1).normal(0, 0.3, 120))
+        return pd.DataFrame({'Open': close, 'High': close + 0.5, 'Low': close - 0.5, 'Close': close,
+                             'Volume': 1e6}, index=pd.date_range('2026-01-01', periods=120, freq='B'))
+
+    async def get_cadeia_opcoes(self, ticker):
+        await asyncio.sleep(self.delays['cadeia'])
+        chain = self.make_chain(ticker, spot=self.spot, strikes=np.round(np.linspace(SPOT * 0.8, SPOT * 1.2, 9), 2),
+                                expiries=(0.08,), skew=0.0)
+        # Formato da fonte (B3RealData): ticker_opcao/tipo/preco
+        return pd.DataFrame({
+            'ticker_opcao': chain['symbol'], 'underlying': ticker, 'tipo': chain['type'].str.upper(),
+            'strike': chain['strike'], 'preco': chain['mid'], 'bid': chain['bid'], 'ask': chain['ask'],
+            'volume': 500, 'iv': 0.3, 'time_to_expiry': chain['time_to_expiry'],
+        })
+
+
+@pytest.fixture
+def scanner(monkeypatch, make_chain):
+    # Serviços globais do scanner trocados por instâncias novas (sem estado entre testes)
+    monkeypatch.setattr(scanner_module, 'portfolio', PortfolioGreeks())
+    monkeypatch.setattr(scanner_module, 'intraday_store', IntradayBarStore())
+    monkeypatch.setattr(scanner_module, 'chain_enricher', ChainEnricher())
+    monkeypatch.setattr(scanner_module, 'vol_surface_service', VolSurfaceService())
+    monkeypatch.setattr(scanner_module, 'strategy_profiler', StrategyProfiler())
+
+    async def no_alert(signal):
+        pass
+
+    monkeypatch.setattr(scanner_module.alert_service, 'send_signal', no_alert)
+    scanner = SignalScanner(attach_scenarios=False, deadlines={'historico': 0.2, 'cadeia': 0.2})
+    scanner.data_client = SlowSource(make_chain, {'cotacao': 0.05, 'historico': 0.05, 'cadeia': 0.1})
+    return scanner
+
+
+def prepare(scanner, ticker='PETR4'):
+    timings = {}
+    return asyncio.run(scanner._prepare(ticker, timings)), timings
+
+
+def sources(timings):
+    return {stage: t['source'] for stage, t in timings.items() if 'source' in t}
+
+
+def test_stages_run_concurrently_and_fall_back_after_deadline(scanner):
+    prepared, timings = prepare(scanner)
+    assert prepared is not None and set(sources(timings).values()) == {'live'}
+    # Em paralelo a aquisição dura ~ a etapa mais lenta, não a soma das três
+    stages = [timings[stage]['ms'] for stage in ('cotacao', 'historico', 'cadeia')]
+    assert timings['aquisicao']['ms'] < sum(stages)
+    rsi = prepared['ticker_data']['rsi']
+
+    # Histórico lento: estoura o prazo e usa o último histórico bom (mesmo RSI)
+    scanner.data_client.delays['historico'] = 30.0
+    prepared, timings = prepare(scanner)
+    assert timings['historico']['source'] == 'cached' and timings['historico']['ms'] < 30_000
+    assert prepared['ticker_data']['rsi'] == rsi and prepared['ticker_data']['degraded'] == ['historico']
+
+    # Sem valor bom recente a etapa falha: RSI neutro, o ativo segue
+    scanner.max_age['historico'] = 0
+    prepared, timings = prepare(scanner)
+    assert timings['historico']['source'] == 'failed' and prepared['ticker_data']['rsi'] == 50.0
+
+
+def test_cached_chain_keeps_its_spot_and_marks_signals(scanner):
+    asyncio.run(scanner.scan_universe(['PETR4']))
+
+    # Cotação nova (31) mas cadeia lenta: a cadeia antiga segue com o spot em que foi cotada
+    scanner.data_client.spot = 31.0
+    scanner.data_client.delays['cadeia'] = 30.0
+    prepared, timings = prepare(scanner)
+    assert sources(timings) == {'cotacao': 'live', 'historico': 'live', 'cadeia': 'cached'}
+    assert prepared['ticker_data']['price'] == SPOT
+    np.testing.assert_allclose(prepared['chain']['iv'], 0.3, atol=1e-4)
+
+    signals = asyncio.run(scanner.scan_universe(['PETR4']))['PETR4']
+    assert signals and all(s['degraded'] == ['cadeia'] and s['spot_price'] == SPOT for s in signals)
+    # Cada ciclo registra o roteamento no profiler (estratégia x ativo)
+    routing = scanner_module.strategy_profiler.summary()['routing']
+    assert routing['evaluated'] + routing['skipped'] == 2 * len(scanner.strategies)
@@ -0,0 +1,47 @@
+import numpy as np
+from fastapi.testclient import TestClient
+from app.main import app
+from app.services.math_service import OptionMath
+from app.services.scenarios import ScenarioEngine
+
+
+def test_grid_matches_leg_by_leg_repricing():
+    legs = [
+        {'type': 'call', 'strike': 30.0, 'time_to_expiry': 0.1, 'iv': 0.35, 'quantity': 1},
+        {'type': 'call', 'strike': 33.0, 'time_to_expiry': 0.1, 'iv': 0.32, 'action': 'SELL'},
+    ]
+    engine = ScenarioEngine(risk_free_rate=0.1)
+
+    result = engine.grid(legs, 30.0, spot_shocks=(-0.1, 0.0, 0.1), vol_shocks=(0.0, 0.1), days_forward=(0, 5))
+
+    assert result['pnl'].shape == (3, 2, 2)
+    # Cenário -10%, vol +10 pts, 5 dias: reprecificação perna a perna
+    t = 0.1 - 5 / 365
+    expected = (
+        OptionMath.price_array('c', 27.0, 30.0, t, 0.1, 0.45) - OptionMath.price_array('c', 30.0, 30.0, 0.1, 0.1, 0.35)
+        - OptionMath.price_array('c', 27.0, 33.0, t, 0.1, 0.42) + OptionMath.price_array('c', 30.0, 33.0, 0.1, 0.1, 0.32)
+    )
+    assert np.isclose(result['pnl'][0, 1, 1], expected)
+    # Trava de alta: sem choque e sem tempo o P&L é zero
+    assert np.isclose(result['pnl'][1, 0, 0], 0.0)
+
+
+def test_short_put_signal_summary_flags_gap_risk():
+    legs = [{'type': 'put', 'strike': 29.0, 'time_to_expiry': 0.08, 'iv': 0.40, 'action': 'SELL', 'price': 0.80}]
+
+    summary = ScenarioEngine().signal_summary(legs, 30.0)
+
+    assert summary['gap_down_10'] < 0
+    assert summary['worst']['spot_shock'] == -0.10
+    assert ScenarioEngine().signal_summary([], 30.0) is None
+
+
+def test_scenarios_endpoint_returns_nested_grid():
+    client = TestClient(app)
+    body = {"spot": 30.0, "legs": [{"type": "put", "strike": 30.0, "time_to_expiry": 0.1, "iv": 0.3}]}
+
+    data = client.post("/options/scenarios", json=body).json()
+
+    assert np.array(data["pnl"]).shape == (len(data["spot_shocks"]), len(data["vol_shocks"]), len(data["days_forward"]))
+    assert data["summary"]["best"]["spot_shock"] == min(data["spot_shocks"])
+    assert client.post("/options/scenarios", json={"spot": 30.0, "legs": []}).status_code == 422
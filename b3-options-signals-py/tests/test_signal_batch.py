@@ -0,0 +1,86 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.core.filters import RiskManager, ScoreCalculator
+from app.core.signal_batch import SignalBatch
+from app.core.strategies_vectorized import CoveredCallStrategy, IronCondorStrategy, RSIStrategy
+from app.services.scenarios import ScenarioEngine
+
+
+@pytest.fixture
+def batch_and_frames(make_universe):
+    df, ctx = make_universe({'PETR4': {'spot': 30.0, 'rsi': 20.0, 'greeks': True},
+                             'VALE3': {'spot': 62.0, 'rsi': 80.0, 'greeks': True}})
+    strategies = (CoveredCallStrategy(), RSIStrategy(), IronCondorStrategy())
+    batch = SignalBatch.concat([s.signals({}, ctx) for s in strategies])
+    frame = pd.concat([s.analyze({}, df, ctx=ctx) for s in strategies], ignore_index=True)
+    return ctx, batch, frame
+
+
+def test_batch_matches_materialized_frames(batch_and_frames):
+    ctx, batch, frame = batch_and_frames
+    assert len(batch) == len(frame) and batch.is_structure.sum() == (frame['type'] == 'structure').sum()
+    # Rótulos só como códigos: uma categoria por texto distinto
+    assert len(batch.labels['strategy'].categories) == 3
+    for key in ('strategy', 'signal_type', 'reason', 'risk_level'):
+        assert batch.label(key).tolist() == frame[key].tolist()
+    quotes = batch.quotes(ctx)
+    for key in ('strike', 'time_to_expiry', 'bid', 'ask', 'mid', 'volume', 'delta', 'iv'):
+        np.testing.assert_allclose(quotes[key], frame[key].to_numpy(dtype=float), equal_nan=True)
+    assert batch.symbols(ctx) == frame['symbol'].tolist()
+    records = batch.leg_records(ctx)
+    structures = frame['type'] == 'structure'
+    assert [records[i] for i in np.flatnonzero(structures)] == frame.loc[structures, 'legs'].tolist()
+    assert all(len(r) == 1 and r[0]['symbol'] == s for r, s in zip(records, frame['symbol']) if len(r) == 1)
+
+
+def test_vectorized_score_and_flags_match_row_by_row():
+    rng = np.random.default_rng(3)
+    n = 400
+    strategy = rng.choice(['Reversão por IFR (RSI)', 'Compra a Seco de Call', 'Venda de Strangle'], n)
+    signal_type = rng.choice(['BUY CALL', 'BUY PUT', 'SELL PUT', 'SHORT STRANGLE', 'COLLAR'], n)
+    risk_level = rng.choice(['LOW', 'HIGH', 'UNLIMITED', 'Médio'], n)
+    columns = {key: np.where(rng.random(n) < 0.15, np.nan, values) for key, values in {
+        'rsi': rng.uniform(10, 90, n), 'iv': rng.uniform(0.1, 0.8, n), 'volume': rng.integers(0, 3000, n),
+        'bid': rng.uniform(0.5, 1.0, n), 'ask': rng.uniform(0.9, 1.2, n), 'pop': rng.uniform(0.3, 0.95, n),
+        'expected_value': rng.normal(0, 0.05, n), 'delta': rng.uniform(-0.9, 0.9, n),
+        'time_to_expiry': rng.uniform(0, 0.05, n), 'intraday_rsi': rng.uniform(10, 90, n),
+    }.items()}
+
+    scores = ScoreCalculator.calculate_scores(
+        pd.Categorical(strategy), pd.Categorical(signal_type), risk_level, columns['rsi'], columns['iv'],
+        columns['volume'], columns['bid'], columns['ask'], columns['pop'], columns['expected_value'], columns['delta'],
+        columns['intraday_rsi'])
+    flags = RiskManager.get_risk_flag_lists(risk_level, columns['volume'], columns['bid'], columns['ask'],
+                                            columns['time_to_expiry'])
+    for i in range(n):
+        row = {key: values[i] for key, values in columns.items()}
+        signal = {'strategy': strategy[i], 'signal_type': signal_type[i], 'risk_level': risk_level[i],
+                  'technicals': {'rsi': row['rsi'], 'iv': row['iv'], 'intraday_rsi': row['intraday_rsi']}}
+        assert scores[i] == ScoreCalculator.calculate_score(signal, row)
+        assert flags[i] == RiskManager.get_risk_flags(signal, row)
+
+
+def test_single_signal_defaults_for_missing_fields():
+    # Sem perna: sem pontos de liquidez/spread e sem flag de liquidez; delta neutro não pontua a venda
+    signal = {'signal_type': 'SELL PUT', 'risk_level': 'UNLIMITED', 'technicals': {'iv': 0.6}}
+    assert ScoreCalculator.calculate_score(signal) == 50 + 10 - 15
+    assert RiskManager.get_risk_flags(signal) == [RiskManager.UNLIMITED]
+    # Perna sem volume conta como volume zero; pop/EV None caem no proxy por delta
+    row = {'bid': 0.9, 'ask': 1.0, 'delta': -0.1, 'pop': None, 'expected_value': None, 'time_to_expiry': 1 / 365}
+    assert ScoreCalculator.calculate_score(signal, row) == 50 + 5 + 20 + 10 - 15
+    assert RiskManager.get_risk_flags(signal, row) == [RiskManager.UNLIMITED, RiskManager.LOW_LIQUIDITY,
+                                                       RiskManager.EXPIRING]
+
+
+def test_batched_scenarios_match_per_signal_summary(batch_and_frames):
+    ctx, batch, _ = batch_and_frames
+    legs = batch.leg_columns(ctx)
+    spot = ctx.spot_row[batch.legs[:, 0]]
+    engine = ScenarioEngine()
+    summaries = engine.signal_summaries(legs['is_call'], legs['strike'], legs['time_to_expiry'], legs['iv'],
+                                        legs['quantity'], legs['price'], spot)
+    for summary, records, quantity, s in zip(summaries, batch.leg_records(ctx), batch.quantity, spot):
+        expected = engine.signal_summary([dict(r, quantity=q) for r, q in zip(records, quantity)], s)
+        assert summary == expected
@@ -0,0 +1,91 @@
+import numpy as np
+import pandas as pd
+
+from app.core import strategies
+from app.core.chain_context import ChainContext
+from app.core.strike_index import StrikeIndex
+
+
+def chain():
+    return pd.DataFrame({
+        'symbol': [f"OPT{i}" for i in range(10)],
+        'type': ['call', 'put', 'call', 'call', 'put', 'call', 'put', 'call', 'put', 'call'],
+        'strike': [32.0, 28.0, 30.0, 28.0, 30.0, 30.0, 32.0, np.nan, 26.0, 34.0],
+        'expiry': ['2026-11', '2026-11', '2026-12', '2026-11', '2026-12', '2026-11', '2026-11', '2026-11', '2026-12', '2026-12'],
+    })
+
+
+def brute_nearest(df, target, option_type=None, expiry=None):
+    rows = df[df['strike'].notna()]
+    if option_type:
+        rows = rows[rows['type'] == option_type]
+    if expiry:
+        rows = rows[rows['expiry'] == expiry]
+    if rows.empty:
+        return None
+    return int((rows['strike'] - target).abs().idxmin())   # primeira posição entre empates
+
+
+def test_segments_are_sorted_per_type_and_expiry():
+    index = StrikeIndex.from_frame(chain(), spot=30.5)
+    assert index.expiries == ['2026-11', '2026-12']
+    assert list(index.positions('call')) == [3, 2, 5, 0, 9]          # empate 30.0: ordem da cadeia
+    assert list(index.strikes('call', '2026-11')) == [28.0, 30.0, 32.0]
+    assert list(index.positions(expiry='2026-12')) == [8, 2, 4, 9]
+    assert list(index.between(29.0, 32.0, 'call')) == [2, 5, 0]
+    assert len(index.positions('put', 'missing')) == 0
+
+
+def test_lookups_match_brute_force():
+    df = chain()
+    index = StrikeIndex.from_frame(df, spot=30.5)
+    targets = np.linspace(24.0, 36.0, 97)
+    for option_type in (None, 'call', 'put'):
+        for expiry in (None, '2026-11', '2026-12'):
+            expected = [brute_nearest(df, t, option_type, expiry) for t in targets]
+            found = index.nearest(targets, option_type, expiry)
+            assert [None if p < 0 else int(p) for p in found] == expected
+            assert [index.nearest(t, option_type, expiry) for t in targets[:5]] == expected[:5]
+
+    assert index.at_or_above(30.1, 'call') == 0 and index.at_or_above(34.5, 'call') is None
+    assert index.at_or_below(29.9, 'call') == 3 and index.at_or_below(30.0, 'call') == 2
+    assert index.at_or_below(25.0, 'put') is None
+    assert index.atm() == 2 and index.atm('put') == 4
+
+
+def test_context_and_legacy_strategies_use_the_index():
+    ctx = ChainContext(chain(), 30.5)
+    assert list(ctx.expiry_groups) == ['2026-11', '2026-12']
+    assert list(ctx.expiry_groups['2026-11']) == [1, 3, 5, 0, 6]
+
+    options = chain().dropna().to_dict('records')
+    index = StrikeIndex.from_records(options, spot=30.5)
+    ticker_data = {'ticker': 'PETR4', 'price': 30.5, 'strike_index': index}
+    assert strategies.BaseStrategy.strike_index(ticker_data, options) is index
+
+    bull = strategies.BullCallSpreadStrategy().analyze(ticker_data, options)
+    assert bull[0]['option_symbol'] == 'Buy OPT2 / Sell OPT5'
+    straddle = strategies.LongStraddleStrategy().analyze(ticker_data, options)
+    assert straddle[0]['option_symbol'] == 'OPT2 + PUT'
+
+
+def test_grouped_lookups_stay_within_each_underlying():
+    rng = np.random.default_rng(4)
+    strike = np.round(rng.uniform(10, 90, 300), 0)
+    option_type = rng.choice(['call', 'put'], 300)
+    group = rng.integers(0, 5, 300)
+    index = StrikeIndex(strike, option_type, group=group, spot=np.array([20.0, 40.0, 50.0, 60.0, 80.0]))
+
+    targets = rng.uniform(0, 100, 400)
+    owners = rng.integers(0, 6, 400)              # ativo 5 não existe: sem resultado
+    found = index.nearest(targets, 'call', group=owners)
+    above = index.at_or_above(targets, 'put', group=owners)
+    for t, g, p, a in zip(targets, owners, found, above):
+        rows = np.flatnonzero((group == g) & (option_type == 'call'))
+        expected = rows[np.argmin(np.abs(strike[rows] - t))] if len(rows) else -1
+        assert p == expected
+        puts = np.flatnonzero((group == g) & (option_type == 'put') & (strike >= t))
+        assert a == (puts[np.lexsort((puts, strike[puts]))][0] if len(puts) else -1)
+    assert list(index.positions('put', group=2)) == list(np.flatnonzero((group == 2) & (option_type == 'put'))[
+        np.argsort(strike[(group == 2) & (option_type == 'put')], kind='stable')])
+    assert all(group[p] == g for g, p in enumerate(index.atm()))
@@ -0,0 +1,237 @@
+import itertools
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.core.chain_context import ChainContext
+from app.core.filter_specs import INF, LegFilter
+from app.core.strategies_vectorized import (
+    IronButterflyStrategy, JadeLizardStrategy, LongStraddleStrategy, ShortStrangleStrategy,
+)
+from app.core.structure_search import (
+    Butterfly, IronButterfly, IronCondor, Strangle, TimeSpread, VerticalSpread, _band_pairs,
+)
+from app.data.real_time import b3_expiry, with_expiry
+from app.services.math_service import OptionMath
+from app.services.probability import candidate_metrics
+
+SPOT = 30.0
+
+
+@pytest.fixture
+def chain(make_chain):
+    def build(n=41, expiries=(0.08,)):
+        return make_chain(spot=SPOT, strikes=np.linspace(24.0, 36.0, n), expiries=expiries, spread=0.03)
+    return build
+
+
+def test_band_pairs_matches_brute_force():
+    rng = np.random.default_rng(3)
+    ka, kb = np.sort(rng.uniform(20, 40, 30)), np.sort(rng.uniform(20, 40, 25))
+    ia, ib = _band_pairs(ka, kb, -1.5, 2.0)
+    expected = {(i, j) for i in range(30) for j in range(25) if -1.5 <= kb[j] - ka[i] <= 2.0}
+    assert set(zip(ia.tolist(), ib.tolist())) == expected and len(ia) == len(expected)
+
+
+def test_vertical_and_butterfly_constraints(chain):
+    ctx = ChainContext(chain(), SPOT)
+    bull = VerticalSpread(LegFilter('call', moneyness=(0.98, 1.02)), LegFilter('call', moneyness=(1.05, 1.10)),
+                          width=(0.03, 0.12), max_debit_ratio=0.75)
+    found = bull.search(ctx)
+    long_k, short_k = ctx.strike[found.positions[:, 0]], ctx.strike[found.positions[:, 1]]
+    debit = -found.premium
+    assert len(found) > 0 and np.all(short_k > long_k)
+    assert np.all((debit > 0) & (debit <= 0.75 * found.width))
+    assert np.allclose(found.score, (found.width - debit) / debit)
+    # top_k ordena pelo score
+    top = bull.search(ctx, top_k=3)
+    assert np.allclose(top.score, np.sort(found.score)[::-1][:3])
+
+    fly = Butterfly(LegFilter('call', moneyness=(0.98, 1.02)), LegFilter('call'), width=(0.02, 0.10)).search(ctx)
+    k1, k2, k3 = (ctx.strike[fly.positions[:, i]] for i in range(3))
+    assert len(fly) > 0 and np.allclose(k2 - k1, k3 - k2)
+    assert np.allclose(-fly.premium, ctx.mid[fly.positions] @ np.array([1.0, -2.0, 1.0]))
+
+
+def test_iron_condor_top_matches_brute_force(chain):
+    df = chain(n=25)
+    ctx = ChainContext(df, SPOT)
+    condor = IronCondor(
+        short_put=LegFilter('put', moneyness=(0.85, 0.97)), long_put=LegFilter('put', moneyness=(-INF, 0.97)),
+        short_call=LegFilter('call', moneyness=(1.03, 1.15)), long_call=LegFilter('call', moneyness=(1.03, INF)),
+        width=(0.01, 0.10), min_credit_ratio=0.2,
+    )
+    best = condor.search(ctx, top_k=1)
+
+    # Produto cartesiano completo das pernas candidatas (cadeia pequena)
+    m = df['strike'] / SPOT
+    calls, puts = df['type'] == 'call', df['type'] == 'put'
+    legs = [df[puts & (m <= 0.97)], df[puts & m.between(0.85, 0.97)],
+            df[calls & m.between(1.03, 1.15)], df[calls & (m >= 1.03)]]
+    scores = []
+    for lp, sp, sc, lc in itertools.product(*(leg[['strike', 'mid']].to_numpy() for leg in legs)):
+        wp, wc = sp[0] - lp[0], lc[0] - sc[0]
+        if not (0.3 - 1e-9 <= wp <= 3.0 + 1e-9 and 0.3 - 1e-9 <= wc <= 3.0 + 1e-9 and sp[0] < sc[0]):
+            continue
+        cp, cc = sp[1] - lp[1], sc[1] - lc[1]
+        credit, width = cp + cc, max(wp, wc)
+        if cp <= 0 or cc <= 0 or credit < 0.2 * width or width - credit <= 0:
+            continue
+        scores.append(credit / (width - credit))
+    assert np.isclose(best.score[0], max(scores))
+
+
+def test_iron_butterfly_ties_short_strikes(chain):
+    df = chain(n=25)
+    ctx = ChainContext(df, SPOT)
+    legs = dict(
+        short_put=LegFilter('put', moneyness=(0.98, 1.02)), long_put=LegFilter('put', moneyness=(-INF, 0.98)),
+        short_call=LegFilter('call', moneyness=(0.98, 1.02)), long_call=LegFilter('call', moneyness=(1.02, INF)),
+        width=(0.02, 0.10),
+    )
+    fly = IronButterfly(**legs).search(ctx)
+    lp, sp, sc, lc = (ctx.strike[fly.positions[:, i]] for i in range(4))
+    assert len(fly) > 0 and fly.kind == 'iron_butterfly' and np.allclose(sp, sc)
+    assert np.all((lp < sp) & (sc < lc))
+    assert np.allclose(fly.premium, ctx.mid[fly.positions] @ np.array([-1.0, 1.0, 1.0, -1.0]))
+    assert np.allclose(fly.max_loss, np.maximum(sp - lp, lc - sc) - fly.premium)
+
+    # Produto cartesiano completo, só corpos iguais
+    m = df['strike'] / SPOT
+    calls, puts = df['type'] == 'call', df['type'] == 'put'
+    sides = [df[puts & (m <= 0.98)], df[puts & m.between(0.98, 1.02)],
+             df[calls & m.between(0.98, 1.02)], df[calls & (m >= 1.02)]]
+    scores = []
+    for lp, sp, sc, lc in itertools.product(*(leg[['strike', 'mid']].to_numpy() for leg in sides)):
+        wp, wc = sp[0] - lp[0], lc[0] - sc[0]
+        if sp[0] != sc[0] or not (0.6 - 1e-9 <= wp <= 3.0 + 1e-9 and 0.6 - 1e-9 <= wc <= 3.0 + 1e-9):
+            continue
+        cp, cc = sp[1] - lp[1], sc[1] - lc[1]
+        width = max(wp, wc)
+        if cp <= 0 or cc <= 0 or cp >= wp or cc >= wc or width - cp - cc <= 0:
+            continue
+        scores.append((cp + cc) / (width - cp - cc))
+    assert np.isclose(IronButterfly(**legs).search(ctx, top_k=1).score[0], max(scores))
+
+    # Condor com os mesmos filtros nunca amarra os corpos no mesmo strike
+    condor = IronCondor(**legs).search(ctx)
+    assert np.all(ctx.strike[condor.positions[:, 1]] < ctx.strike[condor.positions[:, 2]])
+
+
+def test_straddle_joins_call_and_put_on_strike(chain):
+    df = chain(expiries=(0.05, 0.12))
+    ctx = ChainContext(df, SPOT)
+    legs = dict(call_leg=LegFilter('call', moneyness=(0.95, 1.05)), put_leg=LegFilter('put', moneyness=(0.95, 1.05)))
+    straddle = Strangle(**legs, width=(0.0, 0.0)).search(ctx)
+    call_k, put_k = ctx.strike[straddle.positions[:, 0]], ctx.strike[straddle.positions[:, 1]]
+    tte = ctx.time_to_expiry[straddle.positions]
+    # Um par por strike da faixa em cada vencimento, sem poda (beam não se aplica)
+    n_strikes = int(((df['strike'] / SPOT).between(0.95, 1.05) & (df['type'] == 'call')).sum())
+    assert straddle.kind == 'straddle' and len(straddle) == n_strikes
+    assert np.array_equal(call_k, put_k) and np.array_equal(tte[:, 0], tte[:, 1])
+    cost = ctx.mid[straddle.positions].sum(axis=1)
+    assert np.allclose(straddle.premium, -cost) and np.allclose(straddle.score, -cost / SPOT)
+    assert Strangle(**legs, width=(0.0, 0.0), short=True).search(ctx).kind == 'short_straddle'
+
+
+def test_straddle_and_iron_butterfly_rows_are_multi_leg(chain):
+    df = chain(expiries=(0.05, 0.12))
+    ctx = ChainContext(df, SPOT)
+    straddle = LongStraddleStrategy().analyze({'price': SPOT}, df, ctx=ctx)
+    assert 0 < len(straddle) <= 3 and straddle['structure'].eq('straddle').all()
+    for legs in straddle['legs']:
+        assert [(leg['type'], leg['action']) for leg in legs] == [('call', 'BUY'), ('put', 'BUY')]
+        assert legs[0]['strike'] == legs[1]['strike']
+    metrics = candidate_metrics(straddle, SPOT)
+    assert np.allclose(metrics['max_loss'], -straddle['net_premium']) and metrics['max_profit_unlimited'].all()
+
+    fly = IronButterflyStrategy().analyze({'price': SPOT}, df, ctx=ctx)
+    assert 0 < len(fly) <= 3 and fly['signal_type'].eq('SELL IRON BUTTERFLY').all()
+    for legs in fly['legs']:
+        assert [leg['quantity'] for leg in legs] == [1.0, -1.0, -1.0, 1.0]
+        assert legs[1]['strike'] == legs[2]['strike'] and legs[1]['type'] != legs[2]['type']
+    assert not candidate_metrics(fly, SPOT)['max_loss_unlimited'].any()
+
+
+def test_structure_rows_carry_legs_and_metrics(chain):
+    df = chain(expiries=(0.05, 0.12))
+    ctx = ChainContext(df, SPOT)
+    rows = JadeLizardStrategy().analyze({'price': SPOT}, df, ctx=ctx)
+    assert 0 < len(rows) <= 3 and rows['signal_type'].eq('SELL JADE LIZARD').all()
+    for _, row in rows.iterrows():
+        legs = row['legs']
+        assert [leg['quantity'] for leg in legs] == [-1.0, -1.0, 1.0]
+        assert len({leg['time_to_expiry'] for leg in legs}) == 1     # mesmo vencimento
+        call_width = legs[2]['strike'] - legs[1]['strike']
+        assert row['net_premium'] >= call_width                    # sem risco na alta
+        assert row['symbol'] == '/'.join(leg['symbol'] for leg in legs)
+
+    metrics = candidate_metrics(rows, SPOT)
+    put_strike = np.array([legs[0]['strike'] for legs in rows['legs']])
+    assert np.allclose(metrics['max_loss'], put_strike - rows['net_premium'])
+    assert np.allclose(metrics['max_profit'], rows['net_premium'])
+
+    short = ShortStrangleStrategy().analyze({'price': SPOT}, df, ctx=ctx)
+    assert metrics.index.equals(rows.index) and short['structure'].eq('short_strangle').all()
+    unlimited = candidate_metrics(short, SPOT)
+    assert unlimited['max_loss'].isna().all() and unlimited['max_loss_unlimited'].all()   # risco ilimitado
+    assert not metrics['max_loss_unlimited'].any() and not unlimited['max_profit_unlimited'].any()
+
+
+def test_strangle_side_beam_is_exact(chain):
+    ctx = ChainContext(chain(n=81), SPOT)
+    legs = dict(call_leg=LegFilter('call', moneyness=(1.05, INF)), put_leg=LegFilter('put', moneyness=(-INF, 0.95)))
+    for short in (False, True):
+        pruned = Strangle(**legs, short=short, beam=3).search(ctx, top_k=3)
+        full = Strangle(**legs, short=short, beam=10_000).search(ctx)
+        assert np.allclose(pruned.score, np.sort(full.score)[::-1][:3])
+
+
+def test_time_spreads_join_every_expiry_pair(chain):
+    df = chain(n=25, expiries=(0.05, 0.12, 0.25))
+    df['theta'] = OptionMath.greeks_array(df['type'].eq('call').to_numpy(), SPOT, df['strike'], df['time_to_expiry'],
+                                          0.1375, df['iv'])['theta']
+    ctx = ChainContext(df, SPOT)
+    diagonal = TimeSpread(LegFilter('call', moneyness=(1.0, INF)), LegFilter('call', moneyness=(0.8, 1.0)),
+                          strike_offset=(-0.15, -0.02))
+    found = diagonal.search(ctx)
+
+    # Produto cartesiano completo curta x longa, em todos os vencimentos
+    calls = df[df['type'] == 'call']
+    expected = {}
+    for pn, near in calls[calls['strike'] >= SPOT].iterrows():
+        for pf, far in calls[calls['strike'] <= SPOT].iterrows():
+            offset = far['strike'] - near['strike']
+            if far['time_to_expiry'] <= near['time_to_expiry'] or not -4.5 - 1e-9 <= offset <= -0.6 + 1e-9:
+                continue
+            debit, ratio = far['mid'] - near['mid'], near['theta'] / far['theta']
+            if debit > 0 and ratio >= 1.0:
+                expected[(pn, pf)] = (abs(near['theta']) - abs(far['theta'])) / debit * near['iv'] / far['iv']
+    assert {tuple(p) for p in found.positions.tolist()} == set(expected)
+    assert np.allclose(found.score, [expected[tuple(p)] for p in found.positions.tolist()])
+    assert found.kind == 'diagonal' and np.allclose(found.max_loss, -found.premium)   # longa abaixo: perda = débito
+
+    calendar = TimeSpread(LegFilter('call', moneyness=(0.95, 1.05)), LegFilter('call', moneyness=(0.95, 1.05)))
+    cal = calendar.search(ctx)
+    near_k, far_k = ctx.strike[cal.positions[:, 0]], ctx.strike[cal.positions[:, 1]]
+    assert cal.kind == 'calendar' and np.array_equal(near_k, far_k)
+    assert np.all(ctx.time_to_expiry[cal.positions[:, 1]] > ctx.time_to_expiry[cal.positions[:, 0]])
+
+    # Universo: mesmos strikes em dois ativos, sem pares cruzados
+    both = pd.concat([df.assign(underlying='A'), df.assign(underlying='B')], ignore_index=True)
+    uctx = ChainContext(both, SPOT, group=both['underlying'].to_numpy())
+    pairs = calendar.search(uctx).positions
+    assert len(pairs) == 2 * len(cal) and np.all(uctx.group_codes[pairs[:, 0]] == uctx.group_codes[pairs[:, 1]])
+
+
+def test_b3_expiry_from_option_symbol():
+    today = date(2026, 10, 19)
+    # Série K = call de novembro, W = put de novembro; J (outubro) já venceu -> próximo ano
+    assert b3_expiry('PETRK300', today) == b3_expiry('PETRW300', today) == date(2026, 11, 20)
+    assert b3_expiry('PETRJ300', today) == date(2027, 10, 15)
+    assert b3_expiry('BOVA11', today) is None
+    df = with_expiry(pd.DataFrame({'strike': [1.0, 2.0]}), [date(2026, 11, 20), None], today)
+    assert df['expiry'].iloc[0] == '2026-11-20' and pd.isna(df['expiry'].iloc[1])
+    np.testing.assert_allclose(df['time_to_expiry'], [24 / 252, 20 / 252])
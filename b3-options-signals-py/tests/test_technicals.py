@@ -0,0 +1,70 @@
+import asyncio
+
+import numpy as np
+import pandas as pd
+
+import app.data.technicals as technicals
+from app.data.technicals import TechnicalIndicators, resolve_indicators
+
+
+def history(days=120, seed=2):
+    close = 30 + np.cumsum(np.random.default_rng(seed).normal(0, 0.3, days))
+    return pd.DataFrame({'Open': close, 'High': close + 0.5, 'Low': close - 0.5, 'Close': close,
+                         'Volume': 1e6}, index=pd.date_range('2026-01-01', periods=days, freq='B'))
+
+
+def spy(monkeypatch, tech):
+    """Conta as chamadas de cada cálculo base do TechnicalIndicators."""
+    calls = {}
+    for method in ('_calculate_rsi', '_calculate_macd', '_calculate_bollinger', '_calculate_smas', '_analyze_volume'):
+        def counted(*args, _method=method, _original=getattr(tech, method)):
+            calls[_method] = calls.get(_method, 0) + 1
+            return _original(*args)
+        monkeypatch.setattr(tech, method, counted)
+    return calls
+
+
+def test_resolve_indicators_expands_dependencies():
+    assert resolve_indicators(['rsi']) == {'rsi'}
+    assert resolve_indicators(['trend']) == {'trend', 'sma'}
+    assert resolve_indicators(['signals', 'rsi']) == {'signals', 'rsi', 'macd', 'bollinger'}
+    # Nome desconhecido é ignorado, não derruba o scan
+    assert resolve_indicators(['inexistente', 'volume']) == {'volume'}
+
+
+def test_calculates_only_requested_indicators(monkeypatch):
+    tech = TechnicalIndicators()
+    calls = spy(monkeypatch, tech)
+
+    out = asyncio.run(tech.calculate(history(), 'PETR4', ['rsi']))
+    assert set(out) == {'ticker', 'timestamp', 'rsi'} and calls == {'_calculate_rsi': 1}
+
+    # 'trend' puxa 'sma'; o RSI já calculado para esta barra não é refeito
+    out = asyncio.run(tech.calculate(history(), 'PETR4', ['trend', 'rsi']))
+    assert set(out) == {'ticker', 'timestamp', 'rsi', 'trend', 'sma'}
+    assert calls == {'_calculate_rsi': 1, '_calculate_smas': 1}
+
+
+def test_memo_keyed_by_last_bar_and_ttl(monkeypatch):
+    tech = TechnicalIndicators()
+    calls = spy(monkeypatch, tech)
+    now = [1000.0]
+    monkeypatch.setattr(technicals.time, 'monotonic', lambda: now[0])
+    df = history()
+
+    def rsi_runs(frame):
+        asyncio.run(tech.calculate(frame, 'PETR4', ['rsi']))
+        return calls.get('_calculate_rsi', 0)
+
+    assert rsi_runs(df) == 1
+    assert rsi_runs(df.copy()) == 1                 # mesma última barra: cache
+    assert rsi_runs(history()[:-1]) == 2            # tamanho e índice mudaram
+    moved = df.copy()
+    moved.iloc[-1, moved.columns.get_loc('Close')] += 0.1
+    assert rsi_runs(moved) == 3                     # barra atual com novo fechamento
+    assert rsi_runs(moved) == 3
+    now[0] += tech.cache_ttl + 1
+    assert rsi_runs(moved) == 4                     # TTL expirado
+    # Outro ativo tem sua própria entrada
+    asyncio.run(tech.calculate(moved, 'VALE3', ['rsi']))
+    assert calls['_calculate_rsi'] == 5
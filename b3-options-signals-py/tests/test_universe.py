@@ -0,0 +1,55 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.core.strategies_vectorized import HighIVStrategy, IronCondorStrategy, RSIStrategy
+from app.services.probability import candidate_metrics
+
+TICKERS = {'PETR4': (30.0, 20.0), 'VALE3': (62.0, 80.0), 'BBAS3': (25.0, 50.0)}   # spot, RSI
+
+
+@pytest.fixture
+def universe(make_chain, make_universe):
+    spec = {t: {'spot': spot, 'rsi': rsi, 'iv_level': 0.2 + 0.1 * i} for i, (t, (spot, rsi)) in enumerate(TICKERS.items())}
+    df, ctx = make_universe(spec)
+    chains = {t: make_chain(t, spot=params['spot'], iv_level=params['iv_level']) for t, params in spec.items()}
+    return chains, df, ctx
+
+
+def test_context_features_are_per_underlying(universe):
+    chains, df, ctx = universe
+    assert ctx.groups == list(TICKERS) and np.isnan(ctx.spot)
+    assert np.allclose(ctx.moneyness, df['strike'] / df['spot'])
+    assert ctx.group_value('rsi', 50) == [20.0, 80.0, 50.0]
+    # Quantil de IV de cada ativo, difundido nas suas linhas
+    q = ctx.iv_quantile(0.8)
+    for ticker, c in chains.items():
+        assert np.allclose(q[(df['underlying'] == ticker).to_numpy()], c['iv'].quantile(0.8))
+    # Vencimentos agrupados por (ativo, vencimento)
+    assert len(ctx.expiry_groups) == 6
+    for (ticker, _), positions in ctx.expiry_groups.items():
+        assert (df['underlying'].to_numpy()[positions] == ticker).all()
+
+
+def test_single_pass_matches_per_ticker_runs(universe):
+    chains, df, ctx = universe
+    for strategy in (HighIVStrategy(), RSIStrategy(), IronCondorStrategy()):
+        batched = strategy.analyze({}, df, ctx=ctx)
+        for ticker, (spot, rsi) in TICKERS.items():
+            alone = strategy.analyze({'price': spot, 'rsi': rsi}, chains[ticker])
+            part = batched[batched['underlying'] == ticker] if not batched.empty else batched
+            assert part.get('symbol', pd.Series()).tolist() == alone.get('symbol', pd.Series()).tolist()
+            if not alone.empty:
+                assert part['signal_type'].tolist() == alone['signal_type'].tolist()
+
+    # RSI: sobrevenda em PETR4 (call) e sobrecompra em VALE3 (put), numa só busca
+    rsi = RSIStrategy().analyze({}, df, ctx=ctx)
+    assert rsi['underlying'].tolist() == ['PETR4', 'VALE3'] and rsi['type'].tolist() == ['call', 'put']
+
+    # Métricas com spot por linha e superfície por ativo (mapping)
+    condor = IronCondorStrategy().analyze({}, df, ctx=ctx)
+    spots = condor['underlying'].map({t: s for t, (s, _) in TICKERS.items()}).to_numpy()
+    batched = candidate_metrics(condor, spots, surface={})
+    for ticker, (spot, _) in TICKERS.items():
+        rows = condor['underlying'] == ticker
+        assert np.allclose(batched[rows]['pop'], candidate_metrics(condor[rows], spot)['pop'])
@@ -0,0 +1,55 @@
+import numpy as np
+import pandas as pd
+from app.services.vol_surface import VolSurfaceService, svi_total_variance
+
+SPOT = 30.0
+R = 0.1375
+TRUE_PARAMS = {0.1: [0.004, 0.05, -0.4, 0.0, 0.1], 0.5: [0.03, 0.08, -0.3, 0.02, 0.15]}
+
+
+def smile_chain():
+    rows = []
+    for T, params in TRUE_PARAMS.items():
+        strikes = np.linspace(22, 38, 33)
+        k = np.log(strikes / (SPOT * np.exp(R * T)))
+        iv = np.sqrt(svi_total_variance(k, params) / T)
+        for typ in ('call', 'put'):
+            rows.append(pd.DataFrame({'type': typ, 'strike': strikes, 'time_to_expiry': T, 'iv': iv}))
+    return pd.concat(rows, ignore_index=True)
+
+
+def test_fit_reproduces_quoted_smiles_and_is_cached():
+    service = VolSurfaceService(risk_free_rate=R)
+    chain = smile_chain()
+
+    surface = service.build(chain, SPOT)
+
+    fitted = surface.vol(chain['strike'], chain['time_to_expiry'])
+    assert np.allclose(fitted, chain['iv'], atol=2e-3)
+    assert service.build(chain, SPOT) is surface
+
+
+def test_interpolates_total_variance_between_expiries():
+    surface = VolSurfaceService(risk_free_rate=R).build(smile_chain(), SPOT)
+    strikes = np.array([25.0, 30.0, 35.0])
+
+    w_short = surface.total_variance(strikes, 0.1)
+    w_long = surface.total_variance(strikes, 0.5)
+    w_mid = surface.total_variance(strikes, 0.3)
+
+    assert np.all((w_mid > w_short) & (w_mid < w_long))
+    # Antes do primeiro vencimento a vol fica constante na mesma moneyness a termo
+    k = np.array([-0.15, 0.0, 0.15])
+    assert np.allclose(
+        surface.vol(SPOT * np.exp(R * 0.05 + k), 0.05),
+        surface.vol(SPOT * np.exp(R * 0.1 + k), 0.1)
+    )
+
+
+def test_vectorized_queries_broadcast_strikes_against_tenors():
+    surface = VolSurfaceService(risk_free_rate=R).build(smile_chain(), SPOT)
+
+    grid = surface.vol(np.linspace(24, 36, 7)[:, None], np.array([0.05, 0.2, 0.4, 1.0]))
+
+    assert grid.shape == (7, 4)
+    assert np.isfinite(grid).all()